@@ -62,13 +62,18 @@ from fastlane_bot.helpers import (
     TradeInstruction,
     Univ3Calculator,
     SolidlyV2StablePoolsNotSupported,
+    CurveCache,
     add_wrap_or_unwrap_trades_to_route,
     split_carbon_trades,
     maximize_last_trade_per_tkn
 )
 from fastlane_bot.tools.cpc import ConstantProductCurve as CPC, CPCContainer, T
+from fastlane_bot.tools.optimizer import PriceCache
 from .config.constants import FLASHLOAN_FEE_MAP
 from .events.interface import QueryInterface
+from .helpers.poolandtokens import PoolAndTokens
+from .modes.executor import ArbComboExecutor
+from .modes.no_arb_cache import NoArbCache
 from .modes.pairwise_multi import FindArbitrageMultiPairwise
 from .modes.pairwise_multi_all import FindArbitrageMultiPairwiseAll
 from .modes.pairwise_multi_pol import FindArbitrageMultiPairwisePol
@@ -90,6 +95,23 @@ class CarbonBot:
         the database manager.
     tx_helpers: TxHelpers
         the tx-helpers utility.
+    curve_cache: CurveCache
+        the persistent curve cache used by ``get_curves`` (optional).
+    no_arb_cache: NoArbCache
+        the no-arb verdicts for the incremental arbitrage search (optional).
+    price_cache: PriceCache
+        the optimal prices of the previous blocks that the ``MargPOptimizer`` is warm started from (optional).
+    arb_workers: int
+        the number of worker processes solving the curve combos (default: 1, ie no process pool).
+    arb_executor: ArbComboExecutor
+        the process pool solving the curve combos, kept alive across iterations (optional; by default a pool is
+        started for every search if ``arb_workers > 1``).
+    max_arbs_per_block: int
+        the number of non-conflicting arb opportunities submitted per block (default: 1, ie only the one picked by
+        ``randomize``); see ``select_non_conflicting``.
+    integer_route_math: bool
+        whether the routes are recalculated with the wei-exact integer math (default: False, ie ``Decimal`` math);
+        see ``TxRouteHandler.integer_math``.
     """
 
     __VERSION__ = __VERSION__
@@ -98,6 +120,13 @@ class CarbonBot:
     db: QueryInterface = field(init=False)
     tx_helpers: TxHelpers = None
     ConfigObj: Config = None
+    curve_cache: CurveCache = None
+    no_arb_cache: NoArbCache = None
+    price_cache: PriceCache = None
+    arb_workers: int = 1
+    arb_executor: ArbComboExecutor = None
+    max_arbs_per_block: int = 1
+    integer_route_math: bool = False
 
     SCALING_FACTOR = 0.999
 
@@ -132,11 +161,17 @@ class CarbonBot:
         """
         Gets the curves from the database.
 
+        If the bot has a ``curve_cache``, only the pools that changed since the previous call are converted, and the
+        cached curve container is patched in place; otherwise all pools are converted into a new container.
+
         Returns
         -------
         CPCContainer
             The container of curves.
         """
+        if self.curve_cache is not None:
+            return self._get_curves_cached()
+
         self.db.refresh_pool_data()
         pools_and_tokens = self.db.get_pool_data_with_tokens()
         curves = []
@@ -145,47 +180,81 @@ class CarbonBot:
 
         for p in pools_and_tokens:
             p.ADDRDEC = ADDRDEC
-            try:
-                curves += [
-                    curve for curve in p.to_cpc()
-                    if all(curve.params[tkn] not in self.ConfigObj.TAX_TOKENS for tkn in ['tknx_addr', 'tkny_addr'])
-                ]
-            except SolidlyV2StablePoolsNotSupported as e:
-                self.ConfigObj.logger.debug(
-                    f"[bot.get_curves] Solidly V2 stable pools not supported: {e}\n"
-                )
-            except NotImplementedError as e:
-                self.ConfigObj.logger.error(
-                    f"[bot.get_curves] Not supported: {e}\n"
-                )
-            except ZeroDivisionError as e:
-                self.ConfigObj.logger.error(
-                    f"[bot.get_curves] MUST FIX INVALID CURVE {p} [{e}]\n"
-                )
-            except CPC.CPCValidationError as e:
-                self.ConfigObj.logger.error(
-                    f"[bot.get_curves] MUST FIX INVALID CURVE {p} [{e}]\n"
-                )
-            except TypeError as e:
-                self.ConfigObj.logger.error(
-                    f"[bot.get_curves] MUST FIX DECIMAL ERROR CURVE {p} [{e}]\n"
-                )
-            except p.DoubleInvalidCurveError as e:
-                self.ConfigObj.logger.error(
-                    f"[bot.get_curves] MUST FIX DOUBLE INVALID CURVE {p} [{e}]\n"
-                )
-            except Univ3Calculator.DecimalsMissingError as e:
-                self.ConfigObj.logger.error(
-                    f"[bot.get_curves] MUST FIX DECIMALS MISSING [{e}]\n"
-                )
-            except Exception as e:
-                # TODO: unexpected exception should possibly be raised
-                self.ConfigObj.logger.error(
-                    f"[bot.get_curves] MUST FIX UNEXPECTED ERROR converting pool to curve {p}\n[ERR={e}]\n\n"
-                )
+            curves += self._curves_from_pool(p)
 
         return CPCContainer(curves)
 
+    def _get_curves_cached(self) -> CPCContainer:
+        """
+        Gets the curves from the database via the curve cache (see ``get_curves``).
+        """
+        cache = self.curve_cache
+        for address in [self.ConfigObj.NATIVE_GAS_TOKEN_ADDRESS, self.ConfigObj.WRAPPED_GAS_TOKEN_ADDRESS]:
+            cache.ADDRDEC[address] = (address, 18)
+
+        def build(idx: int, record: Dict[str, Any]) -> Tuple[PoolAndTokens, List[CPC]]:
+            for t in self.db.get_record_tokens(record):
+                try:
+                    cache.ADDRDEC[t.address] = (t.address, int(t.decimals))
+                except (TypeError, ValueError):
+                    pass
+            p = self.db.create_pool_and_tokens(idx, record)
+            p.ADDRDEC = cache.ADDRDEC
+            return p, self._curves_from_pool(p)
+
+        CCm = cache.update(self.db.state, build)
+        self.db.pool_data_list = cache.pools()
+        self.db.pool_data = {str(pool.cid): pool for pool in self.db.pool_data_list}
+        self.ConfigObj.logger.debug(
+            f"[bot.get_curves] Rebuilt curves for {cache.n_built} pools, removed {cache.n_removed} pools, "
+            f"{len(CCm)} curves in total"
+        )
+        return CCm
+
+    def _curves_from_pool(self, p: PoolAndTokens) -> List[CPC]:
+        """
+        Converts a pool into its curves, excluding curves with tax tokens; logs and returns no curves on error.
+        """
+        try:
+            return [
+                curve for curve in p.to_cpc()
+                if all(curve.params[tkn] not in self.ConfigObj.TAX_TOKENS for tkn in ['tknx_addr', 'tkny_addr'])
+            ]
+        except SolidlyV2StablePoolsNotSupported as e:
+            self.ConfigObj.logger.debug(
+                f"[bot.get_curves] Solidly V2 stable pools not supported: {e}\n"
+            )
+        except NotImplementedError as e:
+            self.ConfigObj.logger.error(
+                f"[bot.get_curves] Not supported: {e}\n"
+            )
+        except ZeroDivisionError as e:
+            self.ConfigObj.logger.error(
+                f"[bot.get_curves] MUST FIX INVALID CURVE {p} [{e}]\n"
+            )
+        except CPC.CPCValidationError as e:
+            self.ConfigObj.logger.error(
+                f"[bot.get_curves] MUST FIX INVALID CURVE {p} [{e}]\n"
+            )
+        except TypeError as e:
+            self.ConfigObj.logger.error(
+                f"[bot.get_curves] MUST FIX DECIMAL ERROR CURVE {p} [{e}]\n"
+            )
+        except p.DoubleInvalidCurveError as e:
+            self.ConfigObj.logger.error(
+                f"[bot.get_curves] MUST FIX DOUBLE INVALID CURVE {p} [{e}]\n"
+            )
+        except Univ3Calculator.DecimalsMissingError as e:
+            self.ConfigObj.logger.error(
+                f"[bot.get_curves] MUST FIX DECIMALS MISSING [{e}]\n"
+            )
+        except Exception as e:
+            # TODO: unexpected exception should possibly be raised
+            self.ConfigObj.logger.error(
+                f"[bot.get_curves] MUST FIX UNEXPECTED ERROR converting pool to curve {p}\n[ERR={e}]\n\n"
+            )
+        return []
+
     def _simple_ordering_by_src_token(
         self, best_trade_instructions_dic, best_src_token
     ):
@@ -244,7 +313,7 @@ class CarbonBot:
         return [
             TradeInstruction(**{
                 **{k: v for k, v in ti.items() if k != "error"},
-                "raw_txs": "[]",
+                "raw_txs": [],
                 "pair_sorting": "",
                 "ConfigObj": self.ConfigObj,
                 "db": self.db,
@@ -282,15 +351,28 @@ class CarbonBot:
         randomizer: int
     ) -> dict:
         arb_finder = self._get_arb_finder(arb_mode)
-        random_mode = arb_finder.AO_CANDIDATES if randomizer else None
+        random_mode = arb_finder.AO_CANDIDATES if randomizer or self.max_arbs_per_block > 1 else None
         finder = arb_finder(
             flashloan_tokens=flashloan_tokens,
             CCm=CCm,
             mode="bothin",
             result=random_mode,
             ConfigObj=self.ConfigObj,
+            no_arb_cache=self.no_arb_cache,
+            arb_workers=self.arb_workers,
+            price_cache=self.price_cache,
+            arb_executor=self.arb_executor,
         )
-        return {"finder": finder, "r": finder.find_arbitrage()}
+        r = finder.find_arbitrage()
+        if self.no_arb_cache is not None:
+            self.ConfigObj.logger.debug(
+                f"[bot._find_arbitrage] full_sweep={self.no_arb_cache.is_full_sweep}, "
+                f"skipped {self.no_arb_cache.n_skipped} combos without arb, "
+                f"recorded {self.no_arb_cache.n_recorded} new, {len(self.no_arb_cache)} in total"
+            )
+        if self.price_cache is not None:
+            self.ConfigObj.logger.debug(f"[bot._find_arbitrage] price cache: {self.price_cache.stats}")
+        return {"finder": finder, "r": r}
 
     def _run(
         self,
@@ -337,38 +419,61 @@ class CarbonBot:
         self.ConfigObj.logger.info(
             f"[bot._run] Found {len(r)} eligible arb opportunities."
         )
-        r = self.randomize(arb_opps=r, randomizer=randomizer)
-
-        if data_validator:
-            r = self.validate_optimizer_trades(arb_opp=r, arb_finder=finder)
-            if r is None:
-                self.ConfigObj.logger.warning(
-                    "[bot._run] Math validation eliminated arb opportunity, restarting."
-                )
-                return
-            if replay_mode:
-                pass
-            elif self.validate_pool_data(arb_opp=r):
-                self.ConfigObj.logger.debug(
-                    "[bot._run] All data checks passed! Pools in sync!"
-                )
-            else:
-                self.ConfigObj.logger.warning(
-                    "[bot._run] Data validation failed. Updating pools and restarting."
-                )
-                return
-
-        tx_hash, tx_receipt = self._handle_trade_instructions(CCm, arb_mode, r, replay_from_block)
+        if self.max_arbs_per_block > 1:
+            rs = self.select_non_conflicting(arb_opps=r, max_arbs=self.max_arbs_per_block)
+            self.ConfigObj.logger.info(
+                f"[bot._run] Selected {len(rs)} non-conflicting arb opportunities."
+            )
+            if data_validator:
+                rs = [r for r in (self._validate_arb_opp(r, finder, replay_mode) for r in rs) if r is not None]
+            results = self._handle_batch_trade_instructions(CCm, arb_mode, rs, replay_from_block)
+        else:
+            r = self.randomize(arb_opps=r, randomizer=randomizer)
+            if data_validator:
+                r = self._validate_arb_opp(r, finder, replay_mode)
+                if r is None:
+                    return
+            results = [self._handle_trade_instructions(CCm, arb_mode, r, replay_from_block)]
+
+        for tx_hash, tx_receipt in results:
+            if tx_hash:
+                self._log_transaction(tx_hash, tx_receipt, logging_path)
+
+    def _validate_arb_opp(self, r: Any, finder: Any, replay_mode: bool) -> Optional[Any]:
+        """
+        Runs the data validation of an arb opportunity, returns None if it fails.
+        """
+        r = self.validate_optimizer_trades(arb_opp=r, arb_finder=finder)
+        if r is None:
+            self.ConfigObj.logger.warning(
+                "[bot._run] Math validation eliminated arb opportunity, restarting."
+            )
+            return None
+        if replay_mode:
+            pass
+        elif self.validate_pool_data(arb_opp=r):
+            self.ConfigObj.logger.debug(
+                "[bot._run] All data checks passed! Pools in sync!"
+            )
+        else:
+            self.ConfigObj.logger.warning(
+                "[bot._run] Data validation failed. Updating pools and restarting."
+            )
+            return None
+        return r
 
-        if tx_hash:
-            tx_status = ["failed", "succeeded"][tx_receipt["status"]] if tx_receipt else "pending"
-            tx_details = json.dumps(tx_receipt, indent=4) if tx_receipt else "no receipt"
-            self.ConfigObj.logger.info(f"Arbitrage transaction {tx_hash} {tx_status}")
+    def _log_transaction(self, tx_hash: str, tx_receipt: Optional[dict], logging_path: str = None):
+        """
+        Logs the outcome of an arbitrage transaction, and writes it to the logging path (if any).
+        """
+        tx_status = ["failed", "succeeded"][tx_receipt["status"]] if tx_receipt else "pending"
+        tx_details = json.dumps(tx_receipt, indent=4) if tx_receipt else "no receipt"
+        self.ConfigObj.logger.info(f"Arbitrage transaction {tx_hash} {tx_status}")
 
-            if logging_path:
-                filename = f"tx_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.txt"
-                with open(os.path.join(logging_path, filename), "w") as f:
-                    f.write(f"{tx_hash} {tx_status}: {tx_details}")
+        if logging_path:
+            filename = f"tx_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{tx_hash[-8:]}.txt"
+            with open(os.path.join(logging_path, filename), "w") as f:
+                f.write(f"{tx_hash} {tx_status}: {tx_details}")
 
     def validate_optimizer_trades(self, arb_opp, arb_finder):
         """
@@ -540,6 +645,29 @@ class CarbonBot:
         top_n_arbs = arb_opps[:randomizer]
         return random.choice(top_n_arbs)
 
+    @staticmethod
+    def select_non_conflicting(arb_opps, max_arbs: int):
+        """
+        Greedily selects the most profitable arb opportunities which do not trade against the same pool.
+        :param arb_opps: Arb opportunities
+        :param max_arbs: the maximum number of arb opportunities to select.
+        returns:
+            The selected arb opportunities, sorted by profit.
+
+        The Carbon orders of a strategy (cids ``<strategy id>-0`` and ``<strategy id>-1``) are the same pool, as every
+        trade against the strategy updates both orders.
+        """
+        selected, used_cids = [], set()
+        for arb_opp in sorted(arb_opps, key=lambda x: x[0], reverse=True):
+            if len(selected) >= max_arbs:
+                break
+            cids = {str(ti["cid"]).split("-")[0] for ti in arb_opp[2]}
+            if cids & used_cids:
+                continue
+            selected.append(arb_opp)
+            used_cids |= cids
+        return selected
+
     @staticmethod
     def _carbon_in_trade_route(trade_instructions: List[TradeInstruction]) -> bool:
         """
@@ -723,6 +851,88 @@ class CarbonBot:
         - The hash of the transaction if submitted, None otherwise.
         - The receipt of the transaction if completed, None otherwise.
         """
+        arb = self._prepare_trade_instructions(CCm, arb_mode, r, lambda: self._get_deadline(replay_from_block))
+        if arb is None:
+            return None, None
+
+        # Validate and submit the transaction
+        return self.tx_helpers.validate_and_submit_transaction(**arb)
+
+    def _handle_batch_trade_instructions(
+        self,
+        CCm: CPCContainer,
+        arb_mode: str,
+        rs: List[Any],
+        replay_from_block: int = None
+    ) -> List[Tuple[Optional[str], Optional[dict]]]:
+        """
+        Creates and executes the trade instructions of non-conflicting arb opportunities
+
+        The deadline is requested once for the batch, the routes are created one after the other (the route math is
+        CPU-bound and requests nothing), and the transactions are submitted together, with sequential nonces (see
+        ``TxHelpers.validate_and_submit_transactions``).
+
+        Parameters
+        ----------
+        CCm: CPCContainer
+            The container.
+        arb_mode: str
+            The arbitrage mode.
+        rs: List[Any]
+            The results (see ``select_non_conflicting``).
+        replay_from_block: int
+            the block number to start replaying from (default: None)
+
+        Returns
+        -------
+        The hash and the receipt of each transaction submitted (see ``_handle_trade_instructions``).
+        """
+        if len(rs) == 0:
+            return []
+
+        deadline = self._get_deadline(replay_from_block)
+
+        arbs = []
+        for r in rs:
+            try:
+                arb = self._prepare_trade_instructions(CCm, arb_mode, r, lambda: deadline)
+            except Exception as e:
+                self.ConfigObj.logger.error(f"[bot._handle_batch_trade_instructions] Failed to create the route: {e}")
+                continue
+            if arb is not None:
+                arbs.append(arb)
+
+        if len(arbs) == 0:
+            return []
+
+        return self.tx_helpers.validate_and_submit_transactions(arbs)
+
+    def _prepare_trade_instructions(
+        self,
+        CCm: CPCContainer,
+        arb_mode: str,
+        r: Any,
+        get_deadline: Callable[[], int],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Creates the trade instructions, the route and the flashloan of an arb opportunity.
+
+        Parameters
+        ----------
+        CCm: CPCContainer
+            The container.
+        arb_mode: str
+            The arbitrage mode.
+        r: Any
+            The result.
+        get_deadline: Callable[[], int]
+            Returns the deadline (only called if the opportunity meets the minimum profit).
+
+        Returns
+        -------
+        The keyword arguments of ``TxHelpers.validate_and_submit_transaction``, None if the opportunity does not meet
+        the minimum profit.
+        """
         (
             best_profit,
             best_trade_instructions_df,
@@ -751,7 +961,8 @@ class CarbonBot:
 
         # Create the tx route handler
         tx_route_handler = TxRouteHandler(
-            trade_instructions=ordered_trade_instructions_objects
+            trade_instructions=ordered_trade_instructions_objects,
+            integer_math=self.integer_route_math,
         )
 
         # Aggregate the carbon trades
@@ -817,7 +1028,7 @@ class CarbonBot:
             self.ConfigObj.logger.info(
                 f"[bot._handle_trade_instructions] Opportunity with profit: {num_format(best_profit_gastkn)} does not meet minimum profit: {self.ConfigObj.DEFAULT_MIN_PROFIT_GAS_TOKEN}, discarding."
             )
-            return None, None
+            return None
 
         # Log the flashloan amount
         self.ConfigObj.logger.debug(
@@ -836,7 +1047,7 @@ class CarbonBot:
         )
 
         # Get the deadline
-        deadline = self._get_deadline(replay_from_block)
+        deadline = get_deadline()
 
         # Get the route struct
         route_struct = [
@@ -869,8 +1080,7 @@ class CarbonBot:
             f"[bot._handle_trade_instructions] Trade Instructions: \n {best_trade_instructions_dic}"
         )
 
-        # Validate and submit the transaction
-        return self.tx_helpers.validate_and_submit_transaction(
+        return dict(
             route_struct=route_struct_processed,
             src_amt=flashloan_amount_wei,
             src_address=fl_token,
@@ -926,8 +1136,14 @@ class CarbonBot:
 
         if flashloan_tokens is None:
             flashloan_tokens = self.RUN_FLASHLOAN_TOKENS
+        changed_cids = None
         if CCm is None:
             CCm = self.get_curves()
+            if self.curve_cache is not None:
+                changed_cids = self.curve_cache.changed_cids
+        if self.no_arb_cache is not None:
+            # only the combos containing a changed curve are searched (unless it is a full sweep)
+            self.no_arb_cache.begin(changed_cids)
 
         try:
             self._run(
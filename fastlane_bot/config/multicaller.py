@@ -6,7 +6,8 @@ MultiCaller class
 All rights reserved.
 Licensed under MIT.
 """
-from typing import Any, List, Dict
+import asyncio
+from typing import Any, List, Dict, Tuple
 
 from eth_abi import decode
 from web3.contract.contract import ContractFunction
@@ -40,12 +41,21 @@ def collapse_if_tuple(abi: Dict[str, Any]) -> str:
 class MultiCaller:
     """
     Context manager for multicalls.
+
+    The calls are split into batches of at most ``batch_size`` calls (all calls in one batch if None), and the batches
+    are dispatched concurrently if an ``AsyncWeb3`` instance is provided. ``run_calls_raw`` returns the undecoded
+    ``(success, returnData)`` of every call, so that callers can skip decoding results that did not change.
     """
-    __DATE__ = "2022-09-26"
-    __VERSION__ = "0.0.2"
+    __DATE__ = "2024-04-22"
+    __VERSION__ = "0.1.0"
 
-    def __init__(self, web3: Any, multicall_contract_address: str):
+    def __init__(self, web3: Any, multicall_contract_address: str, *, web3_async: Any = None, batch_size: int = None):
         self.multicall_contract = web3.eth.contract(abi=MULTICALL_ABI, address=multicall_contract_address)
+        self.async_multicall_contract = (
+            web3_async.eth.contract(abi=MULTICALL_ABI, address=multicall_contract_address)
+            if web3_async is not None else None
+        )
+        self.batch_size = batch_size
         self.contract_calls: List[ContractFunction] = []
         self.output_types_list: List[List[str]] = []
 
@@ -53,16 +63,45 @@ class MultiCaller:
         self.contract_calls.append({'target': call.address, 'callData': call._encode_transaction_data()})
         self.output_types_list.append([collapse_if_tuple(item) for item in call.abi['outputs']])
 
-    def run_calls(self, block_identifier: Any = 'latest') -> List[Any]:
-        encoded_data = self.multicall_contract.functions.tryAggregate(
-            False,
-            self.contract_calls
-        ).call(block_identifier=block_identifier)
-
-        result_list = [
-            decode(output_types, encoded_output[1]) if encoded_output[0] else (None,)
-            for output_types, encoded_output in zip(self.output_types_list, encoded_data)
-        ]
+    def batches(self) -> List[List[Dict[str, Any]]]:
+        """
+        The calls split into batches of at most ``batch_size`` calls.
+        """
+        size = self.batch_size or max(len(self.contract_calls), 1)
+        return [self.contract_calls[i:i + size] for i in range(0, len(self.contract_calls), size)]
+
+    async def _async_run_batch(self, batch: List[Dict[str, Any]], block_identifier: Any) -> List[Any]:
+        return await self.async_multicall_contract.functions.tryAggregate(False, batch).call(
+            block_identifier=block_identifier
+        )
+
+    def run_calls_raw(self, block_identifier: Any = 'latest') -> List[Tuple[bool, bytes]]:
+        """
+        Runs the calls and returns the raw ``(success, returnData)`` of every call, in call order.
+        """
+        batches = self.batches()
+        if self.async_multicall_contract is not None and len(batches) > 1:
+            coroutines = [self._async_run_batch(batch, block_identifier) for batch in batches]
+            results = asyncio.get_event_loop().run_until_complete(asyncio.gather(*coroutines))
+        else:
+            results = [
+                self.multicall_contract.functions.tryAggregate(False, batch).call(block_identifier=block_identifier)
+                for batch in batches
+            ]
+        return [(success, bytes(data)) for result in results for success, data in result]
+
+    def decode(self, index: int, raw_result: Tuple[bool, bytes]) -> Any:
+        """
+        Decodes the raw result of the call at ``index`` (None if the call failed).
+        """
+        success, data = raw_result
+        result = decode(self.output_types_list[index], data) if success else (None,)
 
         # Convert every single-value tuple into a single value
-        return [result if len(result) > 1 else result[0] for result in result_list]
+        return result if len(result) > 1 else result[0]
+
+    def run_calls(self, block_identifier: Any = 'latest') -> List[Any]:
+        return [
+            self.decode(index, raw_result)
+            for index, raw_result in enumerate(self.run_calls_raw(block_identifier))
+        ]
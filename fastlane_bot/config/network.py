@@ -234,6 +234,7 @@ class ConfigNetwork(ConfigBase):
     GAS_ORACLE_ADDRESS = None
 
     MULTICALLABLE_EXCHANGES = [BANCOR_V3_NAME, BANCOR_POL_NAME, BALANCER_NAME]
+    MULTICALL_BATCH_SIZE = 500  # maximum number of calls per tryAggregate call
     # BANCOR POL
     BANCOR_POL_START_BLOCK = 18184448
     BANCOR_POL_ADDRESS = "0xD06146D292F9651C1D7cf54A3162791DFc2bEf46"
@@ -419,6 +419,13 @@ UNISWAP_V3_POOL_ABI = [
         "inputs": [],
         "outputs": [{"internalType": "uint160", "name": "sqrtPriceX96", "type": "uint160"}, {"internalType": "int24", "name": "tick", "type": "int24"}, {"internalType": "uint16", "name": "observationIndex", "type": "uint16"}, {"internalType": "uint16", "name": "observationCardinality", "type": "uint16"}, {"internalType": "uint16", "name": "observationCardinalityNext", "type": "uint16"}, {"internalType": "uint8", "name": "feeProtocol", "type": "uint8"}, {"internalType": "bool", "name": "unlocked", "type": "bool"}]
     },
+    {
+        "type": "function",
+        "name": "tickBitmap",
+        "stateMutability": "view",
+        "inputs": [{"internalType": "int16", "name": "", "type": "int16"}],
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}]
+    },
     {
         "type": "function",
         "name": "tickSpacing",
@@ -426,6 +433,13 @@ UNISWAP_V3_POOL_ABI = [
         "inputs": [],
         "outputs": [{"internalType": "int24", "name": "", "type": "int24"}]
     },
+    {
+        "type": "function",
+        "name": "ticks",
+        "stateMutability": "view",
+        "inputs": [{"internalType": "int24", "name": "", "type": "int24"}],
+        "outputs": [{"internalType": "uint128", "name": "liquidityGross", "type": "uint128"}, {"internalType": "int128", "name": "liquidityNet", "type": "int128"}, {"internalType": "uint256", "name": "feeGrowthOutside0X128", "type": "uint256"}, {"internalType": "uint256", "name": "feeGrowthOutside1X128", "type": "uint256"}, {"internalType": "int56", "name": "tickCumulativeOutside", "type": "int56"}, {"internalType": "uint160", "name": "secondsPerLiquidityOutsideX128", "type": "uint160"}, {"internalType": "uint32", "name": "secondsOutside", "type": "uint32"}, {"internalType": "bool", "name": "initialized", "type": "bool"}]
+    },
     {
         "type": "function",
         "name": "token0",
@@ -470,6 +484,13 @@ PANCAKESWAP_V3_POOL_ABI = [
         "inputs": [],
         "outputs": [{"internalType": "uint160", "name": "sqrtPriceX96", "type": "uint160"}, {"internalType": "int24", "name": "tick", "type": "int24"}, {"internalType": "uint16", "name": "observationIndex", "type": "uint16"}, {"internalType": "uint16", "name": "observationCardinality", "type": "uint16"}, {"internalType": "uint16", "name": "observationCardinalityNext", "type": "uint16"}, {"internalType": "uint32", "name": "feeProtocol", "type": "uint32"}, {"internalType": "bool", "name": "unlocked", "type": "bool"}]
     },
+    {
+        "type": "function",
+        "name": "tickBitmap",
+        "stateMutability": "view",
+        "inputs": [{"internalType": "int16", "name": "", "type": "int16"}],
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}]
+    },
     {
         "type": "function",
         "name": "tickSpacing",
@@ -477,6 +498,13 @@ PANCAKESWAP_V3_POOL_ABI = [
         "inputs": [],
         "outputs": [{"internalType": "int24", "name": "", "type": "int24"}]
     },
+    {
+        "type": "function",
+        "name": "ticks",
+        "stateMutability": "view",
+        "inputs": [{"internalType": "int24", "name": "", "type": "int24"}],
+        "outputs": [{"internalType": "uint128", "name": "liquidityGross", "type": "uint128"}, {"internalType": "int128", "name": "liquidityNet", "type": "int128"}, {"internalType": "uint256", "name": "feeGrowthOutside0X128", "type": "uint256"}, {"internalType": "uint256", "name": "feeGrowthOutside1X128", "type": "uint256"}, {"internalType": "int56", "name": "tickCumulativeOutside", "type": "int56"}, {"internalType": "uint160", "name": "secondsPerLiquidityOutsideX128", "type": "uint160"}, {"internalType": "uint32", "name": "secondsOutside", "type": "uint32"}, {"internalType": "bool", "name": "initialized", "type": "bool"}]
+    },
     {
         "type": "function",
         "name": "token0",
@@ -0,0 +1,152 @@
+"""
+Contains the checkpoint of the manager state, used to warm-start the bot.
+
+Starting cold, the bot loads the static pool data and then re-fetches the state of the pools from the contracts before
+its first arb search, which takes minutes on Ethereum. A checkpoint persists the state needed to skip that: the pool
+data (as a ``PoolDataSnapshot``), the event mappings, the Carbon fee pairs and the last processed block. When the bot
+is restarted from a checkpoint, only the events since the checkpoint block are replayed.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from fastlane_bot.events.pool_snapshot import PoolDataSnapshot
+
+STATE_FILENAME = "state.json"
+
+
+@dataclass
+class Checkpoint:
+    """
+    Saves the manager state to a checkpoint directory, and restores it (see module docstring).
+
+    Attributes
+    ----------
+    path: str
+        The checkpoint directory.
+    max_age: int
+        The maximum number of blocks between a checkpoint and the current block for it to be restored; older
+        checkpoints are ignored, as replaying their events would take longer than a cold start.
+    block: int
+        The block of the last checkpoint saved or restored, None if there is none.
+    snapshot: PoolDataSnapshot
+        The pool data snapshot.
+    """
+
+    __VERSION__ = "1.0"
+    __DATE__ = "23/Apr/2024"
+
+    STATE_VERSION = 1
+
+    path: str
+    max_age: int = 50000
+    block: Optional[int] = None
+    snapshot: PoolDataSnapshot = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.snapshot is None:
+            self.snapshot = PoolDataSnapshot(os.path.join(self.path, "pool_data"))
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.path, STATE_FILENAME)
+
+    @staticmethod
+    def _state(mgr: Any, block: int) -> Dict[str, Any]:
+        """
+        The (JSON-serializable) manager state other than the pool data.
+        """
+        return {
+            "version": Checkpoint.STATE_VERSION,
+            "block": block,
+            "blockchain": mgr.blockchain,
+            "exchanges": sorted(mgr.SUPPORTED_EXCHANGES),
+            "uniswap_v2_event_mappings": mgr.uniswap_v2_event_mappings,
+            "uniswap_v3_event_mappings": mgr.uniswap_v3_event_mappings,
+            "solidly_v2_event_mappings": mgr.solidly_v2_event_mappings,
+            "fee_pairs": {
+                exchange_name: [[tkn0, tkn1, fee] for (tkn0, tkn1), fee in fee_pairs.items()]
+                for exchange_name, fee_pairs in mgr.fee_pairs.items()
+            },
+            "carbon_inititalized": mgr.carbon_inititalized,
+        }
+
+    def save(self, mgr: Any, block: int) -> None:
+        """
+        Save the manager state at a block. The pool data is written incrementally (see ``PoolDataSnapshot``).
+
+        Parameters
+        ----------
+        mgr : Any
+            The manager object.
+        block : int
+            The last block processed.
+        """
+        self.snapshot.write(mgr.pool_data, block)
+        with open(f"{self.state_path}.tmp", "w") as f:
+            json.dump(self._state(mgr, block), f)
+        os.replace(f"{self.state_path}.tmp", self.state_path)
+        self.block = block
+
+    def restore(self, mgr: Any, current_block: int) -> Optional[int]:
+        """
+        Restore the manager state from the checkpoint, if there is a usable one.
+
+        The checkpoint is not restored if it is missing, was saved for another blockchain or another set of exchanges,
+        or is older than ``max_age`` blocks. The pools are not added to the exchanges (see ``add_initial_pool_data``),
+        and the fee pairs only fill in the exchanges the manager did not load at startup.
+
+        Parameters
+        ----------
+        mgr : Any
+            The manager object.
+        current_block : int
+            The current block.
+
+        Returns
+        -------
+        Optional[int]
+            The checkpoint block, or None if the checkpoint was not restored.
+        """
+        if not os.path.isfile(self.state_path):
+            return None
+        with open(self.state_path, "r") as f:
+            state = json.load(f)
+        reason = None
+        if state.get("version") != self.STATE_VERSION:
+            reason = f"version {state.get('version')}"
+        elif state["blockchain"] != mgr.blockchain or state["exchanges"] != sorted(mgr.SUPPORTED_EXCHANGES):
+            reason = "different blockchain or exchanges"
+        elif current_block - state["block"] > self.max_age:
+            reason = f"{current_block - state['block']} blocks old"
+        if reason is None:
+            pool_data, block = PoolDataSnapshot.load(self.snapshot.path)
+            if block != state["block"]:
+                reason = f"pool data at block {block}"
+        if reason is not None:
+            mgr.cfg.logger.info(f"[events.checkpoint] Not restoring the checkpoint in {self.path}: {reason}")
+            return None
+
+        mgr.pool_data = pool_data
+        mgr.uniswap_v2_event_mappings.update(state["uniswap_v2_event_mappings"])
+        mgr.uniswap_v3_event_mappings.update(state["uniswap_v3_event_mappings"])
+        mgr.solidly_v2_event_mappings.update(state["solidly_v2_event_mappings"])
+        for exchange_name, fee_pairs in state["fee_pairs"].items():
+            if not mgr.fee_pairs.get(exchange_name):
+                mgr.fee_pairs[exchange_name] = {(tkn0, tkn1): fee for tkn0, tkn1, fee in fee_pairs}
+                if exchange_name in mgr.exchanges:
+                    mgr.exchanges[exchange_name].fee_pairs = mgr.fee_pairs[exchange_name]
+        mgr.carbon_inititalized.update(state["carbon_inititalized"])
+
+        self.snapshot.resume(mgr.pool_data)
+        self.block = state["block"]
+        mgr.cfg.logger.info(
+            f"[events.checkpoint] Restored {len(mgr.pool_data)} pools from the checkpoint at block {self.block}"
+        )
+        return self.block
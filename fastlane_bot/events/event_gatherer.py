@@ -1,10 +1,11 @@
 import asyncio
 from itertools import chain
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 from traceback import format_exc
 
 import nest_asyncio
 
+from hexbytes import HexBytes
 from web3 import AsyncWeb3
 from web3.contract import Contract
 
@@ -20,6 +21,16 @@ nest_asyncio.apply()
 class EventGatherer:
     """
     The EventGatherer manages event gathering using eth.get_logs.
+
+    By default, every subscription topic is queried separately for the logs of all contracts. Given the static pools
+    (``static_pools``), the gatherer instead plans its queries:
+
+    - the topics are OR-ed into as few queries as possible (one per block range and address chunk),
+    - the topics of the exchanges whose events are only processed for their static pools (Uniswap V2/V3, Solidly and
+      their forks) are queried for the addresses of those pools only, in chunks of ``max_addresses_per_query``
+      addresses; with more than ``max_address_queries`` chunks, they are queried for all contracts,
+
+    so the logs downloaded and parsed scale with the pools the bot knows about rather than with the chain activity.
     """
 
     def __init__(
@@ -27,23 +38,48 @@ class EventGatherer:
         config: Config,
         w3: AsyncWeb3,
         exchanges: Dict[str, Exchange],
+        static_pools: Optional[Dict[str, Set[str]]] = None,
+        max_addresses_per_query: int = 1000,
+        max_address_queries: int = 20,
     ):
         """ Initializes the EventManager.
         Args:
             manager: The Manager object
             w3: The connected AsyncWeb3 object.
+            exchanges: The exchanges, by name.
+            static_pools: The static pool addresses by "<exchange name>_pools" (see ``Manager.static_pools``), to plan
+                the queries with; None to query every topic separately.
+            max_addresses_per_query: The maximum number of addresses in a query.
+            max_address_queries: The maximum number of address chunks to query a block range for.
         """
         self._config = config
         self._w3 = w3
         self._subscriptions = []
+        self._static_pools = static_pools
+        self._max_addresses_per_query = max_addresses_per_query
+        self._max_address_queries = max_address_queries
+        self._topic_exchanges: Dict[str, Set[str]] = {}
 
-        for exchange in exchanges.values():
+        for exchange_name, exchange in exchanges.items():
             subscriptions = exchange.get_subscriptions(w3)
             for sub in subscriptions:
+                self._topic_exchanges.setdefault(sub.topic, set()).add(exchange_name)
                 if sub.topic not in [s.topic for s in self._subscriptions]:
                     self._subscriptions.append(sub)
+        self._subscriptions_by_topic = {bytes(HexBytes(sub.topic)): sub for sub in self._subscriptions}
+
+    @property
+    def subscriptions(self) -> List[Subscription]:
+        return self._subscriptions
 
     def get_all_events(self, from_block: int, to_block: int):
+        if self._static_pools is not None:
+            coroutines = [
+                self._get_events_for_query(*query) for query in self.plan_queries(from_block, to_block)
+            ]
+            results = asyncio.get_event_loop().run_until_complete(asyncio.gather(*coroutines))
+            return list(chain.from_iterable(results))
+
         coroutines = []
         for sub in self._subscriptions:
             if sub.collect_all:
@@ -54,44 +90,93 @@ class EventGatherer:
         results = asyncio.get_event_loop().run_until_complete(asyncio.gather(*coroutines))
         return list(chain.from_iterable(results))
 
+    def plan_queries(self, from_block: int, to_block: int) -> List[Tuple[int, int, List[str], Optional[List[str]]]]:
+        """
+        Plans the log queries of a block range (see the class docstring).
+
+        Args:
+            from_block: The first block.
+            to_block: The last block.
+
+        Returns:
+            The queries, as (from block, to block, topics, addresses or None for all contracts).
+        """
+        collect_all_topics, unfiltered_topics, filtered_topics = [], [], []
+        addresses = set()
+        for sub in self._subscriptions:
+            if sub.collect_all:
+                collect_all_topics.append(sub.topic)
+                continue
+            pools = [self._static_pools.get(f"{ex}_pools") for ex in self._topic_exchanges[sub.topic]]
+            if all(p is not None for p in pools):
+                filtered_topics.append(sub.topic)
+                addresses.update(*pools)
+            else:
+                unfiltered_topics.append(sub.topic)
+
+        addresses = sorted(addresses)
+        n = self._max_addresses_per_query
+        address_chunks = [addresses[i:i + n] for i in range(0, len(addresses), n)]
+        if len(address_chunks) > self._max_address_queries:
+            unfiltered_topics += filtered_topics
+            filtered_topics = []
+
+        queries = []
+        if collect_all_topics:
+            queries.append((0, to_block, collect_all_topics, None))
+        if unfiltered_topics:
+            queries.append((from_block, to_block, unfiltered_topics, None))
+        if filtered_topics:
+            queries += [(from_block, to_block, filtered_topics, chunk) for chunk in address_chunks]
+        return queries
+
     async def _get_events_for_subscription(self, from_block: int, to_block: int, subscription: Subscription):
         return [subscription.parse_log(log) for log in await self._get_logs_for_topics(from_block, to_block, [subscription.topic])]
 
-    async def _get_logs_for_topics(self, from_block: int, to_block: int, topics: List[str]):
+    async def _get_events_for_query(
+        self, from_block: int, to_block: int, topics: List[str], addresses: Optional[List[str]]
+    ):
+        logs = await self._get_logs_for_topics(from_block, to_block, [topics], addresses)
+        return [self._subscriptions_by_topic[bytes(HexBytes(log["topics"][0]))].parse_log(log) for log in logs]
+
+    async def _get_logs_for_topics(self, from_block: int, to_block: int, topics: list, addresses: List[str] = None):
         chunk_size = BLOCK_CHUNK_SIZE_MAP[self._config.network.NETWORK]
         if chunk_size > 0:
-            return await self._get_logs_iterative(from_block, to_block, topics, chunk_size)
+            return await self._get_logs_iterative(from_block, to_block, topics, chunk_size, addresses)
         else:
-            return await self._get_logs_recursive(from_block, to_block, topics)
+            return await self._get_logs_recursive(from_block, to_block, topics, addresses)
+
+    @staticmethod
+    def _filter_params(from_block: int, to_block: int, topics: list, addresses: List[str] = None) -> dict:
+        filter_params = {"fromBlock": from_block, "toBlock": to_block, "topics": topics}
+        if addresses is not None:
+            filter_params["address"] = addresses
+        return filter_params
 
-    async def _get_logs_iterative(self, from_block: int, to_block: int, topics: List[str], chunk_size: int) -> list:
+    async def _get_logs_iterative(
+        self, from_block: int, to_block: int, topics: list, chunk_size: int, addresses: List[str] = None
+    ) -> list:
         block_numbers = list(range(from_block, to_block + 1, chunk_size)) + [to_block + 1]
         log_lists = await asyncio.gather(*[
-            self._w3.eth.get_logs(filter_params={
-                "fromBlock": r[0],
-                "toBlock": r[1],
-                "topics": topics
-            })
+            self._w3.eth.get_logs(filter_params=self._filter_params(r[0], r[1], topics, addresses))
             for r in zip(block_numbers, map(lambda n: n - 1, block_numbers[1:]))
         ])
         return [log for log_list in log_lists for log in log_list]
 
-    async def _get_logs_recursive(self, from_block: int, to_block: int, topics: List[str]) -> list:
+    async def _get_logs_recursive(self, from_block: int, to_block: int, topics: list, addresses: List[str] = None) -> list:
         if from_block <= to_block:
             try:
-                return await self._w3.eth.get_logs(filter_params={
-                    "fromBlock": from_block,
-                    "toBlock": to_block,
-                    "topics": topics
-                })
+                return await self._w3.eth.get_logs(
+                    filter_params=self._filter_params(from_block, to_block, topics, addresses)
+                )
             except Exception as e:
                 if "eth_getLogs" not in str(e):
                     self._config.logger.error(f"Unexpected exception in EventGatherer: {format_exc()}")
                 if from_block < to_block:
                     mid_block = (from_block + to_block) // 2
                     log_lists = await asyncio.gather(
-                        self._get_logs_recursive(from_block, mid_block, topics),
-                        self._get_logs_recursive(mid_block + 1, to_block, topics)
+                        self._get_logs_recursive(from_block, mid_block, topics, addresses),
+                        self._get_logs_recursive(mid_block + 1, to_block, topics, addresses)
                     )
                     return [log for log_list in log_lists for log in log_list]
                 else:
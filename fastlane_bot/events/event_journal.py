@@ -0,0 +1,201 @@
+"""
+Contains the reorg-aware event journal.
+
+Without a journal, the bot stays ``reorg_delay`` blocks behind the chain head and re-reads that window of events every
+iteration, so it trades on state that is deliberately stale. The journal instead records, for every batch of blocks
+whose events are applied, the block hashes seen and the pre-image of every pool the events changed (or deleted). When
+the hash of a journaled block no longer matches the chain (detected from the parent hash of the next block, when it
+directly follows the journaled blocks), the batches from the fork block on are rolled back to their pre-images and
+their events are fetched again from the canonical chain. The bot can then run with ``reorg_delay=0``.
+
+Only the pool updates applied from events are journaled: the pools added from contracts and the pools refreshed by
+multicall every iteration are read at the current block, and are refreshed by the following events and iterations.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .interfaces.event import Event
+
+
+def _hex(block_hash: Any) -> Optional[str]:
+    """
+    Normalize a block hash to a lowercase 0x-prefixed hex string.
+    """
+    if block_hash is None:
+        return None
+    if isinstance(block_hash, (bytes, bytearray)):
+        return "0x" + bytes(block_hash).hex()
+    block_hash = str(block_hash).lower()
+    return block_hash if block_hash.startswith("0x") else "0x" + block_hash
+
+
+@dataclass
+class JournalEntry:
+    """
+    The journal of a batch of blocks.
+
+    Attributes
+    ----------
+    from_block: int
+        The first block of the batch.
+    to_block: int
+        The last block of the batch.
+    preimages: Dict[str, Dict[str, Any]]
+        The pool records before the events of the batch were applied, by cid.
+    """
+
+    from_block: int
+    to_block: int
+    preimages: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+@dataclass
+class EventJournal:
+    """
+    Journals the pool updates applied from events, detects reorgs and rolls them back (see module docstring).
+
+    Attributes
+    ----------
+    depth: int
+        The number of blocks journaled; deeper reorgs are rolled back to the oldest journaled batch.
+    hashes: Dict[int, str]
+        The hashes of the journaled blocks, by block number.
+    entries: List[JournalEntry]
+        The journaled batches, oldest first.
+    n_reorgs: int
+        The number of reorgs rolled back.
+    """
+
+    __VERSION__ = "1.1"
+    __DATE__ = "30/Apr/2024"
+
+    depth: int = 128
+    hashes: Dict[int, str] = field(default_factory=dict)
+    entries: List[JournalEntry] = field(default_factory=list)
+    n_reorgs: int = 0
+
+    def begin(self, from_block: int, to_block: int, block_hash: Any, events: Iterable[Event] = ()) -> None:
+        """
+        Start journaling a batch of blocks, before its events are applied.
+
+        Parameters
+        ----------
+        from_block : int
+            The first block of the batch.
+        to_block : int
+            The last block of the batch.
+        block_hash : Any
+            The hash of the last block of the batch.
+        events : Iterable[Event], optional
+            The events of the batch, whose block hashes are journaled too.
+        """
+        self.entries.append(JournalEntry(from_block=from_block, to_block=to_block))
+        self.hashes[to_block] = _hex(block_hash)
+        # the hashes of the events are those of the blocks actually applied
+        for event in events:
+            if event.block_hash is not None and event.block_number is not None:
+                self.hashes[event.block_number] = _hex(event.block_hash)
+
+        oldest_block = to_block - self.depth
+        self.entries = [entry for entry in self.entries if entry.to_block > oldest_block]
+        self.hashes = {block: h for block, h in self.hashes.items() if block > oldest_block}
+
+    def capture(self, pool: Dict[str, Any]) -> None:
+        """
+        Record the pre-image of a pool about to be updated or deleted by the events of the current batch (only the
+        first pre-image of a pool is kept).
+
+        Parameters
+        ----------
+        pool : Dict[str, Any]
+            The pool record.
+        """
+        if self.entries and pool["cid"] not in self.entries[-1].preimages:
+            self.entries[-1].preimages[pool["cid"]] = dict(pool)
+
+    def find_fork(
+        self, block_number: int, parent_hash: Any, get_block_hash: Callable[[int], Any]
+    ) -> Optional[int]:
+        """
+        Check that the journaled blocks are still on the chain of a new block.
+
+        The newest journaled block is checked against the parent hash of the new block if it is its parent, and
+        against ``get_block_hash`` otherwise. If it was reorged, the newest older journaled block still on the chain
+        is found by bisection (the blocks below a block on the chain are on the chain too).
+
+        Parameters
+        ----------
+        block_number : int
+            The number of the new block.
+        parent_hash : Any
+            The parent hash of the new block.
+        get_block_hash : Callable[[int], Any]
+            Gets the hash of a block of the chain.
+
+        Returns
+        -------
+        Optional[int]
+            The first block which may have been reorged, or None if there was no reorg.
+        """
+        known_blocks = sorted((block for block in self.hashes if block < block_number), reverse=True)
+        if not known_blocks:
+            return None
+        newest_block = known_blocks[0]
+        if newest_block == block_number - 1:
+            canonical_hash = _hex(parent_hash)
+        else:
+            canonical_hash = _hex(get_block_hash(newest_block))
+        if canonical_hash == self.hashes[newest_block]:
+            return None
+        older_blocks = known_blocks[:0:-1]
+        lo, hi = 0, len(older_blocks)
+        while lo < hi:
+            # the blocks before lo are on the chain, the blocks from hi on were reorged
+            mid = (lo + hi) // 2
+            if _hex(get_block_hash(older_blocks[mid])) == self.hashes[older_blocks[mid]]:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            # a reorg deeper than the journal
+            return older_blocks[0] if older_blocks else newest_block
+        return older_blocks[lo - 1] + 1
+
+    def rollback(self, mgr: Any, fork_block: int) -> int:
+        """
+        Roll back the batches from the fork block on: restore the pools to their pre-images, and forget the batches.
+
+        Parameters
+        ----------
+        mgr : Any
+            The manager object.
+        fork_block : int
+            The first block which may have been reorged (see ``find_fork``).
+
+        Returns
+        -------
+        int
+            The last block whose state is kept, from which the events must be fetched again.
+        """
+        undone = [entry for entry in self.entries if entry.to_block >= fork_block]
+        self.entries = [entry for entry in self.entries if entry.to_block < fork_block]
+        if not undone:
+            return fork_block - 1
+        for entry in reversed(undone):
+            for preimage in entry.preimages.values():
+                pool_info = mgr.pool_data.upsert(dict(preimage))
+                mgr.get_or_init_pool(pool_info).state.update(preimage)
+        resume_block = undone[0].from_block - 1
+        self.hashes = {block: h for block, h in self.hashes.items() if block <= resume_block}
+        self.n_reorgs += 1
+        mgr.cfg.logger.warning(
+            f"[events.event_journal] Reorg from block {fork_block}: rolled back "
+            f"{sum(len(entry.preimages) for entry in undone)} pool updates of blocks {resume_block + 1} to "
+            f"{undone[-1].to_block}"
+        )
+        return resume_block
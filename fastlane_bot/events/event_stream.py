@@ -0,0 +1,304 @@
+"""
+Contains the EventStream, which streams the events of the ``EventGatherer`` subscriptions over a websocket.
+
+Polling ``eth_getLogs`` leaves the bot at least one polling interval behind the chain tip. The stream instead keeps an
+``eth_subscribe("logs")`` subscription open for every topic, plus a ``newHeads`` subscription which tells when the logs
+of a block are complete (nodes publish the logs of a block before its header). Every new head releases the events of
+the blocks up to ``head - reorg_delay`` into a bounded queue, which the main loop blocks on instead of sleeping.
+
+The stream runs its own event loop in a daemon thread and reconnects (with backoff) when the connection drops or no
+message arrives within ``idle_timeout``. The logs emitted while it was disconnected are lost, so every batch tells from
+which block on it is complete: the main loop fetches the blocks before that with ``eth_getLogs`` (see
+``get_streamed_events`` in ``events.utils``), and polls as before while the stream is down.
+
+The headers of the recent heads are kept (see ``head``), so that the event journal can check the parent hash of a
+released block without requesting its header.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from web3 import AsyncWeb3, WebsocketProviderV2
+
+from fastlane_bot.config import Config
+from .interfaces.event import Event
+from .interfaces.subscription import Subscription
+
+
+def websocket_uri(rpc_url: str) -> str:
+    """
+    Gets the websocket endpoint of an HTTP RPC endpoint (e.g. ``https://eth-mainnet.g.alchemy.com/v2/<key>`` ->
+    ``wss://eth-mainnet.g.alchemy.com/v2/<key>``).
+
+    Parameters
+    ----------
+    rpc_url : str
+        The HTTP RPC endpoint.
+
+    Returns
+    -------
+    str
+        The websocket endpoint.
+    """
+    if rpc_url.startswith("https://"):
+        return "wss://" + rpc_url[len("https://"):]
+    if rpc_url.startswith("http://"):
+        return "ws://" + rpc_url[len("http://"):]
+    return rpc_url
+
+
+@dataclass
+class StreamedBlocks:
+    """
+    The events of the blocks released by a new head.
+
+    Attributes
+    ----------
+    to_block: int
+        The last block released.
+    complete_from: int
+        The first block whose events were all streamed; the events of the blocks before it may be missing (they were
+        emitted before the stream (re)connected).
+    events: List[Event]
+        The events of the released blocks.
+    """
+
+    to_block: int
+    complete_from: int
+    events: List[Event]
+
+
+class EventStream:
+    """
+    Streams the events of a list of subscriptions over a websocket (see module docstring).
+    """
+
+    __VERSION__ = "1.1"
+    __DATE__ = "30/Apr/2024"
+
+    def __init__(
+        self,
+        config: Config,
+        ws_uri: str,
+        subscriptions: List[Subscription],
+        reorg_delay: int = 0,
+        max_queue_size: int = 1000,
+        idle_timeout: float = 60.0,
+        max_reconnect_delay: float = 30.0,
+        max_heads: int = 128,
+    ):
+        """
+        Parameters
+        ----------
+        config : Config
+            The config object.
+        ws_uri : str
+            The websocket endpoint.
+        subscriptions : List[Subscription]
+            The log subscriptions (see ``EventGatherer.subscriptions``).
+        reorg_delay : int
+            The number of blocks the released blocks lag behind the chain head.
+        max_queue_size : int
+            The maximum number of batches waiting in the queue; reading from the websocket pauses when it is full.
+        idle_timeout : float
+            The number of seconds without any message after which the connection is considered dead.
+        max_reconnect_delay : float
+            The maximum number of seconds between reconnection attempts.
+        max_heads : int
+            The number of recent heads whose headers are kept.
+        """
+        self._config = config
+        self._ws_uri = ws_uri
+        self._subscriptions = subscriptions
+        self._reorg_delay = reorg_delay
+        self._max_queue_size = max_queue_size
+        self._idle_timeout = idle_timeout
+        self._max_reconnect_delay = max_reconnect_delay
+        self._max_heads = max_heads
+
+        self._pending: Dict[int, List[Event]] = {}
+        self._complete_from: Optional[int] = None
+        self._released_through: Optional[int] = None
+        self._heads: Dict[int, Any] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._connected = threading.Event()
+        self._stopped = False
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def start(self) -> None:
+        """
+        Start streaming in a daemon thread.
+        """
+        self._loop = asyncio.new_event_loop()
+        self._queue = asyncio.Queue(maxsize=self._max_queue_size)
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._run(),), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop streaming (the thread exits at its next message or reconnection attempt).
+        """
+        self._stopped = True
+
+    def head(self, block_number: int) -> Optional[Any]:
+        """
+        The header of a recent head (with its ``hash`` and ``parentHash``), or None if it was not streamed.
+        """
+        return self._heads.get(block_number)
+
+    def get(self, timeout: float) -> List[StreamedBlocks]:
+        """
+        Wait for the next batch of released blocks, and return it with all the other batches already queued.
+
+        Parameters
+        ----------
+        timeout : float
+            The maximum number of seconds to wait.
+
+        Returns
+        -------
+        List[StreamedBlocks]
+            The batches, oldest first; empty if the stream is not connected or no block was released within the
+            timeout.
+        """
+        if self._loop is None or (not self.connected and self._queue.empty()):
+            return []
+        try:
+            return asyncio.run_coroutine_threadsafe(self._get(timeout), self._loop).result()
+        except Exception:
+            return []
+
+    async def _get(self, timeout: float) -> List[StreamedBlocks]:
+        try:
+            batches = [await asyncio.wait_for(self._queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        while not self._queue.empty():
+            batches.append(self._queue.get_nowait())
+        return batches
+
+    def on_connect(self) -> None:
+        """
+        Reset the stream state on a new connection: the first head received determines from which block the stream is
+        complete.
+        """
+        self._complete_from = None
+        self._connected.set()
+
+    def on_disconnect(self) -> None:
+        self._complete_from = None
+        self._connected.clear()
+
+    def on_log(self, subscription: Subscription, log) -> None:
+        """
+        Add a streamed log to the events of its block.
+
+        Parameters
+        ----------
+        subscription : Subscription
+            The subscription of the log.
+        log
+            The log.
+        """
+        event = subscription.parse_log(log)
+        if log.get("removed", False):
+            # the log was removed by a reorg: forget it if its block was not released yet
+            pending = self._pending.get(event.block_number, [])
+            kept = [
+                e for e in pending if (e.transaction_hash, e.log_index) != (event.transaction_hash, event.log_index)
+            ]
+            if event.block_number in self._pending:
+                self._pending[event.block_number] = kept
+            if len(kept) == len(pending):
+                self._config.logger.warning(
+                    f"[events.event_stream] Log {event.transaction_hash}:{event.log_index} of the released block "
+                    f"{event.block_number} was removed by a reorg"
+                )
+            return
+        self._pending.setdefault(event.block_number, []).append(event)
+
+    def on_head(self, block_number: int, header: Any = None) -> Optional[StreamedBlocks]:
+        """
+        Release the events of the blocks up to ``block_number - reorg_delay``.
+
+        Parameters
+        ----------
+        block_number : int
+            The number of the new head.
+        header : Any, optional
+            The header of the new head, kept for ``head``.
+
+        Returns
+        -------
+        Optional[StreamedBlocks]
+            The released blocks, or None if no new block was released.
+        """
+        if header is not None:
+            # the heads above a new head were reorged out
+            for number in [n for n in self._heads if not block_number - self._max_heads < n < block_number]:
+                del self._heads[number]
+            self._heads[block_number] = header
+        if self._complete_from is None:
+            # logs of this block may have been published before the subscriptions were active
+            self._complete_from = block_number + 1
+        to_block = block_number - self._reorg_delay
+        if self._released_through is not None:
+            # a reorg to a lower head does not take back released blocks
+            to_block = max(to_block, self._released_through)
+        released = sorted(block for block in self._pending if block <= to_block)
+        if to_block == self._released_through and not released:
+            return None
+        events = [event for block in released for event in self._pending.pop(block)]
+        self._released_through = to_block
+        return StreamedBlocks(to_block=to_block, complete_from=self._complete_from, events=events)
+
+    async def _run(self) -> None:
+        reconnect_delay = 1.0
+        while not self._stopped:
+            try:
+                async with AsyncWeb3.persistent_websocket(WebsocketProviderV2(self._ws_uri)) as w3:
+                    await self._listen(w3)
+            except Exception as e:
+                self._config.logger.warning(
+                    f"[events.event_stream] Websocket disconnected ({e!r}), the missed blocks are fetched with "
+                    f"eth_getLogs"
+                )
+            if self.connected:
+                reconnect_delay = 1.0
+            self.on_disconnect()
+            if not self._stopped:
+                await asyncio.sleep(reconnect_delay)
+                reconnect_delay = min(2 * reconnect_delay, self._max_reconnect_delay)
+
+    async def _listen(self, w3: AsyncWeb3) -> None:
+        subscriptions = {}
+        for subscription in self._subscriptions:
+            await subscription.subscribe(w3)
+            subscriptions[subscription.subscription_id] = subscription
+        heads_id = await w3.eth.subscribe("newHeads")
+        self.on_connect()
+        self._config.logger.info(
+            f"[events.event_stream] Streaming the logs of {len(subscriptions)} topics"
+        )
+
+        messages = w3.ws.process_subscriptions()
+        while not self._stopped:
+            message = await asyncio.wait_for(messages.__anext__(), self._idle_timeout)
+            subscription_id, result = message["subscription"], message["result"]
+            if subscription_id == heads_id:
+                batch = self.on_head(result["number"], result)
+                if batch is not None:
+                    await self._queue.put(batch)
+            elif subscription_id in subscriptions:
+                self.on_log(subscriptions[subscription_id], result)
@@ -12,6 +12,7 @@ from dataclasses import dataclass, field
 from typing import List, Any, Dict, Optional
 
 from fastlane_bot.config import Config
+from fastlane_bot.events.pool_store import PoolStore
 from fastlane_bot.helpers.poolandtokens import PoolAndTokens
 
 
@@ -61,6 +62,12 @@ class QueryInterface:
     pool_data = None
     pool_data_list = None
 
+    def __setattr__(self, key: str, value: Any):
+        # the state is always held as an indexed PoolStore so that the filters below can look pools up by exchange/cid
+        if key == "state" and not isinstance(value, PoolStore):
+            value = PoolStore(value if value is not None else [])
+        super().__setattr__(key, value)
+
     @property
     def cfg(self) -> Config:
         return self.ConfigObj
@@ -177,16 +184,13 @@ class QueryInterface:
         if keys:
             return [
                 pool
-                for pool in self.state
-                if pool["exchange_name"] == exchange_name
-                and self.has_balance(pool, keys)
+                for pool in self.state.by_exchange(exchange_name)
+                if self.has_balance(pool, keys)
                 and pool["tkn0_decimals"] is not None
                 and pool["tkn1_decimals"] is not None
             ]
         else:
-            return [
-                pool for pool in self.state if pool["exchange_name"] == exchange_name
-            ]
+            return self.state.by_exchange(exchange_name)
 
     def log_pool_numbers(self, pools: List[Dict[str, Any]], exchange_name: str) -> None:
         """
@@ -235,10 +239,7 @@ class QueryInterface:
         ]
 
         for exchange in exchanges:
-            self.log_pool_numbers(
-                [pool for pool in self.state if pool["exchange_name"] == exchange],
-                exchange,
-            )
+            self.log_pool_numbers(self.state.by_exchange(exchange), exchange)
 
         zero_liquidity_pools = [
             pool for pool in initial_state if pool not in self.state
@@ -467,6 +468,7 @@ class QueryInterface:
                     "tkn7_decimals",
                     "tkn7_weight",
                     "pool_type",
+                    "tick_data",
                 ]
             },
         )
@@ -487,15 +489,33 @@ class QueryInterface:
         """
         token_set = set()
         for record in self.state:
-            for idx in range(len(record["descr"].split("/"))):
-                try:
-                    token_set.add(self.create_token(record, f"tkn{str(idx)}_"))
-                except AttributeError:
-                    pass
+            token_set.update(self.get_record_tokens(record))
         token_set.add(Token(symbol=self.ConfigObj.NATIVE_GAS_TOKEN_SYMBOL, address=self.ConfigObj.NATIVE_GAS_TOKEN_ADDRESS, decimals=18))
         token_set.add(Token(symbol=self.ConfigObj.WRAPPED_GAS_TOKEN_SYMBOL, address=self.ConfigObj.WRAPPED_GAS_TOKEN_ADDRESS, decimals=18))
         return list(token_set)
 
+    def get_record_tokens(self, record: Dict[str, Any]) -> List[Token]:
+        """
+        Get the tokens of a single pool record.
+
+        Parameters
+        ----------
+        record: Dict[str, Any]
+            The record
+
+        Returns
+        -------
+        List[Token]
+            The tokens of the pool
+        """
+        tokens = []
+        for idx in range(len(record["descr"].split("/"))):
+            try:
+                tokens.append(self.create_token(record, f"tkn{str(idx)}_"))
+            except AttributeError:
+                pass
+        return tokens
+
     def populate_tokens(self):
         """
         Populate the token Dict with tokens using the available pool data.
@@ -4,6 +4,10 @@ from typing import Any, Dict, Optional
 
 @dataclass
 class Event:
+    __slots__ = (
+        "args", "event", "log_index", "transaction_index", "transaction_hash", "address", "block_hash", "block_number"
+    )
+
     args: Dict[str, Any]
     event: str
     log_index: Optional[int]
@@ -0,0 +1,180 @@
+"""
+Contains the precompiled log decoder of an event.
+
+``ContractEvent.process_log`` resolves the ABI types of the event, builds its decoders, checks the log against the ABI,
+normalizes the decoded values and wraps everything in ``AttributeDict`` objects for every log; the ``Subscription``
+then converts the result to primitive types (``complex_handler``) and builds the ``Event`` from a dict. The
+``LogDecoder`` resolves the types and builds the ``eth_abi`` decoders and value normalizers of an event once, and
+decodes each log straight into an ``Event``, with the same values as the ``process_log`` path:
+
+- the addresses in the arguments are checksummed,
+- the bytes in the arguments are converted to (unprefixed) hex strings, and the structs to dicts,
+- the indexed dynamic arguments (strings, bytes, arrays and structs) are their 32-byte topic hashes.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from eth_abi.decoding import ContextFramesBytesIO, TupleDecoder
+from eth_abi.registry import registry
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+
+from .event import Event
+
+Normalizer = Optional[Callable[[Any], Any]]
+
+
+@lru_cache(maxsize=2**16)
+def _checksum_address(address: str) -> str:
+    """
+    Checksum an address (cached, the same few pool and token addresses make most of the logs).
+    """
+    return to_checksum_address(address)
+
+
+def _hex(value: Any) -> Any:
+    """
+    Convert the bytes of a log field to a hex string, as ``complex_handler`` does.
+    """
+    return value.hex() if isinstance(value, bytes) else value
+
+
+def _abi_type(abi_input: Dict[str, Any]) -> str:
+    """
+    The type string of an ABI input, with its struct components expanded.
+    """
+    abi_type = abi_input["type"]
+    if abi_type.startswith("tuple"):
+        components = ",".join(_abi_type(component) for component in abi_input["components"])
+        return f"({components}){abi_type[len('tuple'):]}"
+    return abi_type
+
+
+def _is_dynamic(abi_type: str) -> bool:
+    """
+    Whether an ABI type is hashed when indexed.
+    """
+    return abi_type in ("string", "bytes") or abi_type.endswith("]") or abi_type.startswith("(")
+
+
+def _normalizer(abi_input: Dict[str, Any], abi_type: str) -> Normalizer:
+    """
+    The function converting a decoded value of an ABI type to the value of the ``process_log`` path, or None if the
+    decoded value is used as is.
+    """
+    if abi_type.endswith("]"):
+        element = _normalizer(abi_input, abi_type[: abi_type.rindex("[")])
+        if element is None:
+            return list
+        return lambda values: [element(value) for value in values]
+    if abi_type.startswith("tuple"):
+        names = [component["name"] for component in abi_input["components"]]
+        normalizers = [_normalizer(component, component["type"]) for component in abi_input["components"]]
+        return lambda values: {
+            name: value if normalizer is None else normalizer(value)
+            for name, normalizer, value in zip(names, normalizers, values)
+        }
+    if abi_type == "address":
+        return _checksum_address
+    if abi_type.startswith("bytes"):
+        return bytes.hex
+    return None
+
+
+class LogDecoder:
+    """
+    Decodes the logs of an event straight into ``Event`` objects (see module docstring).
+
+    The logs which do not match the ABI of the event (e.g. another event signature or a wrong number of topics) raise
+    a ``ValueError``.
+    """
+
+    __VERSION__ = "1.0"
+    __DATE__ = "26/Apr/2024"
+
+    def __init__(self, event_abi: Dict[str, Any]):
+        """
+        Parameters
+        ----------
+        event_abi : Dict[str, Any]
+            The ABI of the event.
+        """
+        self.name = event_abi["name"]
+        self.anonymous = event_abi.get("anonymous", False)
+        self.topic = None if self.anonymous else event_abi_to_log_topic(event_abi)
+
+        # indexed arguments: (name, decoder, normalizer), decoded one topic at a time
+        self._topic_args: List[Tuple[str, Any, Normalizer]] = []
+        # non-indexed arguments, decoded together from the data
+        data_names, data_decoders, data_normalizers = [], [], []
+        for abi_input in event_abi["inputs"]:
+            abi_type = _abi_type(abi_input)
+            if abi_input["indexed"]:
+                if _is_dynamic(abi_type):
+                    self._topic_args.append((abi_input["name"], registry.get_decoder("bytes32"), bytes.hex))
+                else:
+                    normalizer = _normalizer(abi_input, abi_input["type"])
+                    self._topic_args.append((abi_input["name"], registry.get_decoder(abi_type), normalizer))
+            else:
+                data_names.append(abi_input["name"])
+                data_decoders.append(registry.get_decoder(abi_type))
+                data_normalizers.append(_normalizer(abi_input, abi_input["type"]))
+        self._data_args = list(zip(data_names, data_normalizers))
+        self._data_decoder = TupleDecoder(decoders=data_decoders)
+
+        if set(data_names) & {name for name, _, _ in self._topic_args}:
+            raise ValueError(f"Duplicate argument names between the indexed and non-indexed inputs of {self.name}")
+
+    def decode(self, log: Dict[str, Any]) -> Event:
+        """
+        Decode a log of the event.
+
+        Parameters
+        ----------
+        log : Dict[str, Any]
+            The log, as returned by ``eth_getLogs`` or a logs subscription.
+
+        Returns
+        -------
+        Event
+            The event.
+        """
+        topics = log["topics"]
+        if not self.anonymous:
+            if not topics or _to_bytes(topics[0]) != self.topic:
+                raise ValueError(f"The log is not a {self.name} event")
+            topics = topics[1:]
+        if len(topics) != len(self._topic_args):
+            raise ValueError(f"Expected {len(self._topic_args)} topics for {self.name}, got {len(topics)}")
+
+        args = {}
+        for (name, decoder, normalizer), topic in zip(self._topic_args, topics):
+            value = decoder(ContextFramesBytesIO(_to_bytes(topic)))
+            args[name] = value if normalizer is None else normalizer(value)
+        values = self._data_decoder(ContextFramesBytesIO(_to_bytes(log["data"])))
+        for (name, normalizer), value in zip(self._data_args, values):
+            args[name] = value if normalizer is None else normalizer(value)
+
+        return Event(
+            args=args,
+            event=self.name,
+            log_index=log["logIndex"],
+            transaction_index=log["transactionIndex"],
+            transaction_hash=_hex(log["transactionHash"]),
+            address=log["address"],
+            block_hash=_hex(log["blockHash"]),
+            block_number=log["blockNumber"],
+        )
+
+
+def _to_bytes(value: Any) -> bytes:
+    """
+    The bytes of a topic or of the data of a log, given as bytes or as a hex string.
+    """
+    if isinstance(value, bytes):
+        return value
+    return bytes.fromhex(value[2:] if value.startswith("0x") else value)
@@ -5,6 +5,7 @@ from web3.contract.contract import ContractEvent
 
 from ..utils import complex_handler
 from .event import Event
+from .log_decoder import LogDecoder
 
 
 def _get_event_topic(event):
@@ -20,6 +21,7 @@ class Subscription:
         self._collect_all = collect_all
         self._subscription_id = None
         self._latest_event_index = (-1, -1) # (block_number, block_index)
+        self._decoder = LogDecoder(event().abi)
 
     async def subscribe(self, w3: AsyncWeb3):
         self._subscription_id = await w3.eth.subscribe("logs", {"topics": [self._topic]})
@@ -37,6 +39,11 @@ class Subscription:
         return self._collect_all
 
     def parse_log(self, log) -> Event:
+        try:
+            return self._decoder.decode(log)
+        except Exception:
+            # let web3 decode (or reject) the logs the precompiled decoder does not handle
+            pass
         try:
             event_data = complex_handler(self._event().process_log(log))
         except:
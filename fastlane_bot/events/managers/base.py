@@ -8,9 +8,11 @@ Contains the base class for the managers modules.
 All rights reserved.
 Licensed under MIT.
 """
+import functools
+import threading
 import time
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Type, Optional, Tuple
+from typing import List, Dict, Any, Type, Optional, Set, Tuple
 
 from web3 import Web3, AsyncWeb3
 from web3.contract import Contract
@@ -19,8 +21,10 @@ from fastlane_bot import Config
 from fastlane_bot.config.constants import PANCAKESWAP_V2_NAME, PANCAKESWAP_V3_NAME, VELOCIMETER_V2_NAME, AGNI_V3_NAME, \
     FUSIONX_V3_NAME
 from fastlane_bot.config.multicaller import MultiCaller
+from fastlane_bot.events.event_journal import EventJournal
 from fastlane_bot.events.exchanges import exchange_factory
 from fastlane_bot.events.exchanges.base import Exchange
+from fastlane_bot.events.pool_store import PoolStore
 from fastlane_bot.events.pools.utils import get_pool_cid
 from fastlane_bot.events.pools import pool_factory
 from ..interfaces.event import Event
@@ -38,7 +42,7 @@ class BaseManager:
     cfg : Config
         The Config instance.
     pool_data : List[Dict[str, Any]]
-        The pool data.
+        The pool data. Always stored as an indexed ``PoolStore``, whatever list is assigned.
     alchemy_max_block_fetch : int
         The maximum number of blocks to fetch from Alchemy.
     event_contracts : Dict[str, Contract or Type[Contract]]
@@ -61,6 +65,12 @@ class BaseManager:
         The supported exchanges.
     read_only : bool
         Whether the bot is running in read only mode.
+    multicall_results : Dict[Tuple[str, str], Tuple[Tuple, int]]
+        The raw multicall return data and update block of every multicall pool, by (exchange, cid).
+    pool_data_lock : threading.Lock
+        Serializes the writes to the pool data of the threads updating pools from contracts.
+    event_journal : EventJournal
+        The journal of the pool updates applied from events, to roll back reorgs (None to not journal them).
     """
 
     web3: Web3
@@ -107,10 +117,18 @@ class BaseManager:
     replay_from_block: int = None
 
     forked_exchanges: List[str] = field(default_factory=list)
-    static_pools: Dict[str, List[str]] = field(default_factory=dict)
+    static_pools: Dict[str, Set[str]] = field(default_factory=dict)
 
     prefix_path: str = ""
     read_only: bool = False
+    multicall_results: Dict[Tuple[str, str], Tuple[Tuple, int]] = field(default_factory=dict)
+    pool_data_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    event_journal: Optional[EventJournal] = None
+
+    def __setattr__(self, key: str, value: Any):
+        if key == "pool_data" and not isinstance(value, PoolStore):
+            value = PoolStore(value if value is not None else [])
+        super().__setattr__(key, value)
 
     def __post_init__(self):
         initialized_exchanges = []
@@ -281,6 +299,24 @@ class BaseManager:
 
         return exchange_name_default
 
+    @staticmethod
+    @functools.lru_cache(maxsize=2**16)
+    def to_checksum_address(address: str) -> str:
+        """
+        Get the checksum address (cached, since every event address is converted when it is processed).
+
+        Parameters
+        ----------
+        address : str
+            The address.
+
+        Returns
+        -------
+        str
+            The checksum address.
+        """
+        return Web3.to_checksum_address(address)
+
     def get_tkn_info(self, address: str) -> Tuple[Optional[str], Optional[int]]:
         """
         Get the token info.
@@ -473,8 +509,7 @@ class BaseManager:
         """
         return [
             (p["tkn0_address"], p["tkn1_address"])
-            for p in self.pool_data
-            if p["exchange_name"] == exchange_name
+            for p in self.pool_data.by_exchange(exchange_name)
         ]
 
     def create_or_get_carbon_controller(self, exchange_name: str):
@@ -570,16 +605,16 @@ class BaseManager:
             The strategies retrieved from the state.
 
         """
+        pairs = set(pairs)
         cids = [
             pool["cid"]
-            for pool in self.pool_data
-            if pool["exchange_name"] == exchange_name
-               and (pool["tkn0_address"], pool["tkn1_address"]) in pairs
+            for pool in self.pool_data.by_exchange(exchange_name)
+            if (pool["tkn0_address"], pool["tkn1_address"]) in pairs
                or (pool["tkn1_address"], pool["tkn0_address"]) in pairs
         ]
         strategies = []
         for cid in cids:
-            pool_data = [pool for pool in self.pool_data if pool["cid"] == cid][0]
+            pool_data = self.pool_data.by_cid(cid)
             strategy_id = pool_data["strategy_id"]
 
             # Constructing the orders based on the values from the pool_data dictionary
@@ -834,9 +869,12 @@ class BaseManager:
         """
         strategy_id = event.args["id"]
         exchange_name = self.exchange_name_from_event(event)
-        cids = [p["cid"] for p in self.pool_data if
-                p["strategy_id"] == strategy_id and p["exchange_name"] == exchange_name]
-        self.pool_data = [p for p in self.pool_data if p["cid"] not in cids]
+        pools = [p for p in self.pool_data.by_exchange(exchange_name) if p["strategy_id"] == strategy_id]
+        cids = [p["cid"] for p in pools]
+        if self.event_journal is not None:
+            for pool in pools:
+                self.event_journal.capture(pool)
+        self.pool_data.delete_cids(cids)
         for x in cids:
             self.exchanges[exchange_name].delete_strategy(x)
 
@@ -844,14 +882,7 @@ class BaseManager:
         """
         Deduplicate the pool data.
         """
-        self.pool_data = sorted(
-            self.pool_data, key=lambda x: x["last_updated_block"], reverse=True
-        )
-        seen = set()
-        no_duplicates = [
-            d for d in self.pool_data if d["cid"] not in seen and not seen.add(d["cid"])
-        ]
-        self.pool_data = no_duplicates
+        self.pool_data.deduplicate("last_updated_block")
 
     @staticmethod
     def pool_key_value_from_event(key: str, event: Dict[str, Any]) -> Any:
@@ -10,7 +10,7 @@ Licensed under MIT.
 """
 import random
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Hashable, List, Optional
 
 from web3.contract import Contract
 
@@ -66,6 +66,99 @@ class Manager(PoolManager, EventManager, ContractsManager):
         data = pool.update_from_event(event, pool.get_common_data(event, pool_info))
         self.update_pool_data(pool_info, data)
 
+    @staticmethod
+    def event_format_key(event: Event) -> Hashable:
+        """
+        Get the key determining the exchange an event belongs to (see ``exchange_name_from_event``).
+
+        Parameters
+        ----------
+        event : Event
+            The event.
+
+        Returns
+        -------
+        Hashable
+            The emitting address, the event name and argument names, and the token argument (which is matched by
+            value for Bancor POL events).
+        """
+        return event.address, event.event, frozenset(event.args), event.args.get("token")
+
+    def update_from_events(self, events: List[Event]) -> int:
+        """
+        Updates the state of the pool data from a batch of events in a single pass. This is equivalent to calling
+        ``update_from_event`` for every event in chain order, but
+
+        - the exchange of the events is resolved once per ``event_format_key`` rather than once per event,
+        - the Carbon fee handlers, which reload the fees of all pairs, run at most once per batch,
+        - the pool data updates are merged by cid and written to the pool data in bulk.
+
+        The pre-images of the updated pools are recorded in the ``event_journal``, if any.
+
+        Parameters
+        ----------
+        events : List[Event]
+            The events to process.
+
+        Returns
+        -------
+        int
+            The number of pools updated.
+        """
+        control_handlers = {
+            "TradingFeePPMUpdated": self.handle_trading_fee_updated,
+            "PairTradingFeePPMUpdated": self.handle_trading_fee_updated,
+            "PairCreated": self.set_carbon_v1_fee_pairs,
+        }
+        events = sorted(
+            events, key=lambda e: (e.block_number or 0, e.transaction_index or 0, e.log_index or 0)
+        )
+        ex_names = {}
+        handled = set()
+        updates = {}
+        n_updated = 0
+        for event in events:
+            handler = control_handlers.get(event.event)
+            if handler is not None:
+                if handler not in handled:
+                    n_updated += self.pool_data.update_many(updates)
+                    updates.clear()
+                    handler()
+                    handled.add(handler)
+                continue
+
+            if event.event == "StrategyDeleted":
+                self.handle_strategy_deleted(event)
+                continue
+
+            format_key = self.event_format_key(event)
+            if format_key not in ex_names:
+                ex_names[format_key] = self.exchange_name_from_event(event)
+            ex_name = ex_names[format_key]
+            if not ex_name:
+                continue
+
+            addr = self.to_checksum_address(event.address)
+            key, key_value = self.get_key_and_value(event, addr, ex_name)
+            pool_info = self.get_pool_info(key, key_value, ex_name)
+            if not pool_info:
+                # see update_from_event
+                self.pools_to_add_from_contracts.append(
+                    (addr, ex_name, event, key, key_value)
+                )
+                continue
+
+            if "descr" not in pool_info:
+                pool_info["descr"] = self.pool_descr_from_info(pool_info)
+
+            if self.event_journal is not None and pool_info["cid"] not in updates:
+                self.event_journal.capture(self.pool_data.by_cid(pool_info["cid"]))
+            pool = self.get_or_init_pool(pool_info)
+            data = pool.update_from_event(event, pool.get_common_data(event, pool_info))
+            updates.setdefault(pool_info["cid"], {}).update(data)
+
+        return n_updated + self.pool_data.update_many(updates)
+
     def update_from_pool_info(
             self, pool_info: Dict[str, Any], current_block: int = None
     ):
@@ -123,10 +216,9 @@ class Manager(PoolManager, EventManager, ContractsManager):
             pool_info["descr"] = self.pool_descr_from_info(pool_info)
 
         # update the pool_data where the cids match
-        for idx, pool in enumerate(self.pool_data):
-            if pool["cid"] == pool_info["cid"]:
-                self.pool_data[idx] = pool_info
-                break
+        with self.pool_data_lock:
+            if self.pool_data.by_cid(pool_info["cid"]) is not None:
+                self.pool_data.upsert(pool_info)
 
     def update(
             self,
@@ -182,22 +274,11 @@ class Manager(PoolManager, EventManager, ContractsManager):
 
                 fee = self.fee_pairs[exchange_name][(tkn0_address, tkn1_address)]
 
-                for idx, pool in enumerate(self.pool_data):
-                    if (
-                            pool["tkn0_address"] == tkn0_address
-                            and pool["tkn1_address"] == tkn1_address
-                            and pool["exchange_name"] == exchange_name
-                    ):
-                        self._handle_pair_trading_fee_updated(fee, pool, idx)
-                    elif (
-                            pool["tkn0_address"] == tkn1_address
-                            and pool["tkn1_address"] == tkn0_address
-                            and pool["exchange_name"] == exchange_name
-                    ):
-                        self._handle_pair_trading_fee_updated(fee, pool, idx)
+                for pool in self.pool_data.by_pair(exchange_name, tkn0_address, tkn1_address, ordered=False):
+                    self._handle_pair_trading_fee_updated(fee, pool)
 
     def _handle_pair_trading_fee_updated(
-            self, fee: int, pool: Dict[str, Any], idx: int
+            self, fee: int, pool: Dict[str, Any]
     ):
         """
         Handle the pair trading fee updated event by updating the fee pairs and pool info for the given pair.
@@ -208,14 +289,11 @@ class Manager(PoolManager, EventManager, ContractsManager):
             The fee.
         pool : Dict[str, Any]
             The pool.
-        idx : int
-            The index of the pool.
 
         """
         pool["fee"] = f"{fee}"
         pool["fee_float"] = fee / 1e6
         pool["descr"] = self.pool_descr_from_info(pool)
-        self.pool_data[idx] = pool
 
     def handle_trading_fee_updated(self):
         """
@@ -234,14 +312,12 @@ class Manager(PoolManager, EventManager, ContractsManager):
                 self.fee_pairs[exchange_name] = self.get_fee_pairs(pairs, carbon_controller)
 
                 # Update pool info
-                for idx, pool in enumerate(self.pool_data):
-                    if pool["exchange_name"] == exchange_name:
-                        pool["fee"] = self.fee_pairs[exchange_name][
-                            (pool["tkn0_address"], pool["tkn1_address"])
-                        ]
-                        pool["fee_float"] = pool["fee"] / 1e6
-                        pool["descr"] = self.pool_descr_from_info(pool)
-                        self.pool_data[idx] = pool
+                for pool in self.pool_data.by_exchange(exchange_name):
+                    pool["fee"] = self.fee_pairs[exchange_name][
+                        (pool["tkn0_address"], pool["tkn1_address"])
+                    ]
+                    pool["fee_float"] = pool["fee"] / 1e6
+                    pool["descr"] = self.pool_descr_from_info(pool)
 
 
     def update_remaining_pools(self):
@@ -301,10 +301,10 @@ class PoolManager(BaseManager):
                     tenderly_exchanges,
                 )
             )
+            self.pool_data.append(pool_info)
         else:
-            self.pool_data = [p for p in self.pool_data if p["cid"] != pool_info["cid"]]
+            self.pool_data.upsert(pool_info)
 
-        self.pool_data.append(pool_info)
         return pool_info
 
     def add_pool_to_exchange(self, pool_info: Dict[str, Any]):
@@ -355,31 +355,29 @@ class PoolManager(BaseManager):
         #     ex_name = "uniswap_v2"
 
         if key == "address":
-            key_value = self.web3.to_checksum_address(key_value)
+            key_value = self.to_checksum_address(key_value)
 
         if ex_name == "bancor_pol":
             key = "tkn0_address"
 
         if ex_name == "bancor_v2":
-            return next(
+            pool = self.pool_data.first("pair", ex_name, *key_value)
+        elif key == "cid":
+            pool = self.pool_data.by_cid(key_value)
+            pool = pool if pool is not None and pool["exchange_name"] == ex_name else None
+        elif key in ("address", "tkn0_address", "tkn1_address"):
+            pool = self.pool_data.first(key, ex_name, key_value)
+        else:
+            pool = next(
                 (
-                    self.validate_pool_info(key_value, event, pool, key)
-                    for pool in self.pool_data
-                    if pool[key[0]] == key_value[0]
-                    and pool[key[1]] == key_value[1]
-                    and pool["exchange_name"] == ex_name
+                    pool
+                    for pool in self.pool_data.by_exchange(ex_name)
+                    if pool[key] == key_value
                 ),
                 None,
             )
 
-        return next(
-            (
-                self.validate_pool_info(key_value, event, pool, key)
-                for pool in self.pool_data
-                if pool[key] == key_value and pool["exchange_name"] == ex_name
-            ),
-            None,
-        )
+        return self.validate_pool_info(key_value, event, pool, key) if pool else None
 
     def update_pool_data(self, pool_info: Dict[str, Any], data: Dict[str, Any]) -> None:
         """
@@ -392,10 +390,7 @@ class PoolManager(BaseManager):
         data : Dict[str, Any]
             The data.
         """
-        for pool in self.pool_data:
-            if pool["cid"] == pool_info["cid"]:
-                pool.update(data)
-                break
+        self.pool_data.update(pool_info["cid"], data)
 
     def get_or_init_pool(self, pool_info: Dict[str, Any]) -> Pool:
         """
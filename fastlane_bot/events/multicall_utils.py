@@ -96,9 +96,9 @@ def encode_token_price(price: Decimal) -> int:
     return encode_float(encode_rate((price)))
 
 
-def get_pools_for_exchange(exchange: str, mgr: Any) -> List[Any]:
+def get_pools_for_exchange(exchange: str, mgr: Any) -> List[Dict[str, Any]]:
     """
-    Handles the initial iteration of the bot.
+    Get the pool info of all pools on an exchange.
 
     Parameters
     ----------
@@ -109,26 +109,29 @@ def get_pools_for_exchange(exchange: str, mgr: Any) -> List[Any]:
 
     Returns
     -------
-    List[Any]
-        A list of pools for the specified exchange.
+    List[Dict[str, Any]]
+        A list of pools for the specified exchange (unique by cid).
     """
-    return [
-        idx
-        for idx, pool in enumerate(mgr.pool_data)
-        if pool["exchange_name"] == exchange
-    ]
+    pools = {}
+    for pool in mgr.pool_data.by_exchange(exchange):
+        pools.setdefault(pool["cid"], pool)
+    return list(pools.values())
 
 
-def multicall_helper(exchange: str, rows_to_update: List, target_contract: Any, mgr: Any, current_block: int):
+def multicall_helper(exchange: str, pools_to_update: List[Dict[str, Any]], target_contract: Any, mgr: Any, current_block: int):
     """
     Helper function for multicall.
 
+    The calls are dispatched in concurrent batches, and only the pools whose raw return data changed since their
+    previous multicall update (or that were updated otherwise in the meantime) are decoded and written to the pool
+    data. Unchanged pools keep their ``last_updated_block``.
+
     Parameters
     ----------
     exchange : str
         Name of the exchange.
-    rows_to_update : List
-        List of rows to update.
+    pools_to_update : List[Dict[str, Any]]
+        List of pool infos to update.
     target_contract : Any
         The target contract.
     mgr : Any
@@ -136,12 +139,20 @@ def multicall_helper(exchange: str, rows_to_update: List, target_contract: Any,
     current_block : int
         The current block.
 
-    """
-    multicaller = MultiCaller(mgr.web3, mgr.cfg.MULTICALL_CONTRACT_ADDRESS)
+    Returns
+    -------
+    int
+        The number of pools updated.
 
-    for row in rows_to_update:
-        pool_info = mgr.pool_data[row]
-        pool_info["last_updated_block"] = current_block
+    """
+    multicaller = MultiCaller(
+        mgr.web3,
+        mgr.cfg.MULTICALL_CONTRACT_ADDRESS,
+        web3_async=mgr.w3_async,
+        batch_size=mgr.cfg.MULTICALL_BATCH_SIZE,
+    )
+
+    for pool_info in pools_to_update:
         if exchange == "bancor_v3":
             multicaller.add_call(target_contract.functions.tradingLiquidity(pool_info["tkn1_address"]))
         elif exchange == "bancor_pol":
@@ -154,23 +165,38 @@ def multicall_helper(exchange: str, rows_to_update: List, target_contract: Any,
         else:
             raise ValueError(f"Exchange {exchange} not supported")
 
-    result_list = multicaller.run_calls(current_block)
+    raw_results = multicaller.run_calls_raw(current_block)
 
     if exchange == "bancor_pol":
         # Assert that all `amountAvailableForTrading` results are valid
-        assert all(result is not None for result in result_list[1::2])
-        # Rearrange the results as a list of `(tokenPrice, amountAvailableForTrading)` tuples
-        result_list = [result for result in zip(result_list[0::2], result_list[1::2])]
+        assert all(success for success, _ in raw_results[1::2])
+        # Group the results as `(tokenPrice, amountAvailableForTrading)` tuples
+        calls_per_pool = 2
     else:
         # Assert that all results are valid
-        assert all(result is not None for result in result_list)
-
-    for row, result in zip(rows_to_update, result_list):
-        pool_info = mgr.pool_data[row]
+        assert all(success for success, _ in raw_results)
+        calls_per_pool = 1
+
+    n_updated = 0
+    for idx, pool_info in enumerate(pools_to_update):
+        raw_result = tuple(raw_results[idx * calls_per_pool:(idx + 1) * calls_per_pool])
+        key = (exchange, pool_info["cid"])
+        if mgr.multicall_results.get(key) == (raw_result, pool_info.get("last_updated_block")):
+            continue
+
+        result = tuple(
+            multicaller.decode(idx * calls_per_pool + n, raw) for n, raw in enumerate(raw_result)
+        )
+        result = result if calls_per_pool > 1 else result[0]
+        pool_info["last_updated_block"] = current_block
         pool = mgr.get_or_init_pool(pool_info)
         params = extract_params_for_multicall(exchange, result, pool_info, mgr)
         update_pool_for_multicall(params, pool_info, pool)
         update_mgr_exchanges_for_multicall(mgr, exchange, pool, pool_info)
+        mgr.multicall_results[key] = (raw_result, current_block)
+        n_updated += 1
+
+    return n_updated
 
 
 def extract_params_for_multicall(exchange: str, result: Any, pool_info: Dict, mgr: Any) -> Dict[str, Any]:
@@ -284,9 +310,7 @@ def update_mgr_exchanges_for_multicall(mgr: Any, exchange: str, pool: Any, pool_
         unique_key = "tkn0_address"
 
     unique_key_value = pool_info[unique_key]
-    exchange_pool_idx = [idx for idx in range(len(mgr.exchanges[exchange].pools)) if
-                         mgr.exchanges[exchange].pools[unique_key_value].state[unique_key] == pool_info[unique_key]][0]
-    mgr.exchanges[exchange].pools[exchange_pool_idx] = pool
+    mgr.exchanges[exchange].pools[unique_key_value] = pool
 
 
 def get_pool_contract_for_exchange(mgr: Any, exchange: str) -> str:
@@ -331,13 +355,10 @@ def multicall_every_iteration(current_block: int, mgr: Any):
 
     """
     multicallable_exchanges = [exchange for exchange in mgr.cfg.MULTICALLABLE_EXCHANGES if exchange in mgr.exchanges]
-    multicallable_pool_rows = [
-        list(set(get_pools_for_exchange(mgr=mgr, exchange=ex_name)))
-        for ex_name in multicallable_exchanges
-        if ex_name in mgr.exchanges
-    ]
-
-    for idx, exchange in enumerate(multicallable_exchanges):
+    for exchange in multicallable_exchanges:
         pool_contract = get_pool_contract_for_exchange(mgr, exchange)
-        rows_to_update = multicallable_pool_rows[idx]
-        multicall_helper(exchange, rows_to_update, pool_contract, mgr, current_block)
+        pools_to_update = get_pools_for_exchange(mgr=mgr, exchange=exchange)
+        n_updated = multicall_helper(exchange, pools_to_update, pool_contract, mgr, current_block)
+        mgr.cfg.logger.debug(
+            f"[multicall_every_iteration] {exchange}: {n_updated} of {len(pools_to_update)} pools changed"
+        )
@@ -0,0 +1,348 @@
+"""
+Contains the stage latency metrics of the main loop, and the pipeline overlapping the data sync with the arbitrage
+search.
+
+Every iteration of the main loop goes through the same stages:
+
+- ``fetch``: get the events of the new blocks,
+- ``apply``: apply the events, add the new pools from the contracts, run the multicalls,
+- ``write``: write the pool data to disk (and the checkpoint), remove the duplicates,
+- ``snapshot``: copy the pool records into an immutable per-block ``BlockSnapshot``,
+- ``search``: build the curves of the snapshot, search it for arbitrage and submit the transaction (the searcher and
+  the executor run together: ``CarbonBot.run`` submits the transaction of the arbitrage it finds).
+
+Without the pipeline the stages run one after the other, so the events of block N+1 are not fetched before the
+transaction of block N has been submitted. With the ``SearchPipeline``, the ``search`` stage runs in a worker thread,
+fed with the snapshots through a bounded queue: the main thread fetches and applies the events of block N+1 while the
+worker searches block N. The snapshot is a copy of the pool records, so the worker never sees the pools of a block
+half-applied. When the worker falls behind, the queued snapshots which are not the newest are dropped (searching a
+stale block only produces transactions which revert).
+
+``StageMetrics`` records the latency of each stage (and of the time the snapshots wait in the queue and from the start
+of the fetch to the end of the search of a block), in both modes.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from traceback import format_exc
+from typing import Any, Callable, Deque, Dict, Optional
+
+from .pool_store import PoolStore
+
+
+@dataclass
+class StageLatency:
+    """
+    The latency of a stage, in seconds.
+
+    Attributes
+    ----------
+    count: int
+        The number of samples.
+    total: float
+        The sum of the samples.
+    last: float
+        The last sample.
+    max: float
+        The largest sample.
+    window: Deque[float]
+        The most recent samples, for the percentiles.
+    """
+
+    count: int = 0
+    total: float = 0.0
+    last: float = 0.0
+    max: float = 0.0
+    window: Deque[float] = field(default_factory=lambda: deque(maxlen=100))
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        The ``q`` percentile (0 to 100) of the most recent samples.
+        """
+        if not self.window:
+            return 0.0
+        samples = sorted(self.window)
+        return samples[min(len(samples) - 1, int(q / 100 * len(samples)))]
+
+
+@dataclass
+class StageMetrics:
+    """
+    Records the latency of the stages of the main loop (see module docstring). Thread safe.
+
+    Attributes
+    ----------
+    stages: Dict[str, StageLatency]
+        The latencies, by stage name.
+    counters: Dict[str, int]
+        Event counters (e.g. the snapshots dropped by the pipeline).
+    """
+
+    __VERSION__ = "1.0"
+    __DATE__ = "26/Apr/2024"
+
+    stages: Dict[str, StageLatency] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Record a latency sample of a stage.
+
+        Parameters
+        ----------
+        stage : str
+            The stage name.
+        seconds : float
+            The latency.
+        """
+        with self._lock:
+            latency = self.stages.setdefault(stage, StageLatency())
+            latency.count += 1
+            latency.total += seconds
+            latency.last = seconds
+            latency.max = max(latency.max, seconds)
+            latency.window.append(seconds)
+
+    def increment(self, counter: str, n: int = 1) -> None:
+        """
+        Increment an event counter.
+        """
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def timer(self) -> "StageTimer":
+        """
+        Start timing the consecutive stages of an iteration (see ``StageTimer.lap``).
+        """
+        return StageTimer(self)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        The metrics, as a dict (e.g. to export them).
+        """
+        with self._lock:
+            stages = {
+                name: {
+                    "count": s.count,
+                    "last": s.last,
+                    "mean": s.mean,
+                    "p50": s.percentile(50),
+                    "p95": s.percentile(95),
+                    "max": s.max,
+                }
+                for name, s in self.stages.items()
+            }
+            return {"stages": stages, "counters": dict(self.counters)}
+
+    def summary(self) -> str:
+        """
+        The metrics, formatted for the logs.
+        """
+        metrics = self.as_dict()
+        lines = [
+            f"{name:>9}: last {s['last']:.3f}s mean {s['mean']:.3f}s p95 {s['p95']:.3f}s max {s['max']:.3f}s "
+            f"({s['count']} samples)"
+            for name, s in metrics["stages"].items()
+        ]
+        lines += [f"{name:>9}: {n}" for name, n in metrics["counters"].items()]
+        return "\n".join(lines)
+
+
+class StageTimer:
+    """
+    Times consecutive stages: each ``lap`` records the time since the previous lap (or since the timer started).
+    """
+
+    def __init__(self, metrics: StageMetrics):
+        self.metrics = metrics
+        self.start = self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> float:
+        """
+        Record the end of a stage, and return its latency.
+        """
+        now = time.perf_counter()
+        seconds, self._last = now - self._last, now
+        self.metrics.record(stage, seconds)
+        return seconds
+
+
+@dataclass(frozen=True)
+class BlockSnapshot:
+    """
+    The immutable state of a block, searched for arbitrage.
+
+    Attributes
+    ----------
+    block: int
+        The block number.
+    loop_idx: int
+        The main loop iteration.
+    pool_data: PoolStore
+        A copy of the pool records at the block, not shared with the manager (see ``take``).
+    started: float
+        The ``time.perf_counter()`` at the start of the fetch of the block.
+    replay_from_block: int, optional
+        The block replayed from.
+    tenderly_uri: str, optional
+        The Tenderly fork URI.
+    forked_from_block: int, optional
+        The block the Tenderly fork was forked from.
+    queued: float
+        The ``time.perf_counter()`` when the snapshot was taken.
+    """
+
+    block: int
+    loop_idx: int
+    pool_data: PoolStore
+    started: float
+    replay_from_block: Optional[int] = None
+    tenderly_uri: Optional[str] = None
+    forked_from_block: Optional[int] = None
+    queued: float = field(default_factory=time.perf_counter, compare=False)
+
+    @classmethod
+    def take(
+        cls, mgr: Any, block: int, loop_idx: int, started: float, copy: bool = True, **kwargs
+    ) -> "BlockSnapshot":
+        """
+        Take the snapshot of the pool records of a manager.
+
+        Parameters
+        ----------
+        mgr : Any
+            The manager object.
+        block : int
+            The block number.
+        loop_idx : int
+            The main loop iteration.
+        started : float
+            The ``time.perf_counter()`` at the start of the fetch of the block.
+        copy : bool, optional
+            Whether to copy the pool records, by default True. When the snapshot is searched before the manager is
+            updated again (the stages run sequentially), the pool data of the manager can be used as is.
+        kwargs
+            The replay and Tenderly attributes.
+
+        Returns
+        -------
+        BlockSnapshot
+            The snapshot.
+        """
+        pool_data = PoolStore(dict(pool) for pool in mgr.pool_data) if copy else mgr.pool_data
+        return cls(block=block, loop_idx=loop_idx, pool_data=pool_data, started=started, **kwargs)
+
+
+class SearchPipeline:
+    """
+    Runs the ``search`` stage of the main loop in a worker thread (see module docstring).
+    """
+
+    __VERSION__ = "1.0"
+    __DATE__ = "26/Apr/2024"
+
+    def __init__(
+        self,
+        search: Callable[[BlockSnapshot], None],
+        metrics: StageMetrics,
+        logger: Any,
+        max_queue_size: int = 1,
+    ):
+        """
+        Parameters
+        ----------
+        search : Callable[[BlockSnapshot], None]
+            Searches a snapshot for arbitrage (and submits the transaction).
+        metrics : StageMetrics
+            The metrics the ``queue``, ``search`` and ``block`` latencies are recorded to.
+        logger : Any
+            The logger.
+        max_queue_size : int, optional
+            The number of snapshots waiting for the worker, by default 1 (only the newest block).
+        """
+        self._search = search
+        self._metrics = metrics
+        self._logger = logger
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.last_searched_block: Optional[int] = None
+
+    def start(self) -> None:
+        """
+        Start the worker thread.
+        """
+        self._thread = threading.Thread(target=self._run, name="arb-search", daemon=True)
+        self._thread.start()
+
+    def submit(self, snapshot: BlockSnapshot) -> None:
+        """
+        Queue a snapshot for the worker, dropping the oldest queued snapshot if the queue is full. Until the worker
+        is started, the snapshot is searched right away (the stages run sequentially).
+        """
+        if self._thread is None:
+            self._search_snapshot(snapshot)
+            return
+        with self._lock:
+            while True:
+                try:
+                    self._queue.put_nowait(snapshot)
+                    return
+                except queue.Full:
+                    pass
+                try:
+                    dropped = self._queue.get_nowait()
+                    self._queue.task_done()
+                    self._metrics.increment("dropped")
+                    self._logger.debug(f"[events.pipeline] Dropped the stale snapshot of block {dropped.block}")
+                except queue.Empty:
+                    pass
+
+    def join(self) -> None:
+        """
+        Wait until the queued snapshots are searched.
+        """
+        self._queue.join()
+
+    def stop(self) -> None:
+        """
+        Let the worker finish the queued snapshots, then stop it.
+        """
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _search_snapshot(self, snapshot: BlockSnapshot) -> None:
+        self._metrics.record("queue", time.perf_counter() - snapshot.queued)
+        start = time.perf_counter()
+        self._search(snapshot)
+        end = time.perf_counter()
+        self._metrics.record("search", end - start)
+        self._metrics.record("block", end - snapshot.started)
+        self.last_searched_block = snapshot.block
+
+    def _run(self) -> None:
+        while True:
+            snapshot = self._queue.get()
+            try:
+                if snapshot is None:
+                    return
+                self._search_snapshot(snapshot)
+            except Exception:
+                self._logger.error(f"[events.pipeline] Error searching block {snapshot.block}: {format_exc()}")
+            finally:
+                self._queue.task_done()
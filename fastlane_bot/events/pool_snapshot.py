@@ -0,0 +1,292 @@
+"""
+Contains the columnar snapshot of the pool data written by the bot every iteration.
+
+A snapshot is a directory holding a full ``base.parquet`` table of the pool data and one ``delta_<block>.parquet``
+table per written block with only the pools that changed since the previous write (and tombstones for the pools that
+were removed). A pool is considered changed when its ``last_updated_block`` or its ``fee`` changed, as in the
+``CurveCache``. The deltas are folded into a new base every ``compact_every`` writes; with ``compact_every=None``
+they are kept, so the pool data can be restored as of any written block.
+
+Pool records are heterogeneous (big integers, and columns mixing ints, floats and strings), so each column is stored
+with the narrowest Arrow type that holds all its values exactly, falling back to a tagged string encoding. A missing
+key is stored as a null, so records are restored with exactly the keys they were written with.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from glob import glob
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BASE_FILENAME = "base.parquet"
+DELTA_PATTERN = "delta_{block:012d}.parquet"
+DELETED = "__deleted__"
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+
+_ARROW_TYPES = {bool: pa.bool_(), int: pa.int64(), float: pa.float64(), str: pa.string()}
+
+
+def _native(value: Any) -> Any:
+    """
+    Convert numpy scalars to the equivalent python values.
+    """
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _encode_tagged(value: Any) -> Optional[str]:
+    """
+    Encode a value as a type-tagged string.
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return f"b:{int(value)}"
+    if isinstance(value, int):
+        return f"i:{value}"
+    if isinstance(value, float):
+        return f"f:{value!r}"
+    if isinstance(value, str):
+        return f"s:{value}"
+    return f"j:{json.dumps(value)}"
+
+
+def _decode_tagged(value: Optional[str]) -> Any:
+    """
+    Decode a type-tagged string (see ``_encode_tagged``).
+    """
+    if value is None:
+        return None
+    tag, text = value[0], value[2:]
+    if tag == "b":
+        return text == "1"
+    if tag == "i":
+        return int(text)
+    if tag == "f":
+        return float(text)
+    if tag == "s":
+        return text
+    return json.loads(text)
+
+
+def encode_table(records: List[Dict[str, Any]], columns: Iterable[str] = None) -> pa.Table:
+    """
+    Encode pool records as an Arrow table (see module docstring).
+
+    Parameters
+    ----------
+    records : List[Dict[str, Any]]
+        The pool records.
+    columns : Iterable[str], optional
+        The columns, by default the union of the keys of the records.
+
+    Returns
+    -------
+    pa.Table
+        The table. The columns stored as tagged strings are listed in the ``tagged`` schema metadata.
+    """
+    if columns is None:
+        columns = list(dict.fromkeys(key for record in records for key in record))
+    arrays, tagged = {}, []
+    for column in columns:
+        values = [_native(record.get(column)) for record in records]
+        types = {type(value) for value in values if value is not None}
+        ptype = next(iter(types)) if len(types) == 1 else None
+        if ptype is int and any(not INT64_MIN <= value <= INT64_MAX for value in values if value is not None):
+            ptype = None
+        if ptype in _ARROW_TYPES:
+            arrays[column] = pa.array(values, type=_ARROW_TYPES[ptype])
+        elif not types:
+            arrays[column] = pa.array(values, type=pa.null())
+        else:
+            arrays[column] = pa.array([_encode_tagged(value) for value in values], type=pa.string())
+            tagged.append(column)
+    table = pa.table(arrays) if arrays else pa.table({})
+    return table.replace_schema_metadata({"tagged": json.dumps(tagged)})
+
+
+def decode_table(table: pa.Table) -> List[Dict[str, Any]]:
+    """
+    Decode an Arrow table written by ``encode_table`` into pool records.
+
+    Parameters
+    ----------
+    table : pa.Table
+        The table.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        The pool records, without the keys whose value is null.
+    """
+    metadata = table.schema.metadata or {}
+    tagged = set(json.loads(metadata.get(b"tagged", b"[]")))
+    columns = {}
+    for name in table.column_names:
+        values = table.column(name).to_pylist()
+        columns[name] = [_decode_tagged(value) for value in values] if name in tagged else values
+    return [
+        {name: values[i] for name, values in columns.items() if values[i] is not None}
+        for i in range(table.num_rows)
+    ]
+
+
+@dataclass
+class PoolDataSnapshot:
+    """
+    Writes the pool data to a columnar snapshot directory incrementally, and loads it back (see module docstring).
+
+    Attributes
+    ----------
+    path: str
+        The snapshot directory.
+    compact_every: int
+        The number of delta files after which they are folded into the base file; None to keep all of them.
+    written: Dict[Any, Tuple[int, str]]
+        The (last_updated_block, fee) of every pool written, by cid.
+    n_deltas: int
+        The number of delta files since the last base file.
+    n_written: int
+        The number of records written by the last ``write``.
+    """
+
+    __VERSION__ = "1.1"
+    __DATE__ = "30/Apr/2024"
+
+    path: str
+    compact_every: Optional[int] = 100
+    written: Dict[Any, Tuple[int, str]] = field(default_factory=dict)
+    n_deltas: int = 0
+    n_written: int = 0
+
+    @staticmethod
+    def _version(pool: Dict[str, Any]) -> Tuple[Any, str]:
+        return pool.get("last_updated_block"), str(pool.get("fee"))
+
+    def resume(self, pool_data: List[Dict[str, Any]]) -> None:
+        """
+        Resume writing to an existing snapshot, whose pool data is ``pool_data`` (see ``load``).
+
+        Parameters
+        ----------
+        pool_data : List[Dict[str, Any]]
+            The pool data loaded from the snapshot.
+        """
+        self.written = {pool["cid"]: self._version(pool) for pool in pool_data}
+        self.n_deltas = len(self._delta_filenames(self.path))
+
+    def write(self, pool_data: List[Dict[str, Any]], block: int) -> int:
+        """
+        Write the changes of the pool data since the last write.
+
+        The first write (and every ``compact_every``-th write after it) writes a full base file; the other writes
+        append a delta file with the changed pools.
+
+        Parameters
+        ----------
+        pool_data : List[Dict[str, Any]]
+            The pool data.
+        block : int
+            The block of the pool data.
+
+        Returns
+        -------
+        int
+            The number of records written.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        versions = {pool["cid"]: self._version(pool) for pool in pool_data}
+        is_base = len(self.written) == 0 or (
+            self.compact_every is not None and self.n_deltas >= self.compact_every
+        )
+        if is_base:
+            records = list(pool_data)
+            self._write_table(encode_table(records), BASE_FILENAME, block)
+            for filename in self._delta_filenames(self.path):
+                os.remove(filename)
+            self.n_deltas = 0
+        else:
+            records = [pool for pool in pool_data if self.written.get(pool["cid"]) != versions[pool["cid"]]]
+            deleted = [{"cid": cid, DELETED: True} for cid in self.written if cid not in versions]
+            if len(records) + len(deleted) > 0:
+                self._write_table(encode_table(records + deleted), DELTA_PATTERN.format(block=block), block)
+                self.n_deltas += 1
+        self.written = versions
+        self.n_written = len(records)
+        return self.n_written
+
+    def _write_table(self, table: pa.Table, filename: str, block: int) -> None:
+        """
+        Write a table atomically, with its block in the schema metadata.
+        """
+        metadata = dict(table.schema.metadata or {})
+        metadata[b"block"] = str(block).encode()
+        table = table.replace_schema_metadata(metadata)
+        path = os.path.join(self.path, filename)
+        pq.write_table(table, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def _delta_filenames(path: str) -> List[str]:
+        return sorted(glob(os.path.join(path, DELTA_PATTERN.replace("{block:012d}", "*"))))
+
+    @classmethod
+    def deltas(cls, path: str) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Iterate over the delta files of a snapshot directory, in block order.
+
+        Parameters
+        ----------
+        path : str
+            The snapshot directory.
+
+        Yields
+        ------
+        Tuple[int, List[Dict[str, Any]]]
+            The block of the delta and its records; a removed pool is a record ``{"cid": cid, DELETED: True}``.
+        """
+        for filename in cls._delta_filenames(path):
+            table = pq.read_table(filename)
+            yield int(table.schema.metadata[b"block"]), decode_table(table)
+
+    @classmethod
+    def load(cls, path: str, block: int = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Load the pool data from a snapshot directory.
+
+        Parameters
+        ----------
+        path : str
+            The snapshot directory.
+        block : int, optional
+            Restore the pool data as of this block (the latest written block at or before it), by default the
+            latest written block.
+
+        Returns
+        -------
+        Tuple[List[Dict[str, Any]], Optional[int]]
+            The pool records and the block they were written at; an empty list and None if there is no snapshot.
+        """
+        base_path = os.path.join(path, BASE_FILENAME)
+        if not os.path.isfile(base_path):
+            return [], None
+        table = pq.read_table(base_path)
+        snapshot_block = int(table.schema.metadata[b"block"])
+        pools = {pool["cid"]: pool for pool in decode_table(table)}
+        for delta_block, records in cls.deltas(path):
+            if block is not None and delta_block > block:
+                break
+            for record in records:
+                if record.pop(DELETED, False):
+                    pools.pop(record["cid"], None)
+                else:
+                    pools[record["cid"]] = record
+            snapshot_block = delta_block
+        return list(pools.values()), snapshot_block
@@ -0,0 +1,338 @@
+"""
+Contains the indexed pool store used by the managers to hold the pool data.
+
+The store is a drop-in replacement for the plain ``List[Dict[str, Any]]`` previously held in ``Manager.pool_data``. It
+behaves like a list (so existing code indexing, iterating and slicing the pool data keeps working), but additionally
+maintains hash indexes over the fields used to look pools up while processing events, so that lookups and upserts are
+O(1) rather than a linear scan over all pools.
+
+Records are indexed by the values of their key fields at the time they are inserted. Key fields (``cid``,
+``exchange_name``, ``address``, ``tkn0_address``, ``tkn1_address``) must therefore not be mutated in place on a stored
+record; use ``PoolStore.update`` (which re-indexes) or replace the record via item assignment instead.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+INDEXES = {
+    "cid": ("cid",),
+    "exchange_name": ("exchange_name",),
+    "address": ("exchange_name", "address"),
+    "tkn0_address": ("exchange_name", "tkn0_address"),
+    "tkn1_address": ("exchange_name", "tkn1_address"),
+    "pair": ("exchange_name", "tkn0_address", "tkn1_address"),
+}
+KEY_FIELDS = frozenset(field for fields in INDEXES.values() for field in fields)
+
+
+class PoolStore(list):
+    """
+    A list of pool info dicts with hash indexes by cid, exchange, address, token address and token pair.
+
+    Parameters
+    ----------
+    pools : Iterable[Dict[str, Any]], optional
+        The initial pool records.
+    """
+
+    __VERSION__ = "0.0.1"
+    __DATE__ = "2024-04-22"
+
+    def __init__(self, pools: Iterable[Dict[str, Any]] = ()):
+        super().__init__(pools)
+        self._reindex()
+
+    # ------------------------------------------------------------------ #
+    # index maintenance
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def _index_key(pool: Dict[str, Any], fields: Tuple[str, ...]) -> Optional[Tuple[Any, ...]]:
+        """
+        Get the key of a pool record in an index, or None if the record cannot be indexed by those fields.
+        """
+        try:
+            key = tuple(pool[field] for field in fields)
+            hash(key)
+        except (KeyError, TypeError):
+            return None
+        return key
+
+    def _reindex(self) -> None:
+        """
+        Rebuild all indexes from scratch.
+        """
+        self._indexes: Dict[str, Dict[Tuple[Any, ...], List[Dict[str, Any]]]] = {name: {} for name in INDEXES}
+        for pool in list.__iter__(self):
+            self._add_to_indexes(pool)
+
+    def _add_to_indexes(self, pool: Dict[str, Any]) -> None:
+        for name, fields in INDEXES.items():
+            key = self._index_key(pool, fields)
+            if key is not None:
+                self._indexes[name].setdefault(key, []).append(pool)
+
+    def _remove_from_indexes(self, pool: Dict[str, Any]) -> None:
+        for name, fields in INDEXES.items():
+            key = self._index_key(pool, fields)
+            bucket = self._indexes[name].get(key) if key is not None else None
+            if not bucket:
+                continue
+            for i, other in enumerate(bucket):
+                if other is pool:
+                    del bucket[i]
+                    break
+            if not bucket:
+                del self._indexes[name][key]
+
+    # ------------------------------------------------------------------ #
+    # list interface
+    # ------------------------------------------------------------------ #
+    def append(self, pool: Dict[str, Any]) -> None:
+        super().append(pool)
+        self._add_to_indexes(pool)
+
+    def extend(self, pools: Iterable[Dict[str, Any]]) -> None:
+        for pool in pools:
+            self.append(pool)
+
+    def __iadd__(self, pools: Iterable[Dict[str, Any]]) -> "PoolStore":
+        self.extend(pools)
+        return self
+
+    def insert(self, idx: int, pool: Dict[str, Any]) -> None:
+        super().insert(idx, pool)
+        self._add_to_indexes(pool)
+
+    def __setitem__(self, idx, value) -> None:
+        if isinstance(idx, slice):
+            super().__setitem__(idx, value)
+            self._reindex()
+            return
+        self._remove_from_indexes(super().__getitem__(idx))
+        super().__setitem__(idx, value)
+        self._add_to_indexes(value)
+
+    def __delitem__(self, idx) -> None:
+        if isinstance(idx, slice):
+            super().__delitem__(idx)
+            self._reindex()
+            return
+        self._remove_from_indexes(super().__getitem__(idx))
+        super().__delitem__(idx)
+
+    def pop(self, idx: int = -1) -> Dict[str, Any]:
+        pool = super().pop(idx)
+        self._remove_from_indexes(pool)
+        return pool
+
+    def remove(self, pool: Dict[str, Any]) -> None:
+        del self[self.index(pool)]
+
+    def clear(self) -> None:
+        super().clear()
+        self._reindex()
+
+    def copy(self) -> "PoolStore":
+        return PoolStore(self)
+
+    def __reduce__(self):
+        # the indexes are rebuilt on load rather than pickled alongside the records
+        return PoolStore, (list(self),)
+
+    # ------------------------------------------------------------------ #
+    # lookups
+    # ------------------------------------------------------------------ #
+    def find(self, index: str, *key: Any) -> List[Dict[str, Any]]:
+        """
+        Get all pools matching the key in the given index.
+
+        Parameters
+        ----------
+        index : str
+            The index name, one of the keys of ``INDEXES``.
+        key : Any
+            The values of the index fields, in order.
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            The matching pools (possibly empty).
+        """
+        try:
+            return list(self._indexes[index].get(key, ()))
+        except TypeError:
+            return []
+
+    def first(self, index: str, *key: Any) -> Optional[Dict[str, Any]]:
+        """
+        Get the first pool matching the key in the given index, or None.
+        """
+        try:
+            bucket = self._indexes[index].get(key)
+        except TypeError:
+            return None
+        return bucket[0] if bucket else None
+
+    def by_cid(self, cid: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the pool with the given cid, or None.
+        """
+        return self.first("cid", cid)
+
+    def by_exchange(self, exchange_name: str) -> List[Dict[str, Any]]:
+        """
+        Get all pools of the given exchange.
+        """
+        return self.find("exchange_name", exchange_name)
+
+    def by_pair(self, exchange_name: str, tkn0_address: str, tkn1_address: str, ordered: bool = True) -> List[Dict[str, Any]]:
+        """
+        Get all pools of the given exchange for a token pair.
+
+        Parameters
+        ----------
+        exchange_name : str
+            The exchange name.
+        tkn0_address : str
+            The token 0 address.
+        tkn1_address : str
+            The token 1 address.
+        ordered : bool, optional
+            If False, pools with the tokens in reverse order are included as well, by default True.
+
+        Returns
+        -------
+        List[Dict[str, Any]]
+            The matching pools.
+        """
+        pools = self.find("pair", exchange_name, tkn0_address, tkn1_address)
+        if not ordered and tkn0_address != tkn1_address:
+            pools += self.find("pair", exchange_name, tkn1_address, tkn0_address)
+        return pools
+
+    def cids(self) -> List[str]:
+        """
+        Get the (distinct) cids of all pools in the store.
+        """
+        return [key[0] for key in self._indexes["cid"]]
+
+    def __contains__(self, pool: Any) -> bool:
+        if isinstance(pool, dict):
+            key = self._index_key(pool, INDEXES["cid"])
+            if key is not None:
+                return any(other == pool for other in self._indexes["cid"].get(key, ()))
+        return super().__contains__(pool)
+
+    # ------------------------------------------------------------------ #
+    # mutations
+    # ------------------------------------------------------------------ #
+    def update(self, cid: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Update the first pool with the given cid in place, re-indexing it if any key field changes.
+
+        Parameters
+        ----------
+        cid : str
+            The cid of the pool.
+        data : Dict[str, Any]
+            The values to update.
+
+        Returns
+        -------
+        Optional[Dict[str, Any]]
+            The updated pool, or None if no pool has the given cid.
+        """
+        pool = self.by_cid(cid)
+        if pool is None:
+            return None
+        if KEY_FIELDS.intersection(data) and any(pool.get(k) != data[k] for k in KEY_FIELDS.intersection(data)):
+            self._remove_from_indexes(pool)
+            pool.update(data)
+            self._add_to_indexes(pool)
+        else:
+            pool.update(data)
+        return pool
+
+    def update_many(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Update several pools in place, see ``update``.
+
+        Parameters
+        ----------
+        updates : Dict[str, Dict[str, Any]]
+            The values to update, by cid.
+
+        Returns
+        -------
+        int
+            The number of pools updated.
+        """
+        return sum(self.update(cid, data) is not None for cid, data in updates.items())
+
+    def upsert(self, pool: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Replace the pool(s) with the same cid, or append the pool if its cid is not in the store.
+
+        Parameters
+        ----------
+        pool : Dict[str, Any]
+            The pool info.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The pool info.
+        """
+        existing = self.find("cid", pool["cid"])
+        if not existing:
+            self.append(pool)
+            return pool
+        if len(existing) > 1:
+            self.delete_cids([pool["cid"]])
+            self.append(pool)
+            return pool
+
+        # replace the record's contents in place, which keeps its position in the list
+        record = existing[0]
+        self._remove_from_indexes(record)
+        if record is not pool:
+            record.clear()
+            record.update(pool)
+        self._add_to_indexes(record)
+        return record
+
+    def delete_cids(self, cids: Iterable[str]) -> int:
+        """
+        Delete all pools with the given cids.
+
+        Parameters
+        ----------
+        cids : Iterable[str]
+            The cids to delete.
+
+        Returns
+        -------
+        int
+            The number of pools deleted.
+        """
+        cids = {cid for cid in cids if (cid,) in self._indexes["cid"]}
+        if not cids:
+            return 0
+        keep = [pool for pool in list.__iter__(self) if pool.get("cid") not in cids]
+        deleted = len(self) - len(keep)
+        list.__setitem__(self, slice(None), keep)
+        self._reindex()
+        return deleted
+
+    def deduplicate(self, sort_key: str = "last_updated_block") -> None:
+        """
+        Sort the pools by ``sort_key`` in descending order and keep only the first occurrence of each cid.
+        """
+        pools = sorted(list.__iter__(self), key=lambda x: x[sort_key], reverse=True)
+        seen = set()
+        pools = [p for p in pools if p["cid"] not in seen and not seen.add(p["cid"])]
+        list.__setitem__(self, slice(None), pools)
+        self._reindex()
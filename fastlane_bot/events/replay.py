@@ -0,0 +1,609 @@
+"""
+Contains the offline block replay: a corpus of recorded blocks, and the benchmark driver replaying it without an RPC.
+
+The main loop is wired to a live node, so its performance can only be measured against the chain as it moves. With
+``--record_replay_path``, the main loop records every block it processes into a ``ReplayCorpus``:
+
+- ``meta.json``: the manager state at the first recorded block (as in the ``Checkpoint``), the static pools, the
+  chain id and the flashloan tokens,
+- ``pool_data/``: a ``PoolDataSnapshot`` which keeps all its deltas, ie the pool data at the first recorded block and
+  the pools that changed in every later block, whether by events, new pools added from the contracts or multicalls,
+- ``blocks/<block>.json``: the raw events of every later block.
+
+``BlockReplay`` replays a corpus deterministically against a ``ReplayProvider``, a local stand-in for the node which
+serves the chain id and the block numbers and timestamps of the corpus (and fails any other request). For every
+block, it applies the events (``update_pools_from_events``), applies the recorded pool changes that the events do not
+explain (the contract and multicall updates, which are not re-run), initializes the bot (``init_bot``), builds the
+curves (``get_curves``) and runs the ``find_arbitrage`` of every arb mode. The ``ReplayReport`` of a run holds the
+latency of every stage (see ``StageMetrics``), the throughput and the arbitrage opportunities found, and is compared
+with the report of another run (e.g. of the previous commit) by ``ReplayReport.diff``.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import json
+import logging
+import math
+import os
+import shutil
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from glob import glob
+from typing import Any, Dict, List, Optional
+
+from web3 import AsyncWeb3, Web3
+from web3.providers.base import BaseProvider
+
+from fastlane_bot.config.network import ConfigNetwork
+from fastlane_bot.data.abi import FAST_LANE_CONTRACT_ABI
+from fastlane_bot.events.checkpoint import Checkpoint
+from fastlane_bot.events.interfaces.event import Event
+from fastlane_bot.events.managers.manager import Manager
+from fastlane_bot.events.pipeline import StageMetrics
+from fastlane_bot.events.pool_snapshot import DELETED, PoolDataSnapshot
+from fastlane_bot.events.utils import init_bot, update_pools_from_events
+from fastlane_bot.helpers import CurveCache
+from fastlane_bot.modes.executor import ArbComboExecutor
+from fastlane_bot.modes.no_arb_cache import NoArbCache
+from fastlane_bot.tools.optimizer import PriceCache
+
+META_FILENAME = "meta.json"
+BLOCK_PATTERN = "{block:012d}.json"
+
+# An unfunded key, only used to derive the wallet address of the bot: the replay never signs or sends a transaction
+REPLAY_PRIVATE_KEY = "0x" + "11" * 32
+
+
+def _encode(value: Any) -> Any:
+    """
+    Encode an event field as JSON (bytes as hex strings, mappings and tuples as objects and lists).
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, Mapping):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    return value
+
+
+def encode_event(event: Event) -> Dict[str, Any]:
+    """
+    Encode an event as a JSON object, with the keys of ``Event.from_dict``.
+    """
+    return {
+        "args": _encode(event.args),
+        "event": event.event,
+        "logIndex": event.log_index,
+        "transactionIndex": event.transaction_index,
+        "transactionHash": _encode(event.transaction_hash),
+        "address": event.address,
+        "blockHash": _encode(event.block_hash),
+        "blockNumber": event.block_number,
+    }
+
+
+@dataclass
+class ReplayCorpus:
+    """
+    A directory of recorded blocks (see module docstring).
+
+    Attributes
+    ----------
+    path: str
+        The corpus directory.
+    """
+
+    __VERSION__ = "1.0"
+    __DATE__ = "30/Apr/2024"
+
+    CORPUS_VERSION = 1
+
+    path: str
+    _meta: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False)
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.path, META_FILENAME)
+
+    @property
+    def pool_data_path(self) -> str:
+        return os.path.join(self.path, "pool_data")
+
+    @property
+    def blocks_path(self) -> str:
+        return os.path.join(self.path, "blocks")
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        """
+        The corpus metadata (see ``ReplayRecorder.start``); raises FileNotFoundError if there is no corpus.
+        """
+        if self._meta is None:
+            with open(self.meta_path, "r") as f:
+                self._meta = json.load(f)
+            if self._meta.get("version") != self.CORPUS_VERSION:
+                raise ValueError(f"Unsupported replay corpus version {self._meta.get('version')} in {self.path}")
+        return self._meta
+
+    def write_meta(self, meta: Dict[str, Any]) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        with open(f"{self.meta_path}.tmp", "w") as f:
+            json.dump({**meta, "version": self.CORPUS_VERSION}, f)
+        os.replace(f"{self.meta_path}.tmp", self.meta_path)
+        self._meta = None
+
+    def clear(self) -> None:
+        """
+        Remove the recorded corpus files (and only those) from the corpus directory.
+        """
+        for path in [self.pool_data_path, self.blocks_path]:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+        if os.path.isfile(self.meta_path):
+            os.remove(self.meta_path)
+        self._meta = None
+
+    def write_block(self, block: int, events: List[Event], timestamp: int) -> None:
+        """
+        Write the events of a block.
+
+        Parameters
+        ----------
+        block : int
+            The block number.
+        events : List[Event]
+            The events fetched for the block.
+        timestamp : int
+            The block timestamp (the time it was recorded).
+        """
+        os.makedirs(self.blocks_path, exist_ok=True)
+        path = os.path.join(self.blocks_path, BLOCK_PATTERN.format(block=block))
+        with open(f"{path}.tmp", "w") as f:
+            json.dump({"block": block, "timestamp": timestamp, "events": [encode_event(e) for e in events]}, f)
+        os.replace(f"{path}.tmp", path)
+
+    def read_block(self, block: int) -> Dict[str, Any]:
+        """
+        Read a recorded block, as ``{"block": int, "timestamp": int, "events": List[Event]}``.
+        """
+        with open(os.path.join(self.blocks_path, BLOCK_PATTERN.format(block=block)), "r") as f:
+            data = json.load(f)
+        data["events"] = [Event.from_dict(e) for e in data["events"]]
+        return data
+
+    def blocks(self) -> List[int]:
+        """
+        The recorded blocks (not including the first block, whose pool data the replay starts from), in order.
+        """
+        filenames = glob(os.path.join(self.blocks_path, BLOCK_PATTERN.replace("{block:012d}", "*")))
+        return sorted(int(os.path.basename(filename).split(".")[0]) for filename in filenames)
+
+
+@dataclass
+class ReplayRecorder:
+    """
+    Records the blocks processed by the main loop into a ``ReplayCorpus`` (see module docstring).
+
+    Attributes
+    ----------
+    corpus: ReplayCorpus
+        The corpus to record into; it is cleared by the first ``record``.
+    flashloan_tokens: List[str]
+        The flashloan tokens of the bot, the default of the replay.
+    chain_id: int
+        The chain id served by the ``ReplayProvider``, by default the one of the node.
+    arb_rewards_ppm: int
+        The arb rewards of the arb contract, by default the one read by the config.
+    block: int
+        The last recorded block, None before the first ``record``.
+    snapshot: PoolDataSnapshot
+        The pool data snapshot of the corpus.
+    """
+
+    __VERSION__ = "1.0"
+    __DATE__ = "30/Apr/2024"
+
+    corpus: ReplayCorpus
+    flashloan_tokens: List[str] = None
+    chain_id: int = None
+    arb_rewards_ppm: int = None
+    block: Optional[int] = None
+    snapshot: PoolDataSnapshot = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.snapshot is None:
+            self.snapshot = PoolDataSnapshot(self.corpus.pool_data_path, compact_every=None)
+
+    def start(self, mgr: Any, block: int) -> None:
+        """
+        Start a new corpus from the pool data and manager state at a block.
+
+        Parameters
+        ----------
+        mgr : Any
+            The manager object.
+        block : int
+            The block of the pool data.
+        """
+        self.corpus.clear()
+        self.corpus.write_meta({
+            "block": block,
+            "chain_id": int(mgr.cfg.w3.eth.chain_id if self.chain_id is None else self.chain_id),
+            "arb_rewards_ppm": int(mgr.cfg.ARB_REWARDS_PPM if self.arb_rewards_ppm is None else self.arb_rewards_ppm),
+            "flashloan_tokens": self.flashloan_tokens,
+            "static_pools": {name: sorted(addresses) for name, addresses in mgr.static_pools.items()},
+            "state": Checkpoint._state(mgr, block),
+        })
+        self.snapshot = PoolDataSnapshot(self.corpus.pool_data_path, compact_every=None)
+        self.snapshot.write(mgr.pool_data, block)
+        mgr.cfg.logger.info(
+            f"[events.replay] Recording the blocks after {block} into the replay corpus {self.corpus.path}"
+        )
+
+    def record(self, mgr: Any, block: int, events: List[Event]) -> None:
+        """
+        Record a block processed by the main loop, once its pool data has been updated. The first block only starts
+        the corpus (see ``start``): the replay starts from its pool data.
+
+        Parameters
+        ----------
+        mgr : Any
+            The manager object.
+        block : int
+            The block number.
+        events : List[Event]
+            The events fetched for the block.
+        """
+        if self.block is None:
+            self.start(mgr, block)
+        else:
+            self.corpus.write_block(block, events, timestamp=int(time.time()))
+            self.snapshot.write(mgr.pool_data, block)
+        self.block = block
+
+
+class ReplayProvider(BaseProvider):
+    """
+    A web3 provider standing in for the node during a replay: it serves the chain id, and the number and timestamp
+    of the current block of the replay, and fails any other request.
+    """
+
+    def __init__(self, chain_id: int, block: int = 0, timestamp: int = 0):
+        super().__init__()
+        self.chain_id = chain_id
+        self.block = block
+        self.timestamp = timestamp
+
+    def set_block(self, block: int, timestamp: int) -> None:
+        self.block = block
+        self.timestamp = timestamp
+
+    def make_request(self, method: str, params: Any) -> Dict[str, Any]:
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 0, "result": hex(self.chain_id)}
+        if method == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": 0, "result": hex(self.block)}
+        if method == "eth_getBlockByNumber":
+            block = {"number": hex(self.block), "timestamp": hex(self.timestamp)}
+            return {"jsonrpc": "2.0", "id": 0, "result": block}
+        return {"jsonrpc": "2.0", "id": 0, "error": {"code": -32601, "message": f"{method} is not replayed"}}
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+class ReplayConfig:
+    """
+    The configuration of a replay: the network configuration of the corpus, with web3 on a ``ReplayProvider``.
+    """
+
+    ETH_PRIVATE_KEY_BE_CAREFUL = REPLAY_PRIVATE_KEY
+
+    def __init__(self, corpus: ReplayCorpus, logger: logging.Logger = None):
+        meta = corpus.meta
+        self.network = ConfigNetwork.new(network=meta["state"]["blockchain"])
+        self.logger = logger or logging.getLogger(__name__)
+        self.replay_provider = ReplayProvider(chain_id=meta["chain_id"], block=meta["block"])
+        self.w3 = Web3(self.replay_provider)
+        self.w3_async = AsyncWeb3()
+        self.ARB_REWARDS_PPM = meta["arb_rewards_ppm"]
+        address = self.network.FASTLANE_CONTRACT_ADDRESS
+        self.BANCOR_ARBITRAGE_CONTRACT = self.w3.eth.contract(
+            address=self.w3.to_checksum_address(address) if address else None,
+            abi=FAST_LANE_CONTRACT_ABI,
+        )
+
+    def __getattr__(self, name: str):
+        if name == "network":
+            raise AttributeError(name)
+        return getattr(self.network, name)
+
+
+class ReplayManager(Manager):
+    """
+    The manager of a replay, whose Carbon fee pairs are restored from the corpus rather than read from the contracts.
+    """
+
+    def set_carbon_v1_fee_pairs(self):
+        for exchange_name, fee_pairs in self.fee_pairs.items():
+            if exchange_name in self.exchanges:
+                self.exchanges[exchange_name].fee_pairs = fee_pairs
+
+    @classmethod
+    def from_corpus(cls, corpus: ReplayCorpus, cfg: ReplayConfig) -> "ReplayManager":
+        """
+        Create the manager with the pool data and state of the first block of a corpus.
+        """
+        meta = corpus.meta
+        state = meta["state"]
+        pool_data, _ = PoolDataSnapshot.load(corpus.pool_data_path, block=meta["block"])
+        mgr = cls(
+            web3=cfg.w3,
+            w3_async=cfg.w3_async,
+            cfg=cfg,
+            pool_data=pool_data,
+            SUPPORTED_EXCHANGES=list(state["exchanges"]),
+            alchemy_max_block_fetch=20,
+            uniswap_v2_event_mappings=state["uniswap_v2_event_mappings"],
+            uniswap_v3_event_mappings=state["uniswap_v3_event_mappings"],
+            solidly_v2_event_mappings=state["solidly_v2_event_mappings"],
+            forked_exchanges=cfg.UNI_V2_FORKS + cfg.UNI_V3_FORKS + cfg.SOLIDLY_V2_FORKS,
+            blockchain=state["blockchain"],
+            carbon_inititalized=dict(state["carbon_inititalized"]),
+            static_pools={name: set(addresses) for name, addresses in meta["static_pools"].items()},
+            read_only=True,
+            _fee_pairs={
+                exchange_name: {(tkn0, tkn1): fee for tkn0, tkn1, fee in fee_pairs}
+                for exchange_name, fee_pairs in state["fee_pairs"].items()
+            },
+        )
+        return mgr
+
+
+def normalize_candidates(candidates: Optional[List[Any]]) -> List[Dict[str, Any]]:
+    """
+    The arbitrage candidates of a ``find_arbitrage`` call as sorted JSON objects (source token, profit and route).
+    """
+    return sorted(
+        (
+            {"src_token": src_token, "profit": float(profit), "cids": [ti["cid"] for ti in trade_instructions_dic]}
+            for profit, _, trade_instructions_dic, src_token, _ in candidates or []
+        ),
+        key=lambda opportunity: (opportunity["src_token"], opportunity["cids"]),
+    )
+
+
+@dataclass
+class ReplayReport:
+    """
+    The result of a replay run.
+
+    Attributes
+    ----------
+    blocks: List[int]
+        The replayed blocks.
+    n_events: int
+        The number of events replayed.
+    seconds: float
+        The duration of the replay (of all stages, including reading the corpus).
+    stages: Dict[str, Dict[str, float]]
+        The latencies of the stages (see ``StageMetrics.as_dict``), plus their ``total``.
+    counters: Dict[str, int]
+        The event counters (the ``pools_synced`` from the recorded pool changes).
+    opportunities: Dict[int, Dict[str, List[Dict[str, Any]]]]
+        The arbitrage opportunities found, by block and arb mode (see ``normalize_candidates``).
+    """
+
+    __VERSION__ = "1.0"
+    __DATE__ = "30/Apr/2024"
+
+    blocks: List[int] = field(default_factory=list)
+    n_events: int = 0
+    seconds: float = 0.0
+    stages: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    opportunities: Dict[int, Dict[str, List[Dict[str, Any]]]] = field(default_factory=dict)
+
+    @property
+    def blocks_per_second(self) -> float:
+        return len(self.blocks) / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def events_per_second(self) -> float:
+        return self.n_events / self.seconds if self.seconds > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "blocks": self.blocks,
+            "n_events": self.n_events,
+            "seconds": self.seconds,
+            "stages": self.stages,
+            "counters": self.counters,
+            "opportunities": {str(block): modes for block, modes in self.opportunities.items()},
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=1)
+
+    @classmethod
+    def load(cls, path: str) -> "ReplayReport":
+        with open(path, "r") as f:
+            data = json.load(f)
+        data["opportunities"] = {int(block): modes for block, modes in data["opportunities"].items()}
+        return cls(**data)
+
+    def summary(self) -> str:
+        """
+        The stage latencies and the throughput, formatted for the logs.
+        """
+        lines = [
+            f"{name:>20}: total {s['total']:.3f}s mean {s['mean'] * 1000:.2f}ms p95 {s['p95'] * 1000:.2f}ms "
+            f"max {s['max'] * 1000:.2f}ms"
+            for name, s in self.stages.items()
+        ]
+        n_opportunities = sum(len(found) for modes in self.opportunities.values() for found in modes.values())
+        lines += [
+            f"{len(self.blocks)} blocks, {self.n_events} events in {self.seconds:.3f}s: "
+            f"{self.blocks_per_second:.2f} blocks/s, {self.events_per_second:.0f} events/s, "
+            f"{n_opportunities} opportunities, {self.counters.get('pools_synced', 0)} pools synced"
+        ]
+        return "\n".join(lines)
+
+    def diff(self, other: "ReplayReport", rel_tol: float = 1e-9) -> List[str]:
+        """
+        The differences between the opportunities found by this run and another run of the same corpus.
+
+        Parameters
+        ----------
+        other : ReplayReport
+            The report of the other run (e.g. the baseline).
+        rel_tol : float, optional
+            The relative tolerance of the profits, by default 1e-9.
+
+        Returns
+        -------
+        List[str]
+            One line per difference, empty if the runs found the same opportunities.
+        """
+        lines = []
+        if self.blocks != other.blocks:
+            lines += [f"blocks: {len(other.blocks)} replayed in the other run, {len(self.blocks)} in this one"]
+        for block in sorted(set(self.blocks) & set(other.blocks)):
+            modes, other_modes = self.opportunities.get(block, {}), other.opportunities.get(block, {})
+            for mode in sorted(set(modes) | set(other_modes)):
+                found = {(o["src_token"], tuple(o["cids"])): o["profit"] for o in modes.get(mode, [])}
+                other_found = {(o["src_token"], tuple(o["cids"])): o["profit"] for o in other_modes.get(mode, [])}
+                for key in sorted(set(found) | set(other_found)):
+                    route = f"{key[0]} {'/'.join(key[1])}"
+                    if key not in other_found:
+                        lines += [f"{block} {mode}: new {route} profit {found[key]}"]
+                    elif key not in found:
+                        lines += [f"{block} {mode}: missing {route} profit {other_found[key]}"]
+                    elif not math.isclose(found[key], other_found[key], rel_tol=rel_tol):
+                        lines += [f"{block} {mode}: {route} profit {other_found[key]} -> {found[key]}"]
+        return lines
+
+
+@dataclass
+class BlockReplay:
+    """
+    Replays a ``ReplayCorpus`` offline, and reports the stage latencies and the opportunities (see module docstring).
+
+    Attributes
+    ----------
+    corpus: ReplayCorpus
+        The corpus to replay.
+    arb_modes: List[str]
+        The arb modes whose ``find_arbitrage`` is run on every block (see ``CarbonBot.ARB_FINDER``).
+    flashloan_tokens: List[str]
+        The flashloan tokens, by default the ones recorded (or the ones of the network if none were).
+    curve_cache: bool
+        Whether the curves are cached across blocks, as in the main loop (see ``CurveCache``).
+    incremental_arb_search: bool
+        Whether the combos without arb are skipped until their curves change (see ``NoArbCache``).
+    margp_price_cache: bool
+        Whether the marginal price optimizer is warm started from the previous blocks (see ``PriceCache``).
+    arb_workers: int
+        The number of worker processes solving the curve combos.
+    logger: logging.Logger
+        The logger of the replayed bot.
+    mgr: ReplayManager
+        The manager of the last run, with the pool data of its last block.
+    """
+
+    __VERSION__ = "1.0"
+    __DATE__ = "30/Apr/2024"
+
+    corpus: ReplayCorpus
+    arb_modes: List[str] = field(default_factory=lambda: ["multi"])
+    flashloan_tokens: List[str] = None
+    curve_cache: bool = True
+    incremental_arb_search: bool = False
+    margp_price_cache: bool = False
+    arb_workers: int = 1
+    logger: logging.Logger = None
+    mgr: ReplayManager = field(default=None, init=False, repr=False)
+
+    def _apply_changes(self, mgr: Any, records: List[Dict[str, Any]]) -> int:
+        """
+        Apply the recorded pool changes of a block which the events did not reproduce, ie the records whose version
+        (see ``PoolDataSnapshot``) differs from the pool after the events; returns their number.
+        """
+        deleted = [record["cid"] for record in records if record.get(DELETED)]
+        n_changed = mgr.pool_data.delete_cids(deleted) if deleted else 0
+        for record in records:
+            if record.get(DELETED):
+                continue
+            pool = mgr.pool_data.by_cid(record["cid"])
+            if pool is None or PoolDataSnapshot._version(pool) != PoolDataSnapshot._version(record):
+                mgr.pool_data.upsert(record)
+                n_changed += 1
+        return n_changed
+
+    def run(self, max_blocks: int = None) -> ReplayReport:
+        """
+        Replay the blocks of the corpus.
+
+        Parameters
+        ----------
+        max_blocks : int, optional
+            The number of blocks to replay, by default all of them.
+
+        Returns
+        -------
+        ReplayReport
+            The report of the run.
+        """
+        cfg = ReplayConfig(self.corpus, logger=self.logger)
+        self.mgr = mgr = ReplayManager.from_corpus(self.corpus, cfg)
+        flashloan_tokens = self.flashloan_tokens or self.corpus.meta["flashloan_tokens"]
+        curve_cache = CurveCache() if self.curve_cache else None
+        no_arb_cache = NoArbCache() if self.incremental_arb_search else None
+        price_cache = PriceCache() if self.margp_price_cache else None
+        arb_executor = ArbComboExecutor(workers=self.arb_workers) if self.arb_workers > 1 else None
+        changes = {block: records for block, records in PoolDataSnapshot.deltas(self.corpus.pool_data_path)}
+
+        metrics = StageMetrics()
+        report = ReplayReport()
+        for block in self.corpus.blocks()[:max_blocks]:
+            timer = metrics.timer()
+            recorded = self.corpus.read_block(block)
+            cfg.replay_provider.set_block(block, recorded["timestamp"])
+            timer.lap("load")
+
+            update_pools_from_events(-1, mgr, recorded["events"])
+            mgr.pools_to_add_from_contracts = []
+            timer.lap("apply")
+            metrics.increment("pools_synced", self._apply_changes(mgr, changes.get(block, [])))
+            timer.lap("sync")
+
+            bot = init_bot(
+                mgr, curve_cache, no_arb_cache, self.arb_workers, price_cache=price_cache, arb_executor=arb_executor
+            )
+            timer.lap("init")
+            CCm = bot.get_curves()
+            timer.lap("curves")
+            opportunities = {}
+            for arb_mode in self.arb_modes:
+                r = bot._find_arbitrage(flashloan_tokens or bot.RUN_FLASHLOAN_TOKENS, CCm, arb_mode, randomizer=1)
+                opportunities[arb_mode] = normalize_candidates(r["r"])
+                timer.lap(f"find_{arb_mode}")
+
+            report.blocks += [block]
+            report.n_events += len(recorded["events"])
+            report.seconds += time.perf_counter() - timer.start
+            report.opportunities[block] = opportunities
+
+        if arb_executor is not None:
+            arb_executor.shutdown()
+
+        metrics_dict = metrics.as_dict()
+        for name, latency in metrics_dict["stages"].items():
+            report.stages[name] = {**latency, "total": metrics.stages[name].total}
+        report.counters = metrics_dict["counters"]
+        return report
@@ -0,0 +1,273 @@
+"""
+Contains the tick data cache of the Uniswap v3 pools.
+
+The pool data of a Uniswap v3 (fork) pool only holds the liquidity of the current tick, so its curve covers a single
+tick range. The cache reads, with batched multicalls, the tick bitmap words around the current tick of every pool
+(``tickBitmap``) and the ``liquidityNet`` of the initialized ticks in them (``ticks``), and stores them in the pool
+records as ``TickData``; the curves of the pools then span all the liquidity ranges of that window (see
+``Univ3Calculator.range_params``), and the route handler swaps across the ticks (see
+``weimath.uniswap_v3_output_ticks``).
+
+The words are read once, when they enter the window around the current tick. Afterwards, only the words crossed by
+the swaps since the previous refresh (ie between the previous and the current tick of the pool, as updated by the
+Swap events) are read again. The ``liquidityNet`` of a tick only changes on Mint and Burn, which the bot does not
+subscribe to; the liquidity ranges away from the current tick can therefore be out of date until they are crossed.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+
+from fastlane_bot.config.multicaller import MultiCaller
+from fastlane_bot.helpers.univ3calc import TickData
+
+
+def _word(tick: int, tick_spacing: int) -> int:
+    """
+    The position of the tick bitmap word of a tick (``TickBitmap.position``).
+    """
+    return (tick // tick_spacing) >> 8
+
+
+def initialized_ticks(word: int, bitmap: int, tick_spacing: int) -> List[int]:
+    """
+    The initialized ticks of a tick bitmap word.
+
+    Parameters
+    ----------
+    word: int
+        The position of the word.
+    bitmap: int
+        The word of the tick bitmap.
+    tick_spacing: int
+        The tick spacing of the pool.
+
+    Returns
+    -------
+    List[int]
+        The initialized ticks, sorted.
+    """
+    return [(word * 256 + bit) * tick_spacing for bit in range(256) if bitmap >> bit & 1]
+
+
+@dataclass
+class PoolTicks:
+    """
+    The tick bitmap words read for a pool.
+
+    Attributes
+    ----------
+    tick: int
+        The tick of the pool at the last refresh.
+    words: Dict[int, int]
+        The tick bitmap words read, by word position.
+    liquidity_net: Dict[int, int]
+        The liquidityNet of the initialized ticks in the words read, by tick.
+    """
+
+    tick: int
+    words: Dict[int, int] = field(default_factory=dict)
+    liquidity_net: Dict[int, int] = field(default_factory=dict)
+
+
+@dataclass
+class TickCache:
+    """
+    Caches the initialized ticks of the Uniswap v3 pools and writes them to the pool data (see module docstring).
+
+    Attributes
+    ----------
+    radius: int
+        The number of tick bitmap words read on either side of the word of the current tick.
+    pools: Dict[str, PoolTicks]
+        The words read, by cid.
+    contracts: Dict[str, Any]
+        The pool contracts, by address.
+    """
+
+    __VERSION__ = "1.0"
+    __DATE__ = "29/Apr/2024"
+
+    radius: int = 1
+    pools: Dict[str, PoolTicks] = field(default_factory=dict)
+    contracts: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    def window(self, tick: int, tick_spacing: int) -> range:
+        """
+        The positions of the tick bitmap words around a tick.
+        """
+        word = _word(tick, tick_spacing)
+        return range(word - self.radius, word + self.radius + 1)
+
+    def dirty_words(self, cid: str, tick: int, tick_spacing: int) -> List[int]:
+        """
+        The words of a pool to (re)read: the words of the window that were not read yet, and the words crossed since
+        the last refresh.
+
+        Parameters
+        ----------
+        cid: str
+            The cid of the pool.
+        tick: int
+            The current tick of the pool.
+        tick_spacing: int
+            The tick spacing of the pool.
+
+        Returns
+        -------
+        List[int]
+            The positions of the words, sorted.
+        """
+        window = self.window(tick, tick_spacing)
+        pool = self.pools.get(cid)
+        if pool is None:
+            return list(window)
+        if pool.tick != tick:
+            last_word, word = _word(pool.tick, tick_spacing), _word(tick, tick_spacing)
+            crossed = range(min(last_word, word), max(last_word, word) + 1)
+        else:
+            crossed = range(0)
+        return [word for word in window if word not in pool.words or word in crossed]
+
+    def update(
+        self,
+        cid: str,
+        tick: int,
+        tick_spacing: int,
+        words: Dict[int, int],
+        liquidity_net: Dict[int, int],
+    ) -> TickData:
+        """
+        Updates the tick data of a pool with words read from the chain.
+
+        Parameters
+        ----------
+        cid: str
+            The cid of the pool.
+        tick: int
+            The current tick of the pool.
+        tick_spacing: int
+            The tick spacing of the pool.
+        words: Dict[int, int]
+            The words read, by word position.
+        liquidity_net: Dict[int, int]
+            The liquidityNet of the initialized ticks in the words read, by tick.
+
+        Returns
+        -------
+        TickData
+            The tick data of the window around the current tick.
+        """
+        window = self.window(tick, tick_spacing)
+        pool = self.pools.setdefault(cid, PoolTicks(tick=tick))
+        pool.tick = tick
+        pool.words = {w: bitmap for w, bitmap in {**pool.words, **words}.items() if w in window}
+        pool.liquidity_net = {
+            t: net for t, net in pool.liquidity_net.items()
+            if _word(t, tick_spacing) in pool.words and _word(t, tick_spacing) not in words
+        }
+        pool.liquidity_net.update(liquidity_net)
+        return TickData(
+            lower=window[0] * 256 * tick_spacing,
+            upper=(window[-1] * 256 + 255) * tick_spacing,
+            liquidity_net=tuple(sorted(pool.liquidity_net.items())),
+        )
+
+    def _contract(self, mgr: Any, pool: Dict[str, Any]) -> Any:
+        address = pool["address"]
+        if address not in self.contracts:
+            self.contracts[address] = mgr.pool_contracts.get(pool["exchange_name"], {}).get(address) or \
+                mgr.web3.eth.contract(address=address, abi=mgr.exchanges[pool["exchange_name"]].get_abi())
+        return self.contracts[address]
+
+    def _multicaller(self, mgr: Any) -> MultiCaller:
+        return MultiCaller(
+            mgr.web3,
+            mgr.cfg.MULTICALL_CONTRACT_ADDRESS,
+            web3_async=mgr.w3_async,
+            batch_size=mgr.cfg.MULTICALL_BATCH_SIZE,
+        )
+
+    def _pools(self, mgr: Any) -> Iterable[Dict[str, Any]]:
+        """
+        The Uniswap v3 (fork) pools with liquidity (unique by cid).
+        """
+        pools = {}
+        for exchange in mgr.cfg.UNI_V3_FORKS:
+            if exchange not in mgr.exchanges:
+                continue
+            for pool in mgr.pool_data.by_exchange(exchange):
+                tick, tick_spacing, liquidity = (pool.get(key) for key in ("tick", "tick_spacing", "liquidity"))
+                if any(value is None or value != value for value in (tick, tick_spacing, liquidity)):
+                    continue
+                if int(tick_spacing) > 0 and int(liquidity) > 0:
+                    pools.setdefault(pool["cid"], pool)
+        return pools.values()
+
+    def refresh(self, mgr: Any, current_block: int) -> int:
+        """
+        Reads the dirty words of all Uniswap v3 (fork) pools and writes their tick data to the pool data.
+
+        The pools whose tick data changed get ``last_updated_block = current_block``, so that their curves are rebuilt.
+
+        Parameters
+        ----------
+        mgr: Any
+            The manager object.
+        current_block: int
+            The current block.
+
+        Returns
+        -------
+        int
+            The number of pools updated.
+        """
+        reads: List[Tuple[Dict[str, Any], int]] = []
+        bitmap_caller = self._multicaller(mgr)
+        for pool in self._pools(mgr):
+            for word in self.dirty_words(pool["cid"], int(pool["tick"]), int(pool["tick_spacing"])):
+                bitmap_caller.add_call(self._contract(mgr, pool).functions.tickBitmap(word))
+                reads.append((pool, word))
+        if not reads:
+            return 0
+        raw_results = bitmap_caller.run_calls_raw(current_block)
+
+        # the pools whose calls fail (eg forks without a tick bitmap) are skipped
+        failed = {pool["cid"] for (pool, _), (success, _) in zip(reads, raw_results) if not success}
+        words: Dict[str, Dict[int, int]] = {}
+        tick_reads: List[Tuple[Dict[str, Any], int]] = []
+        ticks_caller = self._multicaller(mgr)
+        for idx, ((pool, word), raw_result) in enumerate(zip(reads, raw_results)):
+            if pool["cid"] in failed:
+                continue
+            bitmap = bitmap_caller.decode(idx, raw_result)
+            words.setdefault(pool["cid"], {})[word] = bitmap
+            for tick in initialized_ticks(word, bitmap, int(pool["tick_spacing"])):
+                ticks_caller.add_call(self._contract(mgr, pool).functions.ticks(tick))
+                tick_reads.append((pool, tick))
+        raw_results = ticks_caller.run_calls_raw(current_block) if tick_reads else []
+
+        liquidity_net: Dict[str, Dict[int, int]] = {}
+        for idx, ((pool, tick), raw_result) in enumerate(zip(tick_reads, raw_results)):
+            if not raw_result[0]:
+                failed.add(pool["cid"])
+                continue
+            # ticks() returns (liquidityGross, liquidityNet, ...)
+            liquidity_net.setdefault(pool["cid"], {})[tick] = ticks_caller.decode(idx, raw_result)[1]
+
+        n_updated = 0
+        for pool in {pool["cid"]: pool for pool, _ in reads}.values():
+            cid = pool["cid"]
+            if cid in failed:
+                continue
+            tick_data = self.update(
+                cid, int(pool["tick"]), int(pool["tick_spacing"]), words.get(cid, {}), liquidity_net.get(cid, {})
+            )
+            if TickData.from_value(pool.get("tick_data")) != tick_data:
+                pool["tick_data"] = tick_data
+                pool["last_updated_block"] = current_block
+                n_updated += 1
+        return n_updated
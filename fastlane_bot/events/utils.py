@@ -9,19 +9,21 @@ All rights reserved.
 Licensed under MIT.
 """
 import base64
+import hashlib
 import json
 import os
+import pickle
 import random
 import time
 from _decimal import Decimal
 from glob import glob
-from typing import Any, Union, Dict, Set, Tuple, Hashable
+from typing import Any, Union, Dict, Set, Tuple, Hashable, Optional
 from typing import List
 
-import numpy as np
 import pandas as pd
 import requests
 from hexbytes import HexBytes
+from eth_utils import keccak
 from joblib import Parallel, delayed
 from web3 import AsyncWeb3, Web3
 from web3.datastructures import AttributeDict
@@ -31,8 +33,12 @@ from fastlane_bot.bot import CarbonBot
 from fastlane_bot.data.abi import FAST_LANE_CONTRACT_ABI
 from fastlane_bot.exceptions import ReadOnlyException
 from fastlane_bot.events.interface import QueryInterface
+from fastlane_bot.events.pool_snapshot import PoolDataSnapshot
 
-from fastlane_bot.helpers import TxHelpers
+from fastlane_bot.helpers import TxHelpers, CurveCache
+from fastlane_bot.modes.executor import ArbComboExecutor
+from fastlane_bot.modes.no_arb_cache import NoArbCache
+from fastlane_bot.tools.optimizer import PriceCache
 from fastlane_bot.utils import safe_int
 from .interfaces.event import Event
 
@@ -227,6 +233,206 @@ def get_tkn_symbols(flashloan_tokens, tokens: pd.DataFrame) -> List:
     return flashloan_tkn_symbols
 
 
+STATIC_DATA_CACHE_DIRNAME = ".cache"
+STATIC_DATA_CACHE_VERSION = 1
+
+
+def checksum_addresses(addresses: pd.Series) -> pd.Series:
+    """
+    Converts a column of addresses to checksum addresses, converting every distinct address once.
+
+    Parameters
+    ----------
+    addresses : pd.Series
+        The addresses.
+
+    Returns
+    -------
+    pd.Series
+        The checksum addresses.
+    """
+    unique = addresses.dropna().unique()
+    return addresses.map(dict(zip(unique, map(Web3.to_checksum_address, unique))))
+
+
+def file_digest(filepath: str) -> str:
+    """
+    Gets the sha256 digest of a file.
+
+    Parameters
+    ----------
+    filepath : str
+        The file path.
+
+    Returns
+    -------
+    str
+        The hex digest.
+    """
+    with open(filepath, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def static_data_cache_key(cache_dir: str, *filepaths: str) -> str:
+    """
+    Gets the cache key of the static data computed from the given files, which is the hash of their contents.
+
+    The keys are memoized in the cache index by the modification times and sizes of the files, so the files are only
+    hashed again when they were touched.
+
+    Parameters
+    ----------
+    cache_dir : str
+        The cache directory.
+    filepaths : str
+        The file paths.
+
+    Returns
+    -------
+    str
+        The cache key.
+    """
+    index_path = os.path.join(cache_dir, "index.json")
+    try:
+        with open(index_path, "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    stat_key = ",".join(
+        f"{os.path.abspath(filepath)}:{st.st_mtime_ns}:{st.st_size}"
+        for filepath, st in zip(filepaths, map(os.stat, filepaths))
+    )
+    if stat_key not in index:
+        index[stat_key] = hashlib.sha256(
+            f"{STATIC_DATA_CACHE_VERSION}:{','.join(map(file_digest, filepaths))}".encode()
+        ).hexdigest()
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(index_path, "w") as f:
+                json.dump(index, f)
+        except OSError:
+            pass
+    return index[stat_key]
+
+
+def process_static_pool_data(
+    static_pool_data: pd.DataFrame, tokens: pd.DataFrame
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Processes the raw static pool data and tokens: checksums the addresses, joins the token symbols and decimals to the
+    pools, and computes the pair names, descriptions and cids of the pools.
+
+    Parameters
+    ----------
+    static_pool_data : pd.DataFrame
+        The static pool data, as read from the CSV file.
+    tokens : pd.DataFrame
+        The tokens, as read from the CSV file.
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, pd.DataFrame]
+        The static pool data and tokens.
+    """
+    tokens["address"] = checksum_addresses(tokens["address"])
+    tokens = tokens.drop_duplicates(subset=["address"])
+    tokens = tokens.dropna(subset=["decimals", "symbol", "address"])
+    tokens["symbol"] = (
+        tokens["symbol"]
+        .str.replace(" ", "_")
+        .str.replace("/", "_")
+        .str.replace("-", "_")
+    )
+
+    pool_addresses = checksum_addresses(
+        pd.concat([static_pool_data["tkn0_address"], static_pool_data["tkn1_address"]], ignore_index=True)
+    )
+    static_pool_data["tkn0_address"] = pool_addresses[: len(static_pool_data)].values
+    static_pool_data["tkn1_address"] = pool_addresses[len(static_pool_data) :].values
+
+    token_info = tokens.set_index("address")
+    for keyname in ["decimals", "symbol"]:
+        for tkn in ["tkn0", "tkn1"]:
+            static_pool_data[f"{tkn}_{keyname}"] = (
+                token_info[keyname].reindex(static_pool_data[f"{tkn}_address"]).values
+            )
+
+    static_pool_data["pair_name"] = (
+        static_pool_data["tkn0_address"] + "/" + static_pool_data["tkn1_address"]
+    )
+    static_pool_data = static_pool_data.dropna(
+        subset=[
+            "pair_name",
+            "exchange_name",
+            "fee",
+            "tkn0_symbol",
+            "tkn1_symbol",
+            "tkn0_decimals",
+            "tkn1_decimals",
+        ]
+    )
+
+    static_pool_data["descr"] = (
+        static_pool_data["exchange_name"]
+        + " "
+        + static_pool_data["pair_name"]
+        + " "
+        + static_pool_data["fee"].astype(str)
+    )
+    static_pool_data["cid"] = ["0x" + keccak(text=descr).hex() for descr in static_pool_data["descr"]]
+
+    static_pool_data = static_pool_data.drop_duplicates(subset=["cid"])
+    static_pool_data.reset_index(drop=True, inplace=True)
+    return static_pool_data, tokens
+
+
+def load_static_pool_data(
+    static_pool_data_filepath: str, tokens_filepath: str, cache_dir: str = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Loads and processes the static pool data and tokens (see ``process_static_pool_data``).
+
+    The processed frames are cached in ``cache_dir``, keyed by the contents of the CSV files (see
+    ``static_data_cache_key``).
+
+    Parameters
+    ----------
+    static_pool_data_filepath : str
+        The static pool data CSV file.
+    tokens_filepath : str
+        The tokens CSV file.
+    cache_dir : str, optional
+        The cache directory, by default None (no cache).
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, pd.DataFrame]
+        The static pool data (for all exchanges) and tokens.
+    """
+    cache_path = None
+    if cache_dir is not None:
+        key = static_data_cache_key(cache_dir, static_pool_data_filepath, tokens_filepath)
+        cache_path = os.path.join(cache_dir, f"{os.path.basename(static_pool_data_filepath)}.{key}.pkl")
+        try:
+            return pd.read_pickle(cache_path)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            pass
+
+    static_pool_data, tokens = process_static_pool_data(
+        read_csv_file(static_pool_data_filepath), read_csv_file(tokens_filepath)
+    )
+    if cache_path is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            for stale_path in glob(os.path.join(cache_dir, f"{os.path.basename(static_pool_data_filepath)}.*.pkl")):
+                os.remove(stale_path)
+            pd.to_pickle((static_pool_data, tokens), f"{cache_path}.tmp")
+            os.replace(f"{cache_path}.tmp", cache_path)
+        except OSError:
+            pass
+    return static_pool_data, tokens
+
+
 def get_static_data(
     cfg: Config,
     exchanges: List[str],
@@ -261,11 +467,6 @@ def get_static_data(
     static_pool_data_filepath = os.path.join(
         base_path, f"{static_pool_data_filename}.csv"
     )
-    static_pool_data = read_csv_file(static_pool_data_filepath)
-    static_pool_data = static_pool_data[
-        static_pool_data["exchange_name"].isin(exchanges)
-    ]
-
     # Read Uniswap v2 event mappings and tokens
     uniswap_v2_filepath = os.path.join(base_path, "uniswap_v2_event_mappings.csv")
     uniswap_v2_event_mappings_df = read_csv_file(uniswap_v2_filepath)
@@ -294,72 +495,14 @@ def get_static_data(
         raise ReadOnlyException(
             f"Tokens file {tokens_filepath} does not exist. Please run the bot in non-read-only mode to create it."
         )
-    tokens = read_csv_file(tokens_filepath)
-    tokens["address"] = tokens["address"].apply(lambda x: Web3.to_checksum_address(x))
-    tokens = tokens.drop_duplicates(subset=["address"])
-    tokens = tokens.dropna(subset=["decimals", "symbol", "address"])
-    tokens["symbol"] = (
-        tokens["symbol"]
-        .str.replace(" ", "_")
-        .str.replace("/", "_")
-        .str.replace("-", "_")
-    )
-
-    def correct_tkn(tkn_address, keyname):
-        try:
-            return tokens[tokens["address"] == tkn_address][keyname].values[0]
-        except IndexError:
-            return np.nan
-
-    static_pool_data["tkn0_address"] = static_pool_data["tkn0_address"].apply(
-        lambda x: Web3.to_checksum_address(x)
-    )
-    static_pool_data["tkn1_address"] = static_pool_data["tkn1_address"].apply(
-        lambda x: Web3.to_checksum_address(x)
-    )
-    static_pool_data["tkn0_decimals"] = static_pool_data["tkn0_address"].apply(
-        lambda x: correct_tkn(x, "decimals")
-    )
-    static_pool_data["tkn1_decimals"] = static_pool_data["tkn1_address"].apply(
-        lambda x: correct_tkn(x, "decimals")
-    )
-
-    static_pool_data["tkn0_symbol"] = static_pool_data["tkn0_address"].apply(
-        lambda x: correct_tkn(x, "symbol")
-    )
-    static_pool_data["tkn1_symbol"] = static_pool_data["tkn1_address"].apply(
-        lambda x: correct_tkn(x, "symbol")
-    )
-    static_pool_data["pair_name"] = (
-        static_pool_data["tkn0_address"] + "/" + static_pool_data["tkn1_address"]
-    )
-    static_pool_data = static_pool_data.dropna(
-        subset=[
-            "pair_name",
-            "exchange_name",
-            "fee",
-            "tkn0_symbol",
-            "tkn1_symbol",
-            "tkn0_decimals",
-            "tkn1_decimals",
-        ]
+    static_pool_data, tokens = load_static_pool_data(
+        static_pool_data_filepath,
+        tokens_filepath,
+        cache_dir=None if read_only else os.path.join(base_path, STATIC_DATA_CACHE_DIRNAME),
     )
-
-    static_pool_data["descr"] = (
-        static_pool_data["exchange_name"]
-        + " "
-        + static_pool_data["pair_name"]
-        + " "
-        + static_pool_data["fee"].astype(str)
-    )
-    # Initialize web3
-    static_pool_data["cid"] = [
-        cfg.w3.keccak(text=f"{row['descr']}").hex()
-        for index, row in static_pool_data.iterrows()
-    ]
-
-    static_pool_data = static_pool_data.drop_duplicates(subset=["cid"])
-    static_pool_data.reset_index(drop=True, inplace=True)
+    static_pool_data = static_pool_data[
+        static_pool_data["exchange_name"].isin(exchanges)
+    ].reset_index(drop=True)
 
     return (
         static_pool_data,
@@ -737,6 +880,8 @@ def convert_to_serializable(data: Any) -> Any:
         return [convert_to_serializable(item) for item in data]
     elif hasattr(data, "__dict__"):
         return convert_to_serializable(data.__dict__)
+    elif hasattr(data, "__slots__"):
+        return convert_to_serializable({key: getattr(data, key) for key in data.__slots__})
     else:
         return data
 
@@ -809,57 +954,81 @@ def process_new_events(new_event_mappings, event_mappings, filename, read_only):
 
 def update_pools_from_events(n_jobs: int, mgr: Any, latest_events: List[Event]):
     """
-    Updates the pools with the given events.
+    Updates the pools with the given events, in a single pass (see ``Manager.update_from_events``).
 
     Parameters
     ----------
     n_jobs : int
-        The number of jobs to run in parallel.
+        Unused. The events used to be applied by a pool of threads, which only added overhead to the (GIL-bound)
+        pool data updates.
     mgr : Any
         The manager object.
+    latest_events : List[Event]
+        The events to apply.
 
     """
-    Parallel(n_jobs=n_jobs, backend="threading")(
-        delayed(mgr.update_from_event)(event=event) for event in latest_events
+    n_updated = mgr.update_from_events(latest_events)
+    mgr.cfg.logger.debug(
+        f"[events.utils.update_pools_from_events] Applied {len(latest_events)} events to {n_updated} pools"
     )
 
 
 def write_pool_data_to_disk(
-    cache_latest_only: bool, logging_path: str, mgr: Any, current_block: int
+    cache_latest_only: bool,
+    logging_path: str,
+    mgr: Any,
+    current_block: int,
+    snapshot: PoolDataSnapshot = None,
 ) -> None:
     """
-    Writes the pool data to disk.
+    Writes the changes of the pool data since the last write to a columnar snapshot (see ``PoolDataSnapshot``).
 
     Parameters
     ----------
     cache_latest_only : bool
-        Whether to cache the latest pool data only.
+        Whether to cache the latest pool data only. Otherwise, the changes of every block are kept in ``pool_data``.
     logging_path : str
         The logging path.
     mgr : Any
         The manager object.
     current_block : int
         The current block number.
+    snapshot : PoolDataSnapshot, optional
+        The snapshot to write to, which must be kept across iterations for the writes to be incremental; by default
+        a new one for ``cache_latest_only``.
     """
-    if cache_latest_only:
-        path = f"{logging_path}/latest_pool_data.json"
-    else:
-        if not os.path.isdir("pool_data"):
-            os.mkdir("pool_data")
-        path = f"pool_data/{mgr.SUPPORTED_EXCHANGES}_{current_block}.json"
+    if snapshot is None:
+        snapshot = pool_data_snapshot(cache_latest_only, logging_path)
     try:
-        df = pd.DataFrame(mgr.pool_data)
-
-        def remove_nan(row):
-            return {col: val for col, val in row.items() if pd.notna(val)}
-
-        # Apply the function to each row
-        cleaned_df = df.apply(remove_nan, axis=1)
-        cleaned_df.to_json(path, orient="records")
+        n_written = snapshot.write(mgr.pool_data, current_block)
+        mgr.cfg.logger.debug(
+            f"[events.utils.write_pool_data_to_disk] Wrote {n_written} pools to {snapshot.path} at block {current_block}"
+        )
     except Exception as e:
         mgr.cfg.logger.error(f"Error writing pool data to disk: {e}")
 
 
+def pool_data_snapshot(cache_latest_only: bool, logging_path: str) -> PoolDataSnapshot:
+    """
+    Gets the snapshot the pool data is written to.
+
+    Parameters
+    ----------
+    cache_latest_only : bool
+        Whether to cache the latest pool data only (the deltas are compacted), or the changes of every block.
+    logging_path : str
+        The logging path.
+
+    Returns
+    -------
+    PoolDataSnapshot
+        The snapshot.
+    """
+    if cache_latest_only:
+        return PoolDataSnapshot(os.path.join(logging_path, "pool_data_snapshot"))
+    return PoolDataSnapshot("pool_data", compact_every=None)
+
+
 def parse_non_multicall_rows_to_update(
     mgr: Any,
     rows_to_update: List[Hashable],
@@ -888,7 +1057,18 @@ def parse_non_multicall_rows_to_update(
     return other_pool_rows
 
 
-def init_bot(mgr: Any) -> CarbonBot:
+def init_bot(
+    mgr: Any,
+    curve_cache: CurveCache = None,
+    no_arb_cache: NoArbCache = None,
+    arb_workers: int = 1,
+    pool_data: List[Dict[str, Any]] = None,
+    tx_helpers: TxHelpers = None,
+    max_arbs_per_block: int = 1,
+    integer_route_math: bool = False,
+    price_cache: PriceCache = None,
+    arb_executor: ArbComboExecutor = None,
+) -> CarbonBot:
     """
     Initializes the bot.
 
@@ -896,6 +1076,27 @@ def init_bot(mgr: Any) -> CarbonBot:
     ----------
     mgr : Base
         The manager object.
+    curve_cache : CurveCache, optional
+        The curve cache to share across iterations, by default None (curves are rebuilt on every call).
+    no_arb_cache : NoArbCache, optional
+        The no-arb verdicts to share across iterations, by default None (the whole market is searched every time).
+    arb_workers : int, optional
+        The number of worker processes solving the curve combos, by default 1 (no process pool).
+    pool_data : List[Dict[str, Any]], optional
+        The pool records to search (e.g. the snapshot of a block), by default None (the pool data of the manager).
+    tx_helpers : TxHelpers, optional
+        The transaction helpers to share across iterations (e.g. to track the pending transactions), by default None
+        (new ones are created).
+    max_arbs_per_block : int, optional
+        The number of non-conflicting arb opportunities submitted per block, by default 1.
+    integer_route_math : bool, optional
+        Whether the routes are recalculated with the wei-exact integer math, by default False (``Decimal`` math).
+    price_cache : PriceCache, optional
+        The optimal prices to warm start the ``MargPOptimizer`` from, shared across iterations, by default None
+        (every optimization starts from the price estimates).
+    arb_executor : ArbComboExecutor, optional
+        The process pool solving the curve combos, shared across iterations, by default None (with ``arb_workers > 1``,
+        a pool is started for every search).
 
     Returns
     -------
@@ -905,12 +1106,19 @@ def init_bot(mgr: Any) -> CarbonBot:
     db = QueryInterface(
         mgr=mgr,
         ConfigObj=mgr.cfg,
-        state=mgr.pool_data,
+        state=mgr.pool_data if pool_data is None else pool_data,
         uniswap_v2_event_mappings=mgr.uniswap_v2_event_mappings,
         exchanges=mgr.exchanges,
     )
-    bot = CarbonBot(ConfigObj=mgr.cfg)
+    bot = CarbonBot(ConfigObj=mgr.cfg, tx_helpers=tx_helpers)
     bot.db = db
+    bot.curve_cache = curve_cache
+    bot.no_arb_cache = no_arb_cache
+    bot.arb_workers = arb_workers
+    bot.max_arbs_per_block = max_arbs_per_block
+    bot.integer_route_math = integer_route_math
+    bot.price_cache = price_cache
+    bot.arb_executor = arb_executor
 
     assert isinstance(
         bot.db, QueryInterface
@@ -932,7 +1140,8 @@ def update_pools_from_contracts(
     mgr : Any
         The manager object.
     n_jobs : int
-        The number of jobs to run in parallel.
+        The number of threads fetching the pool states from the contracts (the writes to the pool data are
+        serialized by ``mgr.pool_data_lock``).
     rows_to_update : List[int]
         A list of rows to update.
     current_block : int, optional
@@ -1252,6 +1461,66 @@ def get_latest_events(
     return latest_events
 
 
+def get_streamed_events(
+    mgr: Any,
+    event_stream: "EventStream",
+    event_gatherer: "EventGatherer",
+    last_block: int,
+    timeout: float,
+    cache_latest_only: bool,
+    logging_path: str,
+) -> Tuple[Optional[int], List[Any]]:
+    """
+    Gets the events of the blocks after ``last_block`` from the event stream, waiting for the next block if needed. The
+    blocks the stream may have missed (before it (re)connected) are fetched with ``eth_getLogs``.
+
+    Parameters
+    ----------
+    mgr : Any
+        The manager object.
+    event_stream : EventStream
+        The event stream.
+    event_gatherer : EventGatherer
+        The event gatherer, to fetch the missed blocks.
+    last_block : int
+        The last block processed.
+    timeout : float
+        The maximum number of seconds to wait for a block.
+    cache_latest_only : bool
+        Whether to cache the latest events only.
+    logging_path : str
+        The logging path.
+
+    Returns
+    -------
+    Tuple[Optional[int], List[Any]]
+        The last block streamed and the latest events, or None and an empty list if no block was streamed (the stream
+        is down, or timed out).
+    """
+    # the blocks up to last_block may have been polled while the stream was reconnecting
+    batches = [batch for batch in event_stream.get(timeout) if batch.to_block > last_block]
+    if len(batches) == 0:
+        return None, []
+    current_block, complete_from = batches[-1].to_block, batches[-1].complete_from
+    events = [event for batch in batches for event in batch.events if event.block_number > last_block]
+    if last_block + 1 < complete_from:
+        backfill_to_block = min(complete_from - 1, current_block)
+        mgr.cfg.logger.info(
+            f"[events.utils.get_streamed_events] Fetching the events from {last_block + 1} to {backfill_to_block} "
+            f"missed by the stream"
+        )
+        events = event_gatherer.get_all_events(from_block=last_block + 1, to_block=backfill_to_block) + [
+            event for event in events if event.block_number >= complete_from
+        ]
+
+    latest_events = filter_latest_events(mgr, events)
+    mgr.cfg.logger.info(
+        f"[events.utils.get_streamed_events] Streamed {len(latest_events)} new events up to block {current_block}"
+    )
+    save_events_to_json(cache_latest_only, logging_path, mgr, latest_events, last_block + 1, current_block)
+    return current_block, latest_events
+
+
 def get_start_block(
     alchemy_max_block_fetch: int,
     last_block: int,
@@ -1707,6 +1976,29 @@ def get_current_block(
     return current_block
 
 
+def get_current_block_header(mgr: Any, reorg_delay: int) -> Any:
+    """
+    Get the header of the block reorg_delay blocks ago (see ``get_current_block``), in a single request without
+    reorg_delay; its number is the current block, and its parent hash checks the event journal.
+
+    Parameters
+    ----------
+    mgr: Any
+        The manager object
+    reorg_delay: int
+        The number of blocks to wait to avoid reorgs
+
+    Returns
+    -------
+    Any
+        The block header
+
+    """
+    if reorg_delay == 0:
+        return mgr.web3.eth.get_block("latest")
+    return mgr.web3.eth.get_block(mgr.web3.eth.block_number - reorg_delay)
+
+
 def handle_static_pools_update(mgr: Any):
     """
     Handles the static pools update 1x at startup and then periodically thereafter upon terraformer runs.
@@ -1741,17 +2033,18 @@ def handle_static_pools_update(mgr: Any):
         .to_dict(orient="records")
     )
     if "uniswap_v2_pools" not in mgr.static_pools:
-        mgr.static_pools["uniswap_v2_pools"] = []
+        mgr.static_pools["uniswap_v2_pools"] = set()
     if "uniswap_v3_pools" not in mgr.static_pools:
-        mgr.static_pools["uniswap_v3_pools"] = []
+        mgr.static_pools["uniswap_v3_pools"] = set()
     if "solidly_v2_pools" not in mgr.static_pools:
-        mgr.static_pools["solidly_v2_pools"] = []
+        mgr.static_pools["solidly_v2_pools"] = set()
 
     for ex in mgr.forked_exchanges:
         if ex in mgr.exchanges:
-            exchange_pools = [
+            # a set, since every event is matched against these addresses
+            exchange_pools = {
                 e["address"] for e in all_event_mappings if e["exchange_name"] == ex
-            ]
+            }
             mgr.cfg.logger.info(
                 f"[events.utils.handle_static_pools_update] Adding {len(exchange_pools)} {ex} pools to static pools"
             )
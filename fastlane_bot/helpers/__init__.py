@@ -12,7 +12,9 @@ from .tradeinstruction import TradeInstruction
 from .poolandtokens import SolidlyV2StablePoolsNotSupported
 from .routehandler import TxRouteHandler, RouteStruct
 from .txhelpers import TxHelpers
-from .univ3calc import Univ3Calculator
+from .univ3calc import Univ3Calculator, TickData
 from .wrap_unwrap_processor import add_wrap_or_unwrap_trades_to_route
 from .carbon_trade_splitter import split_carbon_trades
 from .routehandler import maximize_last_trade_per_tkn
+from .curvecache import CurveCache
+from . import weimath
@@ -11,7 +11,6 @@ All rights reserved.
 Licensed under MIT.
 """
 from typing import List
-from json import loads, dumps
 from fastlane_bot.config import Config
 from fastlane_bot.helpers import TradeInstruction
 
@@ -36,7 +35,7 @@ def split_carbon_trades(cfg: Config, trade_instructions: List[TradeInstruction])
 
         carbon_exchanges = {}
 
-        for tx in loads(trade_instruction.raw_txs.replace("'", '"').replace('Decimal("', '').replace('")', '')):
+        for tx in map(dict, trade_instruction.raw_txs):
             pool = trade_instruction.db.get_pool(cid=str(tx["cid"]).split("-")[0])
 
             if cfg.NATIVE_GAS_TOKEN_ADDRESS in pool.get_tokens:
@@ -67,7 +66,7 @@ def split_carbon_trades(cfg: Config, trade_instructions: List[TradeInstruction])
                     amtout=sum([tx["amtout"] for tx in txs]),
                     _amtin_wei=sum([tx["_amtin_wei"] for tx in txs]),
                     _amtout_wei=sum([tx["_amtout_wei"] for tx in txs]),
-                    raw_txs=dumps(txs)
+                    raw_txs=txs
                 )
             )
 
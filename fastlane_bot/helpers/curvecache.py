@@ -0,0 +1,138 @@
+"""
+Defines the ``CurveCache`` class, a persistent cache of the curves built from the pool data.
+
+Every iteration of the main loop the bot converts the pool data into a ``CPCContainer``. Most pools do not change
+between two blocks, so rather than re-creating the ``PoolAndTokens`` object and re-running ``to_cpc()`` for every
+pool, the cache keeps the pool object and its curves per cid, keyed by ``last_updated_block`` (and ``fee``, which
+fee update events change without touching the block). Only pools whose key changed -- ie pools touched by events,
+multicall or contract refreshes -- are rebuilt, and the live ``CPCContainer`` is patched in place.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+__VERSION__ = "1.1"
+__DATE__ = "22/Apr/2024"
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from fastlane_bot.helpers.poolandtokens import PoolAndTokens
+from fastlane_bot.tools.cpc import ConstantProductCurve, CPCContainer
+
+
+@dataclass
+class CurveCacheEntry:
+    """
+    The cached pool object and curves of a single pool.
+    """
+
+    key: Hashable
+    pool: PoolAndTokens
+    curves: Tuple[ConstantProductCurve, ...]
+
+
+@dataclass
+class CurveCache:
+    """
+    Persistent cache of the pool objects and curves built from the pool data (see module docstring).
+
+    Attributes
+    ----------
+    entries: Dict[str, CurveCacheEntry]
+        The cache entries by (pool) cid.
+    CCm: CPCContainer
+        The live curve container, patched in place by ``update``.
+    ADDRDEC: Dict[str, Tuple[str, int]]
+        The token decimals table used by the univ3 curve conversion, extended as new pools are built.
+    n_built: int
+        The number of pools (re)built by the last ``update``.
+    n_removed: int
+        The number of pools removed by the last ``update``.
+    changed_cids: Set[str]
+        The cids of the curves (re)built or removed by the last ``update``; None if all curves were built.
+    """
+
+    __VERSION__ = __VERSION__
+    __DATE__ = __DATE__
+
+    entries: Dict[str, CurveCacheEntry] = field(default_factory=dict)
+    CCm: Optional[CPCContainer] = None
+    ADDRDEC: Dict[str, Tuple[str, int]] = field(default_factory=dict)
+    n_built: int = 0
+    n_removed: int = 0
+    changed_cids: Optional[Set[str]] = None
+
+    @staticmethod
+    def cache_key(record: Dict[str, Any]) -> Hashable:
+        """
+        The cache key of a pool record; the pool is rebuilt whenever it changes.
+        """
+        return record.get("last_updated_block"), str(record.get("fee"))
+
+    def update(
+        self,
+        records: Iterable[Dict[str, Any]],
+        build: Callable[[int, Dict[str, Any]], Tuple[PoolAndTokens, List[ConstantProductCurve]]],
+    ) -> CPCContainer:
+        """
+        Bring the cache in line with the pool records and return the (patched) live curve container.
+
+        Parameters
+        ----------
+        records: Iterable[Dict[str, Any]]
+            The pool records (eg the ``QueryInterface`` state); records with a duplicate cid are ignored.
+        build: Callable[[int, Dict[str, Any]], Tuple[PoolAndTokens, List[ConstantProductCurve]]]
+            Builds the pool object and curves of a record (given its index and the record); only called for
+            records that are new or whose cache key changed.
+
+        Returns
+        -------
+        CPCContainer
+            The curves of all pools, in record order for a new container, otherwise patched in place.
+        """
+        cids = {}
+        dirty = []
+        for idx, record in enumerate(records):
+            cid = str(record["cid"])
+            if cid in cids:
+                continue
+            cids[cid] = idx
+            key = self.cache_key(record)
+            entry = self.entries.get(cid)
+            if entry is None or entry.key != key:
+                dirty.append((idx, cid, key, record))
+            else:
+                entry.pool.id = idx
+
+        removed = [cid for cid in self.entries if cid not in cids]
+        remove_curves = set()
+        for cid in removed:
+            remove_curves.update(c.cid for c in self.entries.pop(cid).curves)
+
+        new_curves = []
+        for idx, cid, key, record in dirty:
+            pool, curves = build(idx, record)
+            old = self.entries.get(cid)
+            if old is not None:
+                remove_curves.update(c.cid for c in old.curves)
+            self.entries[cid] = CurveCacheEntry(key=key, pool=pool, curves=tuple(curves))
+            new_curves += curves
+        self.n_built, self.n_removed = len(dirty), len(removed)
+        if self.CCm is None:
+            self.changed_cids = None
+            self.CCm = CPCContainer(
+                [c for cid in cids for c in self.entries[cid].curves]
+            )
+        else:
+            self.changed_cids = remove_curves.union(c.cid for c in new_curves)
+            remove_curves.difference_update(c.cid for c in new_curves)
+            self.CCm.patch(new_curves, remove=remove_curves)
+        return self.CCm
+
+    def pools(self) -> List[PoolAndTokens]:
+        """
+        The cached pool objects, ordered by their index in the records of the last ``update``.
+        """
+        return sorted((entry.pool for entry in self.entries.values()), key=lambda pool: pool.id)
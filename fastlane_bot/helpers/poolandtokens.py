@@ -6,8 +6,8 @@ Defines the ``PoolAndTokens`` class, representing a pool and its tokens in a sin
 All rights reserved.
 Licensed under MIT.
 """
-__VERSION__ = "1.2"
-__DATE__ = "05/May/2023"
+__VERSION__ = "1.4"
+__DATE__ = "29/Apr/2024"
 
 import decimal
 import math
@@ -18,7 +18,7 @@ from typing import Dict, Any, List, Union
 from fastlane_bot.config import Config
 
 # from fastlane_bot.config import SUPPORTED_EXCHANGES, CARBON_V1_NAME, UNISWAP_V3_NAME
-from fastlane_bot.helpers.univ3calc import Univ3Calculator
+from fastlane_bot.helpers.univ3calc import TickData, Univ3Calculator
 from fastlane_bot.tools.cpc import ConstantProductCurve
 from fastlane_bot.utils import EncodedOrder
 
@@ -110,6 +110,8 @@ class PoolAndTokens:
         The address of token 1
     tkn1_decimals : int
         The decimals of token 1
+    tick_data : TickData
+        The initialized ticks around the current tick (Uniswap v3 only; optional)
 
     """
 
@@ -194,6 +196,7 @@ class PoolAndTokens:
     ADDRDEC = None
 
     pool_type: str = None
+    tick_data: TickData = None
 
 
     def __post_init__(self):
@@ -292,6 +295,8 @@ class PoolAndTokens:
         elif self.exchange_name in self.ConfigObj.SOLIDLY_V2_FORKS:
             if self.pool_type == "volatile":
                 out = self._other_to_cpc()
+            elif self.pool_type == "stable":
+                out = self._solidly_stable_to_cpc()
             else:
                 raise SolidlyV2StablePoolsNotSupported(f"exchange {self.exchange_name}")
         elif self.exchange_name in self.ConfigObj.SUPPORTED_EXCHANGES:
@@ -364,6 +369,31 @@ class PoolAndTokens:
             for typed_args in typed_args_all
         ]
 
+    def _solidly_stable_to_cpc(self) -> List[Any]:
+        """
+        constructor: from a Solidly V2 stable pool (x^3y + xy^3 = k), as a piecewise curve (see
+        ``ConstantProductCurve.from_solidly_stable``)
+
+        :x:         current pool liquidity in token x (base token of the pair)
+        :y:         current pool liquidity in token y (quote token of the pair)
+        """
+        tkn0_balance = self.convert_decimals(self.tkn0_balance, self.tkn0_decimals)
+        tkn1_balance = self.convert_decimals(self.tkn1_balance, self.tkn1_decimals)
+        if tkn0_balance <= 0 or tkn1_balance <= 0:
+            self.ConfigObj.logger.debug(f"empty solidly stable pool [{self.cid}]")
+            return []
+
+        typed_args = {
+            "x": tkn0_balance,
+            "y": tkn1_balance,
+            "pair": self.pair_name.replace(self.ConfigObj.NATIVE_GAS_TOKEN_ADDRESS, self.ConfigObj.WRAPPED_GAS_TOKEN_ADDRESS),
+            "fee": self.fee,
+            "cid": self.cid,
+            "descr": self.descr,
+            "params": self._params,
+        }
+        return [ConstantProductCurve.from_solidly_stable(**self._convert_to_float(typed_args))]
+
     class DoubleInvalidCurveError(ValueError):
         pass
 
@@ -607,15 +637,22 @@ class PoolAndTokens:
                 f"Illegal fee for Uniswap v3 pool: {self.fee_float} [{FEE_LOOKUP}]]"
             )
         uni3 = Univ3Calculator.from_dict(args, feeconst, addrdec=self.ADDRDEC)
-        params = uni3.cpc_params()
+        tick_data = TickData.from_value(self.tick_data)
+        range_params = uni3.range_params(tick_data) if tick_data is not None else None
+        params, other_params = range_params if range_params is not None else (uni3.cpc_params(), [])
         # print("u3params", params)
         if params["uniL"] == 0:
             self.ConfigObj.logger.debug(f"empty univ3 pool [{self.cid}]")
             return []
-        params["cid"] = self.cid
-        params["descr"] = self.descr
-        params["params"] = self._params
-        return [ConstantProductCurve.from_univ3(**params)]
+        curve = ConstantProductCurve.from_univ3(**params, cid=self.cid, descr=self.descr, params=self._params)
+        if not other_params:
+            return [curve]
+        # the liquidity in the ticks away from the current range, as part of the same (piecewise) curve
+        ranges = [
+            ConstantProductCurve.from_univ3(**p, cid=self.cid, descr=self.descr, params=self._params)
+            for p in other_params
+        ]
+        return [curve.set_ranges(ranges)]
 
     @staticmethod
     def convert_decimals(tkn_balance_wei: Decimal, tkn_decimals: int) -> Decimal:
@@ -6,6 +6,12 @@ Main classes defined here are
 - ``RouteStruct``: represents a single trade route
 - ``TxRouteHandler``: converts trade instructions from the optimizer into routes
 
+The trade outputs of a route are recalculated either with the ``Decimal`` approximations of the
+curves (the default), or, with ``integer_math``, in native integers by the wei-exact swap math of
+``weimath``, which matches the rounding of the contracts. Uniswap v3 pools with tick data are always
+recalculated with the integer math, as their trades may cross ticks, and so are the Solidly stable
+pools, whose invariant has no closed form solution for the output.
+
 It also defines a few helper function that should not be relied upon by external modules,
 even if they happen to be exported.
 ---
@@ -24,7 +30,10 @@ from typing import List, Any, Dict, Tuple
 import eth_abi
 import pandas as pd
 
+from . import weimath
 from .tradeinstruction import TradeInstruction
+from .univ3calc import TickData
+from .weimath import BalancerInputTooLargeError, BalancerOutputTooLargeError
 from ..events.interface import Pool
 from ..tools.cpc import T
 from fastlane_bot.config.constants import AGNI_V3_NAME, BUTTER_V3_NAME, CLEOPATRA_V3_NAME, PANCAKESWAP_V3_NAME, \
@@ -92,16 +101,20 @@ class TxRouteHandler:
         The trade instructions. Formatted output from the `CPCOptimizer` class.
     trade_instructions_df: pd.DataFrame
         The trade instructions as a dataframe. Formatted output from the `CPCOptimizer` class.
+    integer_math: bool
+        Whether to recalculate the trade outputs with the wei-exact integer math (default: False).
     """
     __VERSION__ = __VERSION__
     __DATE__ = __DATE__
 
     trade_instructions: List[TradeInstruction]
+    integer_math: bool = False
 
     def __post_init__(self):
         if len(self.trade_instructions) < 2:
             raise ValueError("Length of trade instructions must be greater than 1.")
         self.ConfigObj = self.trade_instructions[0].ConfigObj
+        self._token_decimals: Dict[str, int] = {}
 
     @staticmethod
     def custom_data_encoder(
@@ -109,11 +122,11 @@ class TxRouteHandler:
     ) -> List[TradeInstruction]:
         for i in range(len(agg_trade_instructions)):
             instr = agg_trade_instructions[i]
-            if instr.raw_txs == "[]":
+            if not instr.raw_txs:
                 instr.custom_data = "0x"
                 agg_trade_instructions[i] = instr
             else:
-                tradeInfo = eval(instr.raw_txs)
+                tradeInfo = instr.raw_txs
                 tradeActions = []
                 for trade in tradeInfo:
                     tradeActions += [
@@ -438,7 +451,7 @@ class TxRouteHandler:
                                                                  amtin=trade_before.amtin, amtout=trade.amtout,
                                                                  tknin=trade_before.tknin_address,
                                                                  tknout=trade.tknout_address,
-                                                                 pair_sorting="", raw_txs="[]", db=trade.db)
+                                                                 pair_sorting="", raw_txs=[], db=trade.db)
                         new_trade_instruction.tknout_is_native = trade.tknout_is_native
                         new_trade_instruction.tknout_is_wrapped = trade.tknout_is_wrapped
                         calculated_trade_instructions[idx - 1] = new_trade_instruction
@@ -475,7 +488,7 @@ class TxRouteHandler:
 
         carbons = df[df['carbon']].copy()
         nocarbons = df[~df['carbon']].copy()
-        nocarbons["raw_txs"] = str([])
+        nocarbons["raw_txs"] = [[] for _ in nocarbons.index]
         nocarbons["ConfigObj"] = config_object
         nocarbons["db"] = db
 
@@ -496,7 +509,7 @@ class TxRouteHandler:
                 "tknout": newdf.tknout.values[0],
                 "amtout": newdf.amtout.sum(),
                 "_amtout_wei": newdf._amtout_wei.sum(),
-                "raw_txs": str(newdf.to_dict(orient="records")),
+                "raw_txs": newdf.to_dict(orient="records"),
                 "ConfigObj": config_object,
                 "db": db,
             }
@@ -1098,8 +1111,8 @@ class TxRouteHandler:
         if curve.exchange_name != "balancer":
             tkn0_address = curve.pair_name.split("/")[0]
             tkn1_address = curve.pair_name.split("/")[1]
-            tkn0_decimals = int(trade.db.get_token(tkn_address=tkn0_address).decimals)
-            tkn1_decimals = int(trade.db.get_token(tkn_address=tkn1_address).decimals)
+            tkn0_decimals = self._get_token_decimals(trade, tkn0_address)
+            tkn1_decimals = self._get_token_decimals(trade, tkn1_address)
 
             tkn0_address = self.ConfigObj.WRAPPED_GAS_TOKEN_ADDRESS if tkn0_address in self.ConfigObj.NATIVE_GAS_TOKEN_ADDRESS and (
                     trade.tknin_address in self.ConfigObj.WRAPPED_GAS_TOKEN_ADDRESS or trade.tknout_address in self.ConfigObj.WRAPPED_GAS_TOKEN_ADDRESS) else tkn0_address
@@ -1115,11 +1128,28 @@ class TxRouteHandler:
             assert trade.tknin_address in tokens, f"[_solve_trade_output] trade.tknin_address {trade.tknin_address} not in Balancer curve tokens: {tokens}"
             assert trade.tknout_address in tokens, f"[_solve_trade_output] trade.tknout_address {trade.tknout_address} not in Balancer curve tokens: {tokens}"
 
-        tkn_in_decimals = int(trade.db.get_token(tkn_address=trade.tknin_address).decimals)
-        tkn_out_decimals = int(trade.db.get_token(tkn_address=trade.tknout_address).decimals)
+        tkn_in_decimals = self._get_token_decimals(trade, trade.tknin_address)
+        tkn_out_decimals = self._get_token_decimals(trade, trade.tknout_address)
 
         amount_in = TradeInstruction._quantize(amount_in, tkn_in_decimals)
 
+        if self.integer_math or self._has_tick_data(curve) or self._is_solidly_stable(curve):
+            amount_in_wei, amount_out_wei = self._solve_trade_output_wei(
+                curve=curve,
+                trade=trade,
+                amount_in_wei=TradeInstruction._convert_to_wei(amount_in, tkn_in_decimals),
+                tkn0_address=None if curve.exchange_name == self.ConfigObj.BALANCER_NAME else tkn0_address,
+                tkn_in_decimals=tkn_in_decimals,
+                tkn_out_decimals=tkn_out_decimals,
+            )
+            amount_out_wei = amount_out_wei * 9999 // 10000
+            return (
+                self._from_wei(amount_in_wei, tkn_in_decimals),
+                self._from_wei(amount_out_wei, tkn_out_decimals),
+                amount_in_wei,
+                amount_out_wei,
+            )
+
         if curve.exchange_name in self.ConfigObj.UNI_V3_FORKS:
             amount_out = self._calc_uniswap_v3_output(
                 tkn_in=trade.tknin_address,
@@ -1141,10 +1171,6 @@ class TxRouteHandler:
         elif curve.exchange_name == self.ConfigObj.BALANCER_NAME:
             amount_out = self._calc_balancer_output(curve=curve, tkn_in=trade.tknin_address,
                                                     tkn_out=trade.tknout_address, amount_in=amount_in)
-
-        elif curve.exchange_name in self.ConfigObj.SOLIDLY_V2_FORKS and curve.pool_type in "stable":
-            raise ExchangeNotSupportedError(
-                f"[routerhandler.py _solve_trade_output] Solidly V2 stable pools are not yet supported")
         else:
             tkn0_amt, tkn1_amt = (
                 (curve.tkn0_balance, curve.tkn1_balance)
@@ -1170,6 +1196,144 @@ class TxRouteHandler:
         amount_out_wei = TradeInstruction._convert_to_wei(amount_out, tkn_out_decimals)
         return amount_in, amount_out, amount_in_wei, amount_out_wei
 
+    def _solve_trade_output_wei(
+            self,
+            curve: Pool,
+            trade: TradeInstruction,
+            amount_in_wei: int,
+            tkn0_address: str,
+            tkn_in_decimals: int,
+            tkn_out_decimals: int,
+    ) -> Tuple[int, int]:
+        """
+        Solves a trade with the wei-exact integer math (see ``weimath``), before the safety margin.
+
+        Parameters
+        ----------
+        curve: Pool
+            The pool.
+        trade: TradeInstruction
+            The trade.
+        amount_in_wei: int
+            The input amount, in wei.
+        tkn0_address: str
+            The token 0 of the pool (with the native gas token replaced by the wrapped one if the trade uses it),
+            None for Balancer.
+        tkn_in_decimals: int
+            The input token decimals.
+        tkn_out_decimals: int
+            The output token decimals.
+
+        Returns
+        -------
+        Tuple[int, int]
+            The input and output amounts, in wei.
+        """
+        exchange_name = curve.exchange_name
+        fee = weimath.fee_ppm(curve.fee_float)
+
+        if exchange_name in self.ConfigObj.UNI_V3_FORKS and self._has_tick_data(curve):
+            tick_data = TickData.from_value(curve.tick_data)
+            amount_in_wei, amount_out_wei = weimath.uniswap_v3_output_ticks(
+                amount_in=amount_in_wei,
+                liquidity=int(curve.liquidity),
+                sqrt_price_q96=int(curve.sqrt_price_q96),
+                tick=int(curve.tick),
+                fee=fee,
+                zero_for_one=trade.tknin_address == tkn0_address,
+                tick_spacing=int(curve.tick_spacing),
+                liquidity_net=tick_data.liquidity_net,
+                lower=tick_data.lower,
+                upper=tick_data.upper,
+            )
+        elif exchange_name in self.ConfigObj.UNI_V3_FORKS:
+            amount_out_wei = weimath.uniswap_v3_output(
+                amount_in=amount_in_wei,
+                liquidity=int(curve.liquidity),
+                sqrt_price_q96=int(curve.sqrt_price_q96),
+                fee=fee,
+                zero_for_one=trade.tknin_address == tkn0_address,
+            )
+        elif exchange_name in self.ConfigObj.CARBON_V1_FORKS or exchange_name == self.ConfigObj.BANCOR_POL_NAME:
+            y, z, A, B = (
+                (curve.y_0, curve.z_0, curve.A_0, curve.B_0)
+                if trade.tknin_address != tkn0_address
+                else (curve.y_1, curve.z_1, curve.A_1, curve.B_1)
+            )
+            assert int(y) > 0, f"Trade incoming to empty Carbon curve: {curve}"
+            amount_in_wei, amount_out_wei = weimath.carbon_output(
+                amount_in=amount_in_wei, y=int(y), z=int(z), A=int(A or 0), B=int(B), fee=fee
+            )
+        elif exchange_name == self.ConfigObj.BALANCER_NAME:
+            amount_out_wei = weimath.balancer_output(
+                amount_in=amount_in_wei,
+                balance_in=int(curve.get_token_balance(tkn=trade.tknin_address)),
+                weight_in=int(Decimal(str(curve.get_token_weight(tkn=trade.tknin_address))) * weimath.WAD),
+                decimals_in=tkn_in_decimals,
+                balance_out=int(curve.get_token_balance(tkn=trade.tknout_address)),
+                weight_out=int(Decimal(str(curve.get_token_weight(tkn=trade.tknout_address))) * weimath.WAD),
+                decimals_out=tkn_out_decimals,
+                fee=int(Decimal(str(curve.fee_float)) * weimath.WAD),
+            )
+        elif self._is_solidly_stable(curve):
+            zero_for_one = trade.tknin_address == tkn0_address
+            amount_out_wei = weimath.solidly_stable_output(
+                amount_in=amount_in_wei,
+                reserve0=int(Decimal(str(curve.tkn0_balance))),
+                reserve1=int(Decimal(str(curve.tkn1_balance))),
+                decimals0=tkn_in_decimals if zero_for_one else tkn_out_decimals,
+                decimals1=tkn_out_decimals if zero_for_one else tkn_in_decimals,
+                fee=fee,
+                zero_for_one=zero_for_one,
+            )
+        else:
+            balance_in, balance_out = (
+                (curve.tkn0_balance, curve.tkn1_balance)
+                if trade.tknin_address == tkn0_address
+                else (curve.tkn1_balance, curve.tkn0_balance)
+            )
+            if exchange_name in self.ConfigObj.UNI_V2_FORKS:
+                solve = weimath.uniswap_v2_output
+            elif exchange_name in self.ConfigObj.SOLIDLY_V2_FORKS:
+                solve = weimath.solidly_v2_output
+            else:
+                solve = weimath.bancor_output
+            amount_out_wei = solve(
+                amount_in=amount_in_wei,
+                balance_in=int(Decimal(str(balance_in))),
+                balance_out=int(Decimal(str(balance_out))),
+                fee=fee,
+            )
+
+        return amount_in_wei, amount_out_wei
+
+    def _has_tick_data(self, curve: Pool) -> bool:
+        """
+        Whether the pool is a Uniswap v3 (fork) pool with tick data, whose trades may cross ticks.
+        """
+        return (
+            curve.exchange_name in self.ConfigObj.UNI_V3_FORKS
+            and TickData.from_value(getattr(curve, "tick_data", None)) is not None
+        )
+
+    def _is_solidly_stable(self, curve: Pool) -> bool:
+        """
+        Whether the pool is a Solidly V2 (fork) stable pool.
+        """
+        return curve.exchange_name in self.ConfigObj.SOLIDLY_V2_FORKS and curve.pool_type == "stable"
+
+    def _get_token_decimals(self, trade: TradeInstruction, tkn_address: str) -> int:
+        """
+        The decimals of a token, looked up once per route.
+        """
+        if tkn_address not in self._token_decimals:
+            self._token_decimals[tkn_address] = int(trade.db.get_token(tkn_address=tkn_address).decimals)
+        return self._token_decimals[tkn_address]
+
+    @staticmethod
+    def _from_wei(amount_wei: int, decimals: int) -> Decimal:
+        return Decimal(amount_wei).scaleb(-decimals, context=decimal.Context(prec=80))
+
     def calculate_trade_profit(
             self, trade_instructions: List[TradeInstruction]
     ) -> int or float or Decimal:
@@ -1211,8 +1375,8 @@ class TxRouteHandler:
             if trade.amtin <= 0:
                 trade_instructions.pop(idx)
                 continue
-            if trade.raw_txs != "[]":
-                data = eval(trade.raw_txs)
+            if trade.raw_txs:
+                data = [dict(tx) for tx in trade.raw_txs]
                 total_out = 0
                 total_in = 0
                 total_in_wei = 0
@@ -1326,7 +1490,7 @@ class TxRouteHandler:
                 trade_instructions[idx].amtout = _total_out
                 trade_instructions[idx]._amtin_wei = _total_in_wei
                 trade_instructions[idx]._amtout_wei = _total_out_wei
-                trade_instructions[idx].raw_txs = str(raw_txs_lst)
+                trade_instructions[idx].raw_txs = raw_txs_lst
                 amount_out = _total_out
 
             else:
@@ -1388,13 +1552,5 @@ def powDown(a: Decimal, b: Decimal) -> Decimal:
     return a ** b
 
 
-class BalancerInputTooLargeError(AssertionError):
-    pass
-
-
-class BalancerOutputTooLargeError(AssertionError):
-    pass
-
-
 class ExchangeNotSupportedError(AssertionError):
     pass
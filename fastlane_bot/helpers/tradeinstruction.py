@@ -14,8 +14,11 @@ Licensed under MIT.
 __VERSION__ = "1.2"
 __DATE__="02/May/2023"
 
+import ast
+import json
+import re
 from dataclasses import dataclass
-from typing import Union, Any
+from typing import Union, Any, Dict, List
 from _decimal import Decimal
 from fastlane_bot.events.interface import Token, Pool
 
@@ -44,7 +47,9 @@ class TradeInstruction:
     cid_tkn: str
         If the curve is a Carbon curve, the cid will have a "-1" or "-0" to denote which side of the strategy the trade is on.
         This parameter is used to remove the "-1" or "-0" from the cid.
-    raw_txs: str
+    raw_txs: List[Dict[str, Any]]
+        The trades aggregated into this one (e.g. the orders of a Carbon trade), empty if none. A string
+        representation of the list (as formerly used) is parsed.
     pair_sorting: str
 
     Attributes
@@ -83,7 +88,7 @@ class TradeInstruction:
     amtout: Union[int, Decimal, float]
     strategy_id: int = None
     pair_sorting: str = None
-    raw_txs: str = None
+    raw_txs: List[Dict[str, Any]] = None
     custom_data: str = ''
     db: any = None
     tknin_dec_override: int = None   # for testing to not go to the database
@@ -166,7 +171,9 @@ class TradeInstruction:
             self._amtout_decimals, self._tknout_decimals
         )
         if self.raw_txs is None:
-            self.raw_txs = "[]"
+            self.raw_txs = []
+        elif isinstance(self.raw_txs, str):
+            self.raw_txs = self._parse_raw_txs(self.raw_txs)
         if self.pair_sorting is None:
             self.pair_sorting = ""
         if self.exchange_override is None:
@@ -345,6 +352,16 @@ class TradeInstruction:
         """
         return self.db.get_pool(cid=self.cid)
 
+    @staticmethod
+    def _parse_raw_txs(raw_txs: str) -> List[Dict[str, Any]]:
+        """
+        Parses the string representation (JSON or ``str()`` of the list) of the raw transactions.
+        """
+        try:
+            return json.loads(raw_txs)
+        except json.JSONDecodeError:
+            return ast.literal_eval(re.sub(r"Decimal\(['\"]([^'\"]*)['\"]\)", r"\1", raw_txs))
+
     @staticmethod
     def _convert_to_wei(amount: Union[int, Decimal, float], decimals: int) -> int:
         """
@@ -5,8 +5,21 @@ This module defines the ``TxHelpers`` class, which provides a collection of prop
 and methods for working with transactions:
 
 - ``validate_and_submit_transaction``: Validates a transaction and then submits it to the arb contract
+- ``validate_and_submit_transactions``: Validates a batch of transactions and then submits them with sequential nonces
 - ``check_and_approve_tokens``: Approves every token with zero allowance to the maximum allowance
 
+The nonce of the wallet is tracked locally (read from the node once, then incremented as the transactions are
+mined), and the gas estimation, the access list and the gas prices of a transaction are requested concurrently.
+
+By default, the bot waits for the receipt of each transaction it submits. With ``async_tx``, the receipts are tracked
+in the background (by a single thread, for all the pending transactions) and the bot carries on processing the new
+blocks. A transaction still pending when a newer opportunity is found is superseded:
+
+- it is replaced by the new transaction (same nonce, with the fees bumped by ``replacement_fee_ratio``), if the new
+  transaction is still profitable at the bumped fees,
+- otherwise it is cancelled (replaced by an empty transaction to the wallet) if it would now revert, unless it was sent
+  privately (the private transactions which would revert are not included anyway).
+
 ---
 (c) Copyright Bprotocol foundation 2023-24.
 All rights reserved.
@@ -17,12 +30,16 @@ __DATE__ = "01/May/2023"
 
 from _decimal import Decimal
 
+import threading
+import time
+from math import ceil
+from concurrent.futures import ThreadPoolExecutor
 from requests import post
 from json import loads, dumps
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Any, Dict, Tuple, Optional
 
-from web3.exceptions import TimeExhausted
+from web3.exceptions import TimeExhausted, TransactionNotFound
 
 from fastlane_bot.config import Config
 from fastlane_bot.utils import num_format
@@ -30,17 +47,55 @@ from fastlane_bot.data.abi import ERC20_ABI
 
 MAX_UINT256 = 2 ** 256 - 1
 ETH_RESOLUTION = 10 ** 18
+CANCEL_GAS = 21000
+
+# shared by all the instances, since the bot creates a new TxHelpers in every iteration (without async_tx)
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tx")
+
+@dataclass
+class PendingTransaction:
+    """
+    A transaction submitted and not mined yet.
+
+    Attributes:
+        tx: The last version of the transaction (replacements included).
+        tx_hashes: The hashes of all the versions of the transaction, any of which may be mined.
+        submitted: The time of the first submission.
+        private: Whether the transaction was sent privately.
+        cancelled: Whether the transaction was replaced by a cancellation.
+    """
+    tx: dict
+    tx_hashes: List[str] = field(default_factory=list)
+    submitted: float = field(default_factory=time.time)
+    private: bool = False
+    cancelled: bool = False
+
+    @property
+    def nonce(self) -> int:
+        return self.tx["nonce"]
+
 
 @dataclass
 class TxHelpers:
     """
     This class is used to organize web3 transaction tools.
+
+    Attributes:
+        cfg: The configuration.
+        async_tx: Whether to track the receipts in the background rather than wait for them (see module docstring).
+        replacement_fee_ratio: The minimum ratio of the fees of a replacement transaction to the replaced one.
+        receipt_timeout: The number of seconds after which a transaction without receipt is given up.
+        receipt_poll_interval: The number of seconds between the receipt requests of the background tracking.
     """
 
     __VERSION__ = __VERSION__
     __DATE__ = __DATE__
 
     cfg: Config
+    async_tx: bool = False
+    replacement_fee_ratio: float = 1.125
+    receipt_timeout: float = 120
+    receipt_poll_interval: float = 1.0
 
     def __post_init__(self):
         self.chain_id = self.cfg.w3.eth.chain_id
@@ -50,11 +105,26 @@ class TxHelpers:
 
         if self.cfg.NETWORK == self.cfg.NETWORK_ETHEREUM:
             self.use_access_list = True
+            self.private_tx = True
             self.send_transaction = self._send_private_transaction
         else:
             self.use_access_list = False
+            self.private_tx = False
             self.send_transaction = self._send_regular_transaction
 
+        self.nonce = None
+        self.pending_txs: Dict[int, PendingTransaction] = {}
+        self._lock = threading.RLock()
+        self._tracker: Optional[threading.Thread] = None
+
+    @property
+    def pending(self) -> Optional[PendingTransaction]:
+        """
+        The pending transaction with the lowest nonce, None if there is none.
+        """
+        with self._lock:
+            return self.pending_txs[min(self.pending_txs)] if self.pending_txs else None
+
     def validate_and_submit_transaction(
         self,
         route_struct: List[Dict[str, Any]],
@@ -79,7 +149,130 @@ class TxHelpers:
             The hash of the transaction if submitted, None otherwise.
             The receipt of the transaction if completed, None otherwise.
         """
+        return self.validate_and_submit_transactions([dict(
+            route_struct=route_struct,
+            src_amt=src_amt,
+            src_address=src_address,
+            expected_profit_gastkn=expected_profit_gastkn,
+            expected_profit_usd=expected_profit_usd,
+            flashloan_struct=flashloan_struct,
+        )])[0]
+
+    def validate_and_submit_transactions(self, arbs: List[Dict[str, Any]]) -> List[Tuple[Optional[str], Optional[dict]]]:
+        """
+        This method validates and submits a batch of transactions to the arb contract, with sequential nonces.
+
+        The gas estimations of all the transactions are requested concurrently. The pending transactions are replaced
+        first (in the order of their nonces), then the transactions take the next nonces. A transaction which is not
+        profitable does not take a nonce, so the nonces of the batch have no gap.
+
+        Args:
+            arbs: The keyword arguments of ``validate_and_submit_transaction``, for each transaction.
+
+        Returns:
+            The hash and the receipt of each transaction (see ``validate_and_submit_transaction``).
+        """
+        txs = [self._create_arb_transaction(**arb) for arb in arbs]
+        updates = [self._request_update(tx) for tx in txs]
+
+        with self._lock:
+            pending_txs = [self.pending_txs[nonce] for nonce in sorted(self.pending_txs)]
+
+        results = [(None, None)] * len(arbs)
+        submitted = []
+        for i, (arb, tx, update) in enumerate(zip(arbs, txs, updates)):
+            try:
+                self._apply_update(tx, update)
+            except Exception as e:
+                self.cfg.logger.info(f"Transaction {dumps(tx, indent=4)}\nFailed with {e}")
+                continue
+
+            tx["gas"] += self.cfg.DEFAULT_GAS_SAFETY_OFFSET
+
+            # a transaction still pending is replaced, which takes the same nonce and higher fees
+            if pending_txs:
+                tx["nonce"] = pending_txs[0].nonce
+                self._bump_fees(tx, pending_txs[0].tx)
+            else:
+                tx["nonce"] = self._get_nonce()
+
+            raw_tx = self._sign_transaction(tx)
+            if not self._is_profitable(tx, raw_tx, arb["expected_profit_gastkn"], arb["expected_profit_usd"]):
+                continue
+
+            self.cfg.logger.info(f"Sending transaction {dumps(tx, indent=4)}")
+            tx_hash = self._submit_transaction(tx, raw_tx)
+            if tx_hash is None:
+                # the nonces of the rest of the batch are not valid anymore
+                break
+            if pending_txs:
+                pending_txs.pop(0)
+            results[i] = (tx_hash, None)
+            submitted.append((i, tx))
+
+        self._supersede_pending(pending_txs)
+
+        if self.async_tx:
+            return results
+
+        for i, tx in submitted:
+            tx_hash = results[i][0]
+            self.cfg.logger.info(f"Waiting for transaction {tx_hash} receipt")
+            tx_receipt = self._wait_for_transaction_receipt(tx_hash)
+            self.cfg.logger.info(f"Transaction receipt: {dumps(tx_receipt, indent=4)}")
+            with self._lock:
+                pending = self.pending_txs.get(tx["nonce"])
+            self._settle(pending, tx_hash, tx_receipt)
+            results[i] = (tx_hash, tx_receipt)
+        return results
+
+    def check_and_approve_tokens(self, tokens: List):
+        """
+        This method checks if tokens have been previously approved from the wallet address to the arb contract.
+        If they are not already approved, it will submit approvals for each token specified in the given list of tokens.
+
+        Args:
+            tokens: A list of tokens to check/approve
+        """
+
+        for token_address in [token for token in tokens if token != self.cfg.NATIVE_GAS_TOKEN_ADDRESS]:
+            token_contract = self.cfg.w3.eth.contract(address=token_address, abi=ERC20_ABI)
+            allowance = token_contract.caller.allowance(self.wallet_address, self.arb_contract.address)
+            self.cfg.logger.info(f"Remaining allowance for token {token_address} = {allowance}")
+            if allowance == 0:
+                tx = self._create_transaction(token_contract, "approve", [self.arb_contract.address, MAX_UINT256], 0)
+                self._update_transaction(tx)
+                raw_tx = self._sign_transaction(tx)
+                tx_hash = self._send_regular_transaction(raw_tx)
+                self._wait_for_transaction_receipt(tx_hash)
+                self.nonce = None
 
+    def _create_transaction(self, contract, fn_name: str, args: list, value: int) -> dict:
+        return {
+            "type": 2,
+            "value": value,
+            "chainId": self.chain_id,
+            "from": self.wallet_address,
+            "to": contract.address,
+            "data": contract.encode_abi(fn_name=fn_name, args=args),
+            "nonce": self._get_nonce()
+        }
+
+    def _get_nonce(self) -> int:
+        with self._lock:
+            if self.nonce is None:
+                self.nonce = self.cfg.w3.eth.get_transaction_count(self.wallet_address)
+            return self.nonce
+
+    def _create_arb_transaction(
+        self,
+        route_struct: List[Dict[str, Any]],
+        src_amt: int,
+        src_address: str,
+        expected_profit_gastkn: Decimal,
+        expected_profit_usd: Decimal,
+        flashloan_struct: List[Dict]
+    ) -> dict:
         self.cfg.logger.info("[helpers.txhelpers.validate_and_submit_transaction] Validating trade...")
         self.cfg.logger.debug(
             f"[helpers.txhelpers.validate_and_submit_transaction]:\n"
@@ -98,18 +291,9 @@ class TxHelpers:
             args = [flashloan_struct, route_struct]
             value = 0
 
-        tx = self._create_transaction(self.arb_contract, fn_name, args, value)
-
-        try:
-            self._update_transaction(tx)
-        except Exception as e:
-            self.cfg.logger.info(f"Transaction {dumps(tx, indent=4)}\nFailed with {e}")
-            return None, None
-
-        tx["gas"] += self.cfg.DEFAULT_GAS_SAFETY_OFFSET
-
-        raw_tx = self._sign_transaction(tx)
+        return self._create_transaction(self.arb_contract, fn_name, args, value)
 
+    def _is_profitable(self, tx: dict, raw_tx: str, expected_profit_gastkn: Decimal, expected_profit_usd: Decimal) -> bool:
         gas_cost_wei = tx["gas"] * tx["maxFeePerGas"]
         if self.cfg.network.GAS_ORACLE_ADDRESS:
             gas_cost_wei += self.cfg.GAS_ORACLE_CONTRACT.caller.getL1Fee(raw_tx)
@@ -126,55 +310,140 @@ class TxHelpers:
             f"- Expected gain: {num_format(gas_gain_eth)} GAS token ({num_format(gas_gain_usd)} USD)\n"
         )
 
-        if gas_gain_eth > gas_cost_eth:
-            self.cfg.logger.info(f"Sending transaction {dumps(tx, indent=4)}")
-            tx_hash = self.send_transaction(raw_tx)
-            self.cfg.logger.info(f"Waiting for transaction {tx_hash} receipt")
-            tx_receipt = self._wait_for_transaction_receipt(tx_hash)
-            self.cfg.logger.info(f"Transaction receipt: {dumps(tx_receipt, indent=4)}")
-            return tx_hash, tx_receipt
+        return gas_gain_eth > gas_cost_eth
 
-        return None, None
+    def _request_update(self, tx: dict) -> tuple:
+        # the gas estimation, the access list and the gas prices are requested concurrently
+        gas = _executor.submit(self.cfg.w3.eth.estimate_gas, dict(tx))
+        access_list = _executor.submit(self.cfg.w3.eth.create_access_list, dict(tx)) if self.use_access_list else None
+        gas_prices = _executor.submit(self.cfg.network.gas_strategy, self.cfg.w3)
+        return gas, access_list, gas_prices
 
-    def check_and_approve_tokens(self, tokens: List):
-        """
-        This method checks if tokens have been previously approved from the wallet address to the arb contract.
-        If they are not already approved, it will submit approvals for each token specified in the given list of tokens.
+    def _apply_update(self, tx: dict, update: tuple):
+        gas, access_list, gas_prices = update
+        tx["gas"] = gas.result() # may throw an exception
+        if access_list is not None:
+            result = access_list.result() # may return an error
+            if tx["gas"] > result["gasUsed"] and "error" not in result:
+                tx["gas"] = result["gasUsed"]
+                tx["accessList"] = loads(self.cfg.w3.to_json(result["accessList"]))
+        tx.update(gas_prices.result())
 
-        Args:
-            tokens: A list of tokens to check/approve
-        """
+    def _update_transaction(self, tx: dict):
+        self._apply_update(tx, self._request_update(tx))
 
-        for token_address in [token for token in tokens if token != self.cfg.NATIVE_GAS_TOKEN_ADDRESS]:
-            token_contract = self.cfg.w3.eth.contract(address=token_address, abi=ERC20_ABI)
-            allowance = token_contract.caller.allowance(self.wallet_address, self.arb_contract.address)
-            self.cfg.logger.info(f"Remaining allowance for token {token_address} = {allowance}")
-            if allowance == 0:
-                tx = self._create_transaction(token_contract, "approve", [self.arb_contract.address, MAX_UINT256], 0)
-                self._update_transaction(tx)
-                raw_tx = self._sign_transaction(tx)
-                tx_hash = self._send_regular_transaction(raw_tx)
-                self._wait_for_transaction_receipt(tx_hash)
+    def _bump_fees(self, tx: dict, replaced_tx: dict):
+        for key in ["maxFeePerGas", "maxPriorityFeePerGas"]:
+            tx[key] = max(tx[key], ceil(replaced_tx[key] * self.replacement_fee_ratio))
 
-    def _create_transaction(self, contract, fn_name: str, args: list, value: int) -> dict:
-        return {
+    def _submit_transaction(self, tx: dict, raw_tx: str) -> Optional[str]:
+        try:
+            tx_hash = self.send_transaction(raw_tx)
+        except Exception as e:
+            if "nonce" not in str(e).lower():
+                raise
+            # the nonce was taken in the meantime (e.g. the transaction replaced was mined)
+            self.cfg.logger.info(f"Transaction with nonce {tx['nonce']} rejected with {e}, resyncing the nonce")
+            with self._lock:
+                self.nonce = None
+            return None
+
+        with self._lock:
+            pending = self.pending_txs.get(tx["nonce"])
+            if pending is not None:
+                self.cfg.logger.info(f"Transaction {pending.tx_hashes[-1]} replaced by transaction {tx_hash}")
+                pending.tx = tx
+                pending.tx_hashes.append(tx_hash)
+                pending.submitted = time.time()
+                pending.cancelled = False
+                return tx_hash
+            self.pending_txs[tx["nonce"]] = PendingTransaction(tx=tx, tx_hashes=[tx_hash], private=self.private_tx)
+            self.nonce = max(self.nonce or 0, tx["nonce"] + 1)
+            if self.async_tx and self._tracker is None:
+                self._tracker = threading.Thread(target=self._track_receipts, name="tx-receipts", daemon=True)
+                self._tracker.start()
+        return tx_hash
+
+    def _supersede_pending(self, pending_txs: Optional[List[PendingTransaction]] = None):
+        """
+        Cancel the pending transactions (all of them by default) which would now revert (the newer opportunities
+        could not replace them).
+        """
+        if pending_txs is None:
+            with self._lock:
+                pending_txs = [self.pending_txs[nonce] for nonce in sorted(self.pending_txs)]
+        for pending in pending_txs:
+            if not pending.cancelled and not pending.private:
+                self._cancel_if_reverting(pending)
+
+    def _cancel_if_reverting(self, pending: PendingTransaction):
+        try:
+            self.cfg.w3.eth.estimate_gas({key: pending.tx[key] for key in ["from", "to", "data", "value"]})
+            return
+        except Exception as e:
+            self.cfg.logger.info(f"Pending transaction {pending.tx_hashes[-1]} would now fail with {e}, cancelling it")
+
+        tx = {
             "type": 2,
-            "value": value,
+            "value": 0,
             "chainId": self.chain_id,
             "from": self.wallet_address,
-            "to": contract.address,
-            "data": contract.encode_abi(fn_name=fn_name, args=args),
-            "nonce": self.cfg.w3.eth.get_transaction_count(self.wallet_address)
+            "to": self.wallet_address,
+            "data": "0x",
+            "nonce": pending.nonce,
+            "gas": CANCEL_GAS,
+            **self.cfg.network.gas_strategy(self.cfg.w3),
         }
-
-    def _update_transaction(self, tx: dict):
-        tx["gas"] = self.cfg.w3.eth.estimate_gas(tx) # may throw an exception
-        if self.use_access_list:
-            result = self.cfg.w3.eth.create_access_list(tx) # may return an error
-            if tx["gas"] > result["gasUsed"] and "error" not in result:
-                tx["gas"] = result["gasUsed"]
-                tx["accessList"] = loads(self.cfg.w3.to_json(result["accessList"]))
-        tx.update(self.cfg.network.gas_strategy(self.cfg.w3))
+        self._bump_fees(tx, pending.tx)
+        tx_hash = self._submit_transaction(tx, self._sign_transaction(tx))
+        if tx_hash is not None:
+            pending.cancelled = True
+
+    def _track_receipts(self):
+        # a single thread polls the receipts of all the pending transactions, and stops when there are none left
+        while True:
+            with self._lock:
+                if not self.pending_txs:
+                    self._tracker = None
+                    return
+                pending_txs = [self.pending_txs[nonce] for nonce in sorted(self.pending_txs)]
+            for pending in pending_txs:
+                with self._lock:
+                    if self.pending_txs.get(pending.nonce) is not pending:
+                        continue
+                    tx_hashes = list(pending.tx_hashes)
+                    deadline = pending.submitted + self.receipt_timeout
+                for tx_hash in tx_hashes:
+                    tx_receipt = self._get_transaction_receipt(tx_hash)
+                    if tx_receipt is not None:
+                        self._settle(pending, tx_hash, tx_receipt)
+                        break
+                else:
+                    if time.time() > deadline:
+                        self._settle(pending, tx_hashes[-1], None)
+            time.sleep(self.receipt_poll_interval)
+
+    def _settle(self, pending: Optional[PendingTransaction], tx_hash: str, tx_receipt: Optional[dict]):
+        with self._lock:
+            if pending is None:
+                self.nonce = None
+            elif tx_receipt is not None:
+                if self.pending_txs.get(pending.nonce) is pending:
+                    del self.pending_txs[pending.nonce]
+                if self.nonce is not None:
+                    self.nonce = max(self.nonce, pending.nonce + 1)
+            else:
+                # the transactions with the next nonces cannot be mined before this one
+                for nonce in [nonce for nonce in self.pending_txs if nonce >= pending.nonce]:
+                    del self.pending_txs[nonce]
+                # without receipt, the nonce is read from the node again
+                self.nonce = None
+        if tx_receipt is None:
+            self.cfg.logger.info(f"Transaction {tx_hash} has no receipt after {self.receipt_timeout} seconds")
+        elif self.async_tx:
+            tx_status = ["failed", "succeeded"][tx_receipt["status"]]
+            kind = "Cancellation" if pending.cancelled and tx_hash == pending.tx_hashes[-1] else "Arbitrage"
+            self.cfg.logger.info(f"{kind} transaction {tx_hash} {tx_status}: {dumps(tx_receipt, indent=4)}")
 
     def _sign_transaction(self, tx: dict) -> str:
         return self.cfg.w3.eth.account.sign_transaction(tx, self.cfg.ETH_PRIVATE_KEY_BE_CAREFUL).rawTransaction.hex()
@@ -201,3 +470,9 @@ class TxHelpers:
             return loads(self.cfg.w3.to_json(self.cfg.w3.eth.wait_for_transaction_receipt(tx_hash)))
         except TimeExhausted:
             return None
+
+    def _get_transaction_receipt(self, tx_hash: str) -> Optional[dict]:
+        try:
+            return loads(self.cfg.w3.to_json(self.cfg.w3.eth.get_transaction_receipt(tx_hash)))
+        except TransactionNotFound:
+            return None
@@ -12,11 +12,43 @@ All rights reserved.
 Licensed under MIT.
 """
 
-__VERSION__ = "1.4.1" 
-__DATE__ = "25/Jul/2023"
+__VERSION__ = "1.5" 
+__DATE__ = "29/Apr/2024"
 
+from bisect import bisect_right
 from math import sqrt
 from dataclasses import dataclass, InitVar, asdict
+from typing import NamedTuple
+
+MIN_TICK = -887272
+MAX_TICK = 887272
+
+
+class TickData(NamedTuple):
+    """
+    the initialized ticks of a Uniswap v3 pool within a window of ticks
+
+    :lower:             the lowest tick of the window
+    :upper:             the highest tick of the window
+    :liquidity_net:     tuple of (tick, liquidityNet) for the initialized ticks in the window, sorted by tick
+    """
+    lower: int
+    upper: int
+    liquidity_net: tuple
+
+    @classmethod
+    def from_value(cls, value):
+        """
+        converts a stored tick data value (eg a list, after a round trip through json) into TickData
+
+        returns None if value is None or NaN (ie the pool has no tick data)
+        """
+        if isinstance(value, cls):
+            return value
+        if value is None or value != value:
+            return None
+        lower, upper, liquidity_net = value
+        return cls(int(lower), int(upper), tuple(sorted((int(t), int(n)) for t, n in liquidity_net)))
 
 
 @dataclass(frozen=True)
@@ -325,6 +357,86 @@ class Univ3Calculator():
         )
         return result
     
+    MAX_RANGES = 10
+    # the maximum number of liquidity ranges on either side of the current range
+
+    def liquidity_ranges(self, tick_data, *, max_ranges=None):
+        """
+        returns the liquidity ranges of the pool as list of (ticka, tickb, liquidity), sorted by tick
+
+        :tick_data:     TickData of the pool; the ranges are clipped at the boundaries of its window
+        :max_ranges:    the maximum number of ranges on either side of the current range (default: MAX_RANGES)
+        :returns:       the list of ranges, which always contains the current range (the one that contains
+                        the current tick); None if the current tick is outside the window of tick_data
+
+        The liquidity of the current range is the liquidity of the pool; crossing an initialized tick upwards
+        adds its liquidityNet, crossing it downwards subtracts it. Ranges without liquidity are skipped, and the
+        ranges stop at a negative liquidity (which only stale tick data can produce).
+        """
+        max_ranges = self.MAX_RANGES if max_ranges is None else max_ranges
+        lower, upper = max(tick_data.lower, MIN_TICK), min(tick_data.upper, MAX_TICK)
+        if not lower <= self.tick < upper:
+            return None
+        net = dict(tick_data.liquidity_net)
+        bounds = [lower] + [t for t, _ in tick_data.liquidity_net if lower < t < upper] + [upper]
+        ix = bisect_right(bounds, self.tick) - 1
+        current = (bounds[ix], bounds[ix + 1], self.liquidity)
+
+        above, liquidity = [], self.liquidity
+        for ta, tb in zip(bounds[ix + 1:-1], bounds[ix + 2:]):
+            liquidity += net.get(ta, 0)
+            if liquidity < 0 or len(above) >= max_ranges:
+                break
+            if liquidity > 0:
+                above += [(ta, tb, liquidity)]
+
+        below, liquidity = [], self.liquidity
+        for ta, tb in zip(bounds[ix - 1::-1] if ix > 0 else [], bounds[ix:0:-1]):
+            liquidity -= net.get(tb, 0)
+            if liquidity < 0 or len(below) >= max_ranges:
+                break
+            if liquidity > 0:
+                below += [(ta, tb, liquidity)]
+
+        return below[::-1] + [current] + above
+
+    def range_params(self, tick_data, *, max_ranges=None, **kwargs):
+        """
+        returns the kwarg dicts suitable for CPC.from_univ3 for all liquidity ranges of the pool
+
+        :tick_data:     TickData of the pool (see liquidity_ranges)
+        :max_ranges:    the maximum number of ranges on either side of the current range
+        :kwargs:        additional kwargs to return
+        :returns:       tuple (params of the current range, list of params of the other ranges); the other
+                        ranges are out of range, ie they only hold token 0 (above) or token 1 (below);
+                        None if the current tick is outside the window of tick_data
+        """
+        ranges = self.liquidity_ranges(tick_data, max_ranges=max_ranges)
+        if ranges is None:
+            return None
+        Lscale = 10**(0.5*(self.tkn0dec+self.tkn1dec))
+        current, others = None, []
+        for ta, tb, liquidity in ranges:
+            pa, pb = 1.0001**ta * self.decf, 1.0001**tb * self.decf
+            if ta <= self.tick < tb:
+                pm = min(max(self.p, pa), pb)
+            else:
+                pm = pa if ta > self.tick else pb
+            params = dict(
+                Pmarg = pm,
+                uniL = liquidity/Lscale,
+                uniPa = pa,
+                uniPb = pb,
+                pair = self.pair,
+                fee = self.fee,
+                **kwargs,
+            )
+            if ta <= self.tick < tb:
+                current = params
+            else:
+                others += [params]
+        return current, others
+
     def info(self):
         pa, pb = self.papb
         p = self.p
@@ -0,0 +1,570 @@
+"""
+Wei-exact swap math, used by ``TxRouteHandler`` to recalculate the routes with native integers.
+
+Every function takes and returns amounts in wei (the raw token units) and follows the integer arithmetic and the
+rounding direction of the corresponding contract, so the amounts match what the trade returns on-chain (as opposed
+to the ``Decimal`` approximations of ``TxRouteHandler``):
+
+- ``uniswap_v2_output``: ``UniswapV2Library.getAmountOut`` (fee taken on the input),
+- ``solidly_v2_output``: the volatile pools of the Solidly forks (fee subtracted from the input),
+- ``solidly_stable_output``: the stable pools (x^3y + xy^3 = k) of the Solidly forks (``Pool.getAmountOut``),
+- ``bancor_output``: Bancor V2 standard pools and Bancor V3 pool collections (fee taken on the output),
+- ``uniswap_v3_output``: a Uniswap V3 swap which does not cross a tick (``SwapMath.computeSwapStep``),
+- ``uniswap_v3_output_ticks``: a Uniswap V3 swap across the initialized ticks of a window (``UniswapV3Pool.swap``),
+- ``carbon_output``: Carbon ``tradeBySourceAmount`` (``CarbonController._calculateTradeTargetAmount``),
+- ``balancer_output``: Balancer weighted pools (``WeightedMath._calcOutGivenIn`` in ``FixedPoint`` arithmetic).
+
+The power of the Balancer weighted math is evaluated with 60-digit ``Decimal`` arithmetic rather than the
+``LogExpMath`` series of the contract, so it can differ from the chain by a few wei; ``powUp`` adds the same
+relative error bound as the contract.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+__VERSION__ = "1.1"
+__DATE__ = "29/Apr/2024"
+
+import decimal
+from bisect import bisect_right
+from decimal import Decimal
+from typing import Sequence, Tuple, Union
+
+PPM = 10**6
+Q96 = 2**96
+CARBON_ONE = 2**48
+WAD = 10**18
+MAX_UINT256 = 2**256 - 1
+BALANCER_MAX_IN_RATIO = 3 * 10**17
+BALANCER_MAX_OUT_RATIO = 3 * 10**17
+BALANCER_MAX_POW_RELATIVE_ERROR = 10000
+MIN_TICK = -887272
+MAX_TICK = 887272
+
+# TickMath.getSqrtRatioAtTick: the factors 1/sqrt(1.0001)^(2^i) as Q128.128, for the bits i of the absolute tick
+_TICK_RATIOS = (
+    0xfff97272373d413259a46990580e213a,
+    0xfff2e50f5f656932ef12357cf3c7fdcc,
+    0xffe5caca7e10e4e61c3624eaa0941cd0,
+    0xffcb9843d60f6159c9db58835c926644,
+    0xff973b41fa98c081472e6896dfb254c0,
+    0xff2ea16466c96a3843ec78b326b52861,
+    0xfe5dee046a99a2a811c461f1969c3053,
+    0xfcbe86c7900a88aedcffc83b479aa3a4,
+    0xf987a7253ac413176f2b074cf7815e54,
+    0xf3392b0822b70005940c7a398e4b70f3,
+    0xe7159475a2c29b7443b29c7fa6e889d9,
+    0xd097f3bdfd2022b8845ad8f792aa5825,
+    0xa9f746462d870fdf8a65dc1f90e061e5,
+    0x70d869a156d2a1b890bb3df62baf32f7,
+    0x31be135f97d08fd981231505542fcfa6,
+    0x9aa508b5b7a84e1c677de54f3e99bc9,
+    0x5d6af8dedb81196699c329225ee604,
+    0x2216e584f5fa1ea926041bedfe98,
+    0x48a170391f7dc42444e8fa2,
+)
+
+_POW_CONTEXT = decimal.Context(prec=60)
+
+
+class BalancerInputTooLargeError(AssertionError):
+    pass
+
+
+class BalancerOutputTooLargeError(AssertionError):
+    pass
+
+
+def fee_ppm(fee: Union[float, str, Decimal]) -> int:
+    """
+    The fee as an integer number of parts per million (e.g. ``0.003`` -> ``3000``).
+    """
+    return int(Decimal(str(fee)) * PPM)
+
+
+def mul_div_floor(x: int, y: int, z: int) -> int:
+    return x * y // z
+
+
+def mul_div_ceil(x: int, y: int, z: int) -> int:
+    return -(-x * y // z)
+
+
+def uniswap_v2_output(amount_in: int, balance_in: int, balance_out: int, fee: int) -> int:
+    """
+    The output of a Uniswap V2 (fork) swap.
+
+    Parameters
+    ----------
+    amount_in: int
+        The input amount.
+    balance_in: int
+        The reserve of the input token.
+    balance_out: int
+        The reserve of the output token.
+    fee: int
+        The fee, in ppm.
+
+    Returns
+    -------
+    int
+        The output amount.
+    """
+    amount_in_with_fee = amount_in * (PPM - fee)
+    return amount_in_with_fee * balance_out // (balance_in * PPM + amount_in_with_fee)
+
+
+def solidly_v2_output(amount_in: int, balance_in: int, balance_out: int, fee: int) -> int:
+    """
+    The output of a swap on a volatile Solidly (fork) pool (see ``uniswap_v2_output`` for the parameters).
+    """
+    amount_in -= amount_in * fee // PPM
+    return amount_in * balance_out // (balance_in + amount_in)
+
+
+def _solidly_f(x0: int, y: int) -> int:
+    return x0 * y // WAD * (x0 * x0 // WAD + y * y // WAD) // WAD
+
+
+def _solidly_d(x0: int, y: int) -> int:
+    return 3 * x0 * (y * y // WAD) // WAD + x0 * x0 // WAD * x0 // WAD
+
+
+def _solidly_k(x: int, y: int, scale0: int, scale1: int) -> int:
+    return _solidly_f(x * WAD // scale0, y * WAD // scale1)
+
+
+def _solidly_get_y(x0: int, xy: int, y: int, scale0: int, scale1: int) -> int:
+    """
+    ``Pool._get_y``: the Newton iteration for the reserve ``y`` with ``_f(x0, y) = xy``; like the contract, the
+    rounding check calls ``_k`` on the already normalized reserves.
+    """
+    for _ in range(255):
+        k = _solidly_f(x0, y)
+        if k < xy:
+            dy = (xy - k) * WAD // _solidly_d(x0, y)
+            if dy == 0:
+                if _solidly_k(x0, y + 1, scale0, scale1) > xy:
+                    return y + 1
+                dy = 1
+            y += dy
+        else:
+            dy = (k - xy) * WAD // _solidly_d(x0, y)
+            if dy == 0:
+                if k == xy or _solidly_f(x0, y - 1) < xy:
+                    return y
+                dy = 1
+            y -= dy
+    raise ArithmeticError("!y")
+
+
+def solidly_stable_output(
+    amount_in: int,
+    reserve0: int,
+    reserve1: int,
+    decimals0: int,
+    decimals1: int,
+    fee: int,
+    zero_for_one: bool,
+) -> int:
+    """
+    The output of a swap on a stable Solidly (fork) pool (``Pool.getAmountOut`` of Velodrome V2 / Aerodrome).
+
+    Parameters
+    ----------
+    amount_in: int
+        The input amount.
+    reserve0: int
+        The reserve of token 0.
+    reserve1: int
+        The reserve of token 1.
+    decimals0: int
+        The decimals of token 0.
+    decimals1: int
+        The decimals of token 1.
+    fee: int
+        The fee, in ppm.
+    zero_for_one: bool
+        Whether the input token is token 0.
+
+    Returns
+    -------
+    int
+        The output amount.
+    """
+    scale0, scale1 = 10**decimals0, 10**decimals1
+    amount_in -= amount_in * fee // PPM
+    xy = _solidly_k(reserve0, reserve1, scale0, scale1)
+    reserve0, reserve1 = reserve0 * WAD // scale0, reserve1 * WAD // scale1
+    if zero_for_one:
+        reserve_a, reserve_b, scale_in, scale_out = reserve0, reserve1, scale0, scale1
+    else:
+        reserve_a, reserve_b, scale_in, scale_out = reserve1, reserve0, scale1, scale0
+    amount_in = amount_in * WAD // scale_in
+    y = reserve_b - _solidly_get_y(amount_in + reserve_a, xy, reserve_b, scale0, scale1)
+    return y * scale_out // WAD
+
+
+def bancor_output(amount_in: int, balance_in: int, balance_out: int, fee: int) -> int:
+    """
+    The output of a Bancor V2 or Bancor V3 swap (see ``uniswap_v2_output`` for the parameters).
+    """
+    amount_out = mul_div_floor(balance_out, amount_in, balance_in + amount_in)
+    return amount_out - mul_div_floor(amount_out, fee, PPM)
+
+
+def uniswap_v3_output(amount_in: int, liquidity: int, sqrt_price_q96: int, fee: int, zero_for_one: bool) -> int:
+    """
+    The output of a Uniswap V3 (fork) swap within the current tick.
+
+    Parameters
+    ----------
+    amount_in: int
+        The input amount.
+    liquidity: int
+        The liquidity of the current tick.
+    sqrt_price_q96: int
+        The square root of the price, as a Q64.96.
+    fee: int
+        The fee, in ppm.
+    zero_for_one: bool
+        Whether the input token is the token 0 of the pool.
+
+    Returns
+    -------
+    int
+        The output amount.
+    """
+    amount_in = mul_div_floor(amount_in, PPM - fee, PPM)
+    if zero_for_one:
+        # SqrtPriceMath.getNextSqrtPriceFromAmount0RoundingUp, then getAmount1Delta rounded down
+        numerator = liquidity << 96
+        sqrt_price_next = mul_div_ceil(numerator, sqrt_price_q96, numerator + amount_in * sqrt_price_q96)
+        return mul_div_floor(liquidity, sqrt_price_q96 - sqrt_price_next, Q96)
+    # SqrtPriceMath.getNextSqrtPriceFromAmount1RoundingDown, then getAmount0Delta rounded down
+    sqrt_price_next = sqrt_price_q96 + (amount_in << 96) // liquidity
+    return mul_div_floor(liquidity << 96, sqrt_price_next - sqrt_price_q96, sqrt_price_next) // sqrt_price_q96
+
+
+def sqrt_ratio_at_tick(tick: int) -> int:
+    """
+    The square root of the price at a tick, as a Q64.96 (``TickMath.getSqrtRatioAtTick``).
+    """
+    abs_tick = abs(tick)
+    assert abs_tick <= MAX_TICK, f"tick {tick} out of bounds"
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 1 else 1 << 128
+    for i, factor in enumerate(_TICK_RATIOS, start=1):
+        if abs_tick & (1 << i):
+            ratio = ratio * factor >> 128
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+    return (ratio >> 32) + (1 if ratio % (1 << 32) else 0)
+
+
+def _amount0_delta(sqrt_price_a: int, sqrt_price_b: int, liquidity: int, round_up: bool) -> int:
+    # SqrtPriceMath.getAmount0Delta
+    sqrt_price_a, sqrt_price_b = min(sqrt_price_a, sqrt_price_b), max(sqrt_price_a, sqrt_price_b)
+    numerator = liquidity << 96
+    if round_up:
+        return -(-mul_div_ceil(numerator, sqrt_price_b - sqrt_price_a, sqrt_price_b) // sqrt_price_a)
+    return mul_div_floor(numerator, sqrt_price_b - sqrt_price_a, sqrt_price_b) // sqrt_price_a
+
+
+def _amount1_delta(sqrt_price_a: int, sqrt_price_b: int, liquidity: int, round_up: bool) -> int:
+    # SqrtPriceMath.getAmount1Delta
+    sqrt_price_a, sqrt_price_b = min(sqrt_price_a, sqrt_price_b), max(sqrt_price_a, sqrt_price_b)
+    if round_up:
+        return mul_div_ceil(liquidity, sqrt_price_b - sqrt_price_a, Q96)
+    return mul_div_floor(liquidity, sqrt_price_b - sqrt_price_a, Q96)
+
+
+def _next_sqrt_price_from_input(sqrt_price: int, liquidity: int, amount_in: int, zero_for_one: bool) -> int:
+    # SqrtPriceMath.getNextSqrtPriceFromInput
+    if amount_in == 0:
+        return sqrt_price
+    if zero_for_one:
+        numerator = liquidity << 96
+        product = amount_in * sqrt_price
+        if product <= MAX_UINT256:
+            return mul_div_ceil(numerator, sqrt_price, numerator + product)
+        return -(-numerator // (numerator // sqrt_price + amount_in))
+    return sqrt_price + (amount_in << 96) // liquidity
+
+
+def _swap_step(sqrt_price: int, sqrt_price_target: int, liquidity: int, amount_remaining: int, fee: int):
+    # SwapMath.computeSwapStep, exact input
+    zero_for_one = sqrt_price >= sqrt_price_target
+    amount_remaining_less_fee = mul_div_floor(amount_remaining, PPM - fee, PPM)
+    if zero_for_one:
+        amount_in = _amount0_delta(sqrt_price_target, sqrt_price, liquidity, True)
+    else:
+        amount_in = _amount1_delta(sqrt_price, sqrt_price_target, liquidity, True)
+    if amount_remaining_less_fee >= amount_in:
+        sqrt_price_next = sqrt_price_target
+    else:
+        sqrt_price_next = _next_sqrt_price_from_input(sqrt_price, liquidity, amount_remaining_less_fee, zero_for_one)
+        if zero_for_one:
+            amount_in = _amount0_delta(sqrt_price_next, sqrt_price, liquidity, True)
+        else:
+            amount_in = _amount1_delta(sqrt_price, sqrt_price_next, liquidity, True)
+    if zero_for_one:
+        amount_out = _amount1_delta(sqrt_price_next, sqrt_price, liquidity, False)
+    else:
+        amount_out = _amount0_delta(sqrt_price, sqrt_price_next, liquidity, False)
+    if sqrt_price_next != sqrt_price_target:
+        fee_amount = amount_remaining - amount_in
+    else:
+        fee_amount = mul_div_ceil(amount_in, fee, PPM - fee)
+    return sqrt_price_next, amount_in, amount_out, fee_amount
+
+
+def uniswap_v3_output_ticks(
+    amount_in: int,
+    liquidity: int,
+    sqrt_price_q96: int,
+    tick: int,
+    fee: int,
+    zero_for_one: bool,
+    tick_spacing: int,
+    liquidity_net: Sequence[Tuple[int, int]],
+    lower: int,
+    upper: int,
+) -> Tuple[int, int]:
+    """
+    The input and output of a Uniswap V3 (fork) swap, crossing the initialized ticks within a window of ticks.
+
+    The swap proceeds in the same steps as ``UniswapV3Pool.swap`` (up to the next initialized tick or the end of
+    the tick bitmap word, whichever comes first), so the amounts are wei-exact. It stops at the boundaries of the
+    window, beyond which the initialized ticks are unknown.
+
+    Parameters
+    ----------
+    amount_in: int
+        The input amount.
+    liquidity: int
+        The liquidity of the current tick.
+    sqrt_price_q96: int
+        The square root of the price, as a Q64.96.
+    tick: int
+        The current tick.
+    fee: int
+        The fee, in ppm.
+    zero_for_one: bool
+        Whether the input token is the token 0 of the pool.
+    tick_spacing: int
+        The tick spacing of the pool.
+    liquidity_net: Sequence[Tuple[int, int]]
+        The (tick, liquidityNet) of the initialized ticks within the window, sorted by tick.
+    lower: int
+        The lowest tick of the window.
+    upper: int
+        The highest tick of the window.
+
+    Returns
+    -------
+    Tuple[int, int]
+        The input amount (less than ``amount_in`` if the swap reaches the boundary of the window) and the output
+        amount.
+    """
+    ticks = [t for t, _ in liquidity_net]
+    net = dict(liquidity_net)
+    lower, upper = max(lower, MIN_TICK), min(upper, MAX_TICK)
+    remaining, amount_out = amount_in, 0
+    while remaining > 0 and liquidity >= 0:
+        if not lower <= tick < upper:
+            break
+        compressed = tick // tick_spacing
+        if zero_for_one:
+            ix = bisect_right(ticks, tick) - 1
+            tick_next = (compressed >> 8 << 8) * tick_spacing
+            tick_next = max(tick_next, ticks[ix]) if ix >= 0 else tick_next
+            tick_next = max(tick_next, lower)
+        else:
+            ix = bisect_right(ticks, tick)
+            tick_next = (((compressed + 1) >> 8 << 8) + 255) * tick_spacing
+            tick_next = min(tick_next, ticks[ix]) if ix < len(ticks) else tick_next
+            tick_next = min(tick_next, upper)
+        sqrt_price_next = sqrt_ratio_at_tick(tick_next)
+        sqrt_price_q96, step_in, step_out, step_fee = _swap_step(
+            sqrt_price_q96, sqrt_price_next, liquidity, remaining, fee
+        )
+        remaining -= step_in + step_fee
+        amount_out += step_out
+        if sqrt_price_q96 != sqrt_price_next:
+            break
+        liquidity += -net.get(tick_next, 0) if zero_for_one else net.get(tick_next, 0)
+        tick = tick_next - 1 if zero_for_one else tick_next
+    return amount_in - remaining, amount_out
+
+
+def carbon_expand_rate(rate: int) -> int:
+    """
+    The rate (``A`` or ``B``) of a Carbon order, as stored in the contract, expanded to its value times 2^48.
+    """
+    rate = int(rate)
+    return (rate % CARBON_ONE) << (rate // CARBON_ONE)
+
+
+def _min_factor(x: int, y: int) -> int:
+    # MathEx.minFactor: the smallest factor by which x * y must be divided to fit in 256 bits
+    hi, lo = divmod(x * y, 2**256)
+    return hi + 2 if hi > MAX_UINT256 - lo else hi + 1
+
+
+def carbon_target_by_source(amount_in: int, y: int, z: int, A: int, B: int) -> int:
+    """
+    The output of a Carbon trade by source amount, before the fee (``A`` and ``B`` expanded).
+    """
+    if A == 0:
+        if B == 0:
+            raise ZeroDivisionError("Carbon order with a zero rate")
+        return mul_div_floor(amount_in, B * B, CARBON_ONE * CARBON_ONE)
+    temp1 = z * CARBON_ONE
+    temp2 = y * A + z * B
+    temp3 = temp2 * amount_in
+    factor = max(_min_factor(temp1, temp1), _min_factor(temp3, A))
+    temp4 = mul_div_ceil(temp1, temp1, factor)
+    temp5 = mul_div_ceil(temp3, A, factor)
+    return mul_div_floor(temp2, temp3 // factor, temp4 + temp5)
+
+
+def carbon_source_by_target(amount_out: int, y: int, z: int, A: int, B: int) -> int:
+    """
+    The input of a Carbon trade by target amount, before the fee (``A`` and ``B`` expanded).
+    """
+    if A == 0:
+        if B == 0:
+            raise ZeroDivisionError("Carbon order with a zero rate")
+        return mul_div_ceil(amount_out, CARBON_ONE * CARBON_ONE, B * B)
+    temp1 = z * CARBON_ONE
+    temp2 = y * A + z * B
+    temp3 = temp2 - amount_out * A
+    factor = max(_min_factor(temp1, temp1), _min_factor(temp2, temp3))
+    temp4 = mul_div_ceil(temp1, temp1, factor)
+    temp5 = mul_div_floor(temp2, temp3, factor)
+    return mul_div_ceil(amount_out, temp4, temp5)
+
+
+def carbon_output(amount_in: int, y: int, z: int, A: int, B: int, fee: int) -> Tuple[int, int]:
+    """
+    The input and output of a Carbon trade by source amount.
+
+    Parameters
+    ----------
+    amount_in: int
+        The input amount.
+    y: int
+        The liquidity of the order.
+    z: int
+        The capacity of the order.
+    A: int
+        The compressed ``A`` rate of the order, as stored in the contract.
+    B: int
+        The compressed ``B`` rate of the order, as stored in the contract.
+    fee: int
+        The fee, in ppm.
+
+    Returns
+    -------
+    Tuple[int, int]
+        The input amount (less than ``amount_in`` if the order cannot absorb it all) and the output amount.
+    """
+    A, B = carbon_expand_rate(A or 0), carbon_expand_rate(B)
+    amount_out = carbon_target_by_source(amount_in, y, z, A, B)
+    if amount_out > y:
+        # the largest input which the order can absorb (the contract reverts on a target amount above y)
+        amount_in = carbon_source_by_target(y, y, z, A, B)
+        while amount_in > 0 and carbon_target_by_source(amount_in, y, z, A, B) > y:
+            amount_in -= 1
+        amount_out = carbon_target_by_source(amount_in, y, z, A, B)
+    return amount_in, mul_div_floor(amount_out, PPM - fee, PPM)
+
+
+def _mul_down(a: int, b: int) -> int:
+    return a * b // WAD
+
+
+def _mul_up(a: int, b: int) -> int:
+    return mul_div_ceil(a, b, WAD)
+
+
+def _div_down(a: int, b: int) -> int:
+    return a * WAD // b
+
+
+def _div_up(a: int, b: int) -> int:
+    return 0 if a == 0 else mul_div_ceil(a, WAD, b)
+
+
+def _complement(x: int) -> int:
+    return WAD - x if x < WAD else 0
+
+
+def _pow_up(x: int, y: int) -> int:
+    if y == WAD:
+        return x
+    if y == 2 * WAD:
+        return _mul_up(x, x)
+    if y == 4 * WAD:
+        square = _mul_up(x, x)
+        return _mul_up(square, square)
+    raw = int(_POW_CONTEXT.power(Decimal(x) / WAD, Decimal(y) / WAD) * WAD)
+    return raw + _mul_up(raw, BALANCER_MAX_POW_RELATIVE_ERROR) + 1
+
+
+def balancer_output(
+    amount_in: int,
+    balance_in: int,
+    weight_in: int,
+    decimals_in: int,
+    balance_out: int,
+    weight_out: int,
+    decimals_out: int,
+    fee: int,
+) -> int:
+    """
+    The output of a Balancer weighted pool swap.
+
+    Parameters
+    ----------
+    amount_in: int
+        The input amount.
+    balance_in: int
+        The balance of the input token.
+    weight_in: int
+        The normalized weight of the input token, times 10^18.
+    decimals_in: int
+        The decimals of the input token.
+    balance_out: int
+        The balance of the output token.
+    weight_out: int
+        The normalized weight of the output token, times 10^18.
+    decimals_out: int
+        The decimals of the output token.
+    fee: int
+        The swap fee, times 10^18.
+
+    Returns
+    -------
+    int
+        The output amount.
+
+    Raises
+    ------
+    BalancerInputTooLargeError, BalancerOutputTooLargeError
+        If the input (or the output) exceeds 30% of the balance, which the pool rejects.
+    """
+    scaling_in, scaling_out = 10 ** (18 - decimals_in), 10 ** (18 - decimals_out)
+    amount_in = (amount_in - _mul_up(amount_in, fee)) * scaling_in
+    balance_in *= scaling_in
+    balance_out *= scaling_out
+    if amount_in > _mul_down(balance_in, BALANCER_MAX_IN_RATIO):
+        raise BalancerInputTooLargeError("Balancer input exceeds 30% of the pool balance")
+
+    base = _div_up(balance_in, balance_in + amount_in)
+    power = _pow_up(base, _div_down(weight_in, weight_out))
+    amount_out = _mul_down(balance_out, _complement(power))
+    if amount_out > _mul_down(balance_out, BALANCER_MAX_OUT_RATIO):
+        raise BalancerOutputTooLargeError("Balancer output exceeds 30% of the pool balance")
+    return amount_out // scaling_out
@@ -13,7 +13,10 @@ from typing import Any, Tuple, Dict, List, Union
 from _decimal import Decimal
 import pandas as pd
 
+from fastlane_bot.modes.executor import ArbComboExecutor, ComboSolution
+from fastlane_bot.modes.no_arb_cache import NoArbCache
 from fastlane_bot.tools.cpc import T
+from fastlane_bot.tools.optimizer import PriceCache
 from fastlane_bot.utils import num_format
 
 
@@ -33,6 +36,10 @@ class ArbitrageFinderBase:
         result=AO_CANDIDATES,
         ConfigObj: Any = None,
         arb_mode: str = None,
+        no_arb_cache: NoArbCache = None,
+        arb_workers: int = 1,
+        price_cache: PriceCache = None,
+        arb_executor: ArbComboExecutor = None,
     ):
         self.flashloan_tokens = flashloan_tokens
         self.CCm = CCm
@@ -45,6 +52,10 @@ class ArbitrageFinderBase:
         self.best_trade_instructions_dic = None
         self.ConfigObj = ConfigObj
         self.base_exchange = "bancor_v3" if arb_mode == "bancor_v3" else "carbon_v1"
+        self.no_arb_cache = no_arb_cache
+        self.arb_workers = arb_workers
+        self.price_cache = price_cache
+        self.arb_executor = arb_executor
 
     @abc.abstractmethod
     def find_arbitrage(
@@ -75,6 +86,131 @@ class ArbitrageFinderBase:
         """
         pass
 
+    def is_no_arb(self, src_token: str, curves: List[Any]) -> bool:
+        """
+        Whether the curve combo is known not to yield an arbitrage (always False without a ``no_arb_cache``).
+        """
+        if self.no_arb_cache is None:
+            return False
+        return self.no_arb_cache.is_no_arb(getattr(self, "arb_mode", None), src_token, curves)
+
+    def record_no_arb(self, src_token: str, curves: List[Any]) -> None:
+        """
+        Record that the curve combo does not yield an arbitrage (no-op without a ``no_arb_cache``).
+        """
+        if self.no_arb_cache is not None:
+            self.no_arb_cache.record_no_arb(getattr(self, "arb_mode", None), src_token, curves)
+
+    def solve_combo(self, src_token: str, curves: List[Any], args: Any = None) -> ComboSolution:
+        """
+        Solves a single curve combo (see subclasses); must only depend on the combo and the ``ArbComboExecutor``
+        worker configuration, as it may run in a worker process.
+
+        Parameters
+        ----------
+        src_token : str
+            The source (flashloan) token
+        curves : List[Any]
+            The curves of the combo
+        args : Any, optional
+            Mode specific arguments, by default None
+
+        Returns
+        -------
+        ComboSolution
+            The solution (with the error message set if the solve failed)
+        """
+        raise NotImplementedError(f"solve_combo not implemented for {type(self).__name__}")
+
+    def solve_combos(self, tasks: List[Tuple[str, List[Any], Any]]) -> List[ComboSolution]:
+        """
+        Solves the (src_token, curves, args) combos, in a process pool if ``arb_workers > 1`` (the ``arb_executor``
+        if there is one, otherwise a pool started for this call only).
+
+        Returns
+        -------
+        List[ComboSolution]
+            The solutions, in task order
+        """
+        if self.arb_workers > 1 and len(tasks) > 1:
+            if self.arb_executor is not None:
+                return self.arb_executor.solve(self, tasks)
+            with ArbComboExecutor(workers=self.arb_workers) as executor:
+                return executor.solve(self, tasks)
+        return [self.solve_combo(src_token, curves, args) for src_token, curves, args in tasks]
+
+    def collect_arbitrage(
+        self,
+        tasks: List[Tuple[str, List[Any], Any]],
+        min_trade_instructions: int,
+        candidates: List[Any],
+        best_profit: float,
+        ops: Tuple,
+    ) -> Tuple[List[Any], float, Tuple]:
+        """
+        Solves the combos and collects the candidates and the best operations from the solutions.
+
+        Parameters
+        ----------
+        tasks : List[Tuple[str, List[Any], Any]]
+            The (src_token, curves, args) combos
+        min_trade_instructions : int
+            The minimum number of trade instructions of a valid solution
+        candidates : List[Any]
+            The candidates so far (extended in place)
+        best_profit : float
+            The best profit so far
+        ops : Tuple
+            The best operations so far
+
+        Returns
+        -------
+        Tuple[List[Any], float, Tuple]
+            The candidates, the best profit and the best operations
+        """
+        for (src_token, curves, _), solution in zip(tasks, self.solve_combos(tasks)):
+            trade_instructions_dic = solution.trade_instructions_dic
+            if (
+                solution.error is not None
+                or trade_instructions_dic is None
+                or len(trade_instructions_dic) < min_trade_instructions
+            ):
+                self.record_no_arb(src_token, curves)
+                continue
+
+            # Get the cids
+            cids = [ti["cid"] for ti in trade_instructions_dic]
+
+            # Calculate the profit
+            profit = self.calculate_profit(src_token, solution.profit_src, self.CCm, cids)
+            if str(profit) == "nan":
+                self.ConfigObj.logger.debug("profit is nan, skipping")
+                continue
+            if profit <= 0:
+                self.record_no_arb(src_token, curves)
+
+            # Handle candidates based on conditions
+            candidates += self.handle_candidates(
+                best_profit,
+                profit,
+                solution.trade_instructions_df,
+                trade_instructions_dic,
+                src_token,
+                solution.trade_instructions,
+            )
+
+            # Find the best operations
+            best_profit, ops = self.find_best_operations(
+                best_profit,
+                ops,
+                profit,
+                solution.trade_instructions_df,
+                trade_instructions_dic,
+                src_token,
+                solution.trade_instructions,
+            )
+        return candidates, best_profit, ops
+
     def _set_best_ops(
         self,
         best_profit: float,
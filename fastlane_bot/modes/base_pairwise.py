@@ -13,7 +13,9 @@ import itertools
 from typing import List, Tuple, Any, Union
 
 from fastlane_bot.modes.base import ArbitrageFinderBase
+from fastlane_bot.modes.executor import ComboSolution
 from fastlane_bot.tools.cpc import CPCContainer
+from fastlane_bot.tools.optimizer import PairOptimizer
 
 
 class ArbitrageFinderPairwiseBase(ArbitrageFinderBase):
@@ -21,6 +23,13 @@ class ArbitrageFinderPairwiseBase(ArbitrageFinderBase):
     Base class for pairwise arbitrage finder modes
     """
 
+    #: the exceptions of a combo solve that are treated as "no arbitrage"
+    SOLVE_ERRORS = (Exception,)
+
+    #: True iff ``run_main_flow`` solves the combo with ``PairOptimizer.optimize``, so that the serial
+    #: solves can be replaced by one vectorized ``PairOptimizer.optimize_batch``
+    BATCH_PAIR_SOLVES = False
+
     @abc.abstractmethod
     def find_arbitrage(self, candidates: List[Any] = None, ops: Tuple = None, best_profit: float = 0, profit_src: float = 0) -> Union[List, Tuple]:
         """
@@ -28,6 +37,52 @@ class ArbitrageFinderPairwiseBase(ArbitrageFinderBase):
         """
         pass
 
+    def solve_combo(self, src_token: str, curves: List[Any], args: Any = None) -> ComboSolution:
+        """
+        see base.py; ``args`` is the (tkn0, tkn1) pair, and the combo is solved with ``run_main_flow``
+        """
+        tkn0, tkn1 = args
+        try:
+            O, profit_src, r, trade_instructions_df = self.run_main_flow(
+                curves=curves, src_token=src_token, tkn0=tkn0, tkn1=tkn1
+            )
+            return ComboSolution(
+                profit_src=profit_src,
+                trade_instructions_df=trade_instructions_df,
+                trade_instructions_dic=r.trade_instructions(O.TIF_DICTS),
+                trade_instructions=r.trade_instructions(),
+            )
+        except self.SOLVE_ERRORS as e:
+            return ComboSolution(error=str(e))
+
+    def solve_combos(self, tasks: List[Tuple[str, List[Any], Any]]) -> List[ComboSolution]:
+        """
+        see base.py; if ``BATCH_PAIR_SOLVES`` is set, the combos are solved in one ``PairOptimizer.optimize_batch``
+        (whose results are identical to those of ``run_main_flow``) unless they are sharded across processes
+        """
+        if not self.BATCH_PAIR_SOLVES or self.arb_workers > 1 or len(tasks) < 2:
+            return super().solve_combos(tasks)
+        try:
+            results = PairOptimizer.optimize_batch(
+                [curves for _, curves, _ in tasks], [src_token for src_token, _, _ in tasks]
+            )
+        except self.SOLVE_ERRORS:
+            # eg a combo that is not a single pair; the serial solves isolate the error in that combo
+            return super().solve_combos(tasks)
+
+        solutions = []
+        for r in results:
+            try:
+                solutions.append(ComboSolution(
+                    profit_src=-r.result,
+                    trade_instructions_df=r.trade_instructions(PairOptimizer.TIF_DFAGGR),
+                    trade_instructions_dic=r.trade_instructions(PairOptimizer.TIF_DICTS),
+                    trade_instructions=r.trade_instructions(),
+                ))
+            except self.SOLVE_ERRORS as e:
+                solutions.append(ComboSolution(error=str(e)))
+        return solutions
+
     @staticmethod
     def get_combos(
         CCm: CPCContainer, flashloan_tokens: List[str]
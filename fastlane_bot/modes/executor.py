@@ -0,0 +1,213 @@
+"""
+Defines the ``ArbComboExecutor`` class, which solves the curve combos of an arbitrage finder in a process pool
+
+The arbitrage finders enumerate curve combos and solve each of them independently with a ``PairOptimizer`` or a
+``MargPOptimizer``. The executor shards those solves across a ``ProcessPoolExecutor``, whose workers stay alive
+across solves (and blocks) until ``shutdown``. The curve snapshot of the market is pickled once per block into a
+versioned file that every worker loads the first time it sees the version, and the tasks only contain the cids of
+the curves of each combo. The solutions are returned in task order, so merging them is deterministic and gives the
+same result as the serial loop.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+__VERSION__ = "1.1"
+__DATE__ = "30/Apr/2024"
+
+import os
+import pickle
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from functools import partial
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+@dataclass
+class ComboSolution:
+    """
+    The (picklable) solution of a single curve combo.
+
+    Attributes
+    ----------
+    profit_src: float
+        The profit in the source token.
+    trade_instructions_df: pd.DataFrame
+        The aggregated trade instructions dataframe.
+    trade_instructions_dic: List[Dict[str, Any]]
+        The trade instructions dictionaries.
+    trade_instructions: Tuple
+        The trade instruction objects.
+    error: str
+        The error message if the solve failed, otherwise None.
+    """
+
+    profit_src: float = None
+    trade_instructions_df: pd.DataFrame = None
+    trade_instructions_dic: List[Dict[str, Any]] = None
+    trade_instructions: Tuple = None
+    error: Optional[str] = None
+
+
+# the state of the worker processes: the curve snapshot they loaded last, and a finder instance per finder class
+_worker = SimpleNamespace(version=None, curves_by_cid=None, config=None, finders={})
+
+
+def _load_snapshot(version: int, path: str) -> None:
+    """
+    Loads the curve snapshot in a worker process, unless it is already loaded.
+    """
+    if _worker.version == version:
+        return
+    with open(path, "rb") as f:
+        curves, config = pickle.load(f)
+    _worker.curves_by_cid = {c.cid: c for c in curves}
+    _worker.config = config
+    _worker.finders = {}
+    _worker.version = version
+
+
+def _solve_chunk(
+    version: int, path: str, finder_cls: type, tasks: List[Tuple[str, Tuple[str, ...], Any]]
+) -> List[ComboSolution]:
+    """
+    Solves a chunk of (src_token, cids, args) tasks of the given snapshot version in a worker process.
+    """
+    _load_snapshot(version, path)
+    finder = _worker.finders.get(finder_cls)
+    if finder is None:
+        finder = _worker.finders[finder_cls] = finder_cls(flashloan_tokens=[], CCm=None, ConfigObj=_worker.config)
+    solutions = []
+    for src_token, cids, args in tasks:
+        curves = [_worker.curves_by_cid[cid] for cid in cids]
+        solution = finder.solve_combo(src_token, curves, args)
+        for ti in solution.trade_instructions or []:
+            # the curves are re-attached by the parent; do not ship them back
+            ti.curve = None
+        solutions.append(solution)
+    return solutions
+
+
+@dataclass
+class ArbComboExecutor:
+    """
+    Solves the curve combos of an arbitrage finder in a process pool (see module docstring).
+
+    Attributes
+    ----------
+    workers: int
+        The number of worker processes.
+    chunks_per_worker: int
+        The number of chunks the tasks of each worker are split into (for load balancing).
+    n_snapshots: int
+        The number of curve snapshots shipped to the workers.
+    """
+
+    __VERSION__ = __VERSION__
+    __DATE__ = __DATE__
+
+    workers: int
+    chunks_per_worker: int = 4
+    n_snapshots: int = field(default=0, init=False)
+    _pool: Optional[ProcessPoolExecutor] = field(default=None, init=False, repr=False)
+    _snapshot_dir: Optional[str] = field(default=None, init=False, repr=False)
+    _snapshot_path: Optional[str] = field(default=None, init=False, repr=False)
+    _snapshot_of: Any = field(default=None, init=False, repr=False)
+
+    #: the configuration attributes shipped to the workers
+    CONFIG_ATTRS = (
+        "logger",
+        "CARBON_V1_FORKS",
+        "NATIVE_GAS_TOKEN_ADDRESS",
+        "WRAPPED_GAS_TOKEN_ADDRESS",
+        "DEFAULT_MIN_PROFIT_GAS_TOKEN",
+    )
+
+    @classmethod
+    def worker_config(cls, ConfigObj: Any) -> SimpleNamespace:
+        """
+        The picklable subset of the configuration that is shipped to the workers.
+        """
+        return SimpleNamespace(**{
+            attr: getattr(ConfigObj, attr) for attr in cls.CONFIG_ATTRS if hasattr(ConfigObj, attr)
+        })
+
+    def _ship_snapshot(self, finder: Any) -> Tuple[int, str]:
+        """
+        Writes the curve snapshot of the finder for the workers, unless it was the last one written; returns its
+        (version, path).
+        """
+        if self._snapshot_of is not finder.CCm:
+            path = os.path.join(self._snapshot_dir, f"snapshot_{self.n_snapshots + 1}.pkl")
+            with open(path, "wb") as f:
+                pickle.dump((list(finder.CCm), self.worker_config(finder.ConfigObj)), f, pickle.HIGHEST_PROTOCOL)
+            if self._snapshot_path is not None:
+                # the solves are synchronous: no task of the previous snapshot is pending
+                os.remove(self._snapshot_path)
+            self.n_snapshots += 1
+            self._snapshot_path = path
+            self._snapshot_of = finder.CCm
+        return self.n_snapshots, self._snapshot_path
+
+    def solve(self, finder: Any, tasks: List[Tuple[str, List[Any], Any]]) -> List[ComboSolution]:
+        """
+        Solves the combos in the worker processes, which are started by the first call.
+
+        Parameters
+        ----------
+        finder: ArbitrageFinderBase
+            The arbitrage finder; its class solves the combos, and its ``CCm`` is the curve snapshot.
+        tasks: List[Tuple[str, List[Any], Any]]
+            The (src_token, curves, args) combos; the curves must be in ``finder.CCm``.
+
+        Returns
+        -------
+        List[ComboSolution]
+            The solutions, in task order.
+        """
+        if len(tasks) == 0:
+            return []
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            self._snapshot_dir = tempfile.mkdtemp(prefix="arb_combo_executor_")
+        version, path = self._ship_snapshot(finder)
+        cid_tasks = [(src_token, tuple(c.cid for c in curves), args) for src_token, curves, args in tasks]
+        nchunks = min(len(cid_tasks), self.workers * self.chunks_per_worker)
+        chunks = [cid_tasks[i::nchunks] for i in range(nchunks)]
+        try:
+            chunk_solutions = list(self._pool.map(partial(_solve_chunk, version, path, type(finder)), chunks))
+        except BrokenProcessPool:
+            # a worker died: the next call starts a new pool
+            self.shutdown()
+            raise
+
+        # chunk i holds the tasks i, i + nchunks, i + 2 * nchunks, ...
+        solutions = [None] * len(cid_tasks)
+        for i, chunk in enumerate(chunk_solutions):
+            solutions[i::nchunks] = chunk
+        for solution in solutions:
+            for ti in solution.trade_instructions or []:
+                ti.curve = finder.CCm.bycid(ti.cid)
+        return solutions
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker processes and deletes the curve snapshot; the next ``solve`` starts new ones.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            shutil.rmtree(self._snapshot_dir, ignore_errors=True)
+        self._pool = self._snapshot_dir = self._snapshot_path = self._snapshot_of = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
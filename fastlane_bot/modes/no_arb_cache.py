@@ -0,0 +1,115 @@
+"""
+Defines the ``NoArbCache`` class, a cache of "no-arb" verdicts used for the incremental arbitrage search
+
+The arbitrage finders enumerate and optimize every curve combo across the whole market every block. However, an
+arbitrage can only appear in a combo in which at least one curve changed since the previous search. The cache
+therefore remembers the combos that did not yield a profitable arbitrage, and drops those verdicts as soon as one of
+their curves changes (as reported by the data layer, see ``CurveCache.changed_cids``). The finders skip the combos
+with a valid verdict. Every ``full_sweep_interval`` searches all verdicts are dropped, ie the full market is searched.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+__VERSION__ = "1.0"
+__DATE__ = "22/Apr/2024"
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+
+@dataclass
+class NoArbCache:
+    """
+    Cache of the curve combos that did not yield an arbitrage (see module docstring).
+
+    Attributes
+    ----------
+    full_sweep_interval: int
+        Every ``full_sweep_interval``-th search is a full sweep (0 = only when the changes are unknown).
+    verdicts: Set[Tuple]
+        The keys of the combos without arbitrage.
+    keys_by_cid: Dict[str, Set[Tuple]]
+        The verdict keys by curve cid, used for the invalidation.
+    n_searches: int
+        The number of searches started.
+    is_full_sweep: bool
+        Whether the current search is a full sweep.
+    n_skipped: int
+        The number of combos skipped in the current search.
+    n_recorded: int
+        The number of verdicts recorded in the current search.
+    """
+
+    __VERSION__ = __VERSION__
+    __DATE__ = __DATE__
+
+    full_sweep_interval: int = 0
+    verdicts: Set[Tuple] = field(default_factory=set)
+    keys_by_cid: Dict[str, Set[Tuple]] = field(default_factory=dict)
+    n_searches: int = 0
+    is_full_sweep: bool = True
+    n_skipped: int = 0
+    n_recorded: int = 0
+
+    @staticmethod
+    def combo_key(arb_mode: str, src_token: str, curves: Iterable[Any]) -> Tuple:
+        """
+        The key of a combo, ie the arb mode, the source token and the cids of its curves.
+        """
+        return arb_mode, src_token, tuple(c.cid for c in curves)
+
+    def begin(self, changed_cids: Optional[Iterable[Hashable]] = None) -> bool:
+        """
+        Start a new search, invalidating the verdicts of all combos that contain a changed curve.
+
+        Parameters
+        ----------
+        changed_cids: Iterable[Hashable], optional
+            The cids of all curves changed, added or removed since the previous search; None if unknown,
+            which forces a full sweep.
+
+        Returns
+        -------
+        bool
+            True if the search is a full sweep.
+        """
+        self.is_full_sweep = (
+            changed_cids is None
+            or self.n_searches == 0
+            or (self.full_sweep_interval > 0 and self.n_searches % self.full_sweep_interval == 0)
+        )
+        self.n_searches += 1
+        self.n_skipped = self.n_recorded = 0
+        if self.is_full_sweep:
+            self.verdicts.clear()
+            self.keys_by_cid.clear()
+            return True
+        for cid in changed_cids:
+            keys = self.keys_by_cid.pop(cid, None)
+            if keys:
+                self.verdicts.difference_update(keys)
+        return False
+
+    def is_no_arb(self, arb_mode: str, src_token: str, curves: Iterable[Any]) -> bool:
+        """
+        Whether the combo has a valid no-arb verdict (in which case the caller skips it).
+        """
+        if self.combo_key(arb_mode, src_token, curves) in self.verdicts:
+            self.n_skipped += 1
+            return True
+        return False
+
+    def record_no_arb(self, arb_mode: str, src_token: str, curves: Iterable[Any]) -> None:
+        """
+        Record that the combo does not yield an arbitrage.
+        """
+        key = self.combo_key(arb_mode, src_token, curves)
+        self.verdicts.add(key)
+        for cid in key[2]:
+            self.keys_by_cid.setdefault(cid, set()).add(key)
+        self.n_recorded += 1
+
+    def __len__(self) -> int:
+        return len(self.verdicts)
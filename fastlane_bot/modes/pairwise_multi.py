@@ -23,6 +23,7 @@ class FindArbitrageMultiPairwise(ArbitrageFinderPairwiseBase):
     """
 
     arb_mode = "multi_pairwise"
+    BATCH_PAIR_SOLVES = True
 
     def find_arbitrage(
         self,
@@ -48,6 +49,7 @@ class FindArbitrageMultiPairwise(ArbitrageFinderPairwiseBase):
         self.ConfigObj.logger.debug(
             f"\n ************ combos: {len(combos)} ************\n"
         )
+        tasks = []
         for tkn0, tkn1 in combos:
             r = None
             CC = self.CCm.bypairs(f"{tkn0}/{tkn1}")
@@ -73,56 +75,15 @@ class FindArbitrageMultiPairwise(ArbitrageFinderPairwiseBase):
 
             for curve_combo in curve_combos:
                 src_token = tkn1
-
                 if len(curve_combo) < 2:
                     continue
-
-                try:
-                    (O, profit_src, r, trade_instructions_df,) = self.run_main_flow(
-                        curves=curve_combo, src_token=src_token, tkn0=tkn0, tkn1=tkn1
-                    )
-
-                    trade_instructions_dic = r.trade_instructions(O.TIF_DICTS)
-                    trade_instructions = r.trade_instructions()
-
-                except Exception:
-                    continue
-
-                if trade_instructions_dic is None:
-                    continue
-                if len(trade_instructions_dic) < 2:
-                    continue
-
-                # Get the cids
-                cids = [ti["cid"] for ti in trade_instructions_dic]
-
-                # Calculate the profit
-                profit = self.calculate_profit(src_token, profit_src, self.CCm, cids)
-
-                if str(profit) == "nan":
-                    self.ConfigObj.logger.debug("profit is nan, skipping")
+                if self.is_no_arb(src_token, curve_combo):
                     continue
+                tasks.append((src_token, curve_combo, (tkn0, tkn1)))
 
-                # Handle candidates based on conditions
-                candidates += self.handle_candidates(
-                    best_profit,
-                    profit,
-                    trade_instructions_df,
-                    trade_instructions_dic,
-                    src_token,
-                    trade_instructions,
-                )
-
-                # Find the best operations
-                best_profit, ops = self.find_best_operations(
-                    best_profit,
-                    ops,
-                    profit,
-                    trade_instructions_df,
-                    trade_instructions_dic,
-                    src_token,
-                    trade_instructions,
-                )
+        candidates, best_profit, ops = self.collect_arbitrage(
+            tasks, min_trade_instructions=2, candidates=candidates, best_profit=best_profit, ops=ops
+        )
 
         return candidates if self.result == self.AO_CANDIDATES else ops
 
@@ -24,6 +24,10 @@ class FindArbitrageMultiPairwiseAll(ArbitrageFinderPairwiseBase):
     """
 
     arb_mode = "multi_pairwise_all"
+    BATCH_PAIR_SOLVES = True
+
+    #: only a non-converging optimizer is treated as "no arbitrage"
+    SOLVE_ERRORS = (ValueError,)
 
     def find_arbitrage(self, candidates: List[Any] = None, ops: Tuple = None, best_profit: float = 0, profit_src: float = 0) -> Union[List, Tuple]:
         """
@@ -42,6 +46,7 @@ class FindArbitrageMultiPairwiseAll(ArbitrageFinderPairwiseBase):
         self.ConfigObj.logger.debug(
             f"\n ************ combos: {len(combos)} ************\n"
         )
+        tasks = []
 
         for tkn0, tkn1 in combos:
             r = None
@@ -74,53 +79,13 @@ class FindArbitrageMultiPairwiseAll(ArbitrageFinderPairwiseBase):
                 src_token = tkn1
                 if len(curve_combo) < 2:
                     continue
-                try:
-                    (
-                        O,
-                        profit_src,
-                        r,
-                        trade_instructions_df,
-                    ) = self.run_main_flow(curves=curve_combo, src_token=src_token, tkn0=tkn0, tkn1=tkn1)
-                except ValueError:
-                    #Optimizer did not converge
-                    continue
-
-
-                trade_instructions_dic = r.trade_instructions(O.TIF_DICTS)
-                trade_instructions = r.trade_instructions()
-                if trade_instructions_dic is None:
-                    continue
-                if len(trade_instructions_dic) < 2:
-                    continue
-                # Get the cids
-                cids = [ti["cid"] for ti in trade_instructions_dic]
-
-                # Calculate the profit
-                profit = self.calculate_profit(src_token, profit_src, self.CCm, cids)
-                if str(profit) == "nan":
-                    self.ConfigObj.logger.debug("profit is nan, skipping")
+                if self.is_no_arb(src_token, curve_combo):
                     continue
+                tasks.append((src_token, curve_combo, (tkn0, tkn1)))
 
-                # Handle candidates based on conditions
-                candidates += self.handle_candidates(
-                    best_profit,
-                    profit,
-                    trade_instructions_df,
-                    trade_instructions_dic,
-                    src_token,
-                    trade_instructions,
-                )
-
-                # Find the best operations
-                best_profit, ops = self.find_best_operations(
-                    best_profit,
-                    ops,
-                    profit,
-                    trade_instructions_df,
-                    trade_instructions_dic,
-                    src_token,
-                    trade_instructions,
-                )
+        candidates, best_profit, ops = self.collect_arbitrage(
+            tasks, min_trade_instructions=2, candidates=candidates, best_profit=best_profit, ops=ops
+        )
 
         return candidates if self.result == self.AO_CANDIDATES else ops
 
@@ -66,6 +66,8 @@ class FindArbitrageMultiPairwisePol(ArbitrageFinderPairwiseBase):
                 src_token = tkn1
                 if len(curve_combo) < 2:
                     continue
+                if self.is_no_arb(src_token, curve_combo):
+                    continue
 
                 try:
                     (
@@ -79,10 +81,10 @@ class FindArbitrageMultiPairwisePol(ArbitrageFinderPairwiseBase):
                     trade_instructions = r.trade_instructions()
 
                 except Exception:
+                    self.record_no_arb(src_token, curve_combo)
                     continue
-                if trade_instructions_dic is None:
-                    continue
-                if len(trade_instructions_dic) < 2:
+                if trade_instructions_dic is None or len(trade_instructions_dic) < 2:
+                    self.record_no_arb(src_token, curve_combo)
                     continue
                 # Get the cids
                 cids = [ti["cid"] for ti in trade_instructions_dic]
@@ -93,6 +95,8 @@ class FindArbitrageMultiPairwisePol(ArbitrageFinderPairwiseBase):
                 if str(profit) == "nan":
                     self.ConfigObj.logger.debug("profit is nan, skipping")
                     continue
+                if profit <= 0:
+                    self.record_no_arb(src_token, curve_combo)
 
                 # Handle candidates based on conditions
                 candidates += self.handle_candidates(
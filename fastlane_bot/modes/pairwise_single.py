@@ -60,9 +60,11 @@ class FindArbitrageSinglePairwise(ArbitrageFinderPairwiseBase):
                 continue
 
             for curve_combo in curve_combos:
+                src_token = tkn1
+                if self.is_no_arb(src_token, curve_combo):
+                    continue
                 CC_cc = CPCContainer(curve_combo)
                 O = PairOptimizer(CC_cc)
-                src_token = tkn1
                 try:
                     pstart = {tkn0: CC_cc.bypairs(f"{tkn0}/{tkn1}")[0].p}
                     r = O.optimize(src_token, params=dict(pstart=pstart))
@@ -72,10 +74,10 @@ class FindArbitrageSinglePairwise(ArbitrageFinderPairwiseBase):
                     trade_instructions = r.trade_instructions()
                 except Exception as e:
                     print("[FindArbitrageSinglePairwise] Exception: ", e)
+                    self.record_no_arb(src_token, curve_combo)
                     continue
-                if trade_instructions_dic is None:
-                    continue
-                if len(trade_instructions_dic) < 2:
+                if trade_instructions_dic is None or len(trade_instructions_dic) < 2:
+                    self.record_no_arb(src_token, curve_combo)
                     continue
                 # Get the candidate ids
                 cids = [ti["cid"] for ti in trade_instructions_dic]
@@ -86,6 +88,8 @@ class FindArbitrageSinglePairwise(ArbitrageFinderPairwiseBase):
                 if str(profit) == "nan":
                     self.ConfigObj.logger.debug("profit is nan, skipping")
                     continue
+                if profit <= 0:
+                    self.record_no_arb(src_token, curve_combo)
 
                 # Handle candidates based on conditions
                 candidates += self.handle_candidates(
@@ -12,6 +12,7 @@ import math
 from typing import Union, List, Tuple, Any, Iterable
 
 from fastlane_bot.modes.base_triangle import ArbitrageFinderTriangleBase
+from fastlane_bot.modes.executor import ComboSolution
 from fastlane_bot.tools.cpc import CPCContainer, T, ConstantProductCurve
 from fastlane_bot.tools.optimizer import MargPOptimizer
 
@@ -53,55 +54,14 @@ class ArbitrageFinderTriangleBancor3TwoHop(ArbitrageFinderTriangleBase):
         if len(all_miniverses) == 0:
             return None
 
-        # Check each source token and miniverse combination
-        for src_token, miniverse in all_miniverses:
-            r = None
-
-            try:
-                # Run main flow with the new set of curves
-                (
-                    profit_src,
-                    trade_instructions,
-                    trade_instructions_df,
-                    trade_instructions_dic,
-                ) = self.run_main_flow(miniverse, src_token)
-
-            except Exception:
-                continue
-            if trade_instructions_dic is None:
-                continue
-            if len(trade_instructions_dic) < 3:
-                continue
-            # Get the candidate ids
-            cids = [ti["cid"] for ti in trade_instructions_dic]
-
-            # Calculate the profit
-            profit = self.calculate_profit(src_token, profit_src, self.CCm, cids)
-
-            if str(profit) == "nan":
-                self.ConfigObj.logger.debug("profit is nan, skipping")
-                continue
-
-            # Handle candidates based on conditions
-            candidates += self.handle_candidates(
-                best_profit,
-                profit,
-                trade_instructions_df,
-                trade_instructions_dic,
-                src_token,
-                trade_instructions,
-            )
-
-            # Find the best operations
-            best_profit, ops = self.find_best_operations(
-                best_profit,
-                ops,
-                profit,
-                trade_instructions_df,
-                trade_instructions_dic,
-                src_token,
-                trade_instructions,
-            )
+        tasks = [
+            (src_token, miniverse, None)
+            for src_token, miniverse in all_miniverses
+            if not self.is_no_arb(src_token, miniverse)
+        ]
+        candidates, best_profit, ops = self.collect_arbitrage(
+            tasks, min_trade_instructions=3, candidates=candidates, best_profit=best_profit, ops=ops
+        )
 
         return candidates if self.result == self.AO_CANDIDATES else ops
 
@@ -255,6 +215,26 @@ class ArbitrageFinderTriangleBancor3TwoHop(ArbitrageFinderTriangleBase):
         val = (-p1t0*p2t0*p0t0 + (p1t0*p2t0*p0t0*p1t1*p2t1*p0t1*(-fee1*fee2*fee0 + fee1*fee2 + fee1*fee0 - fee1 + fee2*fee0 - fee2 - fee0 + 1)) ** 0.5)/(p1t0*p2t0 - p2t0*p0t1*fee0 + p2t0*p0t1 + p1t1*p0t1*fee1*fee0 - p1t1*p0t1*fee1 - p1t1*p0t1*fee0 + p1t1*p0t1)
         return val
 
+    def solve_combo(self, src_token: str, curves: List[Any], args: Any = None) -> ComboSolution:
+        """
+        see base.py; the combo is solved with ``run_main_flow``
+        """
+        try:
+            (
+                profit_src,
+                trade_instructions,
+                trade_instructions_df,
+                trade_instructions_dic,
+            ) = self.run_main_flow(curves, src_token)
+        except Exception as e:
+            return ComboSolution(error=str(e))
+        return ComboSolution(
+            profit_src=profit_src,
+            trade_instructions_df=trade_instructions_df,
+            trade_instructions_dic=trade_instructions_dic,
+            trade_instructions=trade_instructions,
+        )
+
     def run_main_flow(self,
         miniverse: List, src_token: str
     ) -> Tuple[float, Any, Any, Any]:
@@ -280,7 +260,7 @@ class ArbitrageFinderTriangleBancor3TwoHop(ArbitrageFinderTriangleBase):
         O = MargPOptimizer(CC_cc)
         pstart = self.build_pstart(CC_cc, CC_cc.tokens(), src_token)
         # Perform the optimization
-        r = O.optimize(src_token, params=dict(pstart=pstart))
+        r = O.optimize(src_token, params=dict(pstart=pstart, pcache=self.price_cache))
 
         # Get the profit in the source token
         profit_src = -r.result
@@ -11,6 +11,7 @@ Licensed under MIT.
 from typing import List, Any, Tuple, Union
 
 from fastlane_bot.modes.base_triangle import ArbitrageFinderTriangleBase
+from fastlane_bot.modes.executor import ComboSolution
 from fastlane_bot.tools.cpc import CPCContainer
 from fastlane_bot.tools.optimizer import MargPOptimizer
 
@@ -35,52 +36,36 @@ class ArbitrageFinderTriangleMulti(ArbitrageFinderTriangleBase):
 
         combos = self.get_combos(self.flashloan_tokens, self.CCm, arb_mode=self.arb_mode)
 
-        for src_token, miniverse in combos:
-            try:
-                CC_cc = CPCContainer(miniverse)
-                O = MargPOptimizer(CC_cc)
-                pstart = self.build_pstart(CC_cc, CC_cc.tokens(), src_token)
-                r = O.optimize(src_token, params=dict(pstart=pstart))
-                trade_instructions_dic = r.trade_instructions(O.TIF_DICTS)
-                if trade_instructions_dic is None or len(trade_instructions_dic) < 3:
-                    # Failed to converge
-                    continue
-                trade_instructions_df = r.trade_instructions(O.TIF_DFAGGR)
-                trade_instructions = r.trade_instructions()
+        tasks = [
+            (src_token, miniverse, None)
+            for src_token, miniverse in combos
+            if not self.is_no_arb(src_token, miniverse)
+        ]
+        candidates, best_profit, ops = self.collect_arbitrage(
+            tasks, min_trade_instructions=3, candidates=candidates, best_profit=best_profit, ops=ops
+        )
 
-            except Exception as e:
-                self.ConfigObj.logger.info(f"[triangle multi] {e}")
-                continue
-            profit_src = -r.result
-
-            # Get the cids
-            cids = [ti["cid"] for ti in trade_instructions_dic]
-
-            # Calculate the profit
-            profit = self.calculate_profit(src_token, profit_src, self.CCm, cids)
-            if str(profit) == "nan":
-                self.ConfigObj.logger.debug("profit is nan, skipping")
-                continue
-
-            # Handle candidates based on conditions
-            candidates += self.handle_candidates(
-                best_profit,
-                profit,
-                trade_instructions_df,
-                trade_instructions_dic,
-                src_token,
-                trade_instructions,
-            )
+        return candidates if self.result == self.AO_CANDIDATES else ops
 
-            # Find the best operations
-            best_profit, ops = self.find_best_operations(
-                best_profit,
-                ops,
-                profit,
-                trade_instructions_df,
-                trade_instructions_dic,
-                src_token,
-                trade_instructions,
+    def solve_combo(self, src_token: str, curves: List[Any], args: Any = None) -> ComboSolution:
+        """
+        see base.py
+        """
+        try:
+            CC_cc = CPCContainer(curves)
+            O = MargPOptimizer(CC_cc)
+            pstart = self.build_pstart(CC_cc, CC_cc.tokens(), src_token)
+            r = O.optimize(src_token, params=dict(pstart=pstart, pcache=self.price_cache))
+            trade_instructions_dic = r.trade_instructions(O.TIF_DICTS)
+            if trade_instructions_dic is None or len(trade_instructions_dic) < 3:
+                # Failed to converge
+                return ComboSolution(trade_instructions_dic=trade_instructions_dic)
+            return ComboSolution(
+                profit_src=-r.result,
+                trade_instructions_df=r.trade_instructions(O.TIF_DFAGGR),
+                trade_instructions_dic=trade_instructions_dic,
+                trade_instructions=r.trade_instructions(),
             )
-
-        return candidates if self.result == self.AO_CANDIDATES else ops
+        except Exception as e:
+            self.ConfigObj.logger.info(f"[triangle multi] {e}")
+            return ComboSolution(error=str(e))
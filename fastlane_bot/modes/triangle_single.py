@@ -38,6 +38,8 @@ class ArbitrageFinderTriangleSingle(ArbitrageFinderTriangleBase):
         # Check each source token and miniverse combination
         for src_token, miniverse in combos:
             r = None
+            if self.is_no_arb(src_token, miniverse):
+                continue
 
             # Instantiate the container and optimizer objects
             CC_cc = CPCContainer(miniverse)
@@ -45,7 +47,7 @@ class ArbitrageFinderTriangleSingle(ArbitrageFinderTriangleBase):
 
             try:
                 # Perform the optimization
-                r = O.margp_optimizer(src_token)
+                r = O.margp_optimizer(src_token, params=dict(pcache=self.price_cache))
 
                 # Get the profit in the source token
                 profit_src = -r.result
@@ -55,11 +57,11 @@ class ArbitrageFinderTriangleSingle(ArbitrageFinderTriangleBase):
                 trade_instructions_dic = r.trade_instructions(O.TIF_DICTS)
                 trade_instructions = r.trade_instructions()
             except Exception:
+                self.record_no_arb(src_token, miniverse)
                 continue
 
-            if trade_instructions_dic is None:
-                continue
-            if len(trade_instructions_dic) < 3:
+            if trade_instructions_dic is None or len(trade_instructions_dic) < 3:
+                self.record_no_arb(src_token, miniverse)
                 continue
 
             # Get the candidate ids
@@ -71,6 +73,8 @@ class ArbitrageFinderTriangleSingle(ArbitrageFinderTriangleBase):
             if str(profit) == "nan":
                 self.ConfigObj.logger.debug("profit is nan, skipping")
                 continue
+            if profit <= 0:
+                self.record_no_arb(src_token, miniverse)
 
             # Handle candidates based on conditions
             candidates += self.handle_candidates(
@@ -25,7 +25,7 @@ __DATE__ = "15/Jan/2024"
 import math as m
 import numpy as np
 import pandas as pd
-from matplotlib import pyplot as plt
+from fastlane_bot.tools.lazyimport import plt
 import os
 import sys
 from decimal import Decimal
@@ -210,8 +210,8 @@ def test_test_precision_using_all_tokens_in_carbon():
             if trade.amtin <=0:
                 trade_instructions.pop(idx)
                 continue
-            if trade.raw_txs != "[]":
-                data = eval(trade.raw_txs)
+            if trade.raw_txs:
+                data = [dict(tx) for tx in trade.raw_txs]
                 total_out = 0
                 total_in = 0
                 total_in_wei = 0
@@ -329,7 +329,7 @@ def test_test_precision_using_all_tokens_in_carbon():
                 trade_instructions[idx].amtout = amount_out
                 trade_instructions[idx]._amtin_wei = total_in_wei
                 trade_instructions[idx]._amtout_wei = total_out_wei
-                trade_instructions[idx].raw_txs = str(raw_txs_lst)
+                trade_instructions[idx].raw_txs = raw_txs_lst
     
             else:
     
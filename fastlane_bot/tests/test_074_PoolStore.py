@@ -0,0 +1,98 @@
+import pickle
+from unittest.mock import MagicMock, Mock
+
+from fastlane_bot.events.interface import QueryInterface
+from fastlane_bot.events.pool_store import PoolStore
+
+
+def make_pool(cid, exchange_name="uniswap_v2", address="0x1", tkn0="0xA", tkn1="0xB", block=1):
+    return {
+        "cid": cid,
+        "exchange_name": exchange_name,
+        "address": address,
+        "tkn0_address": tkn0,
+        "tkn1_address": tkn1,
+        "last_updated_block": block,
+    }
+
+
+def test_lookups():
+    store = PoolStore([
+        make_pool("c1"),
+        make_pool("c2", exchange_name="carbon_v1", address="0xC", tkn0="0xB", tkn1="0xA"),
+        make_pool("c3", exchange_name="carbon_v1", address="0xC", tkn0="0xA", tkn1="0xD"),
+    ])
+    assert isinstance(store, list)
+    assert store.by_cid("c2")["tkn0_address"] == "0xB"
+    assert store.by_cid("missing") is None
+    assert store.first("address", "uniswap_v2", "0x1")["cid"] == "c1"
+    assert store.first("address", "carbon_v1", "0x1") is None
+    assert [p["cid"] for p in store.by_exchange("carbon_v1")] == ["c2", "c3"]
+    assert [p["cid"] for p in store.by_pair("carbon_v1", "0xA", "0xB")] == []
+    assert [p["cid"] for p in store.by_pair("carbon_v1", "0xA", "0xB", ordered=False)] == ["c2"]
+    assert [p["cid"] for p in store.find("tkn0_address", "carbon_v1", "0xA")] == ["c3"]
+
+
+def test_index_maintenance():
+    store = PoolStore()
+    store.append(make_pool("c1"))
+    store.extend([make_pool("c2", address="0x2"), make_pool("c3", address="0x3")])
+    store[0] = make_pool("c4", address="0x4")
+    assert store.by_cid("c1") is None
+    assert store.by_cid("c4") is store[0]
+
+    del store[1]
+    assert store.by_cid("c2") is None
+    assert store.first("address", "uniswap_v2", "0x2") is None
+    assert len(store) == 2
+
+    assert store.delete_cids(["c3", "nope"]) == 1
+    assert [p["cid"] for p in store] == ["c4"]
+    assert store.first("address", "uniswap_v2", "0x3") is None
+
+
+def test_update_reindexes_key_fields():
+    store = PoolStore([make_pool("c1")])
+    store.update("c1", {"tkn0_balance": 5})
+    assert store.by_cid("c1")["tkn0_balance"] == 5
+    store.update("c1", {"address": "0x9"})
+    assert store.first("address", "uniswap_v2", "0x1") is None
+    assert store.first("address", "uniswap_v2", "0x9")["cid"] == "c1"
+    assert store.update("missing", {"tkn0_balance": 1}) is None
+
+
+def test_upsert_and_deduplicate():
+    store = PoolStore([make_pool("c1", block=1), make_pool("c2", address="0x2", block=2)])
+    record = store[0]
+    store.upsert(make_pool("c1", block=5))
+    assert len(store) == 2
+    assert store[0] is record and record["last_updated_block"] == 5
+    store.upsert(make_pool("c3", address="0x3", block=3))
+    assert len(store) == 3
+
+    store.append(make_pool("c2", address="0x2", block=7))
+    store.deduplicate("last_updated_block")
+    assert [p["cid"] for p in store] == ["c2", "c1", "c3"]
+    assert store.by_cid("c2")["last_updated_block"] == 7
+    assert len(store.find("cid", "c2")) == 1
+
+
+def test_pickle_roundtrip():
+    store = PoolStore([make_pool("c1"), make_pool("c2", address="0x2")])
+    clone = pickle.loads(pickle.dumps(store))
+    assert isinstance(clone, PoolStore)
+    assert clone == store
+    assert clone.by_cid("c2")["address"] == "0x2"
+
+
+def test_query_interface_state_is_indexed():
+    cfg = Mock()
+    cfg.logger = MagicMock()
+    qi = QueryInterface(mgr=None, ConfigObj=cfg)
+    qi.state = [make_pool("c1"), make_pool("c2", exchange_name="sushiswap_v2", address="0x2")]
+    assert isinstance(qi.state, PoolStore)
+    assert [p["cid"] for p in qi.filter_pools("sushiswap_v2")] == ["c2"]
+    qi.exchanges = ["uniswap_v2"]
+    qi.remove_unsupported_exchanges()
+    assert isinstance(qi.state, PoolStore)
+    assert qi.state.cids() == ["c1"]
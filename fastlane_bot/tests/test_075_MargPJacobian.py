@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from fastlane_bot.tools.cpc import CPCContainer, ConstantProductCurve as CPC
+from fastlane_bot.tools.optimizer import MargPOptimizer
+
+
+def unlevered_curves():
+    return CPCContainer([
+        CPC.from_pk(pair="WETH/USDC", p=2000, k=10 * 20000, cid="c0"),
+        CPC.from_pk(pair="WETH/USDT", p=2010, k=10 * 20000, cid="c1"),
+        CPC.from_pk(pair="USDC/USDT", p=1.0, k=200000 * 200000, cid="c2"),
+        CPC.from_pk(pair="WBTC/WETH", p=20, k=20 * 100, cid="c3"),
+        CPC.from_pk(pair="WBTC/USDC", p=39000, k=39000 * 5, cid="c4"),
+    ])
+
+
+def weighted_curves():
+    return CPCContainer([
+        CPC.from_xyal(x=10, y=2000 * 3 * 10, alpha=0.25, pair="WETH/DAI", cid="c2000-0.25"),
+        CPC.from_xyal(x=10, y=2500 / 3 * 10, alpha=0.75, pair="WETH/DAI", cid="c2500-0.75"),
+        CPC.from_pk(pair="WETH/USDC", p=2200, k=10 * 22000, cid="c3"),
+        CPC.from_pk(pair="USDC/DAI", p=1.0, k=100000 * 100000, cid="c4"),
+    ])
+
+
+def levered_curves():
+    return CPCContainer([
+        CPC.from_carbon(pair="WETH/USDC", tkny="USDC", yint=20000, y=20000, pa=2100, pb=1900, cid="carb0"),
+        CPC.from_carbon(pair="WETH/USDC", tkny="WETH", yint=10, y=10, pa=1/2050, pb=1/2150, cid="carb1"),
+        CPC.from_pkpp(p=2000, k=2000 * 100, p_min=1500, p_max=2500, pair="WETH/USDC", cid="uv3"),
+        CPC.from_pkpp(p=1.001, k=1e10, p_min=0.99, p_max=1.01, pair="USDC/USDT", cid="uv3s"),
+        CPC.from_pk(pair="WETH/USDT", p=1990, k=10 * 20000, cid="c5"),
+    ])
+
+
+def debug_info(curves, targettkn):
+    O = MargPOptimizer(curves)
+    d = O.optimize(targettkn, result=O.MO_DEBUG)
+    assert isinstance(d, dict)
+    return O, d
+
+
+@pytest.mark.parametrize("curves, targettkn", [
+    (unlevered_curves(), "WETH"),
+    (unlevered_curves(), "USDC"),
+    (weighted_curves(), "WETH"),
+    (levered_curves(), "WETH"),
+    (levered_curves(), "USDT"),
+])
+def test_analytic_jacobian_matches_finite_differences(curves, targettkn):
+    O, d = debug_info(curves, targettkn)
+    f, g = d["dtknfromp_f"], d["dtknjacfromp_f"]
+    rng = np.random.default_rng(42)
+    plog10 = np.log10(np.array(d["price_estimates_t"], dtype=float))
+    for plog10_ in [plog10] + [plog10 + rng.normal(0, 0.01, len(plog10)) for _ in range(5)]:
+        dtkn, J = g(plog10_)
+        Jfd = O.J(f, plog10_, eps=1e-8)  # small step so as not to cross any range boundary
+        scale = np.abs(Jfd).max()
+        assert np.allclose(dtkn, f(plog10_), rtol=1e-9, atol=1e-9 * np.abs(dtkn).max())
+        assert np.allclose(J, Jfd, rtol=1e-3, atol=1e-4 * scale)
+
+
+def test_analytic_jacobian_zero_at_boundary():
+    curves = CPCContainer([
+        CPC.from_carbon(pair="WETH/USDC", tkny="USDC", yint=20000, y=20000, pa=2100, pb=1900, cid="carb0"),
+        CPC.from_pk(pair="WETH/USDC", p=2000, k=10 * 20000, cid="c1"),
+    ])
+    O, d = debug_info(curves, "USDC")
+    g = d["dtknjacfromp_f"]
+
+    # far outside the carbon range only the unlevered curve contributes to the Jacobian
+    dtkn, J = g(np.log10([3000]))
+    dtkn1, J1 = MargPOptimizer.dtknjacfromp_f(
+        np.log10([3000]), MargPOptimizer.curve_arrays(curves[1:2], {"WETH": 0})
+    )
+    assert np.allclose(J, J1)
+    assert np.allclose(dtkn, dtkn1 - curves[0].x_act)
+
+
+@pytest.mark.parametrize("curves, targettkn", [
+    (unlevered_curves(), "WETH"),
+    (weighted_curves(), "WETH"),
+    (levered_curves(), "WETH"),
+])
+def test_optimize_analytic_vs_fd(curves, targettkn):
+    O = MargPOptimizer(curves)
+    r_fd = O.optimize(targettkn, params=dict(jacobian=O.JAC_FD))
+    r_an = O.optimize(targettkn, params=dict(jacobian=O.JAC_ANALYTIC))
+    assert r_fd.errormsg is None and r_an.errormsg is None
+    assert r_an.result == pytest.approx(r_fd.result, rel=1e-6, abs=1e-8)
+    assert np.allclose(r_an.p_optimal_t, r_fd.p_optimal_t, rtol=1e-6)
+    assert r_an.n_iterations <= r_fd.n_iterations + 1
+
+
+def test_optimize_unknown_jacobian():
+    O = MargPOptimizer(unlevered_curves())
+    r = O.optimize("WETH", params=dict(jacobian="magic"))
+    assert isinstance(r.errormsg, MargPOptimizer.ParameterError)
+    with pytest.raises(MargPOptimizer.ParameterError):
+        O.optimize("WETH", params=dict(jacobian="magic", raiseonerror=True))
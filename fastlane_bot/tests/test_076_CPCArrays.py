@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fastlane_bot.tools.cpc import CPCContainer, ConstantProductCurve as CPC
+from fastlane_bot.tools.cpcarrays import CPCArrays
+
+try:
+    market_df = pd.read_csv("_data/NBTEST_002_Curves.csv.gz")
+except:
+    market_df = pd.read_csv("fastlane_bot/tests/_data/NBTEST_002_Curves.csv.gz")
+
+
+cids = lambda curves: tuple(c.cid for c in curves)
+
+
+@pytest.fixture
+def CC():
+    CC = CPCContainer.from_df(market_df)
+    CC += CPC.from_xyal(x=10, y=60000, alpha=0.25, pair="WETH/DAI", cid="w1", params=dict(exchange="balancer"))
+    CC += CPC.from_carbon(pair="WETH/USDC", tkny="USDC", yint=20000, y=15000, pa=2100, pb=1900, cid="carb0",
+                          params=dict(exchange="carbon_v1"))
+    return CC
+
+
+def test_arrays_fields(CC):
+    A = CC.arrays
+    assert isinstance(A, CPCArrays)
+    assert len(A) == len(CC)
+    assert A.cids == CC.cids()
+    for i, c in enumerate(CC):
+        assert A.tokens[A.tknx_ix[i]] == c.tknx
+        assert A.tokens[A.tkny_ix[i]] == c.tkny
+        assert A.pairs[A.pair_ix[i]] == c.pair
+        assert A.ppairs[A.ppair_ix[i]] == c.pairo.primary
+        assert A.exchanges[A.exchange_ix[i]] == c.P("exchange")
+        assert A.k[i] == c.k and A.x_act[i] == c.x_act and A.alpha[i] == c.alpha
+    with pytest.raises(AttributeError):
+        A.nonexistent
+
+
+def test_arrays_cached_and_invalidated(CC):
+    A = CC.arrays
+    assert CC.arrays is A
+    CC += CPC.from_pk(pair="WETH/USDC", p=2000, k=10 * 20000, cid="new")
+    assert CC.arrays is not A
+    assert len(CC.arrays) == len(A) + 1
+
+
+def test_xyfromp_f(CC):
+    A = CC.arrays
+    rng = np.random.default_rng(1)
+    p = A.p * np.exp(rng.normal(0, 0.1, len(A)))
+    for ignorebounds in (False, True):
+        x, y, _ = A.xyfromp_f(p, ignorebounds=ignorebounds)
+        dx, dy, _ = A.dxdyfromp_f(p, ignorebounds=ignorebounds)
+        for i, c in enumerate(CC):
+            if c.p == 0:
+                continue
+            assert c.xyfromp_f(p[i], ignorebounds=ignorebounds)[:2] == pytest.approx((x[i], y[i]), rel=1e-9)
+            assert c.dxdyfromp_f(p[i], ignorebounds=ignorebounds)[:2] == pytest.approx(
+                (dx[i], dy[i]), rel=1e-6, abs=1e-6 * max(abs(c.x), abs(c.y)))
+    x, y, _ = A.xyfromp_f()
+    ok = A.p > 0
+    assert np.allclose(x[ok], A.x[ok]) and np.allclose(y[ok], A.y[ok])
+
+
+def test_dtknfrompvec_f(CC):
+    A = CC.bypairs("WETH/USDC,WETH/DAI,USDC/DAI").arrays
+    pvec = {"WETH": 1, "USDC": 1 / 2000, "DAI": 1 / 1990}
+    dtkn = A.dtknfrompvec_f(pvec, asdct=True)
+    expected = {t: 0 for t in A.tokens}
+    for c in A.curves:
+        for t, v in c.dxvecfrompvec_f(pvec).items():
+            expected[t] += v
+    assert dtkn == pytest.approx(expected, rel=1e-6, abs=1e-6)
+
+    # selections share the token table of the parent, but only need prices for their own tokens
+    S = CC.arrays.bypairs("WETH/USDC,WETH/DAI,USDC/DAI")
+    assert S.dtknfrompvec_f(pvec, asdct=True) == pytest.approx(expected, rel=1e-6, abs=1e-6)
+
+
+def test_selection(CC):
+    A = CC.arrays
+    pairs = "WETH/USDC,WBTC/WETH"
+    assert A.bypairs(pairs).cids == cids(CC.bypairs(pairs, ascc=False)) and len(A.bypairs(pairs)) > 0
+    assert A.bypairs(pairs, directed=True).cids == cids(CC.bypairs(pairs, directed=True, ascc=False))
+    assert A.bytknxs("WETH").cids == cids(CC.bytknxs("WETH", ascc=False))
+    assert A.bytknys("USDC,DAI").cids == cids(CC.bytknys("USDC,DAI", ascc=False))
+    assert A.byexchanges("carbon_v1").cids == ("carb0",)
+
+    S = A.bypairs(pairs)
+    assert S.tokens is A.tokens
+    assert all(c is CC.bycid(c.cid) for c in S.curves)
+    assert S.bytknxs("WETH").cids == tuple(c.cid for c in S.curves if c.tknx == "WETH")
+    assert isinstance(S.ascc(), CPCContainer) and S.ascc().cids() == S.cids
+
+
+@pytest.mark.parametrize("conditions", [
+    dict(),
+    dict(bothin="WETH,USDC,DAI,WBTC"),
+    dict(onein="WETH"),
+    dict(notin="WETH,USDC"),
+    dict(tknbin="WETH", tknqnotin="USDC"),
+    dict(onein_1="WETH", onein_2="USDC"),
+])
+def test_filter_pairs(CC, conditions):
+    assert CC.arrays.filter_pairs(**conditions) == CC.filter_pairs(**conditions)
+    assert CC.arrays.filter_pairs(anyall="any", **conditions) == CC.filter_pairs(anyall="any", **conditions)
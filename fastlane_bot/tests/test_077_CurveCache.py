@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+
+from fastlane_bot.helpers import CurveCache
+from fastlane_bot.tools.cpc import CPCContainer, ConstantProductCurve as CPC
+
+
+def curve(cid, p=2000, k=10 * 20000, pair="WETH/USDC"):
+    return CPC.from_pk(pair=pair, p=p, k=k, cid=cid)
+
+
+def record(cid, block=1, fee="0.003", p=2000, pair="WETH/USDC", ncurves=1):
+    return dict(cid=cid, last_updated_block=block, fee=fee, p=p, pair=pair, ncurves=ncurves)
+
+
+class Builder:
+    def __init__(self):
+        self.built = []
+
+    def __call__(self, idx, rec):
+        self.built.append(rec["cid"])
+        pool = SimpleNamespace(id=idx, cid=rec["cid"])
+        curves = [curve(f"{rec['cid']}-{i}", p=rec["p"], pair=rec["pair"]) for i in range(rec["ncurves"])]
+        return pool, curves
+
+
+def snapshot(CC):
+    return sorted((c.cid, c.p, c.k, c.pair) for c in CC)
+
+
+def test_patch_replace_add_remove():
+    CC = CPCContainer([curve("a"), curve("b", pair="WBTC/WETH", p=20, k=2000), curve("c")])
+    assert len(CC.bypairs("WETH/USDC", ascc=False)) == 2
+
+    assert CC.patch([curve("b", p=2100)]) is CC
+    assert CC.cids() == ("a", "b", "c")
+    assert CC.bycid("b").p == pytest.approx(2100)
+    assert CC.curveix(CC.bycid("b")) == 1
+    assert len(CC.bypairs("WETH/USDC", ascc=False)) == 3
+    assert len(CC.bypairs("WBTC/WETH", ascc=False)) == 0
+
+    CC.patch([curve("d")], remove=["a", "nope"])
+    assert CC.cids() == ("b", "c", "d")
+    assert CC.bycid("a") is None
+    assert [CC.curveix(c) for c in CC] == [0, 1, 2]
+    assert CC.arrays.cids == CC.cids()
+
+
+def test_update_rebuilds_only_changed_pools():
+    cache, build = CurveCache(), Builder()
+    records = [record("p1"), record("p2", ncurves=2), record("p3")]
+    CC = cache.update(records, build)
+    assert build.built == ["p1", "p2", "p3"] and cache.n_built == 3
+    assert cache.changed_cids is None
+    assert CC.cids() == ("p1-0", "p2-0", "p2-1", "p3-0")
+
+    build.built.clear()
+    assert cache.update(records, build) is CC
+    assert build.built == [] and cache.n_built == 0
+
+    records = [record("p1"), record("p2", block=2, p=2100, ncurves=1), record("p3", fee="0.0005"), record("p4")]
+    assert cache.update(records, build) is CC
+    assert build.built == ["p2", "p3", "p4"]
+    assert cache.changed_cids == {"p2-0", "p2-1", "p3-0", "p4-0"}
+    assert CC.bycid("p2-1") is None
+    assert CC.bycid("p2-0").p == pytest.approx(2100)
+
+    build.built.clear()
+    records = [record("p4"), record("p3", fee="0.0005"), record("p3", block=9)]
+    CC = cache.update(records, build)
+    assert build.built == [] and cache.n_removed == 2
+    assert [p.cid for p in cache.pools()] == ["p4", "p3"]
+    assert snapshot(CC) == snapshot(CurveCache().update(records, Builder()))
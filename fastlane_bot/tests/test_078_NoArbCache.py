@@ -0,0 +1,78 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from fastlane_bot.modes.no_arb_cache import NoArbCache
+from fastlane_bot.modes.pairwise_multi_all import FindArbitrageMultiPairwiseAll
+from fastlane_bot.tools.cpc import CPCContainer, ConstantProductCurve as CPC
+
+cfg = SimpleNamespace(
+    logger=logging.getLogger(__name__),
+    CARBON_V1_FORKS=["carbon_v1"],
+    DEFAULT_MIN_PROFIT_GAS_TOKEN=0.0001,
+    NATIVE_GAS_TOKEN_ADDRESS="ETH",
+    WRAPPED_GAS_TOKEN_ADDRESS="WETH",
+)
+
+
+def curve(cid, p, pair="WETH/USDC", exchange="uniswap_v2", k=100 * 200000):
+    return CPC.from_pk(pair=pair, p=p, k=k, cid=cid, params=dict(exchange=exchange))
+
+
+def market():
+    return CPCContainer([
+        curve("u0", 2000),
+        curve("u1", 2000, exchange="sushiswap_v2"),
+        curve("u2", 1, pair="DAI/USDC", k=1e12),
+        curve("u3", 1, pair="DAI/USDC", exchange="sushiswap_v2", k=1e12),
+    ])
+
+
+def find(CCm, cache):
+    finder = FindArbitrageMultiPairwiseAll(
+        flashloan_tokens=["USDC"], CCm=CCm, ConfigObj=cfg, no_arb_cache=cache,
+    )
+    return finder.find_arbitrage()
+
+
+def test_verdicts_and_invalidation():
+    cache = NoArbCache(full_sweep_interval=3)
+    combo1, combo2 = [curve("a", 1), curve("b", 1)], [curve("b", 1), curve("c", 1)]
+    assert cache.begin(["a"]) is True  # the first search is always a full sweep
+    cache.record_no_arb("mode", "USDC", combo1)
+    cache.record_no_arb("mode", "USDC", combo2)
+    assert cache.is_no_arb("mode", "USDC", combo1) and not cache.is_no_arb("other", "USDC", combo1)
+
+    assert cache.begin(["a"]) is False
+    assert not cache.is_no_arb("mode", "USDC", combo1)
+    assert cache.is_no_arb("mode", "USDC", combo2)
+    assert cache.n_skipped == 1
+
+    assert cache.begin([]) is False
+    assert cache.begin([]) is True  # every third search
+    assert len(cache) == 0
+    cache.record_no_arb("mode", "USDC", combo2)
+    assert cache.begin(None) is True  # unknown changes
+    assert len(cache) == 0
+
+
+def test_incremental_search():
+    CCm = market()
+    cache = NoArbCache()
+    cache.begin(None)
+    assert find(CCm, cache) == []
+    n_combos = cache.n_recorded
+    assert n_combos > 0 and cache.n_skipped == 0
+
+    cache.begin([])
+    assert find(CCm, cache) == []
+    assert cache.n_skipped == n_combos and cache.n_recorded == 0
+
+    CCm.patch([curve("u1", 2200, exchange="sushiswap_v2")])
+    cache.begin(["u1"])
+    candidates = find(CCm, cache)
+    assert len(candidates) > 0
+    assert all(c[2][0]["cid"] in ("u0", "u1") for c in candidates)
+    assert 0 < cache.n_skipped < n_combos
+    assert candidates[0][0] == pytest.approx(find(CCm, None)[0][0])
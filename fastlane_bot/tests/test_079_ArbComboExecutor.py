@@ -0,0 +1,106 @@
+import logging
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from fastlane_bot.modes.executor import ArbComboExecutor
+from fastlane_bot.modes.no_arb_cache import NoArbCache
+from fastlane_bot.modes.pairwise_multi_all import FindArbitrageMultiPairwiseAll
+from fastlane_bot.modes.triangle_multi import ArbitrageFinderTriangleMulti
+from fastlane_bot.tools.cpc import CPCContainer, ConstantProductCurve as CPC
+
+cfg = SimpleNamespace(
+    logger=logging.getLogger(__name__),
+    CARBON_V1_FORKS=["carbon_v1"],
+    DEFAULT_MIN_PROFIT_GAS_TOKEN=0.0001,
+    NATIVE_GAS_TOKEN_ADDRESS="ETH",
+    WRAPPED_GAS_TOKEN_ADDRESS="WETH",
+)
+
+
+def market():
+    curves = []
+    for i, (pair, p, k) in enumerate([
+        ("WETH/USDC", 2000, 100 * 200000),
+        ("WETH/USDC", 2050, 100 * 200000),
+        ("WETH/USDC", 1990, 50 * 100000),
+        ("WBTC/USDC", 40000, 10 * 400000),
+        ("WBTC/USDC", 40500, 10 * 400000),
+        ("WBTC/WETH", 20, 10 * 200),
+        ("WBTC/WETH", 19.5, 10 * 200),
+        ("DAI/USDC", 1, 1e12),
+        ("DAI/USDC", 1.001, 1e12),
+        ("USDT/USDC", 1, 1e12),
+        ("USDT/USDC", 1, 1e12),
+    ]):
+        curves += [CPC.from_pk(pair=pair, p=p, k=k, cid=f"c{i}", params=dict(exchange=f"ex{i % 3}"))]
+    curves += [
+        CPC.from_carbon(pair="WETH/USDC", tkny="USDC", yint=20000, y=20000, pa=2100, pb=2080, cid="carb-0",
+                        params=dict(exchange="carbon_v1")),
+        CPC.from_carbon(pair="WBTC/WETH", tkny="WETH", yint=100, y=100, pa=23, pb=21, cid="carb2-0",
+                        params=dict(exchange="carbon_v1")),
+    ]
+    return CPCContainer(curves)
+
+
+def find(finder_cls, flashloan_tokens, arb_workers, **kwargs):
+    finder = finder_cls(
+        flashloan_tokens=flashloan_tokens, CCm=market(), ConfigObj=cfg, arb_workers=arb_workers, **kwargs
+    )
+    return finder.find_arbitrage()
+
+
+def summary(candidates):
+    return [(profit, src, tuple(ti["cid"] for ti in dic)) for profit, _, dic, src, _ in candidates]
+
+
+@pytest.mark.parametrize("finder_cls, flashloan_tokens", [
+    (FindArbitrageMultiPairwiseAll, ["USDC", "WETH"]),
+    (ArbitrageFinderTriangleMulti, ["USDC"]),
+])
+def test_parallel_matches_serial(finder_cls, flashloan_tokens):
+    serial = find(finder_cls, flashloan_tokens, arb_workers=1)
+    parallel = find(finder_cls, flashloan_tokens, arb_workers=3)
+    assert len(serial) > 0
+    assert summary(parallel) == pytest.approx(summary(serial))
+    for _, df, _, _, tis in parallel:
+        assert len(df) > 0
+        assert all(ti.curve is not None and ti.curve.cid == ti.cid for ti in tis)
+
+
+def test_parallel_records_no_arb_verdicts():
+    cache_serial, cache_parallel = NoArbCache(), NoArbCache()
+    for cache, workers in [(cache_serial, 1), (cache_parallel, 2)]:
+        cache.begin(None)
+        find(FindArbitrageMultiPairwiseAll, ["USDC"], arb_workers=workers, no_arb_cache=cache)
+    assert cache_parallel.verdicts == cache_serial.verdicts and len(cache_serial) > 0
+
+
+def test_executor_is_kept_alive_across_solves():
+    serial = find(FindArbitrageMultiPairwiseAll, ["USDC", "WETH"], arb_workers=1)
+    with ArbComboExecutor(workers=2) as executor:
+        CCm = market()
+        for _ in range(2):
+            parallel = find(FindArbitrageMultiPairwiseAll, ["USDC", "WETH"], arb_workers=2, arb_executor=executor)
+            assert summary(parallel) == pytest.approx(summary(serial))
+        pool = executor._pool
+        assert pool is not None and executor.n_snapshots == 2
+
+        # the snapshot of the same curves is shipped once
+        finder = FindArbitrageMultiPairwiseAll(
+            flashloan_tokens=["USDC"], CCm=CCm, ConfigObj=cfg, arb_workers=2, arb_executor=executor
+        )
+        finder.find_arbitrage()
+        finder.find_arbitrage()
+        assert executor._pool is pool and executor.n_snapshots == 3
+        snapshot_dir = executor._snapshot_dir
+        assert os.listdir(snapshot_dir) == ["snapshot_3.pkl"]
+    assert executor._pool is None and not os.path.exists(snapshot_dir)
+
+
+def test_worker_config_is_picklable():
+    import pickle
+    config = ArbComboExecutor.worker_config(cfg)
+    clone = pickle.loads(pickle.dumps(config))
+    assert clone.logger is cfg.logger and clone.CARBON_V1_FORKS == ["carbon_v1"]
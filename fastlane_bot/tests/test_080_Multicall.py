@@ -0,0 +1,108 @@
+import asyncio
+from types import SimpleNamespace
+
+from eth_abi import encode
+
+from fastlane_bot.config.multicaller import MultiCaller
+from fastlane_bot.events.multicall_utils import multicall_helper
+
+# the on-chain state: tkn1_address -> (tkn0_balance, tkn1_balance)
+chain = {}
+
+
+class FakeCall:
+    abi = {"outputs": [{"type": "uint256"}, {"type": "uint256"}]}
+    address = "0xNetworkInfo"
+
+    def __init__(self, tkn):
+        self.tkn = tkn
+
+    def _encode_transaction_data(self):
+        return self.tkn
+
+
+def try_aggregate(batch):
+    return [(True, encode(["uint256", "uint256"], chain[call["callData"]])) for call in batch]
+
+
+class FakeMulticallContract:
+    def __init__(self, log, is_async):
+        self.functions = SimpleNamespace(tryAggregate=self.try_aggregate)
+        self.log, self.is_async = log, is_async
+
+    def try_aggregate(self, require_success, batch):
+        def call(block_identifier):
+            self.log.append((self.is_async, len(batch), block_identifier))
+            return try_aggregate(batch)
+
+        async def async_call(block_identifier):
+            await asyncio.sleep(0)
+            return call(block_identifier)
+
+        return SimpleNamespace(call=async_call if self.is_async else call)
+
+
+def fake_web3(log, is_async=False):
+    return SimpleNamespace(eth=SimpleNamespace(contract=lambda abi, address: FakeMulticallContract(log, is_async)))
+
+
+def test_batches_and_raw_results():
+    chain.update({f"t{i}": (i, 10 * i) for i in range(5)})
+    log = []
+    mc = MultiCaller(fake_web3(log), "0xMulticall", web3_async=fake_web3(log, is_async=True), batch_size=2)
+    for i in range(5):
+        mc.add_call(FakeCall(f"t{i}"))
+    assert [len(b) for b in mc.batches()] == [2, 2, 1]
+    assert mc.run_calls(123) == [(i, 10 * i) for i in range(5)]
+    assert log == [(True, 2, 123), (True, 2, 123), (True, 1, 123)]
+
+    log.clear()
+    mc = MultiCaller(fake_web3(log), "0xMulticall")
+    mc.add_call(FakeCall("t3"))
+    raw = mc.run_calls_raw()
+    assert raw == [(True, encode(["uint256", "uint256"], (3, 30)))]
+    assert mc.decode(0, (False, b"")) is None
+    assert log == [(False, 1, "latest")]
+
+
+def make_mgr():
+    log = []
+    pools = {}
+
+    def get_or_init_pool(pool_info):
+        return pools.setdefault(pool_info["cid"], SimpleNamespace(state={}, unique_key=lambda: "tkn1_address"))
+
+    return SimpleNamespace(
+        web3=fake_web3(log),
+        w3_async=fake_web3(log, is_async=True),
+        cfg=SimpleNamespace(MULTICALL_CONTRACT_ADDRESS="0xMulticall", MULTICALL_BATCH_SIZE=2, CARBON_V1_FORKS=[]),
+        multicall_results={},
+        exchanges={"bancor_v3": SimpleNamespace(pools={})},
+        get_or_init_pool=get_or_init_pool,
+        log=log,
+    )
+
+
+def test_multicall_helper_only_updates_changed_pools():
+    chain.update({f"t{i}": (100 + i, 200 + i) for i in range(3)})
+    pools = [
+        dict(cid=f"c{i}", tkn1_address=f"t{i}", address="0xNetworkInfo", last_updated_block=1) for i in range(3)
+    ]
+    target = SimpleNamespace(functions=SimpleNamespace(tradingLiquidity=FakeCall))
+    mgr = make_mgr()
+
+    assert multicall_helper("bancor_v3", pools, target, mgr, 10) == 3
+    assert [p["last_updated_block"] for p in pools] == [10, 10, 10]
+    assert pools[1]["tkn0_balance"] == 101 and pools[1]["tkn1_balance"] == 201
+    assert set(mgr.exchanges["bancor_v3"].pools) == {"t0", "t1", "t2"}
+
+    chain["t2"] = (500, 600)
+    assert multicall_helper("bancor_v3", pools, target, mgr, 11) == 1
+    assert [p["last_updated_block"] for p in pools] == [10, 10, 11]
+    assert pools[2]["tkn0_balance"] == 500
+
+    # a pool updated otherwise (eg by an event) since its multicall update is rewritten
+    pools[0]["last_updated_block"] = 12
+    pools[0]["tkn0_balance"] = 0
+    assert multicall_helper("bancor_v3", pools, target, mgr, 13) == 1
+    assert pools[0]["tkn0_balance"] == 100 and pools[0]["last_updated_block"] == 13
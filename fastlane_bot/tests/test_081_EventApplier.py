@@ -0,0 +1,106 @@
+import copy
+import json
+import logging
+import random
+
+from web3 import AsyncWeb3, Web3
+
+from fastlane_bot.config import network as network_
+from fastlane_bot.events.interfaces.event import Event
+from fastlane_bot.events.managers.manager import Manager
+from fastlane_bot.events.utils import update_pools_from_events
+
+EXCHANGES = ["uniswap_v2", "sushiswap_v2", "uniswap_v3"]
+
+with open("fastlane_bot/tests/_data/latest_pool_data_testing.json", "r") as f:
+    pool_data = [p for p in json.load(f) if p["exchange_name"] in EXCHANGES]
+
+
+class OfflineConfig:
+    """the mainnet network configuration, with unconnected web3 instances"""
+
+    network = network_.ConfigNetwork.new(network="ethereum")
+    logger = logging.getLogger(__name__)
+    w3 = Web3()
+    w3_async = AsyncWeb3()
+
+    def __getattr__(self, item):
+        return getattr(self.network, item)
+
+
+def make_manager():
+    mgr = Manager(
+        web3=Web3(),
+        w3_async=AsyncWeb3(),
+        cfg=OfflineConfig(),
+        pool_data=copy.deepcopy(pool_data),
+        alchemy_max_block_fetch=20,
+        SUPPORTED_EXCHANGES=EXCHANGES,
+    )
+    for ex in EXCHANGES:
+        mgr.static_pools[f"{ex}_pools"] = {p["address"] for p in pool_data if p["exchange_name"] == ex}
+    mgr.static_pools["uniswap_v2_pools"].add("0x0000000000000000000000000000000000000001")
+    return mgr
+
+
+def event(name, address, block, log_index, **args):
+    return Event(
+        args=args, event=name, log_index=log_index, transaction_index=0, transaction_hash=None,
+        address=address, block_hash=None, block_number=block,
+    )
+
+
+def make_events():
+    events = []
+    for i, p in enumerate(pool_data):
+        block = 19000000 + i % 7
+        if p["exchange_name"] == "uniswap_v3":
+            events += [event("Swap", p["address"], block, i, sqrtPriceX96=2**96 + i, liquidity=10**18 + i, tick=i)]
+        else:
+            events += [event("Sync", p["address"], block, i, reserve0=10**18 + i, reserve1=10**20 + i)]
+            if i % 5 == 0:
+                events += [event("Sync", p["address"], block + 1, i, reserve0=i, reserve1=2 * i)]
+    # a pool that is not in the pool data, and an address that is not a known pool
+    events += [event("Sync", "0x0000000000000000000000000000000000000001", 19000000, 0, reserve0=1, reserve1=1)]
+    events += [event("Sync", "0x0000000000000000000000000000000000000002", 19000000, 1, reserve0=1, reserve1=1)]
+    return events
+
+
+def pool_states(mgr):
+    return sorted(
+        ({k: v for k, v in p.items() if k != "timestamp"} for p in mgr.pool_data), key=lambda p: p["cid"]
+    )
+
+
+def test_batched_applier_matches_per_event_updates():
+    events = make_events()
+    serial, batched = make_manager(), make_manager()
+    for e in sorted(events, key=lambda e: (e.block_number, e.transaction_index, e.log_index)):
+        serial.update_from_event(e)
+
+    random.Random(0).shuffle(events)
+    assert batched.update_from_events(events) == len(pool_data)
+    assert pool_states(batched) == pool_states(serial)
+    assert [x[0] for x in batched.pools_to_add_from_contracts] == ["0x0000000000000000000000000000000000000001"]
+
+    # the later of the two events of the pool wins
+    p = pool_data[0]
+    assert p["exchange_name"] != "uniswap_v3"
+    pool = batched.pool_data.by_cid(p["cid"])
+    assert pool["last_updated_block"] == 19000001 and pool["tkn0_balance"] == 0
+    assert batched.exchanges[p["exchange_name"]].get_pool(p["address"]).state["tkn0_balance"] == pool["tkn0_balance"]
+
+
+def test_exchange_resolved_once_per_event_format():
+    mgr = make_manager()
+    calls = []
+    resolve = mgr.exchange_name_from_event
+
+    def counting_resolve(e):
+        calls.append(e)
+        return resolve(e)
+
+    mgr.exchange_name_from_event = counting_resolve
+    events = make_events()
+    update_pools_from_events(-1, mgr, events)
+    assert len(calls) == len({mgr.event_format_key(e) for e in events}) < len(events)
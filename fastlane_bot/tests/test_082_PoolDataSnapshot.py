@@ -0,0 +1,76 @@
+import copy
+import json
+import math
+import os
+
+import numpy as np
+
+from fastlane_bot.events.pool_snapshot import PoolDataSnapshot, decode_table, encode_table
+
+with open("fastlane_bot/tests/_data/latest_pool_data_testing.json", "r") as f:
+    pool_data = json.load(f)
+
+
+def by_cid(records):
+    """the records by cid, with NaN replaced by a comparable value"""
+    nan = "NaN"
+    return {
+        p["cid"]: {k: nan if isinstance(v, float) and math.isnan(v) else v for k, v in p.items()} for p in records
+    }
+
+
+def test_encode_decode_roundtrip():
+    records = copy.deepcopy(pool_data[:50]) + [
+        dict(cid="x", fee=np.float64(0.5), tick=np.int64(-3), y_0=float("nan"), flag=True, ticks=[1, 2]),
+        dict(cid=2**200, fee="0.003", tick=None),
+    ]
+    decoded = decode_table(encode_table(records))
+    assert list(by_cid(decoded[:50]).items()) == list(by_cid(pool_data[:50]).items())
+    assert {k: type(v) for k, v in decoded[50].items()} == dict(
+        cid=str, fee=float, tick=int, y_0=float, flag=bool, ticks=list
+    )
+    assert math.isnan(decoded[50]["y_0"]) and decoded[50]["ticks"] == [1, 2]
+    assert decoded[51] == dict(cid=2**200, fee="0.003")
+
+
+def test_incremental_writes(tmp_path):
+    pools = copy.deepcopy(pool_data)
+    snapshot = PoolDataSnapshot(str(tmp_path), compact_every=None)
+    assert snapshot.write(pools, 100) == len(pools)
+    assert snapshot.write(pools, 101) == 0
+    assert os.listdir(tmp_path) == ["base.parquet"]
+
+    pools[3]["last_updated_block"] += 5
+    pools[3]["tkn0_balance"] = 12345
+    pools[7]["fee"] = "0.01"
+    deleted = pools.pop(10)
+    assert snapshot.write(pools, 102) == 2
+    pools.append(dict(cid="new", exchange_name="uniswap_v2", last_updated_block=103))
+    assert snapshot.write(pools, 103) == 1
+
+    restored, block = PoolDataSnapshot.load(str(tmp_path))
+    assert block == 103
+    assert by_cid(restored) == by_cid(pools)
+    assert deleted["cid"] not in by_cid(restored)
+
+    restored, block = PoolDataSnapshot.load(str(tmp_path), block=102)
+    assert block == 102 and "new" not in by_cid(restored) and len(restored) == len(pool_data) - 1
+
+    restored, block = PoolDataSnapshot.load(str(tmp_path), block=101)
+    assert block == 100 and by_cid(restored) == by_cid(pool_data)
+
+
+def test_compaction(tmp_path):
+    pools = copy.deepcopy(pool_data)
+    snapshot = PoolDataSnapshot(str(tmp_path), compact_every=2)
+    for block in range(100, 105):
+        pools[0]["last_updated_block"] = block
+        snapshot.write(pools, block)
+    # base at 100, deltas at 101 and 102, base at 103, delta at 104
+    assert sorted(os.listdir(tmp_path)) == ["base.parquet", "delta_000000000104.parquet"]
+    restored, block = PoolDataSnapshot.load(str(tmp_path))
+    assert block == 104 and by_cid(restored) == by_cid(pools)
+
+
+def test_load_missing(tmp_path):
+    assert PoolDataSnapshot.load(str(tmp_path / "nope")) == ([], None)
@@ -0,0 +1,86 @@
+import copy
+import json
+import logging
+import os
+
+from web3 import AsyncWeb3, Web3
+
+from fastlane_bot.config import network as network_
+from fastlane_bot.events.checkpoint import Checkpoint
+from fastlane_bot.events.managers.manager import Manager
+
+EXCHANGES = ["uniswap_v2", "sushiswap_v2", "uniswap_v3"]
+
+with open("fastlane_bot/tests/_data/latest_pool_data_testing.json", "r") as f:
+    pool_data = [p for p in json.load(f) if p["exchange_name"] in EXCHANGES]
+
+
+class OfflineConfig:
+    """the mainnet network configuration, with unconnected web3 instances"""
+
+    network = network_.ConfigNetwork.new(network="ethereum")
+    logger = logging.getLogger(__name__)
+    w3 = Web3()
+    w3_async = AsyncWeb3()
+
+    def __getattr__(self, item):
+        return getattr(self.network, item)
+
+
+def make_manager(pools, exchanges=EXCHANGES):
+    return Manager(
+        web3=Web3(),
+        w3_async=AsyncWeb3(),
+        cfg=OfflineConfig(),
+        pool_data=copy.deepcopy(pools),
+        alchemy_max_block_fetch=20,
+        SUPPORTED_EXCHANGES=list(exchanges),
+        blockchain="ethereum",
+    )
+
+
+def test_save_and_restore(tmp_path):
+    mgr = make_manager(pool_data)
+    mgr.uniswap_v2_event_mappings.update({"0xFactory": "uniswap_v2"})
+    mgr.fee_pairs["carbon_v1"] = {("0xA", "0xB"): 2000, ("0xB", "0xC"): 4000}
+    mgr.carbon_inititalized["carbon_v1"] = True
+    checkpoint = Checkpoint(str(tmp_path))
+    checkpoint.save(mgr, 1000)
+
+    mgr.pool_data[0]["last_updated_block"] = 1001
+    mgr.pool_data[0]["tkn0_balance"] = 42
+    mgr.pool_data.delete_cids([mgr.pool_data[1]["cid"]])
+    checkpoint.save(mgr, 1001)
+    assert checkpoint.snapshot.n_written == 1
+
+    restored = make_manager(pool_data[:10])
+    checkpoint = Checkpoint(str(tmp_path))
+    assert checkpoint.restore(restored, current_block=1010) == 1001
+    assert json.dumps(restored.pool_data) == json.dumps(mgr.pool_data)  # NaN != NaN
+    assert restored.pool_data.by_cid(pool_data[0]["cid"])["tkn0_balance"] == 42
+    assert restored.uniswap_v2_event_mappings == {"0xFactory": "uniswap_v2"}
+    assert restored.fee_pairs["carbon_v1"] == {("0xA", "0xB"): 2000, ("0xB", "0xC"): 4000}
+    assert restored.carbon_inititalized == {"carbon_v1": True}
+
+    # restoring resumes the incremental writes
+    checkpoint.save(restored, 1002)
+    assert checkpoint.snapshot.n_written == 0
+
+
+def test_unusable_checkpoints_are_ignored(tmp_path):
+    mgr = make_manager(pool_data)
+    assert Checkpoint(str(tmp_path)).restore(mgr, current_block=1000) is None
+
+    Checkpoint(str(tmp_path)).save(mgr, 1000)
+    fresh = make_manager(pool_data[:10])
+    assert Checkpoint(str(tmp_path), max_age=100).restore(fresh, current_block=1200) is None
+    assert len(fresh.pool_data) == 10
+    assert Checkpoint(str(tmp_path)).restore(make_manager(pool_data, EXCHANGES[:2]), current_block=1000) is None
+
+    with open(os.path.join(tmp_path, "state.json"), "r") as f:
+        state = json.load(f)
+    state["block"] = 999
+    with open(os.path.join(tmp_path, "state.json"), "w") as f:
+        json.dump(state, f)
+    assert Checkpoint(str(tmp_path)).restore(fresh, current_block=1000) is None
+    assert len(fresh.pool_data) == 10
@@ -0,0 +1,89 @@
+import os
+
+import pandas as pd
+from web3 import Web3
+
+from fastlane_bot.events import utils
+from fastlane_bot.events.utils import load_static_pool_data, static_data_cache_key
+
+TKN_A = "0x" + "ab" * 20
+TKN_B = "0x" + "cd" * 20
+TKN_C = "0x" + "ef" * 20
+TKN_UNKNOWN = "0x" + "12" * 20
+
+
+def write_csvs(path, fee="0.003"):
+    pools = pd.DataFrame(
+        {
+            "exchange_name": ["uniswap_v2", "uniswap_v2", "uniswap_v3", "uniswap_v2"],
+            "address": ["0x1", "0x2", "0x3", "0x4"],
+            "tkn0_address": [TKN_A, TKN_A, TKN_B, TKN_UNKNOWN],
+            "tkn1_address": [TKN_B, TKN_B, TKN_C, TKN_A],
+            "fee": [fee, fee, "0.0005", fee],
+        }
+    )
+    tokens = pd.DataFrame(
+        {
+            "address": [TKN_A, TKN_B, TKN_C, TKN_A.upper().replace("0X", "0x")],
+            "symbol": ["TKN-A", "TKN B", "TKN/C", "DUP"],
+            "decimals": [18, 6, 8, 18],
+        }
+    )
+    pools_filepath, tokens_filepath = str(path / "static_pool_data.csv"), str(path / "tokens.csv")
+    pools.to_csv(pools_filepath, index=False)
+    tokens.to_csv(tokens_filepath, index=False)
+    return pools_filepath, tokens_filepath
+
+
+def test_process_static_pool_data(tmp_path):
+    pools, tokens = load_static_pool_data(*write_csvs(tmp_path))
+    a, b, c = map(Web3.to_checksum_address, [TKN_A, TKN_B, TKN_C])
+    assert list(tokens["address"]) == [a, b, c]
+    assert list(tokens["symbol"]) == ["TKN_A", "TKN_B", "TKN_C"]
+
+    # the duplicate pool (same cid) and the pool with an unknown token are dropped
+    assert list(pools["address"]) == ["0x1", "0x3"]
+    assert list(pools["tkn0_address"]) == [a, b] and list(pools["tkn1_address"]) == [b, c]
+    assert list(pools["tkn0_symbol"]) == ["TKN_A", "TKN_B"] and list(pools["tkn1_decimals"]) == [6, 8]
+    assert list(pools["pair_name"]) == [f"{a}/{b}", f"{b}/{c}"]
+    assert list(pools["descr"]) == [f"uniswap_v2 {a}/{b} 0.003", f"uniswap_v3 {b}/{c} 0.0005"]
+    assert list(pools["cid"]) == [Web3.keccak(text=descr).hex() for descr in pools["descr"]]
+
+
+def test_cache(tmp_path, monkeypatch):
+    filepaths = write_csvs(tmp_path)
+    cache_dir = str(tmp_path / ".cache")
+    pools, tokens = load_static_pool_data(*filepaths, cache_dir=cache_dir)
+    key = static_data_cache_key(cache_dir, *filepaths)
+    assert sorted(os.listdir(cache_dir)) == ["index.json", f"static_pool_data.csv.{key}.pkl"]
+
+    # cache hit: neither processed nor hashed again
+    def fail(*args):
+        raise AssertionError("not cached")
+
+    with monkeypatch.context() as m:
+        m.setattr(utils, "process_static_pool_data", fail)
+        m.setattr(utils, "file_digest", fail)
+        cached_pools, cached_tokens = load_static_pool_data(*filepaths, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(cached_pools, pools)
+    pd.testing.assert_frame_equal(cached_tokens, tokens)
+
+    # touching a file without changing it rehashes it, but keeps the cached frames
+    os.utime(filepaths[0], ns=(0, 0))
+    assert static_data_cache_key(cache_dir, *filepaths) == key
+    with monkeypatch.context() as m:
+        m.setattr(utils, "process_static_pool_data", fail)
+        load_static_pool_data(*filepaths, cache_dir=cache_dir)
+
+    # changing a file invalidates the cache
+    write_csvs(tmp_path, fee="0.0025")
+    pools, _ = load_static_pool_data(*filepaths, cache_dir=cache_dir)
+    assert list(pools["fee"].astype(str)) == ["0.0025", "0.0005"]
+    assert len([f for f in os.listdir(cache_dir) if f.endswith(".pkl")]) == 1
+
+
+def test_unwritable_cache_dir(tmp_path):
+    filepaths = write_csvs(tmp_path)
+    (tmp_path / "file").write_text("")
+    pools, _ = load_static_pool_data(*filepaths, cache_dir=str(tmp_path / "file" / ".cache"))
+    assert len(pools) == 2
@@ -0,0 +1,185 @@
+import asyncio
+import copy
+import json
+import logging
+import threading
+
+from eth_abi import encode
+from hexbytes import HexBytes
+from web3 import AsyncWeb3, Web3
+from web3.datastructures import AttributeDict
+
+from fastlane_bot.config import network as network_
+from fastlane_bot.events.event_stream import EventStream, StreamedBlocks, websocket_uri
+from fastlane_bot.events.managers.manager import Manager
+from fastlane_bot.events.utils import get_streamed_events
+
+EXCHANGES = ["uniswap_v2", "sushiswap_v2", "uniswap_v3"]
+
+with open("fastlane_bot/tests/_data/latest_pool_data_testing.json", "r") as f:
+    pool_data = [p for p in json.load(f) if p["exchange_name"] in EXCHANGES]
+
+V2_POOLS = [p["address"] for p in pool_data if p["exchange_name"] == "uniswap_v2"]
+
+
+class OfflineConfig:
+    """the mainnet network configuration, with unconnected web3 instances"""
+
+    network = network_.ConfigNetwork.new(network="ethereum")
+    logger = logging.getLogger(__name__)
+    w3 = Web3()
+    w3_async = AsyncWeb3()
+
+    def __getattr__(self, item):
+        return getattr(self.network, item)
+
+
+def make_manager():
+    mgr = Manager(
+        web3=Web3(),
+        w3_async=AsyncWeb3(),
+        cfg=OfflineConfig(),
+        pool_data=copy.deepcopy(pool_data),
+        alchemy_max_block_fetch=20,
+        SUPPORTED_EXCHANGES=EXCHANGES,
+    )
+    for ex in EXCHANGES:
+        mgr.static_pools[f"{ex}_pools"] = {p["address"] for p in pool_data if p["exchange_name"] == ex}
+    return mgr
+
+
+mgr = make_manager()
+sync = mgr.exchanges["uniswap_v2"].get_subscriptions(Web3())[0]
+
+
+def sync_log(address, block, log_index, reserve0, removed=False):
+    """a Sync log as formatted by web3 for a logs subscription"""
+    return AttributeDict(dict(
+        address=address,
+        topics=[HexBytes(sync.topic)],
+        data=HexBytes(encode(["uint112", "uint112"], [reserve0, 1])),
+        blockNumber=block,
+        blockHash=HexBytes(b"\x01" * 32),
+        transactionHash=HexBytes(bytes([log_index]) * 32),
+        transactionIndex=0,
+        logIndex=log_index,
+        removed=removed,
+    ))
+
+
+def make_stream(reorg_delay=0):
+    return EventStream(config=OfflineConfig(), ws_uri="ws://unused", subscriptions=[sync], reorg_delay=reorg_delay)
+
+
+def test_websocket_uri():
+    assert websocket_uri("https://eth-mainnet.g.alchemy.com/v2/key") == "wss://eth-mainnet.g.alchemy.com/v2/key"
+    assert websocket_uri("http://localhost:8545") == "ws://localhost:8545"
+    assert websocket_uri("wss://node") == "wss://node"
+
+
+def test_heads_release_complete_blocks():
+    stream = make_stream()
+    stream.on_connect()
+    stream.on_log(sync, sync_log(V2_POOLS[0], 100, 0, 1))
+    batch = stream.on_head(100)
+    # the stream may have connected after some logs of the first head were published
+    assert (batch.to_block, batch.complete_from, len(batch.events)) == (100, 101, 1)
+
+    stream.on_log(sync, sync_log(V2_POOLS[0], 101, 0, 2))
+    stream.on_log(sync, sync_log(V2_POOLS[1], 101, 1, 3))
+    stream.on_log(sync, sync_log(V2_POOLS[1], 102, 0, 4))
+    batch = stream.on_head(101)
+    assert batch.to_block == 101 and [e.args["reserve0"] for e in batch.events] == [2, 3]
+    assert stream.on_head(101) is None
+
+    # a log removed by a reorg before its block is released is dropped
+    stream.on_log(sync, sync_log(V2_POOLS[1], 102, 0, 4, removed=True))
+    assert stream.on_head(102).events == []
+
+    # reconnecting resets the first complete block
+    stream.on_disconnect()
+    stream.on_connect()
+    assert stream.on_head(110).complete_from == 111
+
+
+def test_heads():
+    stream = make_stream()
+    stream.on_connect()
+    for block in range(100, 103):
+        stream.on_head(block, dict(number=block, hash=f"0x{block}", parentHash=f"0x{block - 1}"))
+    assert stream.head(102)["parentHash"] == "0x101" and stream.head(99) is None
+
+    # a reorg to a lower head drops the heads above it
+    stream.on_head(101, dict(number=101, hash="0x101b", parentHash="0x100"))
+    assert stream.head(101)["hash"] == "0x101b" and stream.head(102) is None and stream.head(100) is not None
+
+
+def test_reorg_delay():
+    stream = make_stream(reorg_delay=2)
+    stream.on_connect()
+    stream.on_log(sync, sync_log(V2_POOLS[0], 100, 0, 1))
+    assert stream.on_head(100).to_block == 98
+    assert stream.on_head(101).events == []
+    assert [e.block_number for e in stream.on_head(102).events] == [100]
+
+
+class FakeStream:
+    def __init__(self, batches):
+        self.batches = batches
+
+    def get(self, timeout):
+        return self.batches
+
+
+class FakeGatherer:
+    def __init__(self, events):
+        self.events = events
+        self.calls = []
+
+    def get_all_events(self, from_block, to_block):
+        self.calls.append((from_block, to_block))
+        return [e for e in self.events if from_block <= e.block_number <= to_block]
+
+
+def test_get_streamed_events(tmp_path):
+    stream = make_stream()
+    stream.on_connect()
+    stream.on_head(99)
+    for block in (100, 101):
+        stream.on_log(sync, sync_log(V2_POOLS[block - 100], block, 0, block))
+    batches = [stream.on_head(100), stream.on_head(101)]
+
+    # the stream is complete from block 100: nothing to backfill
+    gatherer = FakeGatherer([])
+    block, events = get_streamed_events(mgr, FakeStream(batches), gatherer, 99, 1, True, str(tmp_path))
+    assert block == 101 and gatherer.calls == []
+    assert sorted(e.args["reserve0"] for e in events) == [100, 101]
+
+    # the blocks before the stream connected are fetched with eth_getLogs, and replace the streamed events
+    missed = [sync.parse_log(sync_log(V2_POOLS[2], 98, 0, 98)), sync.parse_log(sync_log(V2_POOLS[3], 99, 0, 99))]
+    gatherer = FakeGatherer(missed)
+    block, events = get_streamed_events(mgr, FakeStream(batches), gatherer, 97, 1, True, str(tmp_path))
+    assert block == 101 and gatherer.calls == [(98, 99)]
+    assert sorted(e.args["reserve0"] for e in events) == [98, 99, 100, 101]
+
+    # blocks polled while the stream was down are skipped
+    assert get_streamed_events(mgr, FakeStream(batches[:1]), gatherer, 100, 1, True, str(tmp_path)) == (None, [])
+    block, events = get_streamed_events(mgr, FakeStream(batches), gatherer, 100, 1, True, str(tmp_path))
+    assert block == 101 and [e.args["reserve0"] for e in events] == [101]
+    assert get_streamed_events(mgr, FakeStream([]), gatherer, 101, 1, True, str(tmp_path)) == (None, [])
+
+
+def test_get_drains_the_queue():
+    stream = make_stream()
+    stream._loop = asyncio.new_event_loop()
+    stream._queue = asyncio.Queue()
+    threading.Thread(target=stream._loop.run_forever, daemon=True).start()
+    assert stream.get(0.1) == []  # not connected
+
+    stream.on_connect()
+    assert stream.get(0.1) == []
+    batches = [StreamedBlocks(to_block=block, complete_from=100, events=[]) for block in (100, 101)]
+    for batch in batches:
+        stream._loop.call_soon_threadsafe(stream._queue.put_nowait, batch)
+    assert stream.get(1) == batches
+    stream._loop.call_soon_threadsafe(stream._loop.stop)
@@ -0,0 +1,128 @@
+import copy
+import json
+import logging
+
+from web3 import AsyncWeb3, Web3
+
+from fastlane_bot.config import network as network_
+from fastlane_bot.events.event_journal import EventJournal
+from fastlane_bot.events.interfaces.event import Event
+from fastlane_bot.events.managers.manager import Manager
+
+EXCHANGES = ["uniswap_v2", "sushiswap_v2", "uniswap_v3"]
+
+with open("fastlane_bot/tests/_data/latest_pool_data_testing.json", "r") as f:
+    pool_data = [p for p in json.load(f) if p["exchange_name"] in EXCHANGES]
+
+V2_POOLS = [p for p in pool_data if p["exchange_name"] == "uniswap_v2"]
+
+
+class OfflineConfig:
+    """the mainnet network configuration, with unconnected web3 instances"""
+
+    network = network_.ConfigNetwork.new(network="ethereum")
+    logger = logging.getLogger(__name__)
+    w3 = Web3()
+    w3_async = AsyncWeb3()
+
+    def __getattr__(self, item):
+        return getattr(self.network, item)
+
+
+def make_manager():
+    mgr = Manager(
+        web3=Web3(),
+        w3_async=AsyncWeb3(),
+        cfg=OfflineConfig(),
+        pool_data=copy.deepcopy(pool_data),
+        alchemy_max_block_fetch=20,
+        SUPPORTED_EXCHANGES=EXCHANGES,
+        event_journal=EventJournal(depth=10),
+    )
+    for ex in EXCHANGES:
+        mgr.static_pools[f"{ex}_pools"] = {p["address"] for p in pool_data if p["exchange_name"] == ex}
+    return mgr
+
+
+def block_hash(block, fork=0):
+    return "0x" + f"{fork:02x}{block:062x}"
+
+
+def sync(pool, block, reserve0, fork=0):
+    return Event(
+        args=dict(reserve0=reserve0, reserve1=1), event="Sync", log_index=0, transaction_index=0,
+        transaction_hash=None, address=pool["address"], block_hash=block_hash(block, fork), block_number=block,
+    )
+
+
+def apply(mgr, from_block, to_block, events, fork=0):
+    mgr.event_journal.begin(from_block, to_block, block_hash(to_block, fork), events)
+    mgr.update_from_events(events)
+
+
+def states(mgr):
+    return json.dumps(sorted(({k: v for k, v in p.items() if k != "timestamp"} for p in mgr.pool_data),
+                             key=lambda p: p["cid"]))
+
+
+def test_rollback_restores_preimages():
+    mgr = make_manager()
+    apply(mgr, 100, 101, [sync(V2_POOLS[0], 101, 1)])
+    before_fork = states(mgr)
+    apply(mgr, 102, 102, [sync(V2_POOLS[0], 102, 2), sync(V2_POOLS[1], 102, 3)])
+    apply(mgr, 103, 104, [sync(V2_POOLS[1], 103, 4), sync(V2_POOLS[2], 104, 5)])
+    assert mgr.pool_data.by_cid(V2_POOLS[2]["cid"])["tkn0_balance"] == 5
+
+    # block 102 was reorged: the batches of 102 and 103-104 are rolled back
+    assert mgr.event_journal.rollback(mgr, 102) == 101
+    assert states(mgr) == before_fork
+    assert mgr.exchanges["uniswap_v2"].get_pool(V2_POOLS[0]["address"]).state["tkn0_balance"] == 1
+    assert [(e.from_block, e.to_block) for e in mgr.event_journal.entries] == [(100, 101)]
+    assert max(mgr.event_journal.hashes) == 101 and mgr.event_journal.n_reorgs == 1
+
+    # a fork inside a batch rolls back the whole batch
+    apply(mgr, 102, 104, [sync(V2_POOLS[0], 102, 6), sync(V2_POOLS[1], 104, 7)], fork=1)
+    assert mgr.event_journal.rollback(mgr, 104) == 101
+    assert states(mgr) == before_fork
+
+
+def test_find_fork():
+    journal = EventJournal()
+    for block in range(100, 105):
+        journal.begin(block, block, block_hash(block))
+    canonical = {block: block_hash(block) for block in range(100, 110)}
+
+    # the parent hash of the next block is enough to check the journal
+    assert journal.find_fork(105, block_hash(104), canonical.get) is None
+    assert journal.find_fork(108, block_hash(107), canonical.get) is None
+
+    # the chain was reorged from block 103
+    canonical.update({block: block_hash(block, fork=1) for block in range(103, 110)})
+    assert journal.find_fork(105, block_hash(104, fork=1), canonical.get) == 103
+
+    # a reorg deeper than the journal rolls everything back
+    canonical.update({block: block_hash(block, fork=1) for block in range(100, 110)})
+    assert journal.find_fork(105, block_hash(104, fork=1), canonical.get) == 100
+
+
+def test_find_fork_bisects_the_journal():
+    journal = EventJournal()
+    for block in range(100, 164):
+        journal.begin(block, block, block_hash(block))
+    canonical = {block: block_hash(block, fork=int(block >= 150)) for block in range(100, 170)}
+    requested = []
+
+    def get_block_hash(block):
+        requested.append(block)
+        return canonical[block]
+
+    assert journal.find_fork(164, canonical[163], get_block_hash) == 150
+    assert len(requested) <= 7
+
+
+def test_event_hashes_and_depth():
+    journal = EventJournal(depth=3)
+    journal.begin(100, 102, block_hash(102), [sync(V2_POOLS[0], 101, 1, fork=1)])
+    assert journal.hashes == {101: block_hash(101, fork=1), 102: block_hash(102)}
+    journal.begin(103, 105, block_hash(105))
+    assert list(journal.hashes) == [105] and [e.from_block for e in journal.entries] == [103]
@@ -0,0 +1,129 @@
+import json
+import logging
+
+from eth_abi import encode
+from hexbytes import HexBytes
+from web3 import AsyncWeb3, Web3
+from web3.datastructures import AttributeDict
+
+from fastlane_bot.config import network as network_
+from fastlane_bot.events.event_gatherer import EventGatherer
+from fastlane_bot.events.managers.manager import Manager
+
+EXCHANGES = ["uniswap_v2", "sushiswap_v2", "uniswap_v3", "bancor_v3"]
+
+with open("fastlane_bot/tests/_data/latest_pool_data_testing.json", "r") as f:
+    pool_data = [p for p in json.load(f) if p["exchange_name"] in EXCHANGES]
+
+
+class OfflineConfig:
+    """the mainnet network configuration, with unconnected web3 instances"""
+
+    network = network_.ConfigNetwork.new(network="ethereum")
+    logger = logging.getLogger(__name__)
+    w3 = Web3()
+    w3_async = AsyncWeb3()
+
+    def __getattr__(self, item):
+        return getattr(self.network, item)
+
+
+mgr = Manager(
+    web3=Web3(),
+    w3_async=AsyncWeb3(),
+    cfg=OfflineConfig(),
+    pool_data=[],
+    alchemy_max_block_fetch=20,
+    SUPPORTED_EXCHANGES=EXCHANGES,
+)
+static_pools = {
+    f"{ex}_pools": {p["address"] for p in pool_data if p["exchange_name"] == ex} for ex in EXCHANGES[:3]
+}
+UNKNOWN_POOL = "0x0000000000000000000000000000000000000001"
+
+
+class FakeEth:
+    """serves the logs of a fake chain, as a node filtering them on topics and addresses would"""
+
+    def __init__(self, logs):
+        self.logs = logs
+        self.queries = []
+        self.contract = AsyncWeb3().eth.contract
+
+    async def get_logs(self, filter_params):
+        self.queries.append(filter_params)
+        topics = filter_params["topics"][0]
+        topics = {bytes(HexBytes(t)) for t in (topics if isinstance(topics, list) else [topics])}
+        addresses = filter_params.get("address")
+        return [
+            log for log in self.logs
+            if bytes(log["topics"][0]) in topics
+            and (addresses is None or log["address"] in addresses)
+            and filter_params["fromBlock"] <= log["blockNumber"] <= filter_params["toBlock"]
+        ]
+
+
+class FakeWeb3:
+    def __init__(self, logs):
+        self.eth = FakeEth(logs)
+
+
+def make_gatherer(logs, **kwargs):
+    w3 = FakeWeb3(logs)
+    return EventGatherer(config=OfflineConfig(), w3=w3, exchanges=mgr.exchanges, **kwargs), w3.eth
+
+
+def make_logs():
+    topics = {sub.topic: sub for sub in make_gatherer([])[0].subscriptions}
+    sync_topic = next(t for t, sub in topics.items() if sub._event.event_name == "Sync")
+    bancor_topic = next(t for t, sub in topics.items() if sub._event.event_name == "TradingLiquidityUpdated")
+
+    def log(address, topic, data, topics=(), block=100, index=0):
+        return AttributeDict(dict(
+            address=address, topics=[HexBytes(topic)] + list(topics), data=HexBytes(data), blockNumber=block,
+            blockHash=HexBytes(b"\x01" * 32), transactionHash=HexBytes(b"\x02" * 32), transactionIndex=0,
+            logIndex=index,
+        ))
+
+    v2_pools = sorted(static_pools["uniswap_v2_pools"] | static_pools["sushiswap_v2_pools"])
+    logs = [
+        log(address, sync_topic, encode(["uint112", "uint112"], [i, i]), block=100 + i % 3, index=i)
+        for i, address in enumerate(v2_pools[:20] + [UNKNOWN_POOL])
+    ]
+    logs.append(log(
+        "0x" + "ee" * 20, bancor_topic, encode(["uint256", "uint256"], [1, 2]),
+        topics=[HexBytes(b"\x00" * 32), HexBytes(b"\x00" * 12 + b"\x11" * 20), HexBytes(b"\x00" * 12 + b"\x22" * 20)],
+    ))
+    return logs
+
+
+def test_plan_queries():
+    gatherer, _ = make_gatherer([], static_pools=static_pools)
+    queries = gatherer.plan_queries(100, 110)
+    bancor = [q for q in queries if q[3] is None]
+    filtered = [q for q in queries if q[3] is not None]
+    assert len(bancor) == 1 and len(bancor[0][2]) == 1
+    assert len(filtered) == 1 and len(filtered[0][2]) == 2  # Uniswap V2 Sync and Uniswap V3 Swap, OR-ed
+    assert set(filtered[0][3]) == set().union(*static_pools.values())
+
+    # chunked to the provider limits, or unfiltered when there are too many chunks
+    n_addresses = len(set().union(*static_pools.values()))
+    gatherer, _ = make_gatherer([], static_pools=static_pools, max_addresses_per_query=100)
+    assert len(gatherer.plan_queries(100, 110)) == 1 + -(-n_addresses // 100)
+    gatherer, _ = make_gatherer([], static_pools=static_pools, max_addresses_per_query=100, max_address_queries=2)
+    assert [len(q[2]) for q in gatherer.plan_queries(100, 110)] == [3]
+
+
+def test_planned_events_match_per_topic_events():
+    logs = make_logs()
+    per_topic, per_topic_eth = make_gatherer(logs)
+    planned, planned_eth = make_gatherer(logs, static_pools=static_pools)
+    expected = [e for e in per_topic.get_all_events(100, 110) if e.address != UNKNOWN_POOL]
+    events = planned.get_all_events(100, 110)
+
+    def key(e):
+        return e.block_number, e.log_index, e.address, e.event
+
+    assert sorted(map(key, events)) == sorted(map(key, expected))
+    assert len(events) == len(logs) - 1
+    assert len(planned_eth.queries) == 2 and len(per_topic_eth.queries) == 3
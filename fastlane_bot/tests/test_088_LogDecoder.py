@@ -0,0 +1,111 @@
+import json
+import random
+
+import pytest
+from eth_abi import encode
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+from web3 import AsyncWeb3
+from web3.datastructures import AttributeDict
+
+from fastlane_bot.data.abi import (
+    BANCOR_POL_ABI,
+    BANCOR_V2_CONVERTER_ABI,
+    BANCOR_V3_POOL_COLLECTION_ABI,
+    CARBON_CONTROLLER_ABI,
+    PANCAKESWAP_V3_POOL_ABI,
+    SOLIDLY_V2_POOL_ABI,
+    UNISWAP_V2_POOL_ABI,
+    UNISWAP_V3_POOL_ABI,
+)
+from fastlane_bot.events.interfaces.event import Event
+from fastlane_bot.events.interfaces.log_decoder import LogDecoder, _abi_type
+from fastlane_bot.events.interfaces.subscription import Subscription
+from fastlane_bot.events.utils import complex_handler, convert_to_serializable
+
+rng = random.Random(0)
+EVENTS = [
+    getattr(AsyncWeb3().eth.contract(abi=abi).events, item["name"])
+    for abi in (
+        CARBON_CONTROLLER_ABI, BANCOR_POL_ABI, BANCOR_V2_CONVERTER_ABI, BANCOR_V3_POOL_COLLECTION_ABI,
+        PANCAKESWAP_V3_POOL_ABI, SOLIDLY_V2_POOL_ABI, UNISWAP_V2_POOL_ABI, UNISWAP_V3_POOL_ABI,
+    )
+    for item in abi
+    if item["type"] == "event"
+]
+
+
+def random_value(abi_input, abi_type):
+    if abi_type.endswith("]"):
+        element_type = abi_type[: abi_type.rindex("[")]
+        return [random_value(abi_input, element_type) for _ in range(rng.randint(0, 3))]
+    if abi_type == "tuple":
+        return tuple(random_value(c, c["type"]) for c in abi_input["components"])
+    if abi_type == "address":
+        return "0x" + rng.randbytes(20).hex()
+    if abi_type == "bool":
+        return rng.random() < 0.5
+    if abi_type == "string":
+        return "token"
+    if abi_type.startswith("bytes"):
+        return rng.randbytes(int(abi_type[5:] or 7))
+    bits = int(abi_type.lstrip("uint") or 256)
+    if abi_type.startswith("int"):
+        return rng.randint(-(2 ** (bits - 1)), 2 ** (bits - 1) - 1)
+    return rng.randint(0, 2**bits - 1)
+
+
+def random_log(event):
+    abi = event().abi
+    topics = [HexBytes(event_abi_to_log_topic(abi))]
+    data_types, data_values = [], []
+    for abi_input in abi["inputs"]:
+        value = random_value(abi_input, abi_input["type"])
+        if abi_input["indexed"]:
+            topics.append(HexBytes(encode([_abi_type(abi_input)], [value])))
+        else:
+            data_types.append(_abi_type(abi_input))
+            data_values.append(value)
+    return AttributeDict(dict(
+        address="0x" + "ab" * 20, topics=topics, data=HexBytes(encode(data_types, data_values)),
+        blockNumber=rng.randint(0, 10**8), blockHash=HexBytes(rng.randbytes(32)),
+        transactionHash=HexBytes(rng.randbytes(32)), transactionIndex=rng.randint(0, 100), logIndex=rng.randint(0, 500),
+    ))
+
+
+def process_log(event, log):
+    """the events decoded by web3, as ``Subscription.parse_log`` used to"""
+    return Event.from_dict(complex_handler(event().process_log(log)))
+
+
+@pytest.mark.parametrize("event", EVENTS, ids=lambda e: e.event_name)
+def test_decoder_matches_process_log(event):
+    decoder = LogDecoder(event().abi)
+    for _ in range(20):
+        log = random_log(event)
+        assert decoder.decode(log) == process_log(event, log)
+
+    # the logs returned as raw JSON (hex strings) decode the same
+    raw = dict(log, topics=[t.hex() for t in log["topics"]], data=log["data"].hex())
+    assert decoder.decode(raw) == process_log(event, log)
+
+
+def test_mismatched_logs():
+    sync, swap = (next(e for e in EVENTS if e.event_name == name) for name in ("Sync", "Swap"))
+    log = random_log(swap)
+    with pytest.raises(ValueError):
+        LogDecoder(sync().abi).decode(log)
+    with pytest.raises(ValueError):
+        LogDecoder(swap().abi).decode(dict(log, topics=log["topics"][:1]))
+
+    # the subscription falls back to web3, which rejects the log
+    with pytest.raises(Exception):
+        Subscription(sync).parse_log(log)
+
+
+def test_slotted_event_serializes():
+    sync = next(e for e in EVENTS if e.event_name == "Sync")
+    event = Subscription(sync).parse_log(random_log(sync))
+    assert not hasattr(event, "__dict__")
+    data = json.loads(json.dumps(convert_to_serializable([event])))[0]
+    assert data["args"] == event.args and data["block_number"] == event.block_number
@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from fastlane_bot.events.pipeline import BlockSnapshot, SearchPipeline, StageMetrics
+from fastlane_bot.events.pool_store import PoolStore
+
+logger = logging.getLogger(__name__)
+
+
+def make_manager():
+    return SimpleNamespace(pool_data=PoolStore([
+        {"cid": "1", "exchange_name": "uniswap_v2", "tkn0_balance": 1},
+        {"cid": "2", "exchange_name": "uniswap_v3", "liquidity": 2},
+    ]))
+
+
+def test_stage_metrics():
+    metrics = StageMetrics()
+    for seconds in range(1, 11):
+        metrics.record("fetch", seconds / 10)
+    metrics.increment("dropped")
+    fetch = metrics.as_dict()["stages"]["fetch"]
+    assert fetch["count"] == 10 and fetch["last"] == 1.0 and fetch["max"] == 1.0
+    assert fetch["mean"] == pytest.approx(0.55) and fetch["p50"] == 0.6
+    assert metrics.as_dict()["counters"] == {"dropped": 1}
+    assert "fetch" in metrics.summary() and "dropped" in metrics.summary()
+
+    timer = metrics.timer()
+    time.sleep(0.01)
+    assert timer.lap("apply") >= 0.01
+    assert timer.lap("write") < 0.01
+    assert set(metrics.as_dict()["stages"]) == {"fetch", "apply", "write"}
+
+
+def test_snapshot_is_isolated_from_the_manager():
+    mgr = make_manager()
+    snapshot = BlockSnapshot.take(mgr, block=100, loop_idx=1, started=time.perf_counter())
+    mgr.pool_data.update("1", {"tkn0_balance": 5})
+    mgr.pool_data.delete_cids({"2"})
+    assert snapshot.pool_data.by_cid("1")["tkn0_balance"] == 1
+    assert snapshot.pool_data.by_cid("2") is not None
+
+    # without the pipeline, the manager pool data is searched as is
+    assert BlockSnapshot.take(mgr, block=101, loop_idx=2, started=0, copy=False).pool_data is mgr.pool_data
+
+
+def test_sequential_search():
+    metrics = StageMetrics()
+    searched = []
+    pipeline = SearchPipeline(search=lambda s: searched.append(s.block), metrics=metrics, logger=logger)
+    pipeline.submit(BlockSnapshot.take(make_manager(), block=100, loop_idx=1, started=time.perf_counter()))
+    assert searched == [100] and pipeline.last_searched_block == 100
+    assert {"queue", "search", "block"} <= set(metrics.as_dict()["stages"])
+
+    # the errors are raised to the main loop
+    def fail(snapshot):
+        raise ValueError("no arb")
+
+    with pytest.raises(ValueError):
+        SearchPipeline(search=fail, metrics=metrics, logger=logger).submit(
+            BlockSnapshot.take(make_manager(), block=101, loop_idx=2, started=0)
+        )
+
+
+def test_pipelined_search_drops_stale_snapshots():
+    metrics = StageMetrics()
+    searched = []
+    release = threading.Event()
+
+    def search(snapshot):
+        release.wait(5)
+        if snapshot.block == 102:
+            raise ValueError("no arb")
+        searched.append(snapshot.block)
+
+    pipeline = SearchPipeline(search=search, metrics=metrics, logger=logger)
+    pipeline.start()
+    mgr = make_manager()
+    pipeline.submit(BlockSnapshot.take(mgr, block=100, loop_idx=1, started=0))
+    time.sleep(0.1)  # the worker is searching block 100
+    for block in (101, 102, 103):
+        pipeline.submit(BlockSnapshot.take(mgr, block=block, loop_idx=block - 99, started=0))
+    release.set()
+    pipeline.join()
+    assert searched == [100, 103]
+    assert metrics.as_dict()["counters"]["dropped"] == 2
+
+    # the worker survives the errors of a search
+    pipeline.submit(BlockSnapshot.take(mgr, block=102, loop_idx=4, started=0))
+    pipeline.submit(BlockSnapshot.take(mgr, block=104, loop_idx=5, started=0))
+    pipeline.stop()
+    assert searched == [100, 103, 104]
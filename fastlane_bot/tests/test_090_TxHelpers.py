@@ -0,0 +1,212 @@
+import json
+import logging
+import time
+from decimal import Decimal
+
+from eth_account import Account
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from fastlane_bot.helpers import TxHelpers
+
+PRIVATE_KEY = "0x" + "11" * 32
+WALLET = Account.from_key(PRIVATE_KEY).address
+
+
+class FakeEth:
+    """a node holding the transactions sent in a mempool until they are mined"""
+
+    account = Account
+    chain_id = 1
+
+    def __init__(self):
+        self.nonce = 7
+        self.sent = []
+        self.receipts = {}
+        self.reverts = False
+        self.nonce_requests = 0
+
+    def get_transaction_count(self, address):
+        self.nonce_requests += 1
+        return self.nonce
+
+    def estimate_gas(self, tx):
+        if self.reverts and tx["to"] != WALLET:
+            raise ValueError("execution reverted")
+        return 100_000
+
+    def send_raw_transaction(self, raw_tx):
+        self.sent.append(json.loads(raw_tx))
+        return HexBytes(Web3.keccak(text=raw_tx))
+
+    def hash(self, index):
+        return "0x" + Web3.keccak(text=json.dumps(self.sent[index])).hex()[2:]
+
+    def mine(self, index=-1):
+        tx_hash = self.hash(index)
+        self.receipts[tx_hash] = {"status": 1, "transactionHash": tx_hash}
+        self.nonce = max(self.nonce, self.sent[index]["nonce"] + 1)
+        return tx_hash
+
+    def get_transaction_receipt(self, tx_hash):
+        if tx_hash not in self.receipts:
+            raise TransactionNotFound(tx_hash)
+        return self.receipts[tx_hash]
+
+    def wait_for_transaction_receipt(self, tx_hash):
+        self.mine(next(i for i in range(len(self.sent)) if self.hash(i) == tx_hash))
+        return self.get_transaction_receipt(tx_hash)
+
+
+class FakeWeb3:
+    to_json = staticmethod(Web3.to_json)
+
+    def __init__(self):
+        self.eth = FakeEth()
+
+
+class FakeNetwork:
+    GAS_ORACLE_ADDRESS = None
+    max_fee = 10**9
+
+    def gas_strategy(self, w3):
+        return {"maxFeePerGas": self.max_fee, "maxPriorityFeePerGas": self.max_fee // 10}
+
+
+class FakeContract:
+    address = "0x" + "22" * 20
+
+    def encode_abi(self, fn_name, args):
+        return "0x" + "00" * 4
+
+
+class FakeConfig:
+    NETWORK = "fantom"
+    NETWORK_ETHEREUM = "ethereum"
+    ARB_REWARDS_PPM = 500_000
+    ETH_PRIVATE_KEY_BE_CAREFUL = PRIVATE_KEY
+    DEFAULT_GAS_SAFETY_OFFSET = 0
+    SELF_FUND = False
+    BANCOR_ARBITRAGE_CONTRACT = FakeContract()
+    logger = logging.getLogger(__name__)
+
+    def __init__(self):
+        self.w3 = FakeWeb3()
+        self.network = FakeNetwork()
+
+
+def make_helpers(**kwargs):
+    kwargs.setdefault("receipt_timeout", 2)
+    helpers = TxHelpers(cfg=FakeConfig(), receipt_poll_interval=0.01, **kwargs)
+    helpers._sign_transaction = json.dumps
+    return helpers, helpers.cfg.w3.eth
+
+
+def arb(profit=1):
+    return dict(
+        route_struct=[], src_amt=1, src_address=WALLET, expected_profit_gastkn=Decimal(profit),
+        expected_profit_usd=Decimal(profit), flashloan_struct=[],
+    )
+
+
+def submit(helpers, profit=1):
+    return helpers.validate_and_submit_transaction(**arb(profit))
+
+
+def wait_settled(helpers):
+    for _ in range(500):
+        if helpers.pending is None:
+            return
+        time.sleep(0.01)
+    raise TimeoutError
+
+
+def test_nonce_is_tracked_locally():
+    helpers, eth = make_helpers()
+    for nonce in (7, 8, 9):
+        tx_hash, receipt = submit(helpers)
+        assert receipt["status"] == 1 and eth.sent[-1]["nonce"] == nonce
+    assert eth.nonce_requests == 1 and helpers.pending is None
+
+
+def test_pending_transaction_is_replaced():
+    helpers, eth = make_helpers(async_tx=True)
+    tx_hash, receipt = submit(helpers)
+    assert tx_hash is not None and receipt is None and helpers.pending.nonce == 7
+
+    # a newer opportunity replaces the pending transaction, with the fees bumped
+    replacement_hash, _ = submit(helpers)
+    assert [tx["nonce"] for tx in eth.sent] == [7, 7]
+    assert eth.sent[1]["maxFeePerGas"] >= eth.sent[0]["maxFeePerGas"] * 1.125
+    assert eth.sent[1]["maxPriorityFeePerGas"] >= eth.sent[0]["maxPriorityFeePerGas"] * 1.125
+    assert helpers.pending.tx_hashes == [tx_hash, replacement_hash]
+
+    # unless it cannot afford the bumped fees
+    eth.nonce_requests = 0
+    assert submit(helpers, profit=Decimal("0.0002")) == (None, None) and len(eth.sent) == 2
+
+    # any version of the transaction may be mined
+    eth.mine(index=0)
+    wait_settled(helpers)
+    assert helpers.nonce == 8
+    submit(helpers)
+    assert eth.sent[-1]["nonce"] == 8 and eth.nonce_requests == 0
+
+
+def test_pending_transaction_is_cancelled_when_it_would_revert():
+    helpers, eth = make_helpers(async_tx=True)
+    submit(helpers)
+    eth.reverts = True
+    assert submit(helpers) == (None, None)
+    cancel = eth.sent[-1]
+    assert cancel["to"] == WALLET and cancel["nonce"] == 7 and cancel["gas"] == 21000
+    assert cancel["maxFeePerGas"] > eth.sent[0]["maxFeePerGas"] and helpers.pending.cancelled
+
+    # a cancelled transaction is not cancelled again
+    submit(helpers)
+    assert len(eth.sent) == 2
+
+    eth.mine()
+    wait_settled(helpers)
+    assert helpers.nonce == 8
+
+
+def test_unmined_transaction_resyncs_the_nonce():
+    helpers, eth = make_helpers(async_tx=True, receipt_timeout=0.05)
+    submit(helpers)
+    wait_settled(helpers)
+    assert helpers.nonce is None
+    submit(helpers)
+    assert eth.nonce_requests == 2
+
+
+def test_batch_takes_sequential_nonces():
+    helpers, eth = make_helpers()
+    results = helpers.validate_and_submit_transactions([arb(), arb(profit=Decimal("0.0001")), arb()])
+    assert [tx["nonce"] for tx in eth.sent] == [7, 8]
+    assert results[1] == (None, None)
+    assert [receipt["status"] for _, receipt in (results[0], results[2])] == [1, 1]
+    assert helpers.nonce == 9 and helpers.pending is None and eth.nonce_requests == 1
+
+
+def test_batch_replaces_the_pending_transactions_first():
+    helpers, eth = make_helpers(async_tx=True)
+    helpers.validate_and_submit_transactions([arb(), arb()])
+    assert sorted(helpers.pending_txs) == [7, 8]
+
+    helpers.validate_and_submit_transactions([arb(), arb(), arb()])
+    assert [tx["nonce"] for tx in eth.sent] == [7, 8, 7, 8, 9]
+    assert all(len(pending.tx_hashes) == 2 for pending in (helpers.pending_txs[7], helpers.pending_txs[8]))
+
+    # the pending transactions are settled as their receipts come in
+    eth.mine(index=2)
+    for _ in range(500):
+        if min(helpers.pending_txs, default=None) != 7:
+            break
+        time.sleep(0.01)
+    assert sorted(helpers.pending_txs) == [8, 9]
+    eth.mine(index=3)
+    eth.mine(index=4)
+    wait_settled(helpers)
+    assert helpers.nonce == 10
@@ -0,0 +1,68 @@
+import logging
+from types import SimpleNamespace
+
+from fastlane_bot.bot import CarbonBot
+
+
+def arb_opp(profit, *cids):
+    return (profit, None, tuple({"cid": cid} for cid in cids), "src", None)
+
+
+def test_select_non_conflicting():
+    arb_opps = [
+        arb_opp(1, "a", "b"),
+        arb_opp(5, "b", "c"),
+        arb_opp(3, "d", "e"),
+        arb_opp(4, "12-0", "f"),
+        arb_opp(2, "12-1", "g"),
+    ]
+    selected = CarbonBot.select_non_conflicting(arb_opps, max_arbs=10)
+    # the most profitable opportunities win, and the orders of a carbon strategy are the same pool
+    assert [opp[0] for opp in selected] == [5, 4, 3]
+    assert [opp[0] for opp in CarbonBot.select_non_conflicting(arb_opps, max_arbs=2)] == [5, 4]
+    assert CarbonBot.select_non_conflicting([], max_arbs=2) == []
+
+
+class FakeTxHelpers:
+    def __init__(self):
+        self.batches = []
+
+    def validate_and_submit_transactions(self, arbs):
+        self.batches.append(arbs)
+        return [(f"0x{i}", None) for i in range(len(arbs))]
+
+
+def make_bot():
+    bot = CarbonBot.__new__(CarbonBot)
+    bot.ConfigObj = SimpleNamespace(logger=logging.getLogger(__name__))
+    bot.tx_helpers = FakeTxHelpers()
+    bot.deadlines = 0
+
+    def get_deadline(block_number):
+        bot.deadlines += 1
+        return 1000
+
+    def prepare(CCm, arb_mode, r, get_deadline):
+        if r[0] < 2:
+            return None  # below the minimum profit
+        if r[0] == 3:
+            raise ValueError("route failed")
+        return {"profit": r[0], "deadline": get_deadline()}
+
+    bot._get_deadline = get_deadline
+    bot._prepare_trade_instructions = prepare
+    return bot
+
+
+def test_batch_is_submitted_together():
+    bot = make_bot()
+    rs = [arb_opp(profit, str(profit)) for profit in (5, 4, 3, 2, 1)]
+    results = bot._handle_batch_trade_instructions(None, "multi", rs)
+    assert bot.deadlines == 1
+    assert bot.tx_helpers.batches == [[{"profit": p, "deadline": 1000} for p in (5, 4, 2)]]
+    assert results == [("0x0", None), ("0x1", None), ("0x2", None)]
+
+    # nothing is submitted without a route
+    assert bot._handle_batch_trade_instructions(None, "multi", [arb_opp(1, "a")]) == []
+    assert bot._handle_batch_trade_instructions(None, "multi", []) == []
+    assert len(bot.tx_helpers.batches) == 1
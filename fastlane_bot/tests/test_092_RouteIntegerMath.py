@@ -0,0 +1,167 @@
+import decimal
+import json
+import logging
+import random
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+from web3 import AsyncWeb3, Web3
+
+from fastlane_bot.config import network as network_
+from fastlane_bot.events.interface import QueryInterface
+from fastlane_bot.helpers import TradeInstruction, TxRouteHandler, weimath
+
+NATIVE = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
+
+
+class OfflineConfig:
+    """the mainnet network configuration, with unconnected web3 instances"""
+
+    network = network_.ConfigNetwork.new(network="ethereum")
+    logger = logging.getLogger(__name__)
+    w3 = Web3()
+    w3_async = AsyncWeb3()
+
+    def __getattr__(self, item):
+        return getattr(self.network, item)
+
+
+cfg = OfflineConfig()
+with open("fastlane_bot/tests/_data/latest_pool_data_testing.json") as f:
+    pool_data = json.load(f)
+db = QueryInterface(state=pool_data, ConfigObj=cfg, exchanges=list({p["exchange_name"] for p in pool_data}))
+
+
+def is_valid(value):
+    return value is not None and value == value and float(value) > 0
+
+
+def amount_in_wei(pool, zero_for_one):
+    """about 0.1% of the liquidity on the input side of the pool"""
+    exchange = pool["exchange_name"]
+    if exchange in ("uniswap_v3", "pancakeswap_v3"):
+        liquidity, sqrt_price = int(pool["liquidity"]), int(pool["sqrt_price_q96"])
+        return liquidity * weimath.Q96 // sqrt_price // 1000 if zero_for_one else liquidity * sqrt_price // weimath.Q96 // 1000
+    if exchange == "carbon_v1":
+        y, z, A, B = (pool[k + ("_1" if zero_for_one else "_0")] for k in "yzAB")
+        A, B = weimath.carbon_expand_rate(A or 0), weimath.carbon_expand_rate(B)
+        return weimath.carbon_source_by_target(int(y) // 1000, int(y), int(z), A, B)
+    return int(pool["tkn0_balance" if zero_for_one else "tkn1_balance"]) // 1000
+
+
+def sample_trades(exchange, n=10):
+    pools = [
+        p for p in pool_data
+        if p["exchange_name"] == exchange and NATIVE not in (p["tkn0_address"], p["tkn1_address"])
+    ]
+    if exchange in ("uniswap_v3", "pancakeswap_v3"):
+        pools = [p for p in pools if is_valid(p["liquidity"]) and is_valid(p["sqrt_price_q96"])]
+    elif exchange == "carbon_v1":
+        pools = [p for p in pools if is_valid(p["y_0"]) and is_valid(p["y_1"]) and is_valid(p["B_0"]) and is_valid(p["B_1"])]
+    else:
+        pools = [p for p in pools if is_valid(p["tkn0_balance"]) and is_valid(p["tkn1_balance"])]
+    trades = []
+    for pool in random.Random(0).sample(pools, min(n, len(pools))):
+        for zero_for_one in (True, False):
+            tknin, tknout = pool["tkn0_address"], pool["tkn1_address"]
+            decimals = int(pool["tkn0_decimals"] if zero_for_one else pool["tkn1_decimals"])
+            if not zero_for_one:
+                tknin, tknout = tknout, tknin
+            amount = amount_in_wei(pool, zero_for_one)
+            # skip the dust amounts, which the Decimal math rounds to zero
+            if amount >= 10**6:
+                amtin = Decimal(amount).scaleb(-decimals)
+                trades.append(TradeInstruction(
+                    ConfigObj=cfg, db=db, cid=pool["cid"] if exchange != "carbon_v1" else f"{pool['cid']}-0",
+                    tknin=tknin, tknout=tknout, amtin=amtin, amtout=0,
+                ))
+    return trades
+
+
+def solve(trade, integer_math):
+    handler = TxRouteHandler([trade, trade], integer_math=integer_math)
+    curve = db.get_pool(cid=str(trade.cid).split("-")[0])
+    return handler._solve_trade_output(curve=curve, trade=trade, amount_in=trade.amtin)
+
+
+@pytest.mark.parametrize(
+    "exchange", ["uniswap_v2", "uniswap_v3", "bancor_v2", "bancor_v3", "carbon_v1"]
+)
+def test_integer_math_matches_decimal_math(exchange):
+    trades = sample_trades(exchange)
+    assert len(trades) > 0
+    for trade in trades:
+        amount_in, amount_out, amount_in_wei, amount_out_wei = solve(trade, integer_math=True)
+        expected_in, expected_out, expected_in_wei, expected_out_wei = solve(trade, integer_math=False)
+        assert amount_in_wei == expected_in_wei and amount_in == expected_in
+        assert amount_out_wei > 0 and isinstance(amount_out_wei, int)
+        # the amounts are exact
+        assert amount_out == Decimal(amount_out_wei).scaleb(-trade.tknout_decimals, decimal.Context(prec=80))
+        # the Decimal math takes the Uniswap V2 fee on the output rather than the input
+        assert abs(amount_out_wei - expected_out_wei) <= expected_out_wei * Decimal("1e-5") + 1
+
+
+def test_uniswap_v2_output_is_wei_exact():
+    rng = random.Random(1)
+    for _ in range(1000):
+        amount_in, balance_in, balance_out = (rng.randint(1, 10**30) for _ in range(3))
+        # UniswapV2Library.getAmountOut
+        amount_in_with_fee = amount_in * 997
+        expected = amount_in_with_fee * balance_out // (balance_in * 1000 + amount_in_with_fee)
+        assert weimath.uniswap_v2_output(amount_in, balance_in, balance_out, weimath.fee_ppm(0.003)) == expected
+
+
+def test_carbon_output_is_exact_without_overflow():
+    rng = random.Random(2)
+    for _ in range(1000):
+        y = rng.randint(10**6, 10**24)
+        z = y + rng.randint(0, 10**24)
+        A, B = rng.randint(1, 2**48), rng.randint(1, 2**48)
+        amount_in = rng.randint(1, 10**20)
+        # the target amount, in exact rational arithmetic, is only rounded once (the products fit in 256 bits)
+        one = weimath.CARBON_ONE
+        exact = Fraction(amount_in * (y * A + z * B) ** 2, amount_in * A * (y * A + z * B) + (z * one) ** 2)
+        assert weimath.carbon_target_by_source(amount_in, y, z, A, B) == int(exact)
+
+    # a trade larger than the liquidity of the order is reduced to the largest trade the order can absorb
+    y, A, B = 10**18, 0, 2**48 - 1
+    amount_in, amount_out = weimath.carbon_output(10**30, y=y, z=y, A=A, B=B, fee=0)
+    assert 0 <= y - amount_out <= 1
+    assert amount_out == weimath.carbon_target_by_source(amount_in, y, y, A, B)
+    assert weimath.carbon_target_by_source(amount_in + 1, y, y, A, B) > y
+
+    # and to nothing if a single wei exceeds it
+    assert weimath.carbon_output(10**30, y=10, z=10, A=0, B=5 * 2**48 + 2**48 - 1, fee=0) == (0, 0)
+
+
+def test_balancer_output():
+    balance = 10**24
+    amount_out = weimath.balancer_output(
+        amount_in=10**21, balance_in=balance, weight_in=8 * 10**17, decimals_in=18,
+        balance_out=balance // 10**12, weight_out=2 * 10**17, decimals_out=6, fee=0,
+    )
+    expected = balance // 10**12 * (1 - (Decimal(1000) / Decimal(1001)) ** 4)
+    assert 0 < expected - amount_out < expected * Decimal("1e-12") + 1
+    with pytest.raises(weimath.BalancerInputTooLargeError):
+        weimath.balancer_output(balance, balance, 5 * 10**17, 18, balance, 5 * 10**17, 18, 0)
+
+
+def test_raw_txs_are_structured():
+    pool = next(p for p in pool_data if p["exchange_name"] == "uniswap_v2")
+    txs = [{"cid": "1-0", "strategy_id": 1, "_amtin_wei": 10}, {"cid": "2-1", "strategy_id": 2, "_amtin_wei": 20}]
+    trade = TradeInstruction(
+        ConfigObj=cfg, db=db, cid=pool["cid"], tknin=pool["tkn0_address"], tknout=pool["tkn1_address"],
+        amtin=1, amtout=1, raw_txs=txs,
+    )
+    # the string representations are still parsed
+    legacy = TradeInstruction(
+        ConfigObj=cfg, db=db, cid=pool["cid"], tknin=pool["tkn0_address"], tknout=pool["tkn1_address"],
+        amtin=1, amtout=1, raw_txs=str([{**tx, "_amtin_wei": Decimal(tx["_amtin_wei"])} for tx in txs]),
+    )
+    assert legacy.raw_txs == txs and trade.raw_txs == txs
+    empty = TradeInstruction(
+        ConfigObj=cfg, db=db, cid=pool["cid"], tknin=pool["tkn0_address"], tknout=pool["tkn1_address"], amtin=1, amtout=1,
+    )
+    encoded = TxRouteHandler.custom_data_encoder([trade, empty])
+    assert encoded[1].custom_data == "0x" and len(encoded[0].custom_data) == 2 + 64 * 6
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastlane_bot.tools.lazyimport import LazyModule
+
+MAIN = Path(__file__).resolve().parents[2] / "main.py"
+
+# the plotting, graph and notebook libraries, which the bot never imports
+LAZY_MODULES = ["matplotlib", "networkx", "IPython"]
+
+# the cumulative import time of main.py, in seconds (generous, to absorb slow CI machines)
+IMPORT_TIME_BUDGET = float(os.environ.get("FASTLANE_IMPORT_TIME_BUDGET", 5))
+
+
+def import_times():
+    """returns the cumulative import time (in seconds) of the top level modules of ``main.py --help``"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(MAIN), "--help"],
+        cwd=MAIN.parent, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = (int(cumulative) / 1e6, len(name) - len(name.lstrip()))
+    return times
+
+
+def test_main_does_not_import_the_plotting_libraries():
+    times = import_times()
+    assert not [name for name in times if name.split(".")[0] in LAZY_MODULES]
+    top_level = min(depth for _, depth in times.values())
+    total = sum(seconds for seconds, depth in times.values() if depth == top_level)
+    assert total < IMPORT_TIME_BUDGET, f"main.py imports in {total:.2f}s (budget: {IMPORT_TIME_BUDGET}s)"
+
+
+def test_lazy_module():
+    json = LazyModule("json")
+    assert not json.is_loaded and "not loaded" in repr(json)
+    assert json.loads("[1]") == [1]
+    assert json.is_loaded and "dumps" in dir(json)
@@ -0,0 +1,132 @@
+import json
+import random
+
+import pytest
+
+from fastlane_bot.events.tick_cache import TickCache, initialized_ticks
+from fastlane_bot.helpers import TickData, Univ3Calculator, weimath
+from fastlane_bot.tools.cpc import ConstantProductCurve as CPC
+from fastlane_bot.tools.optimizer import MargPOptimizer
+
+USDC = "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"
+WETH = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+
+# a USDC/WETH 0.05% pool at about 3000 USDC per WETH
+TICK, SPACING, LIQUIDITY = 200_000, 10, 2 * 10**18
+
+
+def tick_data(seed=0, n=30, radius=1):
+    rng = random.Random(seed)
+    word = (TICK // SPACING) >> 8
+    lower, upper = (word - radius) * 256 * SPACING, ((word + radius) * 256 + 255) * SPACING
+    ticks = sorted(rng.sample(range(lower // SPACING, upper // SPACING + 1), n))
+    return TickData(lower, upper, tuple((t * SPACING, rng.randint(-LIQUIDITY // 5, LIQUIDITY // 5)) for t in ticks))
+
+
+def calculator(tick=TICK, liquidity=LIQUIDITY):
+    sqrt_price = (weimath.sqrt_ratio_at_tick(tick) + weimath.sqrt_ratio_at_tick(tick + 1)) // 2
+    return Univ3Calculator(
+        tkn0=USDC, tkn1=WETH, sp96=sqrt_price, tick=tick, liquidity=liquidity, fee_const=Univ3Calculator.FEE500,
+    )
+
+
+def curve(uni3, td):
+    params, other_params = uni3.range_params(td)
+    ranges = [CPC.from_univ3(**p, cid="1", descr="") for p in other_params]
+    return CPC.from_univ3(**params, cid="1", descr="").set_ranges(ranges)
+
+
+def test_sqrt_ratio_at_tick():
+    assert weimath.sqrt_ratio_at_tick(0) == 2**96
+    assert weimath.sqrt_ratio_at_tick(weimath.MIN_TICK) == 4295128739
+    assert weimath.sqrt_ratio_at_tick(weimath.MAX_TICK) == 1461446703485210103287273052203988822378723970342
+    for tick in random.Random(0).sample(range(weimath.MIN_TICK, weimath.MAX_TICK), 1000):
+        assert weimath.sqrt_ratio_at_tick(tick) == pytest.approx(1.0001 ** (tick / 2) * 2**96, rel=1e-9)
+
+
+def test_tick_data_round_trip():
+    td = tick_data()
+    assert TickData.from_value(json.loads(json.dumps(td))) == td
+    assert TickData.from_value(None) is None and TickData.from_value(float("nan")) is None
+
+
+def test_liquidity_ranges():
+    td = TickData(-100, 100, ((-10, 30), (0, 20), (10, -20), (20, -30)))
+    ranges = calculator(tick=5, liquidity=100).liquidity_ranges(td)
+    assert ranges == [(-100, -10, 50), (-10, 0, 80), (0, 10, 100), (10, 20, 80), (20, 100, 50)]
+    assert calculator(tick=5, liquidity=100).liquidity_ranges(td, max_ranges=1) == ranges[1:-1]
+    # the current tick is outside the window
+    assert calculator(tick=100, liquidity=100).liquidity_ranges(td) is None
+
+
+def test_swap_within_a_tick_matches_single_tick():
+    td = TickData(TICK - 10_000, TICK + 10_000, ())
+    uni3 = calculator()
+    for zero_for_one, amount_in in ((True, 10**8), (False, 10**16)):
+        args = dict(liquidity=LIQUIDITY, sqrt_price_q96=uni3.sp96, fee=500, zero_for_one=zero_for_one)
+        expected = weimath.uniswap_v3_output(amount_in=amount_in, **args)
+        assert weimath.uniswap_v3_output_ticks(
+            amount_in=amount_in, tick=TICK, tick_spacing=SPACING, liquidity_net=td.liquidity_net,
+            lower=td.lower, upper=td.upper, **args,
+        ) == (amount_in, expected)
+
+
+def test_swap_stops_at_the_window():
+    td, uni3 = tick_data(), calculator()
+    for zero_for_one in (True, False):
+        args = dict(
+            liquidity=LIQUIDITY, sqrt_price_q96=uni3.sp96, tick=TICK, fee=500, zero_for_one=zero_for_one,
+            tick_spacing=SPACING, liquidity_net=td.liquidity_net, lower=td.lower, upper=td.upper,
+        )
+        amount_in, amount_out = weimath.uniswap_v3_output_ticks(amount_in=10**40, **args)
+        assert 0 < amount_in < 10**40
+        assert weimath.uniswap_v3_output_ticks(amount_in=amount_in, **args) == (amount_in, amount_out)
+
+
+@pytest.mark.parametrize("factor", [0.99, 0.8, 0.5, 1.01, 1.25, 2])
+def test_piecewise_curve_matches_multi_tick_swap(factor):
+    td, uni3 = tick_data(), calculator()
+    c = curve(uni3, td)
+    assert len(c.ranges) > 2
+    single = CPC.from_univ3(**uni3.cpc_params(), cid="1", descr="")
+    dx, dy, _ = c.dxdyfromp_f(c.p * factor)
+    # the curve is deeper than the single tick curve
+    assert abs(dx) > abs(single.dxdyfromp_f(c.p * factor)[0])
+    zero_for_one = dx > 0
+    amount_in = int(dx * 10**6) if zero_for_one else int(dy * 10**18)
+    expected_out = -dy * 10**18 if zero_for_one else -dx * 10**6
+    _, amount_out = weimath.uniswap_v3_output_ticks(
+        amount_in=amount_in, liquidity=LIQUIDITY, sqrt_price_q96=uni3.sp96, tick=TICK, fee=0,
+        zero_for_one=zero_for_one, tick_spacing=SPACING, liquidity_net=td.liquidity_net, lower=td.lower,
+        upper=td.upper,
+    )
+    assert amount_out == pytest.approx(expected_out, rel=1e-9)
+
+
+def test_curve_arrays_include_the_ranges():
+    c = curve(calculator(), tick_data())
+    ca = MargPOptimizer.curve_arrays([c], {"WETH": 0})
+    assert len(ca["x0"]) == 1 + len(c.ranges)
+
+
+def test_tick_cache():
+    cache = TickCache(radius=1)
+    word = (TICK // SPACING) >> 8
+    assert cache.dirty_words("1", TICK, SPACING) == [word - 1, word, word + 1]
+
+    bitmaps = {word - 1: 0, word: 1 | 1 << 255, word + 1: 1 << 7}
+    ticks = [t for w, bitmap in bitmaps.items() for t in initialized_ticks(w, bitmap, SPACING)]
+    assert ticks == [word * 256 * SPACING, (word * 256 + 255) * SPACING, ((word + 1) * 256 + 7) * SPACING]
+    td = cache.update("1", TICK, SPACING, bitmaps, {t: 10 for t in ticks})
+    assert td.lower == (word - 1) * 256 * SPACING and td.upper == ((word + 1) * 256 + 255) * SPACING
+    assert td.liquidity_net == tuple((t, 10) for t in ticks)
+
+    # nothing to read while the tick does not move, only the words crossed once it does
+    assert cache.dirty_words("1", TICK, SPACING) == []
+    assert cache.dirty_words("1", TICK + 1, SPACING) == [word]
+    assert cache.dirty_words("1", TICK + 256 * SPACING, SPACING) == [word, word + 1, word + 2]
+
+    # the words leaving the window are dropped, with their ticks
+    td = cache.update("1", TICK + 256 * SPACING, SPACING, {word: 0, word + 2: 0}, {})
+    assert td.liquidity_net == ((((word + 1) * 256 + 7) * SPACING, 10),)
+    assert sorted(cache.pools["1"].words) == [word, word + 1, word + 2]
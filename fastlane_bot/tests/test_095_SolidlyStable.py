@@ -0,0 +1,145 @@
+import decimal
+import json
+import logging
+import random
+from decimal import Decimal
+
+import pytest
+from web3 import AsyncWeb3, Web3
+
+from fastlane_bot.config import network as network_
+from fastlane_bot.events.interface import QueryInterface
+from fastlane_bot.helpers import TradeInstruction, TxRouteHandler, weimath
+from fastlane_bot.tools.cpc import CPCContainer, ConstantProductCurve as CPC
+from fastlane_bot.tools.optimizer import MargPOptimizer, PairOptimizer
+
+
+class OfflineConfig:
+    """the Base network configuration (which has Solidly forks), with unconnected web3 instances"""
+
+    network = network_.ConfigNetwork.new(network=network_.ConfigNetwork.NETWORK_BASE)
+    logger = logging.getLogger(__name__)
+    w3 = Web3()
+    w3_async = AsyncWeb3()
+
+    def __getattr__(self, item):
+        return getattr(self.network, item)
+
+
+cfg = OfflineConfig()
+with open("fastlane_bot/tests/_data/latest_pool_data_testing.json") as f:
+    stable_pool = next(p for p in json.load(f) if p["pool_type"] == "stable")
+
+# (reserve0, reserve1, decimals0, decimals1) of a few stable pools, in wei
+POOLS = [
+    (10**6 * 10**6, 12 * 10**5 * 10**18, 6, 18),
+    (10**6 * 10**18, 10**6 * 10**18, 18, 18),
+    (5 * 10**5 * 10**18, 3 * 10**6 * 10**6, 18, 6),
+    (10**6 * 10**6, 10**5 * 10**6, 6, 6),
+]
+
+
+def exact_output(amount_in, reserve0, reserve1, decimals0, decimals1, fee, zero_for_one):
+    """the output that keeps x^3y + xy^3 constant, solved with 60-digit Decimal arithmetic"""
+    with decimal.localcontext(decimal.Context(prec=60)):
+        x, y = Decimal(reserve0).scaleb(-decimals0), Decimal(reserve1).scaleb(-decimals1)
+        if not zero_for_one:
+            x, y, decimals0, decimals1 = y, x, decimals1, decimals0
+        k = x**3 * y + x * y**3
+        x += Decimal(amount_in - amount_in * fee // weimath.PPM).scaleb(-decimals0)
+        lo, hi = Decimal(0), y
+        for _ in range(200):
+            mid = (lo + hi) / 2
+            lo, hi = (lo, mid) if x**3 * mid + x * mid**3 >= k else (mid, hi)
+        return (y - hi).scaleb(decimals1)
+
+
+def curve_output(curve, amount, zero_for_one):
+    """the output of the curve for an input amount (in token units), by bisection on the price"""
+    lo, hi = (curve.p * 1e-3, curve.p) if zero_for_one else (curve.p, curve.p * 1e3)
+    for _ in range(200):
+        p = (lo * hi) ** 0.5
+        dx, dy, _ = curve.dxdyfromp_f(p)
+        if zero_for_one:
+            lo, hi = (p, hi) if dx > amount else (lo, p)
+        else:
+            lo, hi = (lo, p) if dy > amount else (p, hi)
+    return -dy if zero_for_one else -dx
+
+
+@pytest.mark.parametrize("pool", POOLS)
+@pytest.mark.parametrize("zero_for_one", [True, False])
+def test_solidly_stable_output_matches_invariant(pool, zero_for_one):
+    reserve0, reserve1, decimals0, decimals1 = pool
+    reserve_in = reserve0 if zero_for_one else reserve1
+    for fraction in (10**-6, 10**-3, 0.01, 0.1, 0.5):
+        amount_in = int(reserve_in * fraction)
+        amount_out = weimath.solidly_stable_output(amount_in, *pool, fee=500, zero_for_one=zero_for_one)
+        expected = exact_output(amount_in, *pool, fee=500, zero_for_one=zero_for_one)
+        # the contract normalizes to 18 decimals and rounds down
+        assert expected - 2 * 10 ** max(0, (decimals1 if zero_for_one else decimals0) - 15) <= amount_out <= expected
+
+
+@pytest.mark.parametrize("pool", POOLS)
+def test_solidly_stable_output_keeps_k(pool):
+    reserve0, reserve1, decimals0, decimals1 = pool
+    scale0, scale1 = 10**decimals0, 10**decimals1
+    k = weimath._solidly_k(reserve0, reserve1, scale0, scale1)
+    rng = random.Random(0)
+    for amount_in in (rng.randrange(1, reserve0 // 2) for _ in range(50)):
+        amount_out = weimath.solidly_stable_output(amount_in, *pool, fee=0, zero_for_one=True)
+        assert weimath._solidly_k(reserve0 + amount_in, reserve1 - amount_out, scale0, scale1) >= k
+
+
+@pytest.mark.parametrize("pool", POOLS)
+def test_piecewise_curve_matches_integer_output(pool):
+    reserve0, reserve1, decimals0, decimals1 = pool
+    x, y = reserve0 / 10**decimals0, reserve1 / 10**decimals1
+    c = CPC.from_solidly_stable(x=x, y=y, pair="TKNX/TKNY", cid="1", fee=0)
+    assert c.constr == "solidly_stable" and len(c.ranges) > 20
+    for fraction, rel in ((10**-4, 1e-6), (10**-3, 1e-6), (0.01, 1e-5), (0.1, 1e-3), (0.5, 1e-2)):
+        for zero_for_one in (True, False):
+            amount = fraction * (x if zero_for_one else y)
+            decimals_in, decimals_out = (decimals0, decimals1) if zero_for_one else (decimals1, decimals0)
+            expected = weimath.solidly_stable_output(
+                int(amount * 10**decimals_in), *pool, fee=0, zero_for_one=zero_for_one
+            ) / 10**decimals_out
+            assert curve_output(c, amount, zero_for_one) == pytest.approx(expected, rel=rel)
+
+
+def test_curve_covers_the_wings():
+    c = CPC.from_solidly_stable(x=1000, y=1000, pair="TKNX/TKNY", cid="1", fee=0)
+    assert c.p == pytest.approx(1)
+    # the grid reaches beyond 90% of either reserve
+    assert -1000 < c.dxdyfromp_f(100)[0] < -900
+    assert -1000 < c.dxdyfromp_f(0.01)[1] < -900
+
+
+@pytest.mark.parametrize("Optimizer", [MargPOptimizer, PairOptimizer])
+def test_optimizers_find_the_arbitrage(Optimizer):
+    stable = CPC.from_solidly_stable(x=10**6, y=10**6, pair="USDC/DAI", cid="stable", fee=0.0001)
+    counter = CPC.from_xy(x=10**5, y=1.002 * 10**5, pair="USDC/DAI", cid="counter", fee=0)
+    r = Optimizer(CPCContainer([stable, counter])).optimize("DAI")
+    assert not r.is_error
+    # the pool buys USDC in the counter pool and sells it into the stable pool
+    assert 0 < -r.result < 100
+
+
+def test_stable_pool_to_cpc_and_route():
+    db = QueryInterface(state=[stable_pool], ConfigObj=cfg, exchanges=[stable_pool["exchange_name"]])
+    pool = db.get_pool_data_with_tokens()[0]
+    pool.ADDRDEC = {}
+    curves = pool.to_cpc()
+    assert len(curves) == 1 and curves[0].cid == stable_pool["cid"] and len(curves[0].ranges) > 20
+
+    tknin, tknout = stable_pool["tkn0_address"], stable_pool["tkn1_address"]
+    trade = TradeInstruction(ConfigObj=cfg, db=db, cid=stable_pool["cid"], tknin=tknin, tknout=tknout, amtin=Decimal("0.1"), amtout=0)
+    handler = TxRouteHandler([trade, trade])
+    amount_in, amount_out, amount_in_wei, amount_out_wei = handler._solve_trade_output(
+        curve=db.get_pool(cid=stable_pool["cid"]), trade=trade, amount_in=trade.amtin
+    )
+    expected = weimath.solidly_stable_output(
+        amount_in_wei, int(stable_pool["tkn0_balance"]), int(stable_pool["tkn1_balance"]), 18, 6,
+        fee=weimath.fee_ppm(stable_pool["fee_float"]), zero_for_one=True,
+    )
+    assert amount_in_wei == 10**17 and amount_out_wei == expected * 9999 // 10000
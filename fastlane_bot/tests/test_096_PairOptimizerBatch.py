@@ -0,0 +1,114 @@
+import itertools
+import logging
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from fastlane_bot.modes.pairwise_multi import FindArbitrageMultiPairwise
+from fastlane_bot.modes.pairwise_multi_all import FindArbitrageMultiPairwiseAll
+from fastlane_bot.tools.cpc import CPCContainer, ConstantProductCurve as CPC
+from fastlane_bot.tools.optimizer import PairOptimizer
+
+cfg = SimpleNamespace(
+    logger=logging.getLogger(__name__),
+    CARBON_V1_FORKS=["carbon_v1"],
+    DEFAULT_MIN_PROFIT_GAS_TOKEN=0.0001,
+    NATIVE_GAS_TOKEN_ADDRESS="ETH",
+    WRAPPED_GAS_TOKEN_ADDRESS="WETH",
+)
+
+
+def nbtest_combos():
+    """all curve pairs of the NBTest 002 curves that trade the same pair, for either target token"""
+    curves = CPCContainer.from_df(pd.read_csv("fastlane_bot/tests/_data/NBTEST_002_Curves.csv.gz"))
+    for pair in sorted(curves.pairs()):
+        for combo in itertools.combinations(curves.bypairs(pair).curves, 2):
+            for targettkn in (combo[0].tknx, combo[0].tkny):
+                yield list(combo), targettkn
+
+
+def solve(curves, targettkn):
+    try:
+        return PairOptimizer(curves).optimize(targettkn)
+    except ZeroDivisionError:
+        return None
+
+
+def assert_identical(batch, scalar):
+    assert batch.is_error == scalar.is_error
+    if scalar.is_error:
+        return
+    assert batch.result == scalar.result
+    assert batch.p_optimal_t == scalar.p_optimal_t
+    assert batch.dtokens == scalar.dtokens and batch.dtokens_t == scalar.dtokens_t
+    assert batch.trade_instructions(PairOptimizer.TIF_DICTS) == scalar.trade_instructions(PairOptimizer.TIF_DICTS)
+
+
+def test_batch_is_bit_identical_to_scalar():
+    combos = [(c, t) for c, t in nbtest_combos() if solve(c, t) is not None]
+    assert len(combos) > 200
+    results = PairOptimizer.optimize_batch(*zip(*combos))
+    assert len(results) == len(combos)
+    for (curves, targettkn), r in zip(combos, results):
+        assert r.method == "margp-pair"
+        assert_identical(r, solve(curves, targettkn))
+
+
+def test_batch_piecewise_and_weighted_curves():
+    uni3 = dict(uniL=1e6, pair="WETH/USDC", fee=0, descr="")
+    piecewise = CPC.from_univ3(Pmarg=2000, uniPa=1990, uniPb=2010, cid="u0", **uni3).set_ranges([
+        CPC.from_univ3(Pmarg=2010, uniPa=2010, uniPb=2030, cid="u1", **uni3),
+        CPC.from_univ3(Pmarg=1990, uniPa=1970, uniPb=1990, cid="u2", **uni3),
+    ])
+    stable = CPC.from_solidly_stable(x=10**6, y=10**6, pair="USDC/DAI", cid="s", fee=0.0001)
+    combos = [
+        ([piecewise, CPC.from_pk(pair="WETH/USDC", p=2020, k=1e8, cid="v2")], "USDC"),
+        ([piecewise, CPC.from_pk(pair="USDC/WETH", p=1/1985, k=1e8, cid="inv")], "WETH"),
+        ([stable, CPC.from_xy(x=10**5, y=1.002 * 10**5, pair="USDC/DAI", cid="c", fee=0)], "DAI"),
+        ([CPC.from_xyal(x=100, y=210000, alpha=0.8, pair="WETH/USDC", cid="w"),
+          CPC.from_pk(pair="WETH/USDC", p=2000, k=1e8, cid="v2")], "USDC"),
+    ]
+    for (curves, targettkn), r in zip(combos, PairOptimizer.optimize_batch(*zip(*combos))):
+        assert not r.is_error
+        assert_identical(r, PairOptimizer(curves).optimize(targettkn))
+
+
+def test_batch_raises_as_scalar():
+    parallel = [CPC.from_pk(pair="WETH/USDC", p=2000, k=1e8, cid=cid) for cid in ("a", "b")]
+    r, = PairOptimizer.optimize_batch([parallel], ["USDC"])
+    assert_identical(r, PairOptimizer(parallel).optimize("USDC"))
+
+    broken = next(c for c, t in nbtest_combos() if solve(c, t) is None)
+    with pytest.raises(ZeroDivisionError):
+        PairOptimizer.optimize_batch([parallel, broken], ["USDC", broken[0].tknx])
+    with pytest.raises(AssertionError):
+        PairOptimizer.optimize_batch([parallel], ["WBTC"])
+
+
+@pytest.mark.parametrize("finder_cls", [FindArbitrageMultiPairwise, FindArbitrageMultiPairwiseAll])
+def test_modes_batch_matches_serial(finder_cls, monkeypatch):
+    curves = [
+        CPC.from_pk(pair=pair, p=p, k=k, cid=f"c{i}", params=dict(exchange=f"ex{i % 2}"))
+        for i, (pair, p, k) in enumerate([
+            ("WETH/USDC", 2000, 100 * 200000),
+            ("WETH/USDC", 2050, 100 * 200000),
+            ("USDC/WETH", 1 / 1990, 50 * 100000 / 2000**2),
+            ("WBTC/WETH", 20, 10 * 200),
+        ])
+    ] + [
+        CPC.from_carbon(pair="WETH/USDC", tkny="USDC", yint=20000, y=20000, pa=2100, pb=2080, cid="carb-0",
+                        params=dict(exchange="carbon_v1")),
+        CPC.from_carbon(pair="WETH/USDC", tkny="WETH", yint=10, y=10, pa=1/1950, pb=1/1960, cid="carb-1",
+                        params=dict(exchange="carbon_v1")),
+        CPC.from_carbon(pair="WBTC/WETH", tkny="WETH", yint=100, y=100, pa=23, pb=21, cid="carb2-0",
+                        params=dict(exchange="carbon_v1")),
+    ]
+    find = lambda: finder_cls(
+        flashloan_tokens=["USDC", "WETH"], CCm=CPCContainer(curves), ConfigObj=cfg
+    ).find_arbitrage()
+    batched = find()
+    monkeypatch.setattr(finder_cls, "BATCH_PAIR_SOLVES", False)
+    serial = find()
+    assert len(serial) > 0
+    assert [(p, src, dic) for p, _, dic, src, _ in batched] == [(p, src, dic) for p, _, dic, src, _ in serial]
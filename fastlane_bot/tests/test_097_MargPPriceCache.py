@@ -0,0 +1,95 @@
+import logging
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from fastlane_bot.modes.triangle_multi import ArbitrageFinderTriangleMulti
+from fastlane_bot.tools.cpc import CPCContainer, ConstantProductCurve as CPC
+from fastlane_bot.tools.optimizer import MargPOptimizer, PriceCache
+
+cfg = SimpleNamespace(
+    logger=logging.getLogger(__name__),
+    CARBON_V1_FORKS=["carbon_v1"],
+    DEFAULT_MIN_PROFIT_GAS_TOKEN=0.0001,
+    NATIVE_GAS_TOKEN_ADDRESS="ETH",
+    WRAPPED_GAS_TOKEN_ADDRESS="WETH",
+)
+
+TOKENS = {"WETH", "USDC", "WBTC", "DAI", "LINK"}
+
+
+def market():
+    curves = CPCContainer.from_df(pd.read_csv("fastlane_bot/tests/_data/NBTEST_002_Curves.csv.gz"))
+    return CPCContainer([c for c in curves if c.tknx in TOKENS and c.tkny in TOKENS])
+
+
+def test_warm_start_from_cached_prices():
+    pcache = PriceCache()
+    O = MargPOptimizer(market())
+    cold = O.optimize("WETH")
+    r1 = O.optimize("WETH", params=dict(pcache=pcache))
+    assert (pcache.n_warm, pcache.n_cold, len(pcache)) == (0, 1, 1)
+    assert r1.result == cold.result and r1.n_iterations == cold.n_iterations
+
+    # same market in the next block: the cached prices are the solution
+    r2 = O.optimize("WETH", params=dict(pcache=pcache))
+    assert (pcache.n_warm, pcache.n_cold, pcache.n_fallback) == (1, 1, 0)
+    assert r2.n_iterations == 0 < cold.n_iterations
+    assert r2.result == pytest.approx(cold.result, rel=1e-4)
+    assert pcache.stats["avg_iter_warm"] == 1 and pcache.stats["avg_iter_cold"] == cold.n_iterations + 1
+
+    # a different target token is a different cache entry
+    O.optimize("USDC", params=dict(pcache=pcache))
+    assert (pcache.n_warm, pcache.n_cold, len(pcache)) == (1, 2, 2)
+
+
+def test_warm_start_falls_back_to_cold():
+    pcache = PriceCache()
+    C = market()
+    pcache.prices[pcache.key("WETH", C.tokens())] = {t: float("nan") for t in C.tokens()}
+    r = MargPOptimizer(C).optimize("WETH", params=dict(pcache=pcache, raiseonerror=True))
+    assert not r.is_error and r.result == MargPOptimizer(C).optimize("WETH").result
+    assert (pcache.n_warm, pcache.n_cold, pcache.n_fallback) == (1, 1, 1)
+    assert pcache.get("WETH", C.tokens())["USDC"] == pytest.approx(r.p_optimal["USDC"])
+
+
+def test_cache_drops_least_recently_used():
+    pcache = PriceCache(maxsize=2)
+    result = SimpleNamespace(tokens_t=("USDC",), p_optimal_t=(1 / 2000,))
+    for tokens in ({"WETH", "USDC"}, {"WETH", "USDC", "DAI"}, {"WETH", "USDC", "WBTC"}):
+        pcache.get("WETH", {"WETH", "USDC"})
+        pcache.put("WETH", tokens, result)
+    assert len(pcache) == 2 and pcache.get("WETH", {"WETH", "USDC", "DAI"}) is None
+    assert pcache.get("WETH", {"USDC", "WETH"}) == {"USDC": 1 / 2000}
+    pcache.reset_stats()
+    assert pcache.stats["n_warm"] == 0 and pcache.stats["n_cached"] == 2
+
+
+def test_mode_with_price_cache():
+    curves = [
+        CPC.from_pk(pair=pair, p=p, k=k, cid=f"c{i}", params=dict(exchange=f"ex{i % 2}"))
+        for i, (pair, p, k) in enumerate([
+            ("WETH/USDC", 2000, 100 * 200000),
+            ("WETH/USDC", 2050, 100 * 200000),
+            ("WBTC/USDC", 40000, 10 * 400000),
+            ("WBTC/USDC", 40500, 10 * 400000),
+            ("WBTC/WETH", 20, 10 * 200),
+        ])
+    ] + [
+        CPC.from_carbon(pair="WBTC/WETH", tkny="WETH", yint=100, y=100, pa=23, pb=21, cid="carb2-0",
+                        params=dict(exchange="carbon_v1")),
+    ]
+    find = lambda price_cache: ArbitrageFinderTriangleMulti(
+        flashloan_tokens=["USDC"], CCm=CPCContainer(curves), ConfigObj=cfg, price_cache=price_cache,
+    ).find_arbitrage()
+    routes = lambda candidates: [(src, tuple(ti["cid"] for ti in dic)) for _, _, dic, src, _ in candidates]
+    profits = lambda candidates: [float(profit) for profit, _, _, _, _ in candidates]
+    pcache = PriceCache()
+    cold = find(None)
+    assert len(cold) > 0
+    for _ in range(2):
+        # the miniverses with the same token set are warm started already in the first search
+        warm = find(pcache)
+        assert routes(warm) == routes(cold) and profits(warm) == pytest.approx(profits(cold), rel=1e-6)
+    assert pcache.n_warm > len(cold) and pcache.n_fallback == 0
@@ -0,0 +1,153 @@
+import copy
+import json
+import logging
+
+import pytest
+from web3 import AsyncWeb3, Web3
+from web3.exceptions import MethodUnavailable
+
+from fastlane_bot.config import network as network_
+from fastlane_bot.events.interfaces.event import Event
+from fastlane_bot.events.replay import (
+    BlockReplay,
+    ReplayCorpus,
+    ReplayManager,
+    ReplayProvider,
+    ReplayRecorder,
+    ReplayReport,
+    encode_event,
+)
+
+EXCHANGES = ["carbon_v1", "uniswap_v2", "uniswap_v3"]
+BLOCK = 19000000
+WETH = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+
+
+def is_synced(pool):
+    value = pool["tkn0_balance"] if pool["exchange_name"] == "uniswap_v2" else pool["liquidity"]
+    return isinstance(value, (int, float)) and value > 0
+
+
+with open("fastlane_bot/tests/_data/latest_pool_data_testing.json", "r") as f:
+    pool_data = [
+        p for p in json.load(f)
+        if p["exchange_name"] == "carbon_v1" or (p["exchange_name"] in EXCHANGES and is_synced(p))
+    ]
+
+
+class OfflineConfig:
+    """the mainnet network configuration, with unconnected web3 instances"""
+
+    network = network_.ConfigNetwork.new(network="ethereum")
+    logger = logging.getLogger(__name__)
+    w3 = Web3()
+    w3_async = AsyncWeb3()
+
+    def __getattr__(self, item):
+        return getattr(self.network, item)
+
+
+def make_manager():
+    # the Carbon fee pairs are not read from the contracts by the replay manager
+    mgr = ReplayManager(
+        web3=Web3(),
+        w3_async=AsyncWeb3(),
+        cfg=OfflineConfig(),
+        pool_data=copy.deepcopy(pool_data),
+        alchemy_max_block_fetch=20,
+        SUPPORTED_EXCHANGES=list(EXCHANGES),
+        blockchain="ethereum",
+    )
+    for ex in EXCHANGES:
+        mgr.static_pools[f"{ex}_pools"] = {p["address"] for p in pool_data if p["exchange_name"] == ex}
+    return mgr
+
+
+def sync_events(block, n=20):
+    """Sync events moving the price of ``n`` Uniswap v2 pools by ``block``%"""
+    pools = [p for p in pool_data if p["exchange_name"] == "uniswap_v2"][:n]
+    return [
+        Event(
+            args=dict(reserve0=int(p["tkn0_balance"] * (1 + 0.01 * (block - BLOCK))), reserve1=int(p["tkn1_balance"])),
+            event="Sync", log_index=i, transaction_index=0, transaction_hash=bytes([i]) * 32,
+            address=p["address"], block_hash=None, block_number=block,
+        )
+        for i, p in enumerate(pools)
+    ]
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    corpus = ReplayCorpus(str(tmp_path_factory.mktemp("replay") / "ethereum"))
+    mgr = make_manager()
+    recorder = ReplayRecorder(corpus, flashloan_tokens=[WETH], chain_id=1, arb_rewards_ppm=500000)
+    recorder.record(mgr, BLOCK, [])
+    for block in range(BLOCK + 1, BLOCK + 4):
+        events = sync_events(block)
+        mgr.update_from_events(events)
+        if block == BLOCK + 2:
+            # a multicall update, which has no event
+            pool = next(p for p in mgr.pool_data if p["exchange_name"] == "uniswap_v3")
+            mgr.pool_data.update(pool["cid"], {"liquidity": 2 * pool["liquidity"], "last_updated_block": block})
+        recorder.record(mgr, block, events)
+    corpus.final_state = {p["cid"]: p["last_updated_block"] for p in mgr.pool_data}
+    return corpus
+
+
+def test_recorded_corpus(corpus):
+    assert corpus.blocks() == [BLOCK + 1, BLOCK + 2, BLOCK + 3]
+    assert corpus.meta["block"] == BLOCK and corpus.meta["state"]["exchanges"] == sorted(EXCHANGES)
+    recorded = corpus.read_block(BLOCK + 1)
+    assert [encode_event(e) for e in recorded["events"]] == [encode_event(e) for e in sync_events(BLOCK + 1)]
+    assert recorded["events"][1].transaction_hash == "0x" + "01" * 32
+
+
+def test_replay_is_deterministic(corpus):
+    replay = BlockReplay(corpus, arb_modes=["multi"])
+    report = replay.run()
+    assert report.blocks == corpus.blocks() and report.n_events == 60
+    assert {"load", "apply", "sync", "init", "curves", "find_multi"} <= set(report.stages)
+    assert report.stages["find_multi"]["count"] == 3 and report.blocks_per_second > 0
+    assert all(len(report.opportunities[block]["multi"]) > 0 for block in report.blocks)
+
+    # the pool data of the last block is the recorded one, including the multicall update
+    assert {p["cid"]: p["last_updated_block"] for p in replay.mgr.pool_data} == corpus.final_state
+    pool = next(p for p in pool_data if p["exchange_name"] == "uniswap_v3")
+    assert replay.mgr.pool_data.by_cid(pool["cid"])["liquidity"] == 2 * pool["liquidity"]
+    assert report.counters["pools_synced"] == 1
+
+    # without the curve cache, the same opportunities are found
+    other = BlockReplay(corpus, arb_modes=["multi"], curve_cache=False).run(max_blocks=2)
+    assert other.blocks == report.blocks[:2]
+    assert all(other.opportunities[block] == report.opportunities[block] for block in other.blocks)
+
+
+def test_report_diff(corpus, tmp_path):
+    report = BlockReplay(corpus, arb_modes=["multi"]).run(max_blocks=1)
+    report.save(str(tmp_path / "report.json"))
+    baseline = ReplayReport.load(str(tmp_path / "report.json"))
+    assert baseline == report and report.diff(baseline) == []
+
+    block = report.blocks[0]
+    opportunity = report.opportunities[block]["multi"][0]
+    changed = copy.deepcopy(baseline)
+    changed.opportunities[block]["multi"][0]["profit"] *= 1.01
+    changed.opportunities[block]["multi"] += [dict(opportunity, cids=opportunity["cids"][::-1])]
+    route = f"{opportunity['src_token']} {'/'.join(opportunity['cids'])}"
+    missing = f"{block} multi: missing {opportunity['src_token']} {'/'.join(opportunity['cids'][::-1])} "
+    assert sorted(report.diff(changed)) == sorted([
+        f"{missing}profit {opportunity['profit']}",
+        f"{block} multi: {route} profit {opportunity['profit'] * 1.01} -> {opportunity['profit']}",
+    ])
+    assert report.diff(changed, rel_tol=0.1) == [f"{missing}profit {opportunity['profit']}"]
+    assert report.diff(ReplayReport()) == ["blocks: 0 replayed in the other run, 1 in this one"]
+
+
+def test_replay_provider():
+    provider = ReplayProvider(chain_id=1, block=BLOCK, timestamp=1700000000)
+    w3 = Web3(provider)
+    assert w3.eth.chain_id == 1 and w3.eth.block_number == BLOCK
+    provider.set_block(BLOCK + 1, 1700000012)
+    assert w3.eth.get_block(BLOCK + 1).timestamp == 1700000012
+    with pytest.raises(MethodUnavailable):
+        w3.eth.get_balance(WETH)
@@ -0,0 +1,155 @@
+import copy
+import json
+import logging
+import os
+from types import SimpleNamespace
+
+import pytest
+from web3 import AsyncWeb3, HTTPProvider, Web3
+
+import main
+from fastlane_bot.config import network as network_
+from fastlane_bot.events.interfaces.event import Event
+from fastlane_bot.events.pool_snapshot import PoolDataSnapshot
+from fastlane_bot.events.replay import ReplayManager
+
+EXCHANGES = ["uniswap_v2"]
+BLOCK = 19000000
+
+with open("fastlane_bot/tests/_data/latest_pool_data_testing.json", "r") as f:
+    pool_data = [
+        p for p in json.load(f)
+        if p["exchange_name"] == "uniswap_v2" and isinstance(p["tkn0_balance"], (int, float)) and p["tkn0_balance"] > 0
+    ]
+
+
+class OfflineConfig:
+    """the mainnet network configuration, with unconnected web3 instances"""
+
+    network = network_.ConfigNetwork.new(network="ethereum")
+    logger = logging.getLogger(__name__)
+    w3 = Web3(HTTPProvider("http://localhost:8545"))
+    w3_async = AsyncWeb3()
+
+    def __getattr__(self, item):
+        return getattr(self.network, item)
+
+
+class StopLoop(BaseException):
+    """stops the main loop, which handles every ``Exception``"""
+
+
+def make_manager():
+    mgr = ReplayManager(
+        web3=Web3(),
+        w3_async=AsyncWeb3(),
+        cfg=OfflineConfig(),
+        pool_data=copy.deepcopy(pool_data),
+        alchemy_max_block_fetch=20,
+        SUPPORTED_EXCHANGES=list(EXCHANGES),
+        blockchain="ethereum",
+    )
+    mgr.static_pools["uniswap_v2_pools"] = {p["address"] for p in pool_data}
+    return mgr
+
+
+def sync_events(block, n=5):
+    """Sync events moving the price of ``n`` Uniswap v2 pools by ``block``%"""
+    return [
+        Event(
+            args=dict(reserve0=int(p["tkn0_balance"] * (1 + 0.01 * (block - BLOCK))), reserve1=int(p["tkn1_balance"])),
+            event="Sync", log_index=i, transaction_index=0, transaction_hash=None,
+            address=p["address"], block_hash=None, block_number=block,
+        )
+        for i, p in enumerate(pool_data[:n])
+    ]
+
+
+def make_args(logging_path):
+    return SimpleNamespace(
+        alchemy_max_block_fetch=20, arb_mode="multi", arb_workers=1, async_tx=False, backdate_pools=False,
+        blockchain="ethereum", cache_latest_only=True, filter_log_addresses=False, flashloan_tokens=[],
+        full_sweep_interval=100, increment_blocks=1, increment_time=1, incremental_arb_search=False,
+        integer_route_math=False, logging_path=logging_path, margp_price_cache=False, max_arbs_per_block=1,
+        n_jobs=1, pipeline=False, polling_interval=0, pool_data_update_frequency=-1, pool_finder_period=0,
+        randomizer=1, read_only=False, record_replay_path=None, reorg_delay=0, reorg_journal=False,
+        replay_from_block=None, run_data_validator=False, stream_events=False, stream_timeout=1,
+        target_tokens=None, tenderly_fork_id=None, timeout=None, univ3_tick_data=False, use_cached_events=False,
+        use_specific_exchange_for_target_tokens=None, ws_url=None,
+    )
+
+
+def test_pool_data_is_written_every_iteration(monkeypatch, tmp_path):
+    blocks = iter([BLOCK + 1, BLOCK + 2])
+    searched = []
+
+    def get_current_block(*args):
+        try:
+            return next(blocks)
+        except StopIteration:
+            raise StopLoop()
+
+    # the network and the arbitrage search are stubbed, the pools are updated from the events and written to disk
+    monkeypatch.setattr(main, "EventGatherer", lambda **kwargs: None)
+    monkeypatch.setattr(main, "PoolFinder", lambda **kwargs: None)
+    monkeypatch.setattr(main, "get_start_block", lambda last_block, *args: (last_block + 1, None))
+    monkeypatch.setattr(main, "get_current_block", get_current_block)
+    monkeypatch.setattr(main, "get_latest_events", lambda current_block, *args: sync_events(current_block))
+    monkeypatch.setattr(main, "async_handle_initial_iteration", lambda **kwargs: None)
+    monkeypatch.setattr(main, "multicall_every_iteration", lambda **kwargs: None)
+    monkeypatch.setattr(main, "handle_tokens_csv", lambda *args: None)
+    monkeypatch.setattr(main, "init_bot", lambda *args, **kwargs: None)
+    monkeypatch.setattr(main, "handle_subsequent_iterations", lambda **kwargs: searched.append(kwargs["loop_idx"]))
+
+    mgr = make_manager()
+    with pytest.raises(StopLoop):
+        main.run(mgr, make_args(str(tmp_path)))
+    assert searched == [1, 2]
+
+    path = os.path.join(str(tmp_path), "pool_data_snapshot")
+    assert os.path.exists(os.path.join(path, f"delta_{BLOCK + 2:012d}.parquet"))
+    restored, block = PoolDataSnapshot.load(path)
+    assert block == BLOCK + 2
+    restored = {p["cid"]: p for p in restored}
+    for pool in mgr.pool_data:
+        assert restored[pool["cid"]]["tkn0_balance"] == pool["tkn0_balance"]
+
+
+class FakeEth:
+    """serves the headers of a chain of blocks, one new head per request of the latest block"""
+
+    def __init__(self, heads):
+        self.heads = iter(heads)
+        self.requests = []
+
+    def get_block(self, block_identifier):
+        self.requests.append(block_identifier)
+        try:
+            block = next(self.heads)
+        except StopIteration:
+            raise StopLoop()
+        return dict(number=block, hash=f"0x{block:064x}", parentHash=f"0x{block - 1:064x}")
+
+
+def test_journal_reuses_the_header_of_the_current_block(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "EventGatherer", lambda **kwargs: None)
+    monkeypatch.setattr(main, "PoolFinder", lambda **kwargs: None)
+    monkeypatch.setattr(main, "get_start_block", lambda last_block, *args: (last_block + 1, None))
+    monkeypatch.setattr(main, "get_latest_events", lambda current_block, *args: sync_events(current_block))
+    monkeypatch.setattr(main, "async_handle_initial_iteration", lambda **kwargs: None)
+    monkeypatch.setattr(main, "multicall_every_iteration", lambda **kwargs: None)
+    monkeypatch.setattr(main, "handle_tokens_csv", lambda *args: None)
+    monkeypatch.setattr(main, "init_bot", lambda *args, **kwargs: None)
+    monkeypatch.setattr(main, "handle_subsequent_iterations", lambda **kwargs: None)
+
+    mgr = make_manager()
+    eth = FakeEth([BLOCK + 1, BLOCK + 2])
+    mgr.web3 = SimpleNamespace(eth=eth)
+    args = make_args(str(tmp_path))
+    args.reorg_journal = True
+    with pytest.raises(StopLoop):
+        main.run(mgr, args)
+
+    # a single request per iteration, for the header of the current block
+    assert eth.requests == ["latest"] * 3
+    assert mgr.event_journal.hashes[BLOCK + 2] == f"0x{BLOCK + 2:064x}" and mgr.event_journal.n_reorgs == 0
@@ -13,9 +13,8 @@ __DATE__ = "09/May/2023"
 
 from dataclasses import dataclass, field, asdict, astuple, InitVar
 from .simplepair import SimplePair as Pair
-import networkx as nx
+from .lazyimport import nx, plt
 import numpy as np
-import matplotlib.pyplot as plt
 import pandas as pd
 import math
 
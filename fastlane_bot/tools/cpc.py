@@ -8,8 +8,8 @@ Licensed under MIT
 NOTE: this class is not part of the API of the Carbon protocol, and you must expect breaking
 changes even in minor version updates. Use at your own risk.
 """
-__VERSION__ = "3.4"
-__DATE__ = "23/Jan/2024"
+__VERSION__ = "3.7"
+__DATE__ = "29/Apr/2024"
 
 from dataclasses import dataclass, field, asdict, InitVar
 from .simplepair import SimplePair as Pair
@@ -19,7 +19,7 @@ from math import sqrt
 import numpy as np
 import pandas as pd
 import json
-from matplotlib import pyplot as plt
+from .lazyimport import plt
 from .params import Params
 import itertools as it
 import collections as cl
@@ -27,6 +27,7 @@ from sys import float_info
 from hashlib import md5 as digest
 import time
 from .cpcbase import CurveBase, AttrDict, DAttrDict, dataclass_
+from .cpcarrays import CPCArrays
 
 
 AD = DAttrDict
@@ -500,6 +501,19 @@ class ConstantProductCurve(CurveBase):
         super().__setattr__("cid", cid)
         return self
 
+    ranges = ()
+    # the other liquidity ranges of the pool, as curves of the same pair which are out of range at
+    # the current price (eg the ticks of a Uniswap v3 pool away from the current tick); their token
+    # changes are added to those of the curve itself, so the curve behaves as one piecewise curve
+
+    def set_ranges(self, ranges):
+        """sets the other liquidity ranges of the pool (returns self)"""
+        ranges = tuple(ranges)
+        for r in ranges:
+            assert r.pair == self.pair, f"range pair {r.pair} does not match curve pair {self.pair}"
+        super().__setattr__("ranges", ranges)
+        return self
+
     class CPCValidationError(ValueError): pass
     
     @classmethod
@@ -981,7 +995,105 @@ class ConstantProductCurve(CurveBase):
         else:
             print("[cpc::from_solidly] returning curve directly is deprecated; prepare to accept a list of curves in the future")
             return result
-        
+
+    SOLIDLY_STABLE_STEPS = 24           # number of segments on either side of the current point
+    SOLIDLY_STABLE_FIRST_STEP = 2e-3    # change of log(y/x) over the first segment (~0.1% of the reserves)
+    SOLIDLY_STABLE_GROWTH = 1.3         # growth factor of the steps (the last ones reach >90% of the reserves)
+    SOLIDLY_STABLE_MIN_WIDTH = 1e-6     # minimum relative price width of a segment
+    @classmethod
+    def from_solidly_stable(
+        cls,
+        *,
+        x,
+        y,
+        pair=None,
+        fee=None,
+        cid=None,
+        descr=None,
+        params=None,
+        steps=None,
+        first_step=None,
+        growth=None,
+    ):
+        """
+        constructor: from a Solidly stable pool, as a piecewise curve (see class docstring for other parameters)
+
+        :x:             current pool liquidity in token x (in token units)
+        :y:             current pool liquidity in token y (in token units)
+        :steps:         number of segments on either side of the current point (default SOLIDLY_STABLE_STEPS)
+        :first_step:    change of log(y/x) over the first segment (default SOLIDLY_STABLE_FIRST_STEP)
+        :growth:        growth factor of the subsequent steps (default SOLIDLY_STABLE_GROWTH)
+
+        The invariant x^3 y + x y^3 = k is parametrized by the ratio r = y/x, which gives
+        the points of the curve in closed form:
+
+            p(r) = (3r + r^3) / (1 + 3r^2)          marginal price dy/dx
+            x(r) = (k / (r + r^3))^(1/4),  y(r) = r x(r)
+
+        The curve between consecutive points of a geometric grid in r around the current
+        point is approximated by a constant product range with the exact prices of the
+        endpoints, and a liquidity fitted to the token amounts between them. The segment
+        adjacent to the current point above the current price is the curve itself, and
+        the others are its ``ranges``, so that the pool remains a single curve (with a
+        single cid) for the optimizers. Unlike ``from_solidly`` the curve covers the wings
+        of the invariant as well, beyond 90% of either reserve.
+        """
+        assert x > 0 and y > 0, f"x, y must be positive ({x}, {y})"
+        steps = steps or cls.SOLIDLY_STABLE_STEPS
+        first_step = first_step or cls.SOLIDLY_STABLE_FIRST_STEP
+        growth = growth or cls.SOLIDLY_STABLE_GROWTH
+        k = x**3 * y + x * y**3
+        r0 = y / x
+
+        def point(r):
+            x_ = (k / (r + r**3)) ** 0.25
+            return (3 * r + r**3) / (1 + 3 * r**2), x_, r * x_
+
+        # the grid, in ascending r (ie ascending price, descending x)
+        offsets = list(it.accumulate(first_step * growth**i for i in range(steps)))
+        rr = [r0 * np.exp(-d) for d in reversed(offsets)] + [r0] + [r0 * np.exp(d) for d in offsets]
+        points = [(r, *point(r)) for r in rr]
+        points[steps] = (r0, point(r0)[0], x, y)
+
+        # drop points (other than the current one) whose price does not move enough to
+        # make a proper range, which happens in the flat center of the curve
+        grid = [points[0]]
+        for i, pt in enumerate(points[1:], start=1):
+            if i == steps:
+                while len(grid) > 1 and pt[1] <= grid[-1][1] * (1 + cls.SOLIDLY_STABLE_MIN_WIDTH):
+                    grid.pop()
+            elif pt[1] <= grid[-1][1] * (1 + cls.SOLIDLY_STABLE_MIN_WIDTH):
+                continue
+            grid.append(pt)
+
+        if params is None:
+            params = AttrDict()
+        params = AttrDict({**params, "s_x": x, "s_y": y, "s_k": k})
+        above, below = [], []
+        for (r_lo, pa, x_lo, y_lo), (r_hi, pb, x_hi, y_hi) in zip(grid, grid[1:]):
+            if pb <= pa * (1 + cls.SOLIDLY_STABLE_MIN_WIDTH):
+                continue
+            spa, spb = sqrt(pa), sqrt(pb)
+            L = sqrt((x_lo - x_hi) / (1 / spa - 1 / spb) * (y_hi - y_lo) / (spb - spa))
+            # the segments above the current price hold token x only, those below token y only
+            is_above = r_lo >= r0
+            curve = cls(
+                k=L * L,
+                x=L / spa if is_above else L / spb,
+                x_act=L / spa - L / spb if is_above else 0,
+                y_act=0 if is_above else L * spb - L * spa,
+                pair=pair,
+                cid=cid,
+                fee=fee,
+                descr=descr,
+                constr="solidly_stable",
+                params=params,
+            )
+            (above if is_above else below).append(curve)
+        if not above:
+            return below[-1].set_ranges(below[:-1])
+        return above[0].set_ranges(below + above[1:])
+
     @classmethod
     def from_carbon(
         cls,
@@ -1587,10 +1699,14 @@ class ConstantProductCurve(CurveBase):
         return {self.tknx: x, self.tkny: y}
     
     def dxdyfromp_f(self, p=None, *, ignorebounds=False, withunits=False):
-        """like xyfromp_f, but returns dx,dy,p instead of x,y,p"""
+        """like xyfromp_f, but returns dx,dy,p instead of x,y,p (summed over the ranges, if any)"""
         x, y, p = self.xyfromp_f(p, ignorebounds=ignorebounds)
         dx = x - self.x
         dy = y - self.y
+        for r in self.ranges:
+            rdx, rdy, _ = r.dxdyfromp_f(p)
+            dx += rdx
+            dy += rdy
         if withunits:
             return dx, dy, p, self.tknxp, self.tknyp, self.pairp
         return dx, dy, p
@@ -1787,6 +1903,10 @@ class CPCContainer:
                 pass
             c.set_tokenscale(self.tokenscale)
 
+        self._reindex()
+
+    def _reindex(self):
+        """(re)builds the lookup dicts from self.curves"""
         self.curves_by_cid = {c.cid: c for c in self.curves}
         self.curveix_by_curve = {c: i for i, c in enumerate(self.curves)}
         # self.curves_by_primary_pair = {c.pairo.primary: c for c in self.curves}
@@ -1796,6 +1916,7 @@ class CPCContainer:
                 self.curves_by_primary_pair[c.pairo.primary].append(c)
             except KeyError:
                 self.curves_by_primary_pair[c.pairo.primary] = [c]
+        self._arrays = None
 
     TOKENSCALE = ts.TokenScale1Data
     # default token scale object is the trivial scale (everything one)
@@ -1870,8 +1991,56 @@ class CPCContainer:
             self.curves_by_primary_pair[item.pairo.primary].append(item)
         except KeyError:
             self.curves_by_primary_pair[item.pairo.primary] = [item]
+        self._arrays = None
         return self
 
+    def patch(self, curves=None, *, remove=None):
+        """
+        patches the container in place rather than rebuilding it
+
+        :curves:    iterable of curves; a curve replaces the curve with the same cid (keeping
+                    its position), or is appended if no curve with that cid exists
+        :remove:    iterable of cids of curves to remove (after the replacements)
+        :returns:   self
+
+        NOTE: replacements and additions are O(1) per curve; removals rebuild the lookup
+        dicts once, ie they are O(len(self)) per call (not per removed curve)
+        """
+        for c in CPCInverter.unwrap(curves or []):
+            old = self.curves_by_cid.get(c.cid) if c.cid is not None else None
+            if old is None:
+                c.set_tokenscale(self.tokenscale)
+                self.add(c)
+                continue
+            ix = self.curveix_by_curve.pop(old)
+            c.set_tokenscale(self.tokenscale)
+            self.curves[ix] = c
+            self.curves_by_cid[c.cid] = c
+            self.curveix_by_curve[c] = ix
+            ppair = self.curves_by_primary_pair[old.pairo.primary]
+            ppair.remove(old)
+            if not ppair:
+                del self.curves_by_primary_pair[old.pairo.primary]
+            self.curves_by_primary_pair.setdefault(c.pairo.primary, []).append(c)
+        remove = set(remove or []).intersection(self.curves_by_cid)
+        if remove:
+            self.curves = [c for c in self.curves if not c.cid in remove]
+            self._reindex()
+        self._arrays = None
+        return self
+
+    @property
+    def arrays(self):
+        """
+        columnar (struct-of-arrays) representation of the curves as CPCArrays object
+
+        built lazily on first access and cached until curves are added; allows vectorized
+        evaluation of xyfromp_f / dxdyfromp_f across all curves and mask-based selection
+        """
+        if self._arrays is None or len(self._arrays) != len(self.curves):
+            self._arrays = CPCArrays.from_curves(self.curves)
+        return self._arrays
+
     def price(self, tknb, tknq):
         """returns price of tknb in tknq (tknb per tknq)"""
         pairo = Pair.from_tokens(tknb, tknq)
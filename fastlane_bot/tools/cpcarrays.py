@@ -0,0 +1,320 @@
+"""
+columnar (struct-of-arrays) representation of a set of constant product curves
+
+``CPCArrays`` packs the parameters of a list of ``ConstantProductCurve`` objects into
+contiguous numpy arrays, with the tokens, (directed) pairs, primary pairs and exchanges
+integer-coded against lookup tables. This allows evaluating ``xyfromp_f`` and
+``dxdyfromp_f`` for all curves at once, and selecting curves by pair, token or exchange
+via masks rather than generators over the curve objects.
+
+Selections return ``CPCArrays`` objects that share the lookup tables and the underlying
+curve objects with their parent; only the (cheap) numpy arrays are indexed, so no
+curve objects and no ``CPCContainer`` are created unless explicitly requested via
+``ascc``.
+
+Usually accessed via ``CPCContainer.arrays`` rather than instantiated directly.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+Licensed under MIT
+
+NOTE: this class is not part of the API of the Carbon protocol, and you must expect breaking
+changes even in minor version updates. Use at your own risk.
+"""
+__VERSION__ = "1.0"
+__DATE__ = "22/Apr/2024"
+
+from dataclasses import dataclass
+import numpy as np
+
+
+@dataclass
+class CPCArrays:
+    """
+    columnar representation of a set of curves (see module docstring)
+
+    :curves:        tuple of the underlying curve objects, in array order
+    :tokens:        token table; ``tknx_ix`` and ``tkny_ix`` index into it
+    :pairs:         directed pair table (``c.pair``); ``pair_ix`` indexes into it
+    :ppairs:        primary pair table (``c.pairo.primary``); ``ppair_ix`` indexes into it
+    :exchanges:     exchange table (``c.P("exchange")``); ``exchange_ix`` indexes into it
+    :data:          dict of numpy arrays, one entry per curve (see ``FIELDS``)
+    """
+
+    __VERSION__ = __VERSION__
+    __DATE__ = __DATE__
+
+    curves: tuple
+    tokens: tuple
+    pairs: tuple
+    ppairs: tuple
+    exchanges: tuple
+    data: dict
+
+    FIELDS = (
+        "k", "x", "y", "x_act", "y_act", "alpha", "fee", "p",
+        "x1", "y1", "x_min", "x_max", "y_min", "y_max",
+    )
+    INDEX_FIELDS = ("tknx_ix", "tkny_ix", "pair_ix", "ppair_ix", "exchange_ix")
+
+    def __post_init__(self):
+        self.token_ix = {t: i for i, t in enumerate(self.tokens)}
+        self.pair_ix_by_pair = {p: i for i, p in enumerate(self.pairs)}
+        self.ppair_ix_by_ppair = {p: i for i, p in enumerate(self.ppairs)}
+        self.exchange_ix_by_exchange = {e: i for i, e in enumerate(self.exchanges)}
+
+    @staticmethod
+    def _record(c):
+        """returns the numeric fields of curve c as tuple in the order of FIELDS"""
+        x1, y1, _ = c.xyfromp_f(1, ignorebounds=True)
+        x_max, y_max = c.x_max, c.y_max
+        return (
+            c.k, c.x, c.y, c.x_act, c.y_act, c.alpha,
+            c.fee if c.fee is not None else np.nan, c.p,
+            x1, y1,
+            c.x_min or 0, x_max if x_max is not None else np.inf,
+            c.y_min or 0, y_max if y_max is not None else np.inf,
+        )
+
+    @classmethod
+    def from_curves(cls, curves):
+        """
+        alternative constructor: packs an iterable of curves into arrays
+
+        :curves:    iterable of ConstantProductCurve objects
+        """
+        curves = tuple(curves)
+        tables = dict(tokens={}, pairs={}, ppairs={}, exchanges={})
+        code = lambda table, value: tables[table].setdefault(value, len(tables[table]))
+        records, codes = [], []
+        for c in curves:
+            records += [cls._record(c)]
+            codes += [(
+                code("tokens", c.tknx),
+                code("tokens", c.tkny),
+                code("pairs", c.pair),
+                code("ppairs", c.pairo.primary),
+                code("exchanges", c.P("exchange")),
+            )]
+        records = np.array(records, dtype=np.float64).reshape(len(curves), len(cls.FIELDS))
+        codes = np.array(codes, dtype=np.int64).reshape(len(curves), len(cls.INDEX_FIELDS))
+        data = {f: records[:, i].copy() for i, f in enumerate(cls.FIELDS)}
+        data.update({f: codes[:, i].copy() for i, f in enumerate(cls.INDEX_FIELDS)})
+        return cls(
+            curves=curves,
+            tokens=tuple(tables["tokens"]),
+            pairs=tuple(tables["pairs"]),
+            ppairs=tuple(tables["ppairs"]),
+            exchanges=tuple(tables["exchanges"]),
+            data=data,
+        )
+
+    def __len__(self):
+        return len(self.curves)
+
+    def __getattr__(self, name):
+        # fields are exposed as attributes, eg ``A.k`` or ``A.tknx_ix``
+        data = self.__dict__.get("data")
+        if data is not None and name in data:
+            return data[name]
+        raise AttributeError(name)
+
+    @property
+    def cids(self):
+        """tuple of all curve ids"""
+        return tuple(c.cid for c in self.curves)
+
+    # ------------------------------------------------------------------ #
+    # vectorized evaluation
+    # ------------------------------------------------------------------ #
+    def xyfromp_f(self, p=None, *, ignorebounds=False):
+        """
+        vectorized ``ConstantProductCurve.xyfromp_f`` over all curves
+
+        :p:             marginal prices (in dy/dx), either a scalar or an array with one
+                        entry per curve; if None, the current curve prices are used
+        :ignorebounds:  if True, x and y are not clamped to [x_min, x_max] and [y_min, y_max]
+        :returns:       tuple of arrays x, y, p
+
+        NOTE: on its unclamped part each curve satisfies x(p) = x1 * p^-(1-alpha) and
+        y(p) = y1 * p^alpha, where x1, y1 are the values at p = 1
+        """
+        d = self.data
+        p = d["p"] if p is None else np.broadcast_to(np.asarray(p, dtype=np.float64), d["p"].shape)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x = d["x1"] * p ** -(1 - d["alpha"])
+            y = d["y1"] * p ** d["alpha"]
+        if not ignorebounds:
+            x = np.minimum(np.maximum(x, d["x_min"]), d["x_max"])
+            y = np.minimum(np.maximum(y, d["y_min"]), d["y_max"])
+        return x, y, p
+
+    def dxdyfromp_f(self, p=None, *, ignorebounds=False):
+        """like xyfromp_f, but returns dx, dy, p instead of x, y, p"""
+        x, y, p = self.xyfromp_f(p, ignorebounds=ignorebounds)
+        return x - self.data["x"], y - self.data["y"], p
+
+    def pfrompvec(self, pvec):
+        """
+        converts token prices into curve prices
+
+        :pvec:      a dict {tkn: price} containing at least all tokens of the curves, or an
+                    array of prices indexed like ``tokens``
+        :returns:   array of curve prices p = pvec[tknx] / pvec[tkny]
+        """
+        if isinstance(pvec, dict):
+            missing = {self.tokens[i] for i in self.used_tokens_ix if not self.tokens[i] in pvec}
+            assert not missing, f"pvec must contain prices for all tokens [missing: {missing}]"
+            pvec = np.array([pvec.get(t, np.nan) for t in self.tokens], dtype=np.float64)
+        return pvec[self.data["tknx_ix"]] / pvec[self.data["tkny_ix"]]
+
+    def dtknfrompvec_f(self, pvec, *, ignorebounds=False, asdct=False):
+        """
+        aggregate change in token amounts across all curves for given token prices
+
+        :pvec:          token prices (see ``pfrompvec``)
+        :asdct:         if True, returns dict {tkn: dtkn}, otherwise an array indexed like ``tokens``
+        """
+        dx, dy, _ = self.dxdyfromp_f(self.pfrompvec(pvec), ignorebounds=ignorebounds)
+        n = len(self.tokens)
+        dtkn = (
+            np.bincount(self.data["tknx_ix"], weights=dx, minlength=n)
+            + np.bincount(self.data["tkny_ix"], weights=dy, minlength=n)
+        )
+        if asdct:
+            return {self.tokens[i]: dtkn[i] for i in self.used_tokens_ix}
+        return dtkn
+
+    @property
+    def used_tokens_ix(self):
+        """indices (into ``tokens``) of the tokens used by the curves of this selection"""
+        return np.unique(np.concatenate((self.data["tknx_ix"], self.data["tkny_ix"])))
+
+    # ------------------------------------------------------------------ #
+    # selection
+    # ------------------------------------------------------------------ #
+    def select(self, mask):
+        """
+        returns the curves selected by mask as CPCArrays sharing tables and curve objects
+
+        :mask:      boolean mask or integer index array
+        """
+        ix = np.arange(len(self))[mask]
+        return self.__class__(
+            curves=tuple(self.curves[i] for i in ix),
+            tokens=self.tokens,
+            pairs=self.pairs,
+            ppairs=self.ppairs,
+            exchanges=self.exchanges,
+            data={f: v[ix] for f, v in self.data.items()},
+        )
+
+    def _codes(self, values, lookup):
+        """converts an iterable of values into an array of codes (unknown values are dropped)"""
+        if isinstance(values, str):
+            values = (v.strip() for v in values.split(","))
+        return np.array([lookup[v] for v in values if v in lookup], dtype=np.int64)
+
+    def tknmask(self, tkns, *, which="any"):
+        """
+        mask of curves by token
+
+        :tkns:      iterable or comma-separated string of tokens
+        :which:     "x" (tknx in tkns), "y" (tkny in tkns), "any" (either), "both" (both)
+        """
+        codes = self._codes(tkns, self.token_ix)
+        inx = np.isin(self.data["tknx_ix"], codes)
+        iny = np.isin(self.data["tkny_ix"], codes)
+        if which == "x":
+            return inx
+        if which == "y":
+            return iny
+        if which == "any":
+            return inx | iny
+        if which == "both":
+            return inx & iny
+        raise ValueError(f"unknown which {which}")
+
+    def pairmask(self, pairs, *, directed=False):
+        """
+        mask of curves by pair
+
+        :pairs:     iterable or comma-separated string of pairs
+        :directed:  if False, reverse pairs are matched as well
+        """
+        if isinstance(pairs, str):
+            pairs = [p.strip() for p in pairs.split(",")]
+        pairs = set(pairs)
+        if not directed:
+            pairs |= {"/".join(p.split("/")[::-1]) for p in pairs}
+        return np.isin(self.data["pair_ix"], self._codes(pairs, self.pair_ix_by_pair))
+
+    def exchangemask(self, exchanges):
+        """mask of curves by exchange (iterable or comma-separated string)"""
+        return np.isin(self.data["exchange_ix"], self._codes(exchanges, self.exchange_ix_by_exchange))
+
+    def bypairs(self, pairs, *, directed=False):
+        """selects curves by (possibly directed) pairs (see ``pairmask``)"""
+        return self.select(self.pairmask(pairs, directed=directed))
+
+    def bytknxs(self, tknxs):
+        """selects curves by tknx"""
+        return self.select(self.tknmask(tknxs, which="x"))
+
+    def bytknys(self, tknys):
+        """selects curves by tkny"""
+        return self.select(self.tknmask(tknys, which="y"))
+
+    def byexchanges(self, exchanges):
+        """selects curves by exchange"""
+        return self.select(self.exchangemask(exchanges))
+
+    def filter_pairs(self, *, anyall="all", **conditions):
+        """
+        vectorized equivalent of ``CPCContainer.filter_pairs`` on the primary pairs of the curves
+
+        :anyall:        how conditions are combined ("any" or "all")
+        :conditions:    bothin, onein, contains, notin, tknbin, tknbnotin, tknqin, tknqnotin;
+                        as in ``CPCContainer.filter_pairs`` a "_xxx" suffix can be appended
+        :returns:       set of primary pairs
+        """
+        ppairs = np.array(self.ppairs, dtype=object)
+        if not conditions:
+            return set(ppairs[np.unique(self.data["ppair_ix"])])
+        tknb_ix = np.array([self.token_ix[p.split("/")[0]] for p in self.ppairs], dtype=np.int64)
+        tknq_ix = np.array([self.token_ix[p.split("/")[1]] for p in self.ppairs], dtype=np.int64)
+        present = np.zeros(len(self.ppairs), dtype=bool)
+        present[self.data["ppair_ix"]] = True
+        masks = []
+        for condition, tkns in conditions.items():
+            codes = self._codes(tkns, self.token_ix)
+            inb, inq = np.isin(tknb_ix, codes), np.isin(tknq_ix, codes)
+            condition0 = condition.split("_")[0]
+            if condition0 == "bothin":
+                masks += [inb & inq]
+            elif condition0 in ("contains", "onein"):
+                masks += [inb | inq]
+            elif condition0 == "notin":
+                masks += [~inb & ~inq]
+            elif condition0 == "tknbin":
+                masks += [inb]
+            elif condition0 == "tknbnotin":
+                masks += [~inb]
+            elif condition0 == "tknqin":
+                masks += [inq]
+            elif condition0 == "tknqnotin":
+                masks += [~inq]
+            else:
+                raise ValueError(f"unknown condition {condition}")
+        if anyall == "any":
+            mask = np.logical_or.reduce(masks)
+        elif anyall == "all":
+            mask = np.logical_and.reduce(masks)
+        else:
+            raise ValueError(f"unknown anyall {anyall}")
+        return set(ppairs[mask & present])
+
+    def ascc(self, *, tokenscale=None):
+        """returns the selected curves as CPCContainer"""
+        from .cpc import CPCContainer
+        return CPCContainer(self.curves, tokenscale=tokenscale)
@@ -11,7 +11,7 @@ from dataclasses import dataclass, asdict
 from abc import ABC, abstractmethod
 import math as m
 import numpy as np
-import matplotlib.pyplot as plt
+from ...lazyimport import plt
 from inspect import signature
 
 from ..vector import DictVector
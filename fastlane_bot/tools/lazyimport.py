@@ -0,0 +1,62 @@
+"""
+lazily imported modules (plotting and graph libraries that the bot itself never uses)
+
+---
+(c) Copyright Bprotocol foundation 2024.
+Licensed under MIT
+
+NOTE: this class is not part of the API of the Carbon protocol, and you must expect breaking
+changes even in minor version updates. Use at your own risk.
+"""
+__VERSION__ = "1.0"
+__DATE__ = "29/Apr/2024"
+
+import importlib
+
+
+class LazyModule:
+    """
+    a stand-in for a module that is only imported on first attribute access
+
+    :name:      the fully qualified name of the module, eg ``"matplotlib.pyplot"``
+
+    USAGE
+
+    .. code-block:: python
+
+        plt = LazyModule("matplotlib.pyplot")
+        ...
+        plt.plot(x, y)  # matplotlib is imported here
+    """
+
+    def __init__(self, name):
+        self._lazy_name = name
+        self._lazy_module = None
+
+    @property
+    def module(self):
+        """the module, imported if needed"""
+        if self._lazy_module is None:
+            self._lazy_module = importlib.import_module(self._lazy_name)
+        return self._lazy_module
+
+    @property
+    def is_loaded(self):
+        """whether the module has been imported"""
+        return self._lazy_module is not None
+
+    def __getattr__(self, item):
+        if item.startswith("_lazy_"):
+            raise AttributeError(item)
+        return getattr(self.module, item)
+
+    def __dir__(self):
+        return dir(self.module)
+
+    def __repr__(self):
+        status = "loaded" if self.is_loaded else "not loaded"
+        return f"<LazyModule {self._lazy_name!r} ({status})>"
+
+
+plt = LazyModule("matplotlib.pyplot")
+nx = LazyModule("networkx")
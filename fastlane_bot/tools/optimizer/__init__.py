@@ -40,6 +40,9 @@ Marginal price optimization is implemented in the class
 ``PairOptimizer``, and convex optimization in the class
 ``ConvexOptimizer``. All those classes are subclasses of
 ``CPCArbOptimizer``, and ultimately of ``OptimizerBase``.
+The ``PriceCache`` stores the optimal prices of the
+``MargPOptimizer`` to warm start its later optimizations of
+the same token set (eg in the next block).
 
 
 NOTE 1: routing is not implemented yet, but it is a trivial
@@ -60,4 +63,5 @@ Licensed under MIT.
 from .cpcarboptimizer import *
 from .pairoptimizer import PairOptimizer
 from .margpoptimizer import MargPOptimizer
+from .pricecache import PriceCache
 from .convexoptimizer import ConvexOptimizer
\ No newline at end of file
@@ -22,8 +22,8 @@ author is Stefan Loesch <stefan@bancor.network>
 (c) Copyright Bprotocol foundation 2023. 
 Licensed under MIT
 """
-__VERSION__ = "5.2"
-__DATE__ = "15/Sep/2023"
+__VERSION__ = "5.6"
+__DATE__ = "30/Apr/2024"
 
 from dataclasses import dataclass, field, fields, asdict, astuple, InitVar
 import pandas as pd
@@ -34,6 +34,7 @@ import time
 # import numbers
 # import pickle
 from ..cpc import ConstantProductCurve as CPC, CPCInverter, CPCContainer
+from ..cpcarrays import CPCArrays
 #from sys import float_info
 
 from .dcbase import DCBase
@@ -73,6 +74,69 @@ class MargPOptimizer(CPCArbOptimizer):
     J = jacobian
     JACEPS = 1e-5
 
+    JAC_FD = "fd"
+    JAC_ANALYTIC = "analytic"
+
+    @staticmethod
+    def curve_arrays(curves, tokens_ix):
+        """
+        packs the curve parameters needed by ``dtknjacfromp_f`` into numpy arrays
+
+        :curves:        CPCContainer (whose cached ``arrays`` are then used) or iterable of curves
+        :tokens_ix:     dict {tkn: ix} of the non-target tokens; any token not in
+                        there (ie the target token) gets index ``len(tokens_ix)``
+        :returns:       dict of np.arrays, one entry per curve (and per range of a curve, if any)
+        """
+        ranges = [r for c in curves for r in c.ranges]
+        if ranges:
+            ca = CPCArrays.from_curves(list(curves) + ranges)
+        else:
+            ca = curves.arrays if isinstance(curves, CPCContainer) else CPCArrays.from_curves(curves)
+        n = len(tokens_ix)
+        remap = np.array([tokens_ix.get(t, n) for t in ca.tokens], dtype=np.int64)
+        return dict(
+            ixx=remap[ca.tknx_ix], ixy=remap[ca.tkny_ix],
+            x1=ca.x1, y1=ca.y1, alpha=ca.alpha, x0=ca.x, y0=ca.y,
+            xmin=ca.x_min, xmax=ca.x_max, ymin=ca.y_min, ymax=ca.y_max,
+        )
+
+    @staticmethod
+    def dtknjacfromp_f(plog10, ca):
+        """
+        calculates the aggregate change in token amounts and its analytic Jacobian
+
+        :plog10:    log10 price vector of the non-target tokens (target token price = 1)
+        :ca:        the curve arrays, as returned by ``curve_arrays``
+        :returns:   tuple (dtkn, J) where dtkn is the same as the result of the ``dtknfromp_f``
+                    function in ``optimize``, and J[i, j] = d dtkn_i / d log10(p_j)
+
+        NOTE: the pool price is p = p_x / p_y, therefore d log10 p / d log10 p_x = 1 and
+        d log10 p / d log10 p_y = -1; the derivatives of x and y with respect to log10 p are
+        -(1-alpha) x ln10 and alpha y ln10 respectively, and zero where they are clamped
+        at their boundaries
+        """
+        n = len(plog10)
+        ixx, ixy, alpha = ca["ixx"], ca["ixy"], ca["alpha"]
+        ulog10 = np.append(np.asarray(plog10, dtype=np.float64), 0.0)
+        lnp = (ulog10[ixx] - ulog10[ixy]) * np.log(10)
+        xu = ca["x1"] * np.exp(-(1 - alpha) * lnp)
+        yu = ca["y1"] * np.exp(alpha * lnp)
+        x = np.minimum(np.maximum(xu, ca["xmin"]), ca["xmax"])
+        y = np.minimum(np.maximum(yu, ca["ymin"]), ca["ymax"])
+
+        dtkn = (
+            np.bincount(ixx, weights=x - ca["x0"], minlength=n + 1)
+            + np.bincount(ixy, weights=y - ca["y0"], minlength=n + 1)
+        )
+
+        dxdlp = np.where((xu > ca["xmin"]) & (xu < ca["xmax"]), -(1 - alpha) * x * np.log(10), 0)
+        dydlp = np.where((yu > ca["ymin"]) & (yu < ca["ymax"]), alpha * y * np.log(10), 0)
+        rows = np.concatenate((ixx, ixx, ixy, ixy))
+        cols = np.concatenate((ixx, ixy, ixx, ixy))
+        vals = np.concatenate((dxdlp, -dxdlp, dydlp, -dydlp))
+        J = np.bincount(rows * (n + 1) + cols, weights=vals, minlength=(n + 1) ** 2)
+        return dtkn[:n], J.reshape(n + 1, n + 1)[:n, :n]
+
     
     MO_DEBUG = "debug"
     MO_PSTART = "pstart"
@@ -83,6 +147,7 @@ class MargPOptimizer(CPCArbOptimizer):
 
     MOEPS = 1e-6
     MOMAXITER = 50
+    MOMAXHALVINGS = 30
     
     class OptimizationError(Exception): pass
     class ConvergenceError(OptimizationError): pass
@@ -128,6 +193,10 @@ class MargPOptimizer(CPCArbOptimizer):
         debug2              more debug output
         raiseonerror        if True, raise an OptimizationError exception on error
         pstart              starting price for optimization (3)
+        jacobian            JAC_FD (finite differences; default) or JAC_ANALYTIC (4)
+        maxhalvings         maximum number of halvings of a Newton step (5)
+        pcache              PriceCache to warm start from, and to store the optimal prices in (6)
+        warmstart           if True, pstart is the solution of a similar problem (6)
         ==================  =========================================================================
             
 
@@ -142,12 +211,32 @@ class MargPOptimizer(CPCArbOptimizer):
         NOTE 3: can be provided either as dict {tkn:p, ...}, or as df as price estimate as 
         returned by MO_PSTART; excess tokens can be provided but all required tokens 
         must be present
+
+        NOTE 4: JAC_ANALYTIC computes dtkn and the Jacobian in closed form in a single vectorized
+        pass over the curves (see ``dtknjacfromp_f``), rather than calling ``dtknfromp_f`` once
+        per token as the finite difference method does
+
+        NOTE 5: a Newton step (of at least eps) that increases the norm of dtkn is halved (and retried)
+        rather than accepted, up to `maxhalvings` times in a row; each retry counts as an iteration;
+        this matters for the piecewise curves (curves with `ranges`), eg stable swap curves whose price
+        is nearly constant over a large amount, where the full steps overshoot back and forth; the
+        default is MOMAXHALVINGS if any curve has ranges, and 0 (plain Newton) otherwise
+
+        NOTE 6: with a `pcache`, the iteration starts from the cached optimal prices of the last
+        optimization with the same target token and token set (if any) rather than from `pstart` or
+        the price estimates; if that warm start fails (eg it diverges, or does not converge within
+        maxiter) the optimization is repeated from the cold start; the optimal prices are stored in the
+        cache, which also records iterations and time of warm and cold starts (see `PriceCache.stats`);
+        the warm start sets `warmstart`, which allows the iteration to stop after the first step, as
+        unlike the price estimates the start prices are already a common baseline
         """
         # data conversion: string to SFC object; note that anything but pure arb not currently supported
         if isinstance(sfc, str):
             sfc = self.arb(targettkn=sfc)
         assert sfc.is_arbsfc(), "only pure arbitrage SFC are supported at the moment"
         targettkn = sfc.optimizationvar
+        if params is not None and params.get("pcache") is not None and result in (None, self.MO_FULL, self.MO_MINIMAL):
+            return self._optimize_pcache(sfc, result, params)
         
         # lambdas
         P      = lambda item: params.get(item, None) if params is not None else None
@@ -158,8 +247,12 @@ class MargPOptimizer(CPCArbOptimizer):
         # initialisations
         eps = P("eps") or self.MOEPS
         maxiter = P("maxiter") or self.MOMAXITER
+        maxhalvings = P("maxhalvings")
+        jacmode = P("jacobian") or self.JAC_FD
         start_time = time.time()
         curves_t = self.curve_container
+        if maxhalvings is None:
+            maxhalvings = self.MOMAXHALVINGS if any(c.ranges for c in curves_t) else 0
         alltokens_s = self.curve_container.tokens()
         tokens_t = tuple(t for t in alltokens_s if t != targettkn) # all _other_ tokens...
         tokens_ix = {t: i for i, t in enumerate(tokens_t)}         # ...with index lookup
@@ -177,6 +270,8 @@ class MargPOptimizer(CPCArbOptimizer):
                 raise self.ParameterError(f"can't run arbitrage on single curve {curves_t}")
             if not targettkn in alltokens_s:
                 raise self.ParameterError(f"targettkn {targettkn} not in {alltokens_s}")
+            if not jacmode in (self.JAC_FD, self.JAC_ANALYTIC):
+                raise self.ParameterError(f"unknown jacobian {jacmode} [{self.JAC_FD}, {self.JAC_ANALYTIC}]")
                 
             # calculating the start price for the iteration process
             if not P("pstart") is None:
@@ -301,6 +396,10 @@ class MargPOptimizer(CPCArbOptimizer):
             if result == self.MO_DTKNFROMPF:
                 return dtknfromp_f
 
+            # pack the curves into arrays for the analytic Jacobian
+            if jacmode == self.JAC_ANALYTIC or result == self.MO_DEBUG:
+                carr = self.curve_arrays(curves_t, tokens_ix)
+
             # return debug info if requested
             if result == self.MO_DEBUG:
                 return dict(
@@ -314,6 +413,7 @@ class MargPOptimizer(CPCArbOptimizer):
                     targettkn=targettkn,
                     pairs_t=pairs_t,
                     dtknfromp_f=dtknfromp_f,
+                    dtknjacfromp_f=lambda p: self.dtknjacfromp_f(p, carr),
                     optimizer=self,
                 )
 
@@ -332,6 +432,7 @@ class MargPOptimizer(CPCArbOptimizer):
                 #     print("[margp_optimizer] dtkn_d", dtkn_d)
 
             ## MAIN OPTIMIZATION LOOP
+            residual0, nhalvings = None, 0
             for i in range(maxiter):
 
                 if P("progress"):
@@ -339,17 +440,33 @@ class MargPOptimizer(CPCArbOptimizer):
                         f"Iteration [{i:2.0f}]: time elapsed: {time.time()-start_time:.2f}s"
                     )
 
-                # calculate the change in token amounts (also as dict if requested)
+                # calculate the change in token amounts (also as dict if requested)...
                 if P("tknd"):
                     dtkn_d, dtkn = dtknfromp_f(plog10, islog10=True, asdct=True)
-                else:
+                elif jacmode != self.JAC_ANALYTIC:
                     dtkn = dtknfromp_f(plog10, islog10=True, asdct=False)
 
-                # calculate the Jacobian
+                # ...and the Jacobian
                 # if P("debug"):
                 #     print("\n[margp_optimizer] ============= JACOBIAN =============>>>")
-                J = self.J(dtknfromp_f, plog10)  
-                    # ATTENTION: dtknfromp_f takes log10(p) as input
+                if jacmode == self.JAC_ANALYTIC:
+                    dtkn_, J = self.dtknjacfromp_f(plog10, carr)
+                    if not P("tknd"):
+                        dtkn = dtkn_
+                else:
+                    J = self.J(dtknfromp_f, plog10)  
+                        # ATTENTION: dtknfromp_f takes log10(p) as input
+
+                # damped Newton: if the last step increased the residual, halve it (see NOTE 5)
+                residual = np.linalg.norm(dtkn)
+                if residual0 is not None and residual > residual0 and criterium >= eps and nhalvings < maxhalvings:
+                    dplog10 = dplog10 / 2
+                    plog10 = np.array(p0log10) + dplog10
+                    nhalvings += 1
+                    if P("verbose"):
+                        print(f"[margp_optimizer] residual increased ({residual:.2e} > {residual0:.2e}), halving the step")
+                    continue
+                residual0, nhalvings = residual, 0
                 if P("debug"):
                     # print("==== J ====>")
                     print("\n============= JACOBIAN =============>>>")
@@ -396,7 +513,7 @@ class MargPOptimizer(CPCArbOptimizer):
 
                 # ...and finally check the criterium (percentage changes this step) for convergence
                 if criterium < eps:
-                    if i != 0:
+                    if i != 0 or P("warmstart"):
                         # we don't break in the first iteration because we need this first iteration
                         # to establish a common baseline price, therefore d logp ~ 0 is not good
                         # in the first step                      
@@ -447,3 +564,28 @@ class MargPOptimizer(CPCArbOptimizer):
             )
     margp_optimizer = optimize # margp_optimizer is deprecated
 
+    def _optimize_pcache(self, sfc, result, params):
+        """
+        runs `optimize`, warm started from the PriceCache params["pcache"] (see NOTE 6 of `optimize`)
+        """
+        pcache = params["pcache"]
+        params = {k: v for k, v in params.items() if k != "pcache"}
+        targettkn = sfc.optimizationvar
+        tokens = self.curve_container.tokens()
+        pwarm = pcache.get(targettkn, tokens)
+        if pwarm is not None:
+            start_time = time.time()
+            r = self.optimize(sfc, result, params={**params, "pstart": pwarm, "warmstart": True, "raiseonerror": False})
+            pcache.record(r, warm=True, seconds=time.time() - start_time)
+            if not r.is_error:
+                pcache.put(targettkn, tokens, r)
+                return r
+            if params.get("verbose") or params.get("debug"):
+                print(f"[margp_optimizer] warm start failed ({r.errormsg}), restarting cold")
+        start_time = time.time()
+        r = self.optimize(sfc, result, params=params)
+        pcache.record(r, warm=False, seconds=time.time() - start_time)
+        if not r.is_error:
+            pcache.put(targettkn, tokens, r)
+        return r
+
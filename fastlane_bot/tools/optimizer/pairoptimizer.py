@@ -6,6 +6,11 @@ The pair optimizer uses a marginal price method in one dimension to find the opt
 solution. It uses a bisection method to find the root of the transfer equation, therefore
 it only work for a single pair. To use it on multiple pairs, use MargPOptimizer instead.
 
+Many independent pair optimizations (eg all curve combos of the pairwise arbitrage modes)
+can be solved at once with `PairOptimizer.optimize_batch`, which runs the bisections of all
+of them in lockstep on numpy arrays, and which gives exactly the same results as solving them
+one by one with `optimize`.
+
 ---
 This module is still subject to active research, and comments and suggestions are welcome. 
 The corresponding author is Stefan Loesch <stefan@bancor.network>
@@ -13,8 +18,8 @@ The corresponding author is Stefan Loesch <stefan@bancor.network>
 (c) Copyright Bprotocol foundation 2023. 
 Licensed under MIT
 """
-__VERSION__ = "6.0.1"
-__DATE__ = "21/Sep/2023"
+__VERSION__ = "6.1"
+__DATE__ = "30/Apr/2024"
 
 from dataclasses import dataclass, field, fields, asdict, astuple, InitVar
 #import pandas as pd
@@ -315,4 +320,193 @@ class PairOptimizer(CPCArbOptimizer):
             tokens_t=(c0.tknx if targettkn==c0.tkny else c0.tkny,),
             n_iterations=None, # not available
         )
-    
\ No newline at end of file
+    
+    GOALSEEKMAXITER = 200 # as in OptimizerBase.goalseek
+    ARITHMETIC_ERRORS = (ArithmeticError, ValueError)
+
+    @classmethod
+    def optimize_batch(cls, curve_sets, targettkns, *, params=None):
+        """
+        solves many pair optimizations at once (vectorized equivalent of `optimize(targettkn)`)
+
+        :curve_sets:        iterable of curve sets (CPCContainer objects or lists of curves), each of
+                            which must contain curves of exactly one pair
+        :targettkns:        iterable of target tokens, one per curve set
+        :params:            dict of parameters, shared by all curve sets
+        :eps:               accuracy parameter passed to bisection method (default: PAIROPTIMIZEREPS)
+        :returns:           list of results, one per curve set, equal to the result of
+                            ``PairOptimizer(curves).optimize(targettkn, params=params)``
+
+        NOTE 1: the bisections of all curve sets run in lockstep on arrays indexed by (curve set,
+        curve, liquidity range); every float operation of the scalar path is performed in the same
+        order and on the same values, so the results are bit for bit identical to those of `optimize`;
+        missing curves and ranges are padded with -0.0 which is the exact neutral element of addition
+
+        NOTE 2: numpy does not guarantee that ``np.power`` on arrays rounds like the scalar ``pow``,
+        so the (rare) curves that are not constant product are evaluated one by one; curve sets where
+        the ranges of a curve have ranges themselves are solved with `optimize`
+
+        NOTE 3: curve sets where the scalar path raises (a curve can not be evaluated at a price,
+        or the bisection did not converge within GOALSEEKMAXITER iterations) are solved again with
+        `optimize`, so that the exception is raised exactly as in a loop over `optimize`
+        """
+        start_time = time.time()
+        if params is None:
+            params = dict()
+        eps = params.get("eps", cls.PAIROPTIMIZEREPS)
+        curve_sets, targettkns = list(curve_sets), list(targettkns)
+        assert len(curve_sets) == len(targettkns), f"need one targettkn per curve set [{len(curve_sets)} != {len(targettkns)}]"
+
+        results = [None] * len(curve_sets)
+        batch = []
+        for i, (curves, targettkn) in enumerate(zip(curve_sets, targettkns)):
+            O = cls(curves)
+            curves_t = CPCInverter.wrap(O.curve_container)
+            assert len(curves_t) > 0, "no curves found"
+            c0 = curves_t[0]
+            pairs = set(c.pair for c in curves_t)
+            assert (len(pairs) == 1), f"pair_optimizer only works on curves of exactly one pair [{pairs}]"
+            assert targettkn in {c0.tknx, c0.tkny,}, f"targettkn {targettkn} not in {c0.tknx}, {c0.tkny}"
+            segments = [CPCInverter.unwrap((c,))[0] for c in curves_t]
+            segments = [(c,) + tuple(c.ranges) for c in segments]
+            if any(r.ranges for segs in segments for r in segs[1:]):
+                results[i] = O.optimize(targettkn, params=params)
+                continue
+            batch.append((i, O, curves_t, segments, targettkn))
+        if not batch:
+            return results
+
+        # pack the curves into (curve set, curve, range) arrays; padding entries are invalid
+        shape = (len(batch), max(len(b[3]) for b in batch), max(len(s) for b in batch for s in b[3]))
+        valid = np.zeros(shape, dtype=bool)
+        inverted = np.zeros(shape[:2] + (1,), dtype=bool)
+        kbar, x0, y0 = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+        x_min, y_min = np.full(shape, -np.inf), np.full(shape, -np.inf)
+        x_max, y_max = np.full(shape, np.inf), np.full(shape, np.inf)
+        non_cp = []
+        p_lo, p_hi = np.zeros(shape[0]), np.zeros(shape[0])
+        is_tknx = np.zeros(shape[0], dtype=bool)
+        for bix, (_, _, curves_t, segments, targettkn) in enumerate(batch):
+            for cix, (c, segs) in enumerate(zip(curves_t, segments)):
+                inverted[bix, cix, 0] = isinstance(c, CPCInverter)
+                for six, seg in enumerate(segs):
+                    ix = (bix, cix, six)
+                    valid[ix] = True
+                    kbar[ix], x0[ix], y0[ix] = seg.kbar, seg.x, seg.y
+                    if not seg.is_constant_product():
+                        non_cp.append((ix, seg))
+                    for arr, val in ((x_min, seg.x_min), (x_max, seg.x_max), (y_min, seg.y_min), (y_max, seg.y_max)):
+                        if not val is None:
+                            arr[ix] = val
+            p_lo[bix] = np.min([c.p for c in curves_t]) * 0.99
+            p_hi[bix] = np.max([c.p for c in curves_t]) * 1.01
+            is_tknx[bix] = targettkn == curves_t[0].tknx
+
+        def dxdyfromp_sum_f(p):
+            """the summed dx, dy values of all curve sets at the prices p, and where the scalar path raises"""
+            with np.errstate(all="ignore"):
+                p_c = np.where(inverted, 1 / p[:, None, None], p[:, None, None])
+                sqrt_p = np.sqrt(p_c)
+                x = kbar / sqrt_p
+                y = kbar * sqrt_p
+            raises = valid & ((sqrt_p == 0) | (p_c < 0))
+            for ix, seg in non_cp:
+                try:
+                    x[ix], y[ix], _ = seg.xyfromp_f(p_c[ix[:2] + (0,)], ignorebounds=True)
+                    raises[ix] = False
+                except cls.ARITHMETIC_ERRORS:
+                    raises[ix] = True
+            x = np.where(x < x_min, x_min, x)
+            x = np.where(x > x_max, x_max, x)
+            y = np.where(y < y_min, y_min, y)
+            y = np.where(y > y_max, y_max, y)
+            with np.errstate(all="ignore"):
+                dx, dy = x - x0, y - y0
+            dx, dy = np.where(inverted, dy, dx), np.where(inverted, dx, dy)
+            dx, dy = np.where(valid, dx, -0.0), np.where(valid, dy, -0.0)
+            # summation in the order of the scalar path (ranges within curves, then curves)
+            dx_c, dy_c = dx[:, :, 0], dy[:, :, 0]
+            for six in range(1, shape[2]):
+                dx_c, dy_c = dx_c + dx[:, :, six], dy_c + dy[:, :, six]
+            dx_s, dy_s = np.zeros(shape[0]), np.zeros(shape[0])
+            for cix in range(shape[1]):
+                dx_s, dy_s = dx_s + dx_c[:, cix], dy_s + dy_c[:, cix]
+            return dx_s, dy_s, raises.any(axis=(1, 2))
+
+        # goalseek == 0 on the token that is NOT the target token, for all curve sets at once
+        def func(p):
+            dx, dy, raises = dxdyfromp_sum_f(p)
+            return np.where(is_tknx, dy, dx), raises
+
+        a, b = p_lo, p_hi
+        fa, raises_a = func(a)
+        fb, raises_b = func(b)
+        rerun = raises_a | raises_b
+        with np.errstate(invalid="ignore"):
+            failed = ~rerun & (fa * fb > 0)
+        active = ~rerun & ~failed
+        found = np.zeros(shape[0], dtype=bool)
+        p_found = np.zeros(shape[0])
+        counter = np.zeros(shape[0], dtype=int)
+        while True:
+            with np.errstate(divide="ignore"):
+                active &= (b / a - 1) > eps
+            if not active.any():
+                break
+            c = (a + b) / 2
+            fc, raises = func(c)
+            rerun |= active & raises
+            active &= ~raises
+            hit = active & (fc == 0)
+            found |= hit
+            p_found = np.where(hit, c, p_found)
+            active &= ~hit
+            with np.errstate(invalid="ignore"):
+                lower = fa * fc < 0
+            b = np.where(active & lower, c, b)
+            a = np.where(active & ~lower, c, a)
+            fa = np.where(active & ~lower, fc, fa)
+            counter += active
+            rerun |= active & (counter > cls.GOALSEEKMAXITER)
+            active &= counter <= cls.GOALSEEKMAXITER
+        p_optimal = np.where(found, p_found, (a + b) / 2)
+        dx_opt, dy_opt, raises = dxdyfromp_sum_f(p_optimal)
+        rerun |= ~failed & raises
+
+        for bix, (i, O, curves_t, _, targettkn) in enumerate(batch):
+            c0 = curves_t[0]
+            tokens_t = (c0.tknx if targettkn==c0.tkny else c0.tkny,)
+            if rerun[bix]:
+                results[i] = O.optimize(targettkn, params=params)
+                continue
+            if failed[bix]:
+                results[i] = cls.MargpOptimizerResult(
+                    method="margp-pair",
+                    optimizer=O,
+                    result=None,
+                    time=time.time() - start_time,
+                    targettkn=targettkn,
+                    curves=curves_t,
+                    p_optimal_t=None,
+                    dtokens=None,
+                    dtokens_t=None,
+                    tokens_t=tokens_t,
+                    n_iterations=None,
+                    errormsg="bisection did not converge",
+                )
+                continue
+            dx, dy = dx_opt[bix], dy_opt[bix]
+            results[i] = cls.MargpOptimizerResult(
+                method="margp-pair",
+                optimizer=O,
+                result=dx if is_tknx[bix] else dy,
+                time=time.time() - start_time,
+                targettkn=targettkn,
+                curves=curves_t,
+                p_optimal_t=(1/float(p_optimal[bix]) if is_tknx[bix] else float(p_optimal[bix]),),
+                dtokens={c0.tknx: dx, c0.tkny: dy},
+                dtokens_t=(dy if is_tknx[bix] else dx,),
+                tokens_t=tokens_t,
+                n_iterations=None, # not available
+            )
+        return results
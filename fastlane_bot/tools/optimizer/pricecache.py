@@ -0,0 +1,116 @@
+"""
+optimization library -- price cache for warm starting the marginal price optimizer
+
+The MargPOptimizer starts its Newton iteration from price estimates that are computed
+afresh from the curves. Between consecutive blocks however the prices of a given set of
+tokens barely move, so the optimal prices of the previous optimization of the same target
+token and token set are a much better starting point. The PriceCache stores those prices
+(see the `pcache` parameter of `MargPOptimizer.optimize`), and it records the number of
+iterations and the time of the warm and cold started optimizations, so that the saving
+can be measured.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+__VERSION__ = "1.0"
+__DATE__ = "30/Apr/2024"
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+
+@dataclass
+class PriceCache:
+    """
+    cache of the optimal prices of the MargPOptimizer, by target token and token set
+
+    :maxsize:       maximum number of cached price vectors; the least recently used ones
+                    are dropped (0 = unlimited)
+    :prices:        the cached price vectors, as {(targettkn, tokens): {tkn: p, ...}}
+    :n_warm:        number of warm started optimizations (including the failed ones)
+    :n_cold:        number of cold started optimizations (including the fallbacks)
+    :n_fallback:    number of failed warm starts, ie that were repeated cold
+    :iter_warm:     total number of iterations of the successful warm starts
+    :iter_cold:     ditto cold starts
+    :time_warm:     total time of the warm starts, including the failed ones [s]
+    :time_cold:     ditto cold starts
+    """
+    __VERSION__ = __VERSION__
+    __DATE__ = __DATE__
+
+    maxsize: int = 10000
+    prices: OrderedDict = field(default_factory=OrderedDict, repr=False)
+    n_warm: int = 0
+    n_cold: int = 0
+    n_fallback: int = 0
+    iter_warm: int = 0
+    iter_cold: int = 0
+    time_warm: float = 0
+    time_cold: float = 0
+
+    @staticmethod
+    def key(targettkn, tokens):
+        """the cache key of the target token and the token set (which includes the target token)"""
+        return targettkn, frozenset(tokens)
+
+    def get(self, targettkn, tokens):
+        """the cached prices {tkn: p} for target token and token set (None if not cached)"""
+        key = self.key(targettkn, tokens)
+        prices = self.prices.get(key)
+        if prices is not None:
+            self.prices.move_to_end(key)
+        return prices
+
+    def put(self, targettkn, tokens, result):
+        """caches the optimal prices of the (successful) optimization result"""
+        key = self.key(targettkn, tokens)
+        self.prices[key] = dict(zip(result.tokens_t, result.p_optimal_t))
+        self.prices.move_to_end(key)
+        if self.maxsize and len(self.prices) > self.maxsize:
+            self.prices.popitem(last=False)
+
+    def record(self, result, *, warm, seconds):
+        """records the iterations and time of an optimization result (warm or cold started)"""
+        if warm:
+            self.n_warm += 1
+            self.time_warm += seconds
+            if result.is_error:
+                self.n_fallback += 1
+            else:
+                self.iter_warm += result.n_iterations + 1
+        else:
+            self.n_cold += 1
+            self.time_cold += seconds
+            if not result.is_error:
+                self.iter_cold += result.n_iterations + 1
+
+    @property
+    def stats(self):
+        """the statistics of the optimizations as dict, including the averages per optimization"""
+        n_warm_ok = self.n_warm - self.n_fallback
+        avg = lambda x, n: x / n if n > 0 else None
+        return dict(
+            n_cached=len(self.prices),
+            n_warm=self.n_warm,
+            n_cold=self.n_cold,
+            n_fallback=self.n_fallback,
+            iter_warm=self.iter_warm,
+            iter_cold=self.iter_cold,
+            time_warm=self.time_warm,
+            time_cold=self.time_cold,
+            avg_iter_warm=avg(self.iter_warm, n_warm_ok),
+            avg_iter_cold=avg(self.iter_cold, self.n_cold),
+            avg_time_warm=avg(self.time_warm, self.n_warm),
+            avg_time_cold=avg(self.time_cold, self.n_cold),
+        )
+
+    def reset_stats(self):
+        """resets the statistics (but not the cached prices)"""
+        self.n_warm = self.n_cold = self.n_fallback = 0
+        self.iter_warm = self.iter_cold = 0
+        self.time_warm = self.time_cold = 0
+
+    def __len__(self):
+        return len(self.prices)
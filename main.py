@@ -6,10 +6,18 @@ This is the main file for configuring the bot and running the fastlane bot.
 Licensed under MIT
 """
 from fastlane_bot.events.event_gatherer import EventGatherer
+from fastlane_bot.events.event_journal import EventJournal
+from fastlane_bot.events.event_stream import EventStream, websocket_uri
+from fastlane_bot.events.pipeline import BlockSnapshot, SearchPipeline, StageMetrics
+from fastlane_bot.events.tick_cache import TickCache
 from fastlane_bot.exceptions import ReadOnlyException, FlashloanUnavailableException
 from fastlane_bot.events.version_utils import check_version_requirements
+from fastlane_bot.helpers import CurveCache, TxHelpers
+from fastlane_bot.modes.executor import ArbComboExecutor
+from fastlane_bot.modes.no_arb_cache import NoArbCache
 from fastlane_bot.pool_finder import PoolFinder
 from fastlane_bot.tools.cpc import T
+from fastlane_bot.tools.optimizer import PriceCache
 
 check_version_requirements(required_version="6.11.0", package_name="web3")
 
@@ -25,11 +33,13 @@ from fastlane_bot import __version__ as bot_version
 from fastlane_bot.events.async_backdate_utils import (
     async_handle_initial_iteration,
 )
+from fastlane_bot.events.checkpoint import Checkpoint
 from fastlane_bot.events.async_event_update_utils import (
     async_update_pools_from_contracts,
 )
 from fastlane_bot.events.managers.manager import Manager
 from fastlane_bot.events.multicall_utils import multicall_every_iteration
+from fastlane_bot.events.replay import ReplayCorpus, ReplayRecorder
 from fastlane_bot.events.utils import (
     add_initial_pool_data,
     get_static_data,
@@ -41,15 +51,18 @@ from fastlane_bot.events.utils import (
     update_pools_from_events,
     process_new_events,
     write_pool_data_to_disk,
+    pool_data_snapshot,
     init_bot,
     get_cached_events,
     handle_subsequent_iterations,
     handle_duplicates,
     get_latest_events,
+    get_streamed_events,
     get_start_block,
     set_network_to_mainnet_if_replay,
     set_network_to_tenderly_if_replay,
     get_current_block,
+    get_current_block_header,
     handle_tenderly_event_exchanges,
     handle_static_pools_update,
     read_csv_file,
@@ -96,6 +109,20 @@ def process_arguments(args):
         "read_only": is_true,
         "is_args_test": is_true,
         "pool_finder_period": int,
+        "incremental_arb_search": is_true,
+        "full_sweep_interval": int,
+        "arb_workers": int,
+        "warm_start": is_true,
+        "stream_events": is_true,
+        "stream_timeout": float,
+        "reorg_journal": is_true,
+        "filter_log_addresses": is_true,
+        "pipeline": is_true,
+        "async_tx": is_true,
+        "max_arbs_per_block": int,
+        "integer_route_math": is_true,
+        "univ3_tick_data": is_true,
+        "margp_price_cache": is_true,
     }
 
     # Apply the transformations
@@ -122,6 +149,10 @@ def main(args: argparse.Namespace) -> None:
         args.reorg_delay = 0
         args.use_cached_events = False
 
+    if args.reorg_journal:
+        # reorgs are rolled back rather than waited out
+        args.reorg_delay = 0
+
     # Set config
     loglevel = get_loglevel(args.loglevel)
 
@@ -228,6 +259,22 @@ def main(args: argparse.Namespace) -> None:
             self_fund: {args.self_fund}
             read_only: {args.read_only}
             pool_finder_period: {args.pool_finder_period}
+            incremental_arb_search: {args.incremental_arb_search}
+            full_sweep_interval: {args.full_sweep_interval}
+            arb_workers: {args.arb_workers}
+            warm_start: {args.warm_start}
+            checkpoint_path: {args.checkpoint_path}
+            stream_events: {args.stream_events}
+            stream_timeout: {args.stream_timeout}
+            reorg_journal: {args.reorg_journal}
+            filter_log_addresses: {args.filter_log_addresses}
+            pipeline: {args.pipeline}
+            async_tx: {args.async_tx}
+            max_arbs_per_block: {args.max_arbs_per_block}
+            integer_route_math: {args.integer_route_math}
+            univ3_tick_data: {args.univ3_tick_data}
+            margp_price_cache: {args.margp_price_cache}
+            record_replay_path: {args.record_replay_path}
 
             +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
             +++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
@@ -293,23 +340,34 @@ def main(args: argparse.Namespace) -> None:
         read_only=args.read_only,
     )
 
+    # Restore the pool data from the last checkpoint, so that only the events since then are replayed
+    checkpoint = None
+    if args.warm_start and not args.replay_from_block and not args.tenderly_fork_id and not args.read_only:
+        checkpoint = Checkpoint(os.path.join(args.checkpoint_path, args.blockchain))
+        checkpoint.restore(mgr, current_block=mgr.web3.eth.block_number)
+
     # Add initial pool data to the manager
     add_initial_pool_data(cfg, mgr, args.n_jobs)
 
     # Run the main loop
-    run(mgr, args)
+    run(mgr, args, checkpoint=checkpoint)
 
 
-def run(mgr, args, tenderly_uri=None) -> None:
+def run(mgr, args, tenderly_uri=None, checkpoint: Checkpoint = None) -> None:
     loop_idx = last_block = last_block_queried = total_iteration_time = 0
+    if checkpoint is not None and checkpoint.block is not None:
+        # warm start: skip the initial iteration (backdating, contract updates) and replay the events since then
+        last_block = checkpoint.block
     start_timeout = time.time()
     mainnet_uri = mgr.cfg.w3.provider.endpoint_uri
     handle_static_pools_update(mgr)
 
+    # With filter_log_addresses, the topics are queried together, and only for the static pools where possible
     event_gatherer = EventGatherer(
         config=mgr.cfg,
         w3=mgr.w3_async,
         exchanges=mgr.exchanges,
+        static_pools=mgr.static_pools if args.filter_log_addresses else None,
     )
 
     pool_finder = PoolFinder(
@@ -321,60 +379,198 @@ def run(mgr, args, tenderly_uri=None) -> None:
         multicall_address=mgr.cfg.network.MULTICALL_CONTRACT_ADDRESS
     )
 
+    # Curves are cached across iterations and only rebuilt for pools that changed
+    curve_cache = CurveCache()
+
+    # With incremental arb search, only the curve combos affected by changed curves are re-optimized
+    no_arb_cache = NoArbCache(full_sweep_interval=args.full_sweep_interval) if args.incremental_arb_search else None
+
+    # With arb_workers > 1, the curve combos are solved in a process pool that is kept alive across iterations
+    arb_executor = ArbComboExecutor(workers=args.arb_workers) if args.arb_workers > 1 else None
+
+    # With univ3_tick_data, the curves of the Uniswap v3 pools span the liquidity ranges around the current tick
+    tick_cache = TickCache() if args.univ3_tick_data else None
+
+    # With margp_price_cache, the marginal price optimizer is warm started from the optimal prices of the previous blocks
+    price_cache = PriceCache() if args.margp_price_cache else None
+
+    # With record_replay_path, the events and the pool updates of every block are recorded for the offline replay
+    replay_recorder = None
+    if args.record_replay_path and not args.replay_from_block and not args.tenderly_fork_id and not args.use_cached_events:
+        replay_recorder = ReplayRecorder(
+            ReplayCorpus(os.path.join(args.record_replay_path, args.blockchain)),
+            flashloan_tokens=args.flashloan_tokens,
+        )
+
+    # The pool data is written to disk incrementally (only the pools that changed since the previous iteration)
+    snapshot = pool_data_snapshot(args.cache_latest_only, args.logging_path)
+
+    # With reorg_journal, the pool updates applied from events are journaled, and rolled back when their blocks are reorged
+    if args.reorg_journal and not args.replay_from_block and not args.tenderly_fork_id and not args.use_cached_events:
+        mgr.event_journal = EventJournal()
+
+    # With stream_events, the events are pushed over a websocket as soon as their block is mined
+    event_stream = None
+    if args.stream_events and not args.replay_from_block and not args.tenderly_fork_id and not args.use_cached_events:
+        event_stream = EventStream(
+            config=mgr.cfg,
+            ws_uri=args.ws_url or websocket_uri(mgr.cfg.RPC_URL),
+            subscriptions=event_gatherer.subscriptions,
+            reorg_delay=args.reorg_delay,
+        )
+        event_stream.start()
+
+    # With async_tx, the transactions are tracked in the background, and superseded by the newer opportunities
+    tx_helpers = None
+    if args.async_tx and not args.replay_from_block and not args.tenderly_fork_id:
+        tx_helpers = TxHelpers(cfg=mgr.cfg, async_tx=True)
+
+    # The latencies of the stages of the main loop (see fastlane_bot/events/pipeline.py)
+    stage_metrics = StageMetrics()
+
+    def search_arbitrage(snapshot: BlockSnapshot) -> None:
+        # Re-initialize the bot
+        bot = init_bot(
+            mgr, curve_cache, no_arb_cache, args.arb_workers, pool_data=snapshot.pool_data, tx_helpers=tx_helpers,
+            max_arbs_per_block=args.max_arbs_per_block, integer_route_math=args.integer_route_math,
+            price_cache=price_cache, arb_executor=arb_executor,
+        )
+
+        if args.use_specific_exchange_for_target_tokens is not None:
+            target_tokens = bot.get_tokens_in_exchange(
+                exchange_name=args.use_specific_exchange_for_target_tokens
+            )
+            mgr.cfg.logger.info(
+                f"[main] Using only tokens in: {args.use_specific_exchange_for_target_tokens}, found {len(target_tokens)} tokens"
+            )
+
+        # Handle subsequent iterations
+        handle_subsequent_iterations(
+            arb_mode=args.arb_mode,
+            bot=bot,
+            flashloan_tokens=args.flashloan_tokens,
+            randomizer=args.randomizer,
+            run_data_validator=args.run_data_validator,
+            target_tokens=args.target_tokens,
+            loop_idx=snapshot.loop_idx,
+            logging_path=args.logging_path,
+            replay_from_block=snapshot.replay_from_block,
+            tenderly_uri=snapshot.tenderly_uri,
+            mgr=mgr,
+            forked_from_block=snapshot.forked_from_block,
+        )
+
+    # With pipeline, each block is searched for arbitrage in a worker thread while the next block is synced
+    search_pipeline = SearchPipeline(search=search_arbitrage, metrics=stage_metrics, logger=mgr.cfg.logger)
+    use_pipeline = args.pipeline and not args.replay_from_block and not args.tenderly_fork_id
+    if use_pipeline:
+        search_pipeline.start()
+
     while True:
         try:
+            stage_timer = stage_metrics.timer()
+
             # ensure 'last_updated_block' is in pool_data for all pools
             for pool in mgr.pool_data:
                 if "last_updated_block" not in pool:
                     pool["last_updated_block"] = last_block_queried
 
-            # Get current block number, then adjust to the block number reorg_delay blocks ago to avoid reorgs
-            start_block, replay_from_block = get_start_block(
-                args.alchemy_max_block_fetch,
-                last_block,
-                mgr,
-                args.reorg_delay,
-                args.replay_from_block,
-            )
+            # Get the events of the new blocks from the stream (after the initial iteration, which syncs the pools)
+            streamed_block = header = None
+            if event_stream is not None and last_block > 0:
+                streamed_block, latest_events = get_streamed_events(
+                    mgr,
+                    event_stream,
+                    event_gatherer,
+                    last_block,
+                    args.stream_timeout,
+                    args.cache_latest_only,
+                    args.logging_path,
+                )
 
-            # Get all events from the last block to the current block
-            current_block = get_current_block(
-                last_block,
-                mgr,
-                args.reorg_delay,
-                replay_from_block,
-                args.tenderly_fork_id,
-            )
+            if streamed_block is not None:
+                start_block, current_block, replay_from_block = last_block + 1, streamed_block, None
+                header = event_stream.head(current_block)
+            else:
+                # Get current block number, then adjust to the block number reorg_delay blocks ago to avoid reorgs
+                start_block, replay_from_block = get_start_block(
+                    args.alchemy_max_block_fetch,
+                    last_block,
+                    mgr,
+                    args.reorg_delay,
+                    args.replay_from_block,
+                )
+                if mgr.event_journal is not None and last_block > 0:
+                    # reorgs are detected by the journal: there is no need to fetch the last blocks again
+                    start_block = last_block + 1
+
+                # Get all events from the last block to the current block
+                if mgr.event_journal is not None:
+                    # the header of the current block checks the journal for reorgs
+                    header = get_current_block_header(mgr, args.reorg_delay)
+                    current_block = header["number"]
+                else:
+                    current_block = get_current_block(
+                        last_block,
+                        mgr,
+                        args.reorg_delay,
+                        replay_from_block,
+                        args.tenderly_fork_id,
+                    )
+
+                # Log the current start, end and last block
+                mgr.cfg.logger.info(
+                    f"Fetching events from {start_block} to {current_block}... {last_block}"
+                )
 
-            # Log the current start, end and last block
-            mgr.cfg.logger.info(
-                f"Fetching events from {start_block} to {current_block}... {last_block}"
-            )
+                # Set the network connection to Mainnet if replaying from a block
+                set_network_to_mainnet_if_replay(
+                    last_block,
+                    loop_idx,
+                    mainnet_uri,
+                    mgr,
+                    replay_from_block,
+                    args.use_cached_events,
+                )
 
-            # Set the network connection to Mainnet if replaying from a block
-            set_network_to_mainnet_if_replay(
-                last_block,
-                loop_idx,
-                mainnet_uri,
-                mgr,
-                replay_from_block,
-                args.use_cached_events,
-            )
+                # Get the events
+                latest_events = (
+                    get_cached_events(mgr, args.logging_path)
+                    if args.use_cached_events
+                    else get_latest_events(
+                        current_block,
+                        mgr,
+                        args.n_jobs,
+                        start_block,
+                        args.cache_latest_only,
+                        args.logging_path,
+                        event_gatherer
+                    )
+                )
 
-            # Get the events
-            latest_events = (
-                get_cached_events(mgr, args.logging_path)
-                if args.use_cached_events
-                else get_latest_events(
-                    current_block,
-                    mgr,
-                    args.n_jobs,
-                    start_block,
-                    args.cache_latest_only,
-                    args.logging_path,
-                    event_gatherer
+            # Roll back the pool updates of reorged blocks and fetch their events again, then journal the new blocks
+            if mgr.event_journal is not None:
+                if header is None:
+                    # the head was not streamed, or the stream lags reorg_delay blocks behind it
+                    header = mgr.web3.eth.get_block(current_block)
+                fork_block = mgr.event_journal.find_fork(
+                    current_block, header["parentHash"], lambda n: mgr.web3.eth.get_block(n)["hash"]
                 )
-            )
+                if fork_block is not None:
+                    last_block = mgr.event_journal.rollback(mgr, fork_block)
+                    start_block = last_block + 1
+                    latest_events = get_latest_events(
+                        current_block,
+                        mgr,
+                        args.n_jobs,
+                        start_block,
+                        args.cache_latest_only,
+                        args.logging_path,
+                        event_gatherer
+                    )
+                mgr.event_journal.begin(start_block, current_block, header["hash"], latest_events)
+
+            stage_timer.lap("fetch")
             iteration_start_time = time.time()
 
             # Update the pools from the latest events
@@ -414,6 +610,9 @@ def run(mgr, args, tenderly_uri=None) -> None:
 
             # Run multicall every iteration
             multicall_every_iteration(current_block=current_block, mgr=mgr)
+            if tick_cache is not None:
+                tick_cache.refresh(mgr=mgr, current_block=current_block)
+            stage_timer.lap("apply")
 
             # Update the last block number
             last_block = current_block
@@ -425,43 +624,40 @@ def run(mgr, args, tenderly_uri=None) -> None:
                     logging_path=args.logging_path,
                     mgr=mgr,
                     current_block=current_block,
+                    snapshot=snapshot,
                 )
 
+            if checkpoint is not None:
+                checkpoint.save(mgr, current_block)
+
             # Handle/remove duplicates in the pool data
             handle_duplicates(mgr)
 
-            # Re-initialize the bot
-            bot = init_bot(mgr)
-
-            if args.use_specific_exchange_for_target_tokens is not None:
-                target_tokens = bot.get_tokens_in_exchange(
-                    exchange_name=args.use_specific_exchange_for_target_tokens
-                )
-                mgr.cfg.logger.info(
-                    f"[main] Using only tokens in: {args.use_specific_exchange_for_target_tokens}, found {len(target_tokens)} tokens"
-                )
+            if replay_recorder is not None:
+                replay_recorder.record(mgr, current_block, latest_events)
 
             if not mgr.read_only:
                 handle_tokens_csv(mgr, mgr.prefix_path)
+            stage_timer.lap("write")
 
-            # Handle subsequent iterations
-            handle_subsequent_iterations(
-                arb_mode=args.arb_mode,
-                bot=bot,
-                flashloan_tokens=args.flashloan_tokens,
-                randomizer=args.randomizer,
-                run_data_validator=args.run_data_validator,
-                target_tokens=args.target_tokens,
+            # Snapshot the pools of the block (copied when they are searched while the next block is synced)
+            block_snapshot = BlockSnapshot.take(
+                mgr,
+                block=current_block,
                 loop_idx=loop_idx,
-                logging_path=args.logging_path,
+                started=stage_timer.start,
+                copy=use_pipeline,
                 replay_from_block=replay_from_block,
                 tenderly_uri=tenderly_uri,
-                mgr=mgr,
                 forked_from_block=forked_from_block,
             )
+            stage_timer.lap("snapshot")
 
-            # Sleep for the polling interval
-            if not replay_from_block and args.polling_interval > 0:
+            # Search the block for arbitrage, in the worker thread with pipeline
+            search_pipeline.submit(block_snapshot)
+
+            # Sleep for the polling interval (unless the next block is awaited from the stream)
+            if not replay_from_block and args.polling_interval > 0 and not (event_stream and event_stream.connected):
                 mgr.cfg.logger.info(
                     f"[main] Sleeping for polling_interval={args.polling_interval} seconds..."
                 )
@@ -546,6 +742,7 @@ def run(mgr, args, tenderly_uri=None) -> None:
             mgr.cfg.logger.info(
                 f"\n\n********************************************\n"
                 f"Average Total iteration time for loop {loop_idx}: {total_iteration_time / loop_idx}\n"
+                f"Stage latencies:\n{stage_metrics.summary()}\n"
                 f"bot_version: {bot_version}\n"
                 f"\n********************************************\n\n"
             )
@@ -562,6 +759,11 @@ def run(mgr, args, tenderly_uri=None) -> None:
                 mgr.cfg.logger.info("[main] Timeout hit... stopping bot")
                 break
 
+    # Let the worker finish searching the last block
+    search_pipeline.stop()
+    if arb_executor is not None:
+        arb_executor.shutdown()
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
@@ -741,6 +943,107 @@ if __name__ == "__main__":
         default=100,
         help="Searches for pools that can service Carbon strategies that do not have viable routes.",
     )
+    parser.add_argument(
+        "--incremental_arb_search",
+        default='False',
+        help="If True, only the curve combos containing curves that changed since the previous block are searched "
+             "for arbitrage; combos known not to have an arbitrage are skipped.",
+    )
+    parser.add_argument(
+        "--full_sweep_interval",
+        default=20,
+        help="With incremental_arb_search, the whole market is searched every full_sweep_interval iterations.",
+    )
+    parser.add_argument(
+        "--arb_workers",
+        default=1,
+        help="The number of worker processes the arbitrage finder shards the curve combos across "
+             "(multi_pairwise_all, multi, multi_triangle and b3_two_hop modes). 1 solves them in the main process.",
+    )
+    parser.add_argument(
+        "--warm_start",
+        default='False',
+        help="Set to True to checkpoint the pool data every iteration, and on startup restore it from the last "
+             "checkpoint and only replay the events since then, rather than syncing all pools from the contracts.",
+    )
+    parser.add_argument(
+        "--checkpoint_path",
+        default="checkpoint",
+        help="The directory of the warm start checkpoints (one subdirectory per blockchain).",
+    )
+    parser.add_argument(
+        "--filter_log_addresses",
+        default='False',
+        help="Set to True to fetch the events of all topics in a single eth_getLogs query per block range, filtered on "
+             "the addresses of the static pools for the Uniswap V2/V3 and Solidly forks, rather than one unfiltered "
+             "query per topic.",
+    )
+    parser.add_argument(
+        "--reorg_journal",
+        default='False',
+        help="Set to True to journal the pool updates applied from events and roll them back when their blocks are "
+             "reorged, rather than staying reorg_delay blocks behind the chain head (reorg_delay is set to 0).",
+    )
+    parser.add_argument(
+        "--stream_events",
+        default='False',
+        help="Set to True to stream the events over a websocket subscription and search for arbitrage as soon as a "
+             "block is mined, rather than polling for them every polling_interval. The bot falls back to polling "
+             "while the websocket is disconnected.",
+    )
+    parser.add_argument(
+        "--ws_url",
+        default="",
+        help="The websocket endpoint of stream_events, by default the websocket endpoint of the RPC url.",
+    )
+    parser.add_argument(
+        "--stream_timeout",
+        default=30,
+        help="With stream_events, the number of seconds to wait for a block before polling for it.",
+    )
+    parser.add_argument(
+        "--pipeline",
+        default='False',
+        help="Set to True to search each block for arbitrage (and submit the transaction) in a worker thread, on a "
+             "snapshot of the pools, while the events of the next block are fetched and applied.",
+    )
+    parser.add_argument(
+        "--async_tx",
+        default='False',
+        help="Set to True to track the receipts of the arbitrage transactions in the background rather than wait for "
+             "them, replacing (or cancelling) a pending transaction when a newer opportunity is found.",
+    )
+    parser.add_argument(
+        "--max_arbs_per_block",
+        default=1,
+        help="The number of arbitrage opportunities submitted per block. Above 1, the most profitable opportunities "
+             "which do not share a pool are submitted together, as transactions with sequential nonces.",
+    )
+    parser.add_argument(
+        "--integer_route_math",
+        default='False',
+        help="Set to True to recalculate the trades of the routes with wei-exact integer math (following the rounding "
+             "of the exchange contracts) rather than Decimal math.",
+    )
+    parser.add_argument(
+        "--univ3_tick_data",
+        default='False',
+        help="Set to True to read the initialized ticks around the current tick of the Uniswap v3 pools, so that "
+             "their curves span several liquidity ranges rather than the current tick only.",
+    )
+    parser.add_argument(
+        "--margp_price_cache",
+        default='False',
+        help="Set to True to start the marginal price optimizer (multi_triangle, b3_two_hop and single_triangle modes) "
+             "from the optimal prices of the previous blocks for the same flashloan token and token set, falling back "
+             "to the price estimates if it does not converge.",
+    )
+    parser.add_argument(
+        "--record_replay_path",
+        default=None,
+        help="The directory to record the events and the pool updates of every block into (one subdirectory per "
+             "blockchain), to replay them offline with resources/benchmarks/bench_block_replay.py.",
+    )
 
     # Process the arguments
     args = parser.parse_args()
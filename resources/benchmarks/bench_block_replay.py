@@ -0,0 +1,128 @@
+"""
+Benchmarks the bot end to end by replaying a recorded block corpus offline
+
+Replays a corpus recorded with ``main.py --record_replay_path <dir>`` (in ``<dir>/<blockchain>``)
+with ``BlockReplay``: per block, the events are applied, the recorded pool changes synced,
+the bot initialized, the curves built and ``find_arbitrage`` run for every arb mode. Prints
+the latency of every stage, the throughput and the number of opportunities found, and the
+opportunities that differ from a baseline report saved by an earlier run (e.g. on the
+previous commit).
+
+Without a recorded corpus, ``--synthetic`` records one from the test pool data, with Sync
+events moving the reserves of the Uniswap v2 pools in every block.
+
+Usage (from the repo root)::
+
+    python resources/benchmarks/bench_block_replay.py <corpus> [--arb_modes multi multi_pairwise_all] [--max_blocks 100]
+        [--no_curve_cache] [--incremental_arb_search] [--margp_price_cache] [--save report.json] [--baseline report.json]
+    python resources/benchmarks/bench_block_replay.py <corpus> --synthetic [--blocks 20] ...
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import argparse
+import json
+import logging
+import random
+
+from web3 import AsyncWeb3, Web3
+
+from fastlane_bot.config.network import ConfigNetwork
+from fastlane_bot.events.interfaces.event import Event
+from fastlane_bot.events.replay import BlockReplay, ReplayCorpus, ReplayManager, ReplayRecorder, ReplayReport
+
+POOL_DATA_FN = "fastlane_bot/tests/_data/latest_pool_data_testing.json"
+EXCHANGES = ["carbon_v1", "uniswap_v2", "uniswap_v3"]
+START_BLOCK = 19000000
+WETH = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+
+
+class SyntheticConfig:
+    """the mainnet network configuration, with unconnected web3 instances"""
+
+    network = ConfigNetwork.new(network="ethereum")
+    logger = logging.getLogger(__name__)
+    w3 = Web3()
+    w3_async = AsyncWeb3()
+
+    def __getattr__(self, item):
+        return getattr(self.network, item)
+
+
+def synthetic_corpus(path, blocks, share, seed):
+    """records a corpus in which ``share`` of the Uniswap v2 pools trade in each of ``blocks`` blocks"""
+    synced = lambda v: isinstance(v, (int, float)) and v > 0
+    with open(POOL_DATA_FN, "r") as f:
+        pool_data = [
+            p for p in json.load(f)
+            if p["exchange_name"] == "carbon_v1"
+            or (p["exchange_name"] == "uniswap_v2" and synced(p["tkn0_balance"]))
+            or (p["exchange_name"] == "uniswap_v3" and synced(p["liquidity"]))
+        ]
+    mgr = ReplayManager(
+        web3=Web3(), w3_async=AsyncWeb3(), cfg=SyntheticConfig(), pool_data=pool_data, alchemy_max_block_fetch=20,
+        SUPPORTED_EXCHANGES=list(EXCHANGES), blockchain="ethereum",
+    )
+    for ex in EXCHANGES:
+        mgr.static_pools[f"{ex}_pools"] = {p["address"] for p in pool_data if p["exchange_name"] == ex}
+    corpus = ReplayCorpus(path)
+    recorder = ReplayRecorder(corpus, flashloan_tokens=[WETH], chain_id=1, arb_rewards_ppm=500000)
+    recorder.record(mgr, START_BLOCK, [])
+    rng = random.Random(seed)
+    for block in range(START_BLOCK + 1, START_BLOCK + 1 + blocks):
+        events = []
+        for p in mgr.pool_data.by_exchange("uniswap_v2"):
+            if rng.random() < share:
+                reserve0 = int(p["tkn0_balance"] * rng.uniform(0.99, 1.01))
+                events += [Event(
+                    args=dict(reserve0=reserve0, reserve1=int(p["tkn1_balance"])), event="Sync",
+                    log_index=len(events), transaction_index=0, transaction_hash=None, address=p["address"],
+                    block_hash=None, block_number=block,
+                )]
+        mgr.update_from_events(events)
+        recorder.record(mgr, block, events)
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("corpus")
+    parser.add_argument("--arb_modes", nargs="+", default=["multi"])
+    parser.add_argument("--max_blocks", type=int, default=None)
+    parser.add_argument("--no_curve_cache", action="store_true")
+    parser.add_argument("--incremental_arb_search", action="store_true")
+    parser.add_argument("--margp_price_cache", action="store_true")
+    parser.add_argument("--save", default=None, help="the file to save the report to")
+    parser.add_argument("--baseline", default=None, help="the report to diff the opportunities against")
+    parser.add_argument("--rel_tol", type=float, default=1e-9)
+    parser.add_argument("--synthetic", action="store_true")
+    parser.add_argument("--blocks", type=int, default=20)
+    parser.add_argument("--share", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.getLogger("fastlane_bot.events.replay").setLevel(logging.CRITICAL)
+
+    if args.synthetic:
+        corpus = synthetic_corpus(args.corpus, args.blocks, args.share, args.seed)
+    else:
+        corpus = ReplayCorpus(args.corpus)
+    report = BlockReplay(
+        corpus,
+        arb_modes=args.arb_modes,
+        curve_cache=not args.no_curve_cache,
+        incremental_arb_search=args.incremental_arb_search,
+        margp_price_cache=args.margp_price_cache,
+    ).run(max_blocks=args.max_blocks)
+    print(report.summary())
+    if args.save:
+        report.save(args.save)
+    if args.baseline:
+        lines = report.diff(ReplayReport.load(args.baseline), rel_tol=args.rel_tol)
+        print(f"{len(lines)} differences with {args.baseline}")
+        print("\n".join(lines))
+
+
+if __name__ == "__main__":
+    main()
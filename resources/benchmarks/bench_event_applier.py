@@ -0,0 +1,128 @@
+"""
+Benchmarks the batched event applier against the threaded per-event updates it replaces
+
+Builds an (unconnected) manager over the Uniswap v2/v3 and Sushiswap v2 pools of the test
+pool data, generates Sync and Swap events for those pools, and applies them with
+
+- ``threaded``: ``Parallel(n_jobs, backend="threading")`` over ``mgr.update_from_event``
+  (the previous ``update_pools_from_events``), with the static pools held in lists,
+- ``batched``: ``mgr.update_from_events``, with the static pools held in sets,
+
+and reports events per second for each method.
+
+Usage (from the repo root)::
+
+    python resources/benchmarks/bench_event_applier.py [--events 1 5 20] [--n_jobs -1] [--repeat 3]
+
+where ``--events`` is the number of events per pool.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import argparse
+import copy
+import json
+import logging
+import random
+import time
+
+from joblib import Parallel, delayed
+from web3 import AsyncWeb3, Web3
+
+from fastlane_bot.config import network as network_
+from fastlane_bot.events.interfaces.event import Event
+from fastlane_bot.events.managers.manager import Manager
+
+POOLS_FN = "fastlane_bot/tests/_data/latest_pool_data_testing.json"
+EXCHANGES = ["uniswap_v2", "sushiswap_v2", "uniswap_v3"]
+
+
+class OfflineConfig:
+    """the mainnet network configuration, with unconnected web3 instances"""
+
+    network = network_.ConfigNetwork.new(network="ethereum")
+    logger = logging.getLogger(__name__)
+    w3 = Web3()
+    w3_async = AsyncWeb3()
+
+    def __getattr__(self, item):
+        return getattr(self.network, item)
+
+
+def make_manager(pools, static_pools_type):
+    """returns a manager holding a copy of ``pools``"""
+    mgr = Manager(
+        web3=Web3(),
+        w3_async=AsyncWeb3(),
+        cfg=OfflineConfig(),
+        pool_data=copy.deepcopy(pools),
+        alchemy_max_block_fetch=20,
+        SUPPORTED_EXCHANGES=EXCHANGES,
+    )
+    for ex in EXCHANGES:
+        mgr.static_pools[f"{ex}_pools"] = static_pools_type(p["address"] for p in pools if p["exchange_name"] == ex)
+    return mgr
+
+
+def make_events(pools, events_per_pool):
+    """returns ``events_per_pool`` events for each pool, shuffled"""
+    events = []
+    for n in range(events_per_pool):
+        for i, p in enumerate(pools):
+            if p["exchange_name"] == "uniswap_v3":
+                args = dict(sqrtPriceX96=2**96 + i + n, liquidity=10**18 + i, tick=i, amount0=1, amount1=-1)
+                name = "Swap"
+            else:
+                args = dict(reserve0=10**18 + i + n, reserve1=10**20 + i)
+                name = "Sync"
+            events += [
+                Event(args=args, event=name, log_index=i, transaction_index=0, transaction_hash=None,
+                      address=p["address"], block_hash=None, block_number=19000000 + n)
+            ]
+    random.Random(0).shuffle(events)
+    return events
+
+
+def threaded(mgr, events, n_jobs):
+    Parallel(n_jobs=n_jobs, backend="threading")(delayed(mgr.update_from_event)(event=e) for e in events)
+
+
+def batched(mgr, events, n_jobs):
+    mgr.update_from_events(events)
+
+
+def run(method, pools, events, static_pools_type, n_jobs, repeat):
+    """returns the events per second of ``method`` (best of ``repeat`` runs on fresh managers)"""
+    best = float("inf")
+    for _ in range(repeat):
+        mgr = make_manager(pools, static_pools_type)
+        start = time.perf_counter()
+        method(mgr, events, n_jobs)
+        best = min(best, time.perf_counter() - start)
+    return len(events) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--events", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--n_jobs", type=int, default=-1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(POOLS_FN, "r") as f:
+        pools = [p for p in json.load(f) if p["exchange_name"] in EXCHANGES]
+    print(f"{'pools':>6} {'events':>7} {'threaded ev/s':>14} {'batched ev/s':>13} {'speedup':>8}")
+    for events_per_pool in args.events:
+        events = make_events(pools, events_per_pool)
+        eps_threaded = run(threaded, pools, events, list, args.n_jobs, args.repeat)
+        eps_batched = run(batched, pools, events, set, args.n_jobs, args.repeat)
+        print(
+            f"{len(pools):>6} {len(events):>7} {eps_threaded:>14,.0f} {eps_batched:>13,.0f} "
+            f"{eps_batched / eps_threaded:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
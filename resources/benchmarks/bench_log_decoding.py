@@ -0,0 +1,145 @@
+"""
+Benchmarks the precompiled log decoder against the web3 ``process_log`` path it replaces
+
+Re-encodes the recorded mainnet events of the test data (Uniswap/Sushiswap/Pancakeswap/Solidly
+Sync and Swap, Bancor v2/v3/POL and Carbon events) into logs, as returned by ``eth_getLogs``,
+repeats them into a corpus of ``--logs`` logs, and decodes the corpus with
+
+- ``process_log``: ``ContractEvent.process_log``, ``complex_handler`` and ``Event.from_dict``
+  (the previous ``Subscription.parse_log``),
+- ``decoder``: ``LogDecoder.decode``,
+
+checks that both produce the same events, and reports logs per second for each method.
+
+Usage (from the repo root)::
+
+    python resources/benchmarks/bench_log_decoding.py [--logs 1000 10000] [--repeat 3]
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import argparse
+import json
+import random
+import time
+
+from eth_abi import encode
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+from web3 import AsyncWeb3
+from web3.datastructures import AttributeDict
+
+from fastlane_bot.data.abi import (
+    BANCOR_POL_ABI,
+    BANCOR_V2_CONVERTER_ABI,
+    BANCOR_V3_POOL_COLLECTION_ABI,
+    CARBON_CONTROLLER_ABI,
+    PANCAKESWAP_V3_POOL_ABI,
+    SOLIDLY_V2_POOL_ABI,
+    UNISWAP_V2_POOL_ABI,
+    UNISWAP_V3_POOL_ABI,
+)
+from fastlane_bot.events.interfaces.event import Event
+from fastlane_bot.events.interfaces.log_decoder import LogDecoder, _abi_type
+from fastlane_bot.events.utils import complex_handler
+
+EVENTS_FN = "fastlane_bot/tests/_data/event_test_data.json"
+ABIS = {
+    "uniswap_v2": UNISWAP_V2_POOL_ABI,
+    "sushiswap_v2": UNISWAP_V2_POOL_ABI,
+    "pancakeswap_v2": UNISWAP_V2_POOL_ABI,
+    "solidly_v2": SOLIDLY_V2_POOL_ABI,
+    "uniswap_v3": UNISWAP_V3_POOL_ABI,
+    "pancakeswap_v3": PANCAKESWAP_V3_POOL_ABI,
+    "bancor_v2": BANCOR_V2_CONVERTER_ABI,
+    "bancor_v3": BANCOR_V3_POOL_COLLECTION_ABI,
+    "bancor_pol": BANCOR_POL_ABI,
+    "carbon_v1": CARBON_CONTROLLER_ABI,
+}
+
+
+def encode_value(abi_input, value):
+    """returns ``value`` (as recorded, or None if not recorded) in the form ``eth_abi`` encodes for ``abi_input``"""
+    if value is None:
+        abi_type = abi_input["type"]
+        return b"\x00" * 32 if abi_type.startswith("bytes") else "0x" + "00" * 20 if abi_type == "address" else 0
+    if abi_input["type"] == "tuple":
+        if isinstance(value, dict):
+            value = [value[c["name"]] for c in abi_input["components"]]
+        return tuple(encode_value(c, v) for c, v in zip(abi_input["components"], value))
+    if abi_input["type"] == "address":
+        return value.lower()
+    return value
+
+
+def make_corpus(n_logs):
+    """returns ``n_logs`` (contract event, decoder, log) tuples, the logs re-encoded from the recorded events"""
+    with open(EVENTS_FN, "r") as f:
+        recorded = json.load(f)
+    logs = []
+    for key, data in recorded.items():
+        abi = ABIS[next(ex for ex in ABIS if key.startswith(ex))]
+        contract_event = getattr(AsyncWeb3().eth.contract(abi=abi).events, data["event"])
+        event_abi = contract_event().abi
+        topics = [HexBytes(event_abi_to_log_topic(event_abi))]
+        data_types, data_values = [], []
+        for abi_input in event_abi["inputs"]:
+            value = encode_value(abi_input, data["args"].get(abi_input["name"]))
+            if abi_input["indexed"]:
+                topics.append(HexBytes(encode([_abi_type(abi_input)], [value])))
+            else:
+                data_types.append(_abi_type(abi_input))
+                data_values.append(value)
+        log = AttributeDict(dict(
+            address=data.get("address", "0x" + "00" * 20),
+            topics=topics,
+            data=HexBytes(encode(data_types, data_values)),
+            blockNumber=data.get("blockNumber", 0),
+            blockHash=HexBytes(data.get("blockHash", "0x" + "00" * 32)),
+            transactionHash=HexBytes(data.get("transactionHash", "0x" + "00" * 32)),
+            transactionIndex=data.get("transactionIndex", 0),
+            logIndex=data.get("logIndex", 0),
+        ))
+        logs.append((contract_event, LogDecoder(event_abi), log))
+    corpus = [logs[i % len(logs)] for i in range(n_logs)]
+    random.Random(0).shuffle(corpus)
+    return corpus
+
+
+def process_log(corpus):
+    return [Event.from_dict(complex_handler(contract_event().process_log(log))) for contract_event, _, log in corpus]
+
+
+def decoder(corpus):
+    return [log_decoder.decode(log) for _, log_decoder, log in corpus]
+
+
+def run(method, corpus, repeat):
+    """returns the logs per second of ``method`` (best of ``repeat`` runs) and its events"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        events = method(corpus)
+        best = min(best, time.perf_counter() - start)
+    return len(corpus) / best, events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--logs", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'logs':>7} {'process_log logs/s':>19} {'decoder logs/s':>15} {'speedup':>8}")
+    for n_logs in args.logs:
+        corpus = make_corpus(n_logs)
+        lps_process_log, expected = run(process_log, corpus, args.repeat)
+        lps_decoder, events = run(decoder, corpus, args.repeat)
+        assert events == expected, "the decoder events differ from the process_log events"
+        print(f"{n_logs:>7} {lps_process_log:>19,.0f} {lps_decoder:>15,.0f} {lps_decoder / lps_process_log:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmarks the analytic Jacobian of the MargPOptimizer against the finite difference one
+
+Runs ``MargPOptimizer.optimize`` on sub-markets of the NBTest 002 curve set (the curves
+whose tokens are all among the N most connected tokens) with ``jacobian="fd"`` and
+``jacobian="analytic"`` respectively, and reports Newton iterations per second as well
+as the result difference between the two methods.
+
+Usage (from the repo root)::
+
+    python resources/benchmarks/bench_margp_jacobian.py [--tokens 5 10 20] [--repeat 5]
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import argparse
+import collections as cl
+import time
+
+import pandas as pd
+
+from fastlane_bot.tools.cpc import CPCContainer
+from fastlane_bot.tools.optimizer import MargPOptimizer
+
+CURVES_FN = "fastlane_bot/tests/_data/NBTEST_002_Curves.csv.gz"
+TARGETTKN = "WETH"
+
+
+def submarket(curves, ntokens):
+    """returns the curves whose tokens are both among the ``ntokens`` most connected tokens"""
+    counts = cl.Counter(t for c in curves for t in (c.tknx, c.tkny))
+    tokens = {TARGETTKN} | {t for t, _ in counts.most_common(ntokens - 1)}
+    return CPCContainer([c for c in curves if c.tknx in tokens and c.tkny in tokens])
+
+
+def run(O, jacobian, repeat):
+    """returns (result, iterations, seconds) aggregated over ``repeat`` runs"""
+    iterations, seconds = 0, 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        r = O.optimize(TARGETTKN, params=dict(jacobian=jacobian))
+        seconds += time.perf_counter() - start
+        if r.is_error:
+            raise RuntimeError(f"optimization failed [{jacobian}]: {r.errormsg}")
+        iterations += r.n_iterations + 1
+    return r.result, iterations, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tokens", type=int, nargs="+", default=[5, 10, 20, 40])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    curves = CPCContainer.from_df(pd.read_csv(CURVES_FN))
+    print(f"{'tokens':>6} {'curves':>6} {'fd it/s':>10} {'an it/s':>10} {'speedup':>8} {'result diff':>12}")
+    for ntokens in args.tokens:
+        C = submarket(curves, ntokens)
+        O = MargPOptimizer(C)
+        try:
+            r_fd, it_fd, s_fd = run(O, O.JAC_FD, args.repeat)
+            r_an, it_an, s_an = run(O, O.JAC_ANALYTIC, args.repeat)
+        except RuntimeError as e:
+            print(f"{ntokens:>6} {len(C):>6} {e}")
+            continue
+        ips_fd, ips_an = it_fd / s_fd, it_an / s_an
+        print(
+            f"{len(C.tokens()):>6} {len(C):>6} {ips_fd:>10,.1f} {ips_an:>10,.1f}"
+            f" {ips_an / ips_fd:>7,.1f}x {abs(r_an - r_fd):>12.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
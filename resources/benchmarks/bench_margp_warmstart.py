@@ -0,0 +1,94 @@
+"""
+Benchmarks the MargPOptimizer warm started from the prices of the previous block
+
+Simulates a range of blocks on sub-markets of the NBTest 002 curve set (the curves whose
+tokens are all among the N most connected tokens): in every block a random share of the
+curves trades a small random amount. Every block is optimized cold (from the price
+estimates) and warm (with a ``PriceCache`` shared across the blocks), and the script reports
+the iterations and time per optimization of either, the number of fallbacks to the cold start,
+and the largest result difference between the two.
+
+Usage (from the repo root)::
+
+    python resources/benchmarks/bench_margp_warmstart.py [--tokens 5 10 20] [--blocks 50] [--share 0.05] [--trade 0.005]
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import argparse
+import collections as cl
+import random
+import time
+
+import pandas as pd
+
+from fastlane_bot.tools.cpc import CPCContainer
+from fastlane_bot.tools.optimizer import MargPOptimizer, PriceCache
+
+CURVES_FN = "fastlane_bot/tests/_data/NBTEST_002_Curves.csv.gz"
+TARGETTKN = "WETH"
+
+
+def submarket(curves, ntokens):
+    """returns the curves whose tokens are both among the ``ntokens`` most connected tokens"""
+    counts = cl.Counter(t for c in curves for t in (c.tknx, c.tkny))
+    tokens = {TARGETTKN} | {t for t, _ in counts.most_common(ntokens - 1)}
+    return [c for c in curves if c.tknx in tokens and c.tkny in tokens]
+
+
+def next_block(curves, rng, share, trade):
+    """returns the curves after a block in which ``share`` of them traded up to ``trade`` of their x_act"""
+    result = []
+    for c in curves:
+        if rng.random() < share:
+            try:
+                c = c.execute(dx=rng.uniform(-trade, trade) * c.x_act)
+            except (ValueError, AssertionError):
+                pass
+        result += [c]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tokens", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--blocks", type=int, default=50)
+    parser.add_argument("--share", type=float, default=0.05)
+    parser.add_argument("--trade", type=float, default=0.005)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    curves = CPCContainer.from_df(pd.read_csv(CURVES_FN)).curves
+    print(
+        f"{'tokens':>6} {'curves':>6} {'cold it':>8} {'warm it':>8} {'cold ms':>8} {'warm ms':>8}"
+        f" {'fallback':>8} {'result diff':>12}"
+    )
+    for ntokens in args.tokens:
+        rng = random.Random(args.seed)
+        block = submarket(curves, ntokens)
+        pcache = PriceCache()
+        n_cold, iter_cold, time_cold, maxdiff = 0, 0, 0, 0
+        for _ in range(args.blocks):
+            block = next_block(block, rng, args.share, args.trade)
+            O = MargPOptimizer(CPCContainer(block))
+            start = time.perf_counter()
+            r_cold = O.optimize(TARGETTKN)
+            time_cold += time.perf_counter() - start
+            r_warm = O.optimize(TARGETTKN, params=dict(pcache=pcache))
+            if r_cold.is_error or r_warm.is_error:
+                continue
+            n_cold += 1
+            iter_cold += r_cold.n_iterations + 1
+            maxdiff = max(maxdiff, abs(r_warm.result - r_cold.result) / max(1, abs(r_cold.result)))
+        stats = pcache.stats
+        print(
+            f"{ntokens:>6} {len(block):>6} {iter_cold / n_cold:>8.2f} {stats['avg_iter_warm']:>8.2f}"
+            f" {1000 * time_cold / args.blocks:>8.2f} {1000 * stats['time_warm'] / max(1, stats['n_warm']):>8.2f}"
+            f" {stats['n_fallback']:>8} {maxdiff:>12.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmarks the batched PairOptimizer against solving the combos one by one
+
+Builds the pairwise combos of the NBTest 002 curve set (every two curves of the same pair,
+for either target token, replicated ``--copies`` times to emulate larger blocks), solves
+them with ``PairOptimizer.optimize`` in a loop and with ``PairOptimizer.optimize_batch``,
+and reports combos per second as well as the number of results that are not identical.
+
+Usage (from the repo root)::
+
+    python resources/benchmarks/bench_pair_batch.py [--copies 1 4 16] [--repeat 3]
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import argparse
+import itertools
+import time
+
+import pandas as pd
+
+from fastlane_bot.tools.cpc import CPCContainer
+from fastlane_bot.tools.optimizer import PairOptimizer
+
+CURVES_FN = "fastlane_bot/tests/_data/NBTEST_002_Curves.csv.gz"
+
+
+def combos(curves):
+    """returns the (curves, targettkn) combos that the scalar optimizer can solve"""
+    result = []
+    for pair in sorted(curves.pairs()):
+        for combo in itertools.combinations(curves.bypairs(pair).curves, 2):
+            for targettkn in (combo[0].tknx, combo[0].tkny):
+                try:
+                    PairOptimizer(list(combo)).optimize(targettkn)
+                except ZeroDivisionError:
+                    continue
+                result += [(list(combo), targettkn)]
+    return result
+
+
+def run(solve, tasks, repeat):
+    """returns (results, seconds) of the fastest of ``repeat`` runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = solve(tasks)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return results, best
+
+
+def scalar(tasks):
+    return [PairOptimizer(curves).optimize(targettkn) for curves, targettkn in tasks]
+
+
+def batch(tasks):
+    return PairOptimizer.optimize_batch(*zip(*tasks))
+
+
+def same(r1, r2):
+    """True iff the two results are identical"""
+    if r1.is_error or r2.is_error:
+        return r1.is_error == r2.is_error
+    return r1.result == r2.result and r1.p_optimal_t == r2.p_optimal_t and r1.dtokens == r2.dtokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    base = combos(CPCContainer.from_df(pd.read_csv(CURVES_FN)))
+    print(f"{'combos':>7} {'scalar/s':>10} {'batch/s':>10} {'speedup':>8} {'different':>10}")
+    for copies in args.copies:
+        tasks = base * copies
+        r_scalar, s_scalar = run(scalar, tasks, args.repeat)
+        r_batch, s_batch = run(batch, tasks, args.repeat)
+        different = sum(not same(r1, r2) for r1, r2 in zip(r_scalar, r_batch))
+        cps_scalar, cps_batch = len(tasks) / s_scalar, len(tasks) / s_batch
+        print(
+            f"{len(tasks):>7} {cps_scalar:>10,.0f} {cps_batch:>10,.0f}"
+            f" {cps_batch / cps_scalar:>7,.1f}x {different:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
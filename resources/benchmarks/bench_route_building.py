@@ -0,0 +1,139 @@
+"""
+Benchmarks the recalculation of the routes by TxRouteHandler, with Decimal math against integer math
+
+Builds two-hop routes (a round trip through a pool) over the Uniswap v2/v3, Bancor v3 and Carbon
+pools of the test pool data, and times ``TxRouteHandler.calculate_trade_outputs`` with
+
+- ``decimal``: the default ``Decimal`` math,
+- ``integer``: the wei-exact integer math of ``fastlane_bot/helpers/weimath.py`` (``integer_math=True``),
+
+reporting the mean route-building latency for each exchange, and the largest relative difference
+between the outputs of the two methods.
+
+Usage (from the repo root)::
+
+    python resources/benchmarks/bench_route_building.py [--routes 50] [--repeat 5]
+
+where ``--routes`` is the number of routes per exchange.
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import argparse
+import copy
+import json
+import logging
+import random
+import time
+from decimal import Decimal
+
+from web3 import AsyncWeb3, Web3
+
+from fastlane_bot.config import network as network_
+from fastlane_bot.events.interface import QueryInterface
+from fastlane_bot.helpers import TradeInstruction, TxRouteHandler, weimath
+
+POOLS_FN = "fastlane_bot/tests/_data/latest_pool_data_testing.json"
+EXCHANGES = ["uniswap_v2", "uniswap_v3", "bancor_v3", "carbon_v1"]
+NATIVE = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"
+
+
+class OfflineConfig:
+    """the mainnet network configuration, with unconnected web3 instances"""
+
+    network = network_.ConfigNetwork.new(network="ethereum")
+    logger = logging.getLogger(__name__)
+    w3 = Web3()
+    w3_async = AsyncWeb3()
+
+    def __getattr__(self, item):
+        return getattr(self.network, item)
+
+
+def is_valid(value):
+    return value is not None and value == value and float(value) > 0
+
+
+def has_liquidity(pool):
+    if pool["exchange_name"] == "uniswap_v3":
+        return is_valid(pool["liquidity"]) and is_valid(pool["sqrt_price_q96"])
+    if pool["exchange_name"] == "carbon_v1":
+        return all(is_valid(pool[k]) for k in ("y_0", "y_1", "B_0", "B_1"))
+    return is_valid(pool["tkn0_balance"]) and is_valid(pool["tkn1_balance"])
+
+
+def amount_in(pool):
+    """about 0.1% of the liquidity of the pool on the tkn0 side, in tkn0"""
+    if pool["exchange_name"] == "uniswap_v3":
+        amount_wei = int(pool["liquidity"]) * weimath.Q96 // int(pool["sqrt_price_q96"]) // 1000
+    elif pool["exchange_name"] == "carbon_v1":
+        y, z, A, B = (int(pool[k + "_1"] or 0) for k in "yzAB")
+        A, B = weimath.carbon_expand_rate(A), weimath.carbon_expand_rate(B)
+        amount_wei = weimath.carbon_source_by_target(y // 1000, y, z, A, B)
+    else:
+        amount_wei = int(pool["tkn0_balance"]) // 1000
+    return Decimal(amount_wei).scaleb(-int(pool["tkn0_decimals"]))
+
+
+def make_routes(cfg, db, pools, exchange, n):
+    """returns ``n`` round trips (tkn0 -> tkn1 -> tkn0) through pools of ``exchange``"""
+    pools = [
+        p for p in pools
+        if p["exchange_name"] == exchange and NATIVE not in (p["tkn0_address"], p["tkn1_address"]) and has_liquidity(p)
+    ]
+    routes = []
+    for pool in random.Random(0).choices(pools, k=n):
+        tkn0, tkn1 = pool["tkn0_address"], pool["tkn1_address"]
+        cid = f"{pool['cid']}-0" if exchange == "carbon_v1" else pool["cid"]
+        amtin = amount_in(pool)
+        route = []
+        for tknin, tknout in ((tkn0, tkn1), (tkn1, tkn0)):
+            raw_txs = [dict(cid=cid, tknin=tknin, tknout=tknout, amtin=amtin)] if exchange == "carbon_v1" else []
+            route.append(TradeInstruction(
+                ConfigObj=cfg, db=db, cid=cid, tknin=tknin, tknout=tknout, amtin=amtin, amtout=0, raw_txs=raw_txs,
+            ))
+        routes.append(route)
+    return routes
+
+
+def run(routes, integer_math, repeat):
+    """returns the mean latency per route (best of ``repeat`` runs) and the route outputs"""
+    best, outputs = float("inf"), []
+    for _ in range(repeat):
+        elapsed, outputs = 0, []
+        for route in routes:
+            trade_instructions = [copy.copy(trade) for trade in route]
+            handler = TxRouteHandler(trade_instructions, integer_math=integer_math)
+            start = time.perf_counter()
+            outputs.append(handler.calculate_trade_outputs(trade_instructions)[-1]._amtout_wei)
+            elapsed += time.perf_counter() - start
+        best = min(best, elapsed / len(routes))
+    return best, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--routes", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cfg = OfflineConfig()
+    with open(POOLS_FN, "r") as f:
+        pools = json.load(f)
+    db = QueryInterface(state=pools, ConfigObj=cfg, exchanges=list({p["exchange_name"] for p in pools}))
+    print(f"{'exchange':>11} {'decimal us':>11} {'integer us':>11} {'speedup':>8} {'max rel diff':>13}")
+    for exchange in EXCHANGES:
+        routes = make_routes(cfg, db, pools, exchange, args.routes)
+        latency_decimal, out_decimal = run(routes, False, args.repeat)
+        latency_integer, out_integer = run(routes, True, args.repeat)
+        diff = max(abs(a - b) / max(b, 1) for a, b in zip(out_integer, out_decimal))
+        print(
+            f"{exchange:>11} {latency_decimal * 1e6:>11,.0f} {latency_integer * 1e6:>11,.0f} "
+            f"{latency_decimal / latency_integer:>7.1f}x {float(diff):>13.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
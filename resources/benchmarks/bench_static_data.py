@@ -0,0 +1,103 @@
+"""
+Benchmarks the startup time of loading the static pool data
+
+Loads the static pool data and tokens of the given blockchains with
+
+- ``rowwise``: the previous implementation of ``get_static_data`` (a token table lookup per
+  pool and token field, a checksum per address and a keccak per pool in ``iterrows``),
+- ``vectorized``: ``load_static_pool_data`` without cache,
+- ``cached``: ``load_static_pool_data`` from its (warm) on-disk cache,
+
+checks that all methods give the same frames, and reports the time taken by each.
+
+Usage (from the repo root)::
+
+    python resources/benchmarks/bench_static_data.py [--blockchains linea mantle fantom] [--skip_rowwise]
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from web3 import Web3
+
+from fastlane_bot.events.utils import load_static_pool_data, read_csv_file
+
+
+def rowwise(static_pool_data_filepath, tokens_filepath):
+    """the previous implementation of ``get_static_data`` (without the exchange filter)"""
+    static_pool_data = read_csv_file(static_pool_data_filepath)
+    tokens = read_csv_file(tokens_filepath)
+    tokens["address"] = tokens["address"].apply(lambda x: Web3.to_checksum_address(x))
+    tokens = tokens.drop_duplicates(subset=["address"])
+    tokens = tokens.dropna(subset=["decimals", "symbol", "address"])
+    tokens["symbol"] = tokens["symbol"].str.replace(" ", "_").str.replace("/", "_").str.replace("-", "_")
+
+    def correct_tkn(tkn_address, keyname):
+        try:
+            return tokens[tokens["address"] == tkn_address][keyname].values[0]
+        except IndexError:
+            return np.nan
+
+    for tkn in ["tkn0", "tkn1"]:
+        static_pool_data[f"{tkn}_address"] = static_pool_data[f"{tkn}_address"].apply(Web3.to_checksum_address)
+    for keyname in ["decimals", "symbol"]:
+        for tkn in ["tkn0", "tkn1"]:
+            static_pool_data[f"{tkn}_{keyname}"] = static_pool_data[f"{tkn}_address"].apply(
+                lambda x: correct_tkn(x, keyname)
+            )
+    static_pool_data["pair_name"] = static_pool_data["tkn0_address"] + "/" + static_pool_data["tkn1_address"]
+    static_pool_data = static_pool_data.dropna(
+        subset=["pair_name", "exchange_name", "fee", "tkn0_symbol", "tkn1_symbol", "tkn0_decimals", "tkn1_decimals"]
+    )
+    static_pool_data["descr"] = (
+        static_pool_data["exchange_name"] + " " + static_pool_data["pair_name"] + " "
+        + static_pool_data["fee"].astype(str)
+    )
+    static_pool_data["cid"] = [Web3.keccak(text=f"{row['descr']}").hex() for _, row in static_pool_data.iterrows()]
+    static_pool_data = static_pool_data.drop_duplicates(subset=["cid"])
+    static_pool_data.reset_index(drop=True, inplace=True)
+    return static_pool_data, tokens
+
+
+def timed(func, *args, **kwargs):
+    """returns (result, seconds)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--blockchains", nargs="+", default=["linea", "mantle", "fantom"])
+    parser.add_argument("--skip_rowwise", action="store_true", help="skip the (slow) previous implementation")
+    args = parser.parse_args()
+
+    print(f"{'blockchain':>12} {'pools':>6} {'tokens':>7} {'rowwise s':>10} {'vectorized s':>13} {'cached s':>9}")
+    for blockchain in args.blockchains:
+        base_path = os.path.normpath(f"fastlane_bot/data/blockchain_data/{blockchain}/")
+        filepaths = os.path.join(base_path, "static_pool_data.csv"), os.path.join(base_path, "tokens.csv")
+        (pools, tokens), t_vectorized = timed(load_static_pool_data, *filepaths)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            load_static_pool_data(*filepaths, cache_dir=cache_dir)
+            (cached, _), t_cached = timed(load_static_pool_data, *filepaths, cache_dir=cache_dir)
+        pd.testing.assert_frame_equal(cached, pools)
+        t_rowwise = float("nan")
+        if not args.skip_rowwise:
+            (expected, _), t_rowwise = timed(rowwise, *filepaths)
+            pd.testing.assert_frame_equal(pools, expected)
+        print(
+            f"{blockchain:>12} {len(pools):>6} {len(tokens):>7} {t_rowwise:>10.2f} {t_vectorized:>13.2f} "
+            f"{t_cached:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
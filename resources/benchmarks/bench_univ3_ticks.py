@@ -0,0 +1,127 @@
+"""
+Benchmarks the multi-range Uniswap v3 curves against the single tick curves
+
+Gives every Uniswap v3 pool of the test pool data a synthetic set of initialized ticks (``--ticks``
+ticks in the tick bitmap words around the current tick, with random liquidityNet), and sets up
+an arbitrage against a deeper constant product pool of the same pair whose price is off by
+0.5% to 5%. Each arbitrage is solved with the MargPOptimizer and the PairOptimizer, with the
+pool modelled
+
+- ``single``: as a single tick range around the current tick (``Univ3Calculator.cpc_params``),
+- ``multi``: as a piecewise curve over all the liquidity ranges (``Univ3Calculator.range_params``),
+
+reporting the mean solve time and the total profit found for each model (the profit of each pool
+is in units of the virtual quote token liquidity of its current tick, so that pools add up).
+
+Usage (from the repo root)::
+
+    python resources/benchmarks/bench_univ3_ticks.py [--pools 50] [--ticks 40] [--repeat 3]
+
+---
+(c) Copyright Bprotocol foundation 2023-24.
+All rights reserved.
+Licensed under MIT.
+"""
+import argparse
+import json
+import random
+import time
+from math import sqrt
+
+from fastlane_bot.helpers import TickData, Univ3Calculator
+from fastlane_bot.helpers.poolandtokens import FEE_LOOKUP
+from fastlane_bot.tools.cpc import CPCContainer, ConstantProductCurve as CPC
+from fastlane_bot.tools.optimizer import MargPOptimizer, PairOptimizer
+
+POOLS_FN = "fastlane_bot/tests/_data/latest_pool_data_testing.json"
+
+
+def is_valid(value):
+    return value is not None and value == value and float(value) > 0
+
+
+def calculator(pool):
+    """the Univ3Calculator of a pool record"""
+    tkn0, tkn1 = pool["tkn0_address"], pool["tkn1_address"]
+    args = dict(token0=tkn0, token1=tkn1, sqrt_price_q96=pool["sqrt_price_q96"], tick=pool["tick"], liquidity=pool["liquidity"])
+    return Univ3Calculator.from_dict(
+        args, FEE_LOOKUP[float(pool["fee_float"])],
+        tkn0decv=int(pool["tkn0_decimals"]), tkn1decv=int(pool["tkn1_decimals"]),
+    )
+
+
+def synthetic_tick_data(uni3, nticks, rng):
+    """``nticks`` random initialized ticks in the three tick bitmap words around the current tick"""
+    spacing = uni3.ticksize
+    word = (uni3.tick // spacing) >> 8
+    lower, upper = (word - 1) * 256 * spacing, ((word + 1) * 256 + 255) * spacing
+    ticks = sorted(rng.sample(range(lower // spacing, upper // spacing + 1), nticks))
+    nets = [rng.randint(-uni3.liquidity // 4, uni3.liquidity // 4) for _ in ticks]
+    return TickData(lower, upper, tuple((t * spacing, net) for t, net in zip(ticks, nets)))
+
+
+def curves(uni3, tick_data, cid):
+    """the single tick and the multi-range curve of a pool"""
+    single = CPC.from_univ3(**uni3.cpc_params(), cid=cid, descr="single")
+    params, other_params = uni3.range_params(tick_data)
+    ranges = [CPC.from_univ3(**p, cid=cid, descr="multi") for p in other_params]
+    return single, CPC.from_univ3(**params, cid=cid, descr="multi").set_ranges(ranges)
+
+
+def counter_curve(uni3, rng):
+    """a constant product pool 10x deeper than the current tick, whose price is off by 0.5% to 5%"""
+    p = uni3.p * (1 + rng.choice([-1, 1]) * rng.uniform(0.005, 0.05))
+    L = 10 * uni3.L
+    return CPC.from_xy(x=L / sqrt(p), y=L * sqrt(p), pair=uni3.pair, cid="counter", fee=0, descr="counter")
+
+
+def solve(Optimizer, curve, counter, targettkn, repeat):
+    """returns the mean solve time and the profit found"""
+    O = Optimizer(CPCContainer([curve, counter]))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        r = O.optimize(targettkn)
+    elapsed = (time.perf_counter() - start) / repeat
+    return elapsed, -r.result if not r.is_error else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--pools", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(POOLS_FN, "r") as f:
+        pools = [
+            p for p in json.load(f)
+            if p["exchange_name"] == "uniswap_v3" and is_valid(p["liquidity"]) and is_valid(p["sqrt_price_q96"])
+        ]
+    rng = random.Random(0)
+    scenarios = []
+    for pool in rng.sample(pools, min(args.pools, len(pools))):
+        uni3 = calculator(pool)
+        tick_data = synthetic_tick_data(uni3, args.ticks, rng)
+        if uni3.range_params(tick_data)[0]["uniL"] == 0:
+            continue
+        scenarios.append((uni3, *curves(uni3, tick_data, pool["cid"]), counter_curve(uni3, rng)))
+    nranges = sum(1 + len(multi.ranges) for _, _, multi, _ in scenarios) / len(scenarios)
+    print(f"{len(scenarios)} pools, {nranges:.1f} liquidity ranges per pool on average")
+
+    print(f"{'optimizer':>10} {'model':>7} {'solve ms':>9} {'profit':>10}")
+    for Optimizer in (MargPOptimizer, PairOptimizer):
+        results = {}
+        for model in ("single", "multi"):
+            elapsed = profit = 0
+            for uni3, single, multi, counter in scenarios:
+                curve = single if model == "single" else multi
+                t, pr = solve(Optimizer, curve, counter, uni3.tkn1, args.repeat)
+                elapsed += t
+                profit += pr / (uni3.L * sqrt(uni3.p))
+            results[model] = profit
+            print(f"{Optimizer.__name__[:-9]:>10} {model:>7} {elapsed / len(scenarios) * 1e3:>9.2f} {profit:>10.4f}")
+        print(f"{'':>10} {'':>7} {'multi/single profit':>20} {results['multi'] / results['single']:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()